@@ -1,4 +1,4 @@
-from auth.jwt import verify_jwt, JWTClaims
+from auth.jwt import verify_jwt, invalidate_user, JWTClaims
 from auth.middleware import get_current_user, require_role
 
-__all__ = ["verify_jwt", "JWTClaims", "get_current_user", "require_role"]
+__all__ = ["verify_jwt", "invalidate_user", "JWTClaims", "get_current_user", "require_role"]
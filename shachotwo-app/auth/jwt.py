@@ -1,10 +1,27 @@
 """JWT verification for Supabase Auth tokens.
 
-Uses Supabase Admin API (auth.get_user) for token verification
-instead of manual JWT decode, for compatibility with all Supabase versions.
+Two modes (env JWT_VERIFY_MODE):
+- "remote" (default): Supabase Admin API (auth.get_user), compatible with all
+  Supabase versions.
+- "local": verify the signature in-process against the project JWKS
+  (asymmetric keys) or SUPABASE_JWT_SECRET (HS256), and read company_id/role
+  from the app_metadata claim. No network hop per request.
+
+Both modes keep a bounded TTL cache of verified claims keyed by token hash.
+Call invalidate_user() after role changes so stale claims are not served.
 """
+import asyncio
+import hashlib
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+import httpx
+from jose import JWTError, jwt as jose_jwt
 
 from db.supabase import get_service_client
 
@@ -22,6 +39,18 @@ ROLE_LEVEL = {
     "admin": 5,
 }
 
+# キャッシュ設定
+CLAIMS_CACHE_TTL_SEC = int(os.environ.get("JWT_CLAIMS_CACHE_TTL_SEC", "60"))
+CLAIMS_CACHE_MAX_SIZE = int(os.environ.get("JWT_CLAIMS_CACHE_MAX_SIZE", "10000"))
+MFA_CACHE_TTL_SEC = int(os.environ.get("MFA_CACHE_TTL_SEC", "300"))
+JWKS_CACHE_TTL_SEC = int(os.environ.get("JWKS_CACHE_TTL_SEC", "600"))
+# 未知の kid を受けたときの JWKS 再取得の最短間隔（鍵ローテーション対応・DoS 防止）
+JWKS_MIN_REFRESH_INTERVAL_SEC = 30
+# invalidate_user() の記録を保持する期間（Supabase アクセストークンの最大寿命）
+_INVALIDATION_RETENTION_SEC = 3600
+_ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+_AUDIENCE = "authenticated"
+
 
 @dataclass
 class JWTClaims:
@@ -33,24 +62,75 @@ class JWTClaims:
     exp: int = 0
 
 
-async def verify_jwt(token: str) -> JWTClaims:
-    """Verify a Supabase JWT via Admin API and extract claims.
+V = TypeVar("V")
 
-    Raises:
-        ValueError: If token is invalid, expired, or missing required claims.
-    """
-    try:
-        db = get_service_client()
-        res = db.auth.get_user(token)
-        user = res.user
-    except Exception as e:
-        raise ValueError(f"Invalid JWT: {e}")
 
-    if not user:
-        raise ValueError("Invalid JWT: user not found")
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, max_size: int, ttl_sec: float) -> None:
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._data: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V, ttl_sec: float | None = None) -> None:
+        ttl = self.ttl_sec if ttl_sec is None else min(ttl_sec, self.ttl_sec)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate) -> None:
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
 
-    app_metadata = user.app_metadata or {}
+    def __len__(self) -> int:
+        return len(self._data)
 
+
+_claims_cache: TTLCache[JWTClaims] = TTLCache(CLAIMS_CACHE_MAX_SIZE, CLAIMS_CACHE_TTL_SEC)
+# user_id -> MFA 有効状態（None=未設定, True/False）
+mfa_status_cache: TTLCache[bool | None] = TTLCache(CLAIMS_CACHE_MAX_SIZE, MFA_CACHE_TTL_SEC)
+# user_id -> invalidate_user() が呼ばれた時刻。これより前に発行されたトークンは再検証する
+_invalidated_at: dict[str, float] = {}
+
+
+def _verify_mode() -> str:
+    return os.environ.get("JWT_VERIFY_MODE", "remote").lower()
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _build_claims(
+    sub: str, email: str, app_metadata: dict[str, Any], exp: int = 0,
+) -> JWTClaims:
     company_id = app_metadata.get("company_id")
     role = app_metadata.get("role")
 
@@ -63,9 +143,185 @@ async def verify_jwt(token: str) -> JWTClaims:
     if role not in VALID_ROLES:
         raise ValueError(f"Invalid role: {role}")
 
-    return JWTClaims(
+    return JWTClaims(sub=sub, company_id=company_id, role=role, email=email, exp=exp)
+
+
+# ---------------------------------------------------------------------------
+# Local verification (JWKS / shared secret)
+# ---------------------------------------------------------------------------
+
+class JWKSCache:
+    """Caches the project's JWKS and refetches on expiry or unknown kid."""
+
+    def __init__(self, ttl_sec: float = JWKS_CACHE_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+        self._keys: dict[str, dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _url(self) -> str:
+        explicit = os.environ.get("SUPABASE_JWKS_URL", "")
+        if explicit:
+            return explicit
+        base = os.environ.get("SUPABASE_URL", "").rstrip("/")
+        return f"{base}/auth/v1/.well-known/jwks.json" if base else ""
+
+    async def _fetch(self) -> None:
+        url = self._url()
+        if not url:
+            return
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            resp = await client.get(url)
+            resp.raise_for_status()
+            keys = resp.json().get("keys", [])
+        self._keys = {k["kid"]: k for k in keys if k.get("kid")}
+        self._fetched_at = time.time()
+
+    async def get_key(self, kid: str) -> dict[str, Any] | None:
+        age = time.time() - self._fetched_at
+        if kid in self._keys and age < self.ttl_sec:
+            return self._keys[kid]
+        async with self._lock:
+            age = time.time() - self._fetched_at
+            stale = age >= self.ttl_sec
+            unknown_kid = kid not in self._keys and age >= JWKS_MIN_REFRESH_INTERVAL_SEC
+            if stale or unknown_kid:
+                try:
+                    await self._fetch()
+                except Exception as e:
+                    # 取得失敗時は手元の鍵で継続（Auth 障害で全 API を落とさない）
+                    logger.warning(f"JWKS fetch failed: {e}")
+        return self._keys.get(kid)
+
+    def clear(self) -> None:
+        self._keys = {}
+        self._fetched_at = 0.0
+
+
+_jwks_cache = JWKSCache()
+
+
+def _shared_secrets() -> list[str]:
+    """Current secret first, then rotated-out ones (comma separated)."""
+    secrets = [os.environ.get("SUPABASE_JWT_SECRET", "")]
+    secrets += os.environ.get("SUPABASE_JWT_SECRETS_PREVIOUS", "").split(",")
+    return [s.strip() for s in secrets if s.strip()]
+
+
+async def _decode_local(token: str) -> dict[str, Any]:
+    try:
+        header = jose_jwt.get_unverified_header(token)
+    except JWTError as e:
+        raise ValueError(f"Invalid JWT: {e}")
+
+    alg = header.get("alg", "")
+    if alg in _ASYMMETRIC_ALGORITHMS:
+        key = await _jwks_cache.get_key(header.get("kid", ""))
+        if key is None:
+            raise ValueError("Invalid JWT: signing key not found")
+        candidates: list[Any] = [key]
+    elif alg == "HS256":
+        candidates = _shared_secrets()
+        if not candidates:
+            raise ValueError("Invalid JWT: SUPABASE_JWT_SECRET is not configured")
+    else:
+        raise ValueError(f"Invalid JWT: unsupported alg {alg}")
+
+    last_error: Exception | None = None
+    for key in candidates:
+        try:
+            return jose_jwt.decode(token, key, algorithms=[alg], audience=_AUDIENCE)
+        except JWTError as e:
+            last_error = e
+    raise ValueError(f"Invalid JWT: {last_error}")
+
+
+async def _verify_local(token: str) -> JWTClaims | None:
+    """Returns None when the token predates invalidate_user() (needs remote check)."""
+    payload = await _decode_local(token)
+    sub = payload.get("sub", "")
+    invalidated = _invalidated_at.get(sub)
+    if invalidated is not None and payload.get("iat", 0) <= invalidated:
+        return None
+    return _build_claims(
+        sub=sub,
+        email=payload.get("email") or "",
+        app_metadata=payload.get("app_metadata") or {},
+        exp=int(payload.get("exp", 0)),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Remote verification (Supabase Admin API)
+# ---------------------------------------------------------------------------
+
+async def _verify_remote(token: str) -> JWTClaims:
+    try:
+        db = get_service_client()
+        res = await asyncio.to_thread(db.auth.get_user, token)
+        user = res.user
+    except Exception as e:
+        raise ValueError(f"Invalid JWT: {e}")
+
+    if not user:
+        raise ValueError("Invalid JWT: user not found")
+
+    exp = 0
+    try:
+        exp = int(jose_jwt.get_unverified_claims(token).get("exp", 0))
+    except Exception:
+        pass
+
+    return _build_claims(
         sub=user.id,
-        company_id=company_id,
-        role=role,
         email=user.email or "",
+        app_metadata=user.app_metadata or {},
+        exp=exp,
     )
+
+
+async def verify_jwt(token: str) -> JWTClaims:
+    """Verify a Supabase JWT and extract claims.
+
+    Verified claims are cached by token hash until min(TTL, token exp).
+
+    Raises:
+        ValueError: If token is invalid, expired, or missing required claims.
+    """
+    key = _token_hash(token)
+    cached = _claims_cache.get(key)
+    if cached is not None:
+        return cached
+
+    claims: JWTClaims | None = None
+    if _verify_mode() == "local":
+        claims = await _verify_local(token)
+    if claims is None:
+        claims = await _verify_remote(token)
+
+    ttl = CLAIMS_CACHE_TTL_SEC if not claims.exp else claims.exp - time.time()
+    _claims_cache.set(key, claims, ttl)
+    return claims
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop cached claims/MFA status for a user (call after role or MFA changes).
+
+    In local mode, tokens issued before this call are re-checked against the
+    Admin API, so a demoted user cannot keep acting on their old role claim.
+    """
+    now = time.time()
+    _invalidated_at[user_id] = now
+    for uid, ts in list(_invalidated_at.items()):
+        if now - ts > _INVALIDATION_RETENTION_SEC:
+            del _invalidated_at[uid]
+    _claims_cache.discard_where(lambda c: c.sub == user_id)
+    mfa_status_cache.pop(user_id)
+
+
+def clear_auth_caches() -> None:
+    """Reset all auth caches (tests / key rotation)."""
+    _claims_cache.clear()
+    mfa_status_cache.clear()
+    _invalidated_at.clear()
+    _jwks_cache.clear()
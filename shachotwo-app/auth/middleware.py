@@ -4,13 +4,15 @@ import logging
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from auth.jwt import verify_jwt, JWTClaims, ROLE_LEVEL
-from db.supabase import get_service_client
+from auth.jwt import verify_jwt, JWTClaims, ROLE_LEVEL, mfa_status_cache
+from db.supabase import execute, get_service_client
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+_MFA_UNKNOWN = object()
+
 
 async def _check_admin_mfa(user_id: str) -> None:
     """admin ロールの MFA 有効チェック。
@@ -21,22 +23,28 @@ async def _check_admin_mfa(user_id: str) -> None:
     - is_enabled = False（一度有効化後に無効化）→ 403
 
     エラー時（DB 接続失敗等）はフェイルオープン（ロックアウト防止）。
+    判定結果は MFA_CACHE_TTL_SEC だけキャッシュし、MFA 設定変更時は
+    auth.jwt.invalidate_user() で破棄する。
     """
     try:
-        db = get_service_client()
-        result = (
-            db.table("mfa_settings")
-            .select("is_enabled")
-            .eq("user_id", user_id)
-            .maybe_single()
-            .execute()
-        )
+        is_enabled = mfa_status_cache.get(user_id, _MFA_UNKNOWN)
+        if is_enabled is _MFA_UNKNOWN:
+            db = get_service_client()
+            result = await execute(
+                db.table("mfa_settings")
+                .select("is_enabled")
+                .eq("user_id", user_id)
+                .maybe_single()
+            )
+            data = result.data if result is not None else None
+            is_enabled = data.get("is_enabled") if data is not None else None
+            mfa_status_cache.set(user_id, is_enabled)
         # レコードなし＝未設定 → 猶予あり（ログインは通す）
-        if result.data is None:
+        if is_enabled is None:
             logger.warning(f"admin user {str(user_id)[:8]} has not set up MFA yet")
             return
         # 一度設定して明示的に無効化した場合のみブロック
-        if result.data.get("is_enabled") is False:
+        if is_enabled is False:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
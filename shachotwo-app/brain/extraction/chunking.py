@@ -0,0 +1,122 @@
+"""Structure-aware text chunking for large-document extraction.
+
+大きな文書を LLM 1 回分に収まるチャンクへ分割する。境界の優先順位:
+1. ページ / シート区切り（フォームフィード ``\\f``。brain/ingestion/file.py が挿入）
+2. 見出し行（Markdown ``#``、``第N章``、``1.`` / ``1-1`` 形式、``【…】``）
+3. 空行（段落）
+4. 改行（CSV / Excel の行）
+5. 上記で収まらない場合のみ文字数で強制分割
+
+隣接チャンクは末尾 ``overlap_chars`` 文字（行境界に揃える）を重ねて、
+境界をまたぐルールや条件が片方のチャンクで途切れないようにする。
+"""
+import re
+from dataclasses import dataclass
+
+PAGE_BREAK = "\f"
+
+_HEADING_RE = re.compile(
+    r"^(?:#{1,6}\s+\S"                       # Markdown 見出し
+    r"|第[0-9０-９一二三四五六七八九十百]+[章節条項]"  # 第1章 / 第三条
+    r"|[0-9０-９]+(?:[.\-．][0-9０-９]+)*[.．)]?\s+\S"  # 1. / 1-1 / 2.3
+    r"|【[^】]+】)"                            # 【見出し】
+)
+
+
+@dataclass
+class TextChunk:
+    """One unit of text sent to the LLM."""
+    index: int
+    text: str
+    start: int  # 元テキスト上の開始位置（オーバーラップ部分を除く）
+    end: int
+
+
+def split_text(text: str, max_chars: int, overlap_chars: int = 0) -> list[TextChunk]:
+    """Split text into chunks of at most ``max_chars`` (+ overlap) on structural boundaries."""
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    overlap_chars = max(0, min(overlap_chars, max_chars // 2))
+    if len(text) <= max_chars:
+        return [TextChunk(index=0, text=text, start=0, end=len(text))]
+
+    spans = _pack(_segments(text, 0, len(text), 0, max_chars), max_chars)
+    chunks: list[TextChunk] = []
+    for start, end in spans:
+        body = text[start:end].strip(PAGE_BREAK)
+        if not body.strip():
+            continue
+        prefix = _overlap_tail(text, start, overlap_chars) if chunks else ""
+        chunks.append(TextChunk(
+            index=len(chunks),
+            text=(prefix + body).replace(PAGE_BREAK, "\n"),
+            start=start,
+            end=end,
+        ))
+    return chunks
+
+
+def _segments(text: str, start: int, end: int, level: int, max_chars: int) -> list[tuple[int, int]]:
+    """Recursively split [start, end) until every segment fits in max_chars."""
+    if end - start <= max_chars:
+        return [(start, end)]
+    if level >= len(_SPLITTERS):
+        return [(i, min(i + max_chars, end)) for i in range(start, end, max_chars)]
+
+    cuts = _SPLITTERS[level](text, start, end)
+    if not cuts:
+        return _segments(text, start, end, level + 1, max_chars)
+
+    result: list[tuple[int, int]] = []
+    bounds = [start, *cuts, end]
+    for seg_start, seg_end in zip(bounds, bounds[1:]):
+        if seg_end > seg_start:
+            result.extend(_segments(text, seg_start, seg_end, level + 1, max_chars))
+    return result
+
+
+def _page_cuts(text: str, start: int, end: int) -> list[int]:
+    return [start + m.end() for m in re.finditer(PAGE_BREAK, text[start:end]) if start + m.end() < end]
+
+
+def _heading_cuts(text: str, start: int, end: int) -> list[int]:
+    cuts = []
+    pos = start
+    for line in text[start:end].splitlines(keepends=True):
+        if pos > start and _HEADING_RE.match(line.lstrip()):
+            cuts.append(pos)
+        pos += len(line)
+    return cuts
+
+
+def _paragraph_cuts(text: str, start: int, end: int) -> list[int]:
+    return [start + m.end() for m in re.finditer(r"\n\s*\n", text[start:end]) if start + m.end() < end]
+
+
+def _line_cuts(text: str, start: int, end: int) -> list[int]:
+    return [start + m.end() for m in re.finditer(r"\n", text[start:end]) if start + m.end() < end]
+
+
+_SPLITTERS = (_page_cuts, _heading_cuts, _paragraph_cuts, _line_cuts)
+
+
+def _pack(segments: list[tuple[int, int]], max_chars: int) -> list[tuple[int, int]]:
+    """Greedily merge adjacent segments while the merged span fits in max_chars."""
+    spans: list[tuple[int, int]] = []
+    for seg_start, seg_end in segments:
+        if spans and seg_end - spans[-1][0] <= max_chars:
+            spans[-1] = (spans[-1][0], seg_end)
+        else:
+            spans.append((seg_start, seg_end))
+    return spans
+
+
+def _overlap_tail(text: str, start: int, overlap_chars: int) -> str:
+    """Last ``overlap_chars`` before ``start``, trimmed forward to a line boundary."""
+    if overlap_chars <= 0:
+        return ""
+    tail = text[max(0, start - overlap_chars):start]
+    newline = tail.find("\n")
+    if 0 <= newline < len(tail) - 1:
+        tail = tail[newline + 1:]
+    return tail.replace(PAGE_BREAK, "\n")
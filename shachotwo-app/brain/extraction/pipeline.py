@@ -1,17 +1,43 @@
-"""Text → LLM structured extraction → knowledge_items save pipeline."""
+"""Text → LLM structured extraction → knowledge_items save pipeline.
+
+EXTRACTION_CHUNK_CHARS を超える文書はチャンク抽出に切り替える:
+- 構造境界（ページ・見出し・段落・行）で分割し、隣接チャンクを少し重ねる
+- チャンクごとの LLM 呼び出しを EXTRACTION_MAX_CONCURRENCY 並列で実行
+- 完了したチャンクから順に、正規化タイトル＋埋め込み類似で既出アイテムと統合し一括保存
+- knowledge_sessions.extraction_progress に進捗を書き込む
+"""
+import asyncio
 import json
 import logging
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
 from uuid import UUID
 
+from brain.extraction.chunking import TextChunk, split_text
 from brain.extraction.models import ExtractedItem, ExtractionResult
-from db.supabase import get_service_client
-from llm.client import LLMTask, ModelTier, get_llm_client
+from brain.knowledge.embeddings import content_hash, generate_embeddings
+from db.supabase import execute, get_service_client
+from llm.client import LLMResponse, LLMTask, ModelTier, get_llm_client
 from llm.prompts.extraction import SYSTEM_EXTRACTION
 
 logger = logging.getLogger(__name__)
 
 VALID_ITEM_TYPES = {"rule", "flow", "decision_logic", "fact", "tip"}
 
+# この文字数を超える入力はチャンク抽出（1回の LLM 呼び出しが 30 秒以内に収まる目安）
+EXTRACTION_CHUNK_CHARS = int(os.environ.get("EXTRACTION_CHUNK_CHARS", "6000"))
+EXTRACTION_CHUNK_OVERLAP_CHARS = int(os.environ.get("EXTRACTION_CHUNK_OVERLAP_CHARS", "400"))
+EXTRACTION_MAX_CONCURRENCY = int(os.environ.get("EXTRACTION_MAX_CONCURRENCY", "4"))
+# チャンク抽出の出力上限（1チャンクのアイテム数が多くても JSON が途切れないように）
+_CHUNK_MAX_TOKENS = 4096
+# 埋め込みのコサイン類似度がこれ以上なら同一アイテムとして統合
+DEDUP_SIMILARITY_THRESHOLD = 0.92
+
+_RETRY_INSTRUCTION = "\n\n必ずJSON配列形式で出力してください。マークダウンのコードブロックは不要です。"
+
 
 async def extract_knowledge(
     text: str,
@@ -27,7 +53,13 @@ async def extract_knowledge(
     3. Parse JSON → ExtractedItem list
     4. Insert each item into knowledge_items
     5. Update session status to completed
+
+    Inputs longer than EXTRACTION_CHUNK_CHARS go through the chunked path
+    (see _extract_knowledge_chunked) with the same result shape.
     """
+    if len(text) > EXTRACTION_CHUNK_CHARS:
+        return await _extract_knowledge_chunked(text, company_id, user_id, department, category)
+
     client = get_service_client()
     session_id = await _create_session(client, company_id, user_id, text)
 
@@ -35,43 +67,10 @@ async def extract_knowledge(
         # LLM extraction
         llm = get_llm_client()
         user_prompt = _build_user_prompt(text, department, category)
-        response = await llm.generate(LLMTask(
-            messages=[
-                {"role": "system", "content": SYSTEM_EXTRACTION},
-                {"role": "user", "content": user_prompt},
-            ],
-            tier=ModelTier.FAST,
-            task_type="extraction",
-            company_id=company_id,
-        ))
-
-        # Parse LLM response
-        items = _parse_items(response.content)
-        if items is None:
-            # Retry once with explicit JSON instruction
-            logger.warning("JSON parse failed, retrying with explicit instruction")
-            retry_response = await llm.generate(LLMTask(
-                messages=[
-                    {"role": "system", "content": SYSTEM_EXTRACTION},
-                    {"role": "user", "content": user_prompt + "\n\n必ずJSON配列形式で出力してください。マークダウンのコードブロックは不要です。"},
-                ],
-                tier=ModelTier.FAST,
-                task_type="extraction_retry",
-                company_id=company_id,
-            ))
-            items = _parse_items(retry_response.content)
-            if items is None:
-                raise ValueError(f"Failed to parse LLM response as JSON after retry: {retry_response.content[:200]}")
-            response = retry_response
+        items, response = await _generate_items(llm, user_prompt, company_id)
 
         # Apply overrides
-        for item in items:
-            if department:
-                item.department = department
-            if category:
-                item.category = category
-            if item.item_type not in VALID_ITEM_TYPES:
-                item.item_type = "fact"
+        _apply_overrides(items, department, category)
 
         # Save to DB
         await _save_items(client, company_id, user_id, session_id, items)
@@ -91,6 +90,288 @@ async def extract_knowledge(
         raise
 
 
+async def _generate_items(
+    llm, user_prompt: str, company_id: str, max_tokens: int = 2048,
+) -> tuple[list[ExtractedItem], LLMResponse]:
+    """Call the LLM and parse items, retrying once with an explicit JSON instruction."""
+    response = await llm.generate(LLMTask(
+        messages=[
+            {"role": "system", "content": SYSTEM_EXTRACTION},
+            {"role": "user", "content": user_prompt},
+        ],
+        tier=ModelTier.FAST,
+        task_type="extraction",
+        company_id=company_id,
+        cache=True,  # 同一文書の再抽出は応答を再利用
+        max_tokens=max_tokens,
+    ))
+
+    # Parse LLM response
+    items = _parse_items(response.content)
+    if items is None:
+        # Retry once with explicit JSON instruction
+        logger.warning("JSON parse failed, retrying with explicit instruction")
+        retry_response = await llm.generate(LLMTask(
+            messages=[
+                {"role": "system", "content": SYSTEM_EXTRACTION},
+                {"role": "user", "content": user_prompt + _RETRY_INSTRUCTION},
+            ],
+            tier=ModelTier.FAST,
+            task_type="extraction_retry",
+            company_id=company_id,
+            cache=True,
+            max_tokens=max_tokens,
+        ))
+        items = _parse_items(retry_response.content)
+        if items is None:
+            raise ValueError(f"Failed to parse LLM response as JSON after retry: {retry_response.content[:200]}")
+        response = retry_response
+    return items, response
+
+
+def _apply_overrides(items: list[ExtractedItem], department: str | None, category: str | None) -> None:
+    for item in items:
+        if department:
+            item.department = department
+        if category:
+            item.category = category
+        if item.item_type not in VALID_ITEM_TYPES:
+            item.item_type = "fact"
+
+
+# ---------------------------------------------------------------------------
+# Chunked extraction (large documents)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _MergedItem:
+    """An item accumulated across chunks, with its saved row id once inserted."""
+    item: ExtractedItem
+    embedding: list[float] | None = None
+    row_id: str | None = None
+    dirty: bool = False
+
+
+async def _extract_knowledge_chunked(
+    text: str,
+    company_id: str,
+    user_id: str,
+    department: str | None,
+    category: str | None,
+) -> ExtractionResult:
+    """Extract from a large document chunk by chunk with bounded concurrency.
+
+    Chunks are merged and saved in completion order, so items become visible
+    while later chunks are still running. A chunk that fails after its retry
+    is recorded in the session progress; the run fails only if every chunk fails.
+    """
+    client = get_service_client()
+    session_id = await _create_session(client, company_id, user_id, text)
+    chunks = split_text(text, EXTRACTION_CHUNK_CHARS, EXTRACTION_CHUNK_OVERLAP_CHARS)
+    logger.info(f"Chunked extraction: session={session_id} chars={len(text)} chunks={len(chunks)}")
+
+    llm = get_llm_client()
+    semaphore = asyncio.Semaphore(EXTRACTION_MAX_CONCURRENCY)
+
+    async def run_chunk(chunk: TextChunk) -> tuple[TextChunk, list[ExtractedItem], LLMResponse]:
+        async with semaphore:
+            user_prompt = _build_user_prompt(_chunk_prompt_text(chunk, len(chunks)), department, category)
+            items, response = await _generate_items(llm, user_prompt, company_id, _CHUNK_MAX_TOKENS)
+            return chunk, items, response
+
+    merged: list[_MergedItem] = []
+    by_title: dict[str, _MergedItem] = {}
+    responses: list[tuple[int, str]] = []
+    failed_chunks: list[dict] = []
+    cost_yen = 0.0
+    model_used = ""
+    chunks_done = 0
+
+    tasks = [asyncio.create_task(run_chunk(chunk)) for chunk in chunks]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                chunk, items, response = await next_done
+            except Exception as e:
+                logger.warning(f"Chunk extraction failed for session {session_id}: {e}")
+                failed_chunks.append({"message": str(e)[:200]})
+            else:
+                cost_yen += response.cost_yen
+                model_used = model_used or response.model_used
+                responses.append((chunk.index, response.content))
+                _apply_overrides(items, department, category)
+                await _merge_and_save(
+                    client, company_id, user_id, session_id, items, merged, by_title,
+                )
+            chunks_done += 1
+            await _update_session_progress(client, session_id, {
+                "chunks_total": len(chunks),
+                "chunks_done": chunks_done,
+                "chunks_failed": len(failed_chunks),
+                "items_saved": len(merged),
+            })
+
+        if len(failed_chunks) == len(chunks):
+            raise ValueError(f"All {len(chunks)} chunks failed: {failed_chunks[0]['message']}")
+
+        error = f"{len(failed_chunks)}/{len(chunks)} chunks failed" if failed_chunks else None
+        await _update_session_status(
+            client, session_id, "completed", error, cost_yen=cost_yen, model_used=model_used,
+        )
+        return ExtractionResult(
+            session_id=session_id,
+            items=[m.item for m in merged],
+            raw_llm_response="\n".join(content for _, content in sorted(responses)),
+            model_used=model_used,
+            cost_yen=cost_yen,
+        )
+
+    except Exception as e:
+        for task in tasks:
+            task.cancel()
+        logger.error(f"Extraction failed for session {session_id}: {e}")
+        await _update_session_status(client, session_id, "failed", str(e))
+        raise
+
+
+def _chunk_prompt_text(chunk: TextChunk, total: int) -> str:
+    if total <= 1:
+        return chunk.text
+    return f"（長い文書の一部です: {chunk.index + 1}/{total}）\n\n{chunk.text}"
+
+
+async def _merge_and_save(
+    client,
+    company_id: str,
+    user_id: str,
+    session_id: UUID,
+    items: list[ExtractedItem],
+    merged: list[_MergedItem],
+    by_title: dict[str, _MergedItem],
+) -> None:
+    """Fold one chunk's items into ``merged``; insert new ones, update grown ones."""
+    embeddings = await _embed_items(items)
+    new_entries: list[_MergedItem] = []
+    for item, embedding in zip(items, embeddings):
+        match = by_title.get(_normalize_title(item.title)) or _find_similar(embedding, merged)
+        if match is not None:
+            if _merge_item(match.item, item) and match.row_id is not None:
+                match.dirty = True
+            if match.embedding is None:
+                match.embedding = embedding
+            continue
+        entry = _MergedItem(item=item, embedding=embedding)
+        merged.append(entry)
+        by_title[_normalize_title(item.title)] = entry
+        new_entries.append(entry)
+
+    if new_entries:
+        rows = [
+            _item_row(company_id, user_id, session_id, e.item, e.embedding) for e in new_entries
+        ]
+        result = await execute(client.table("knowledge_items").insert(rows))
+        for entry, row in zip(new_entries, result.data or []):
+            entry.row_id = row.get("id")
+        _invalidate_agent_roles(company_id)
+
+    for entry in merged:
+        if entry.dirty:
+            await execute(
+                client.table("knowledge_items")
+                .update(_item_update(entry.item))
+                .eq("id", entry.row_id)
+            )
+            entry.dirty = False
+
+
+async def _embed_items(items: list[ExtractedItem]) -> list[list[float] | None]:
+    """Batch-embed items for dedup; degrades to title-only dedup on failure."""
+    if not items:
+        return []
+    try:
+        return await generate_embeddings([f"{i.title}\n{i.content}" for i in items])
+    except Exception as e:
+        logger.warning(f"Embedding for extraction dedup failed, using titles only: {e}")
+        return [None] * len(items)
+
+
+def _normalize_title(title: str) -> str:
+    """NFKC + lowercase, with whitespace and punctuation removed."""
+    normalized = unicodedata.normalize("NFKC", title).lower()
+    return re.sub(r"[\s\W_]+", "", normalized)
+
+
+def _find_similar(embedding: list[float] | None, merged: list[_MergedItem]) -> _MergedItem | None:
+    if embedding is None:
+        return None
+    best, best_score = None, DEDUP_SIMILARITY_THRESHOLD
+    for entry in merged:
+        if entry.embedding is None:
+            continue
+        score = _cosine(embedding, entry.embedding)
+        if score >= best_score:
+            best, best_score = entry, score
+    return best
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _merge_item(target: ExtractedItem, other: ExtractedItem) -> bool:
+    """Merge ``other`` into ``target``. Returns True if target changed."""
+    changed = False
+    if other.confidence > target.confidence:
+        target.content = other.content
+        target.item_type = other.item_type
+        target.confidence = other.confidence
+        changed = True
+    for field in ("conditions", "examples", "exceptions"):
+        extra = [v for v in (getattr(other, field) or []) if v not in (getattr(target, field) or [])]
+        if extra:
+            setattr(target, field, (getattr(target, field) or []) + extra)
+            changed = True
+    return changed
+
+
+def _item_row(
+    company_id: str, user_id: str, session_id: UUID, item: ExtractedItem,
+    embedding: list[float] | None = None,
+) -> dict:
+    row = {
+        "company_id": company_id,
+        "session_id": str(session_id),
+        "department": item.department,
+        "category": item.category,
+        "item_type": item.item_type,
+        "title": item.title,
+        "content": item.content,
+        "conditions": item.conditions,
+        "examples": item.examples,
+        "exceptions": item.exceptions,
+        "source_type": "explicit",
+        "source_user_id": user_id,
+        "confidence": item.confidence,
+    }
+    if embedding is not None:
+        row["embedding"] = embedding
+        row["embedding_hash"] = content_hash(item.title, item.content)
+    return row
+
+
+def _item_update(item: ExtractedItem) -> dict:
+    return {
+        "item_type": item.item_type,
+        "content": item.content,
+        "conditions": item.conditions,
+        "examples": item.examples,
+        "exceptions": item.exceptions,
+        "confidence": item.confidence,
+    }
+
+
 def _build_user_prompt(text: str, department: str | None, category: str | None) -> str:
     parts = [f"以下のテキストからナレッジを抽出してください:\n\n{text}"]
     if department:
@@ -138,26 +419,16 @@ async def _create_session(client, company_id: str, user_id: str, text: str) -> U
 async def _save_items(
     client, company_id: str, user_id: str, session_id: UUID, items: list[ExtractedItem]
 ) -> None:
-    rows = [
-        {
-            "company_id": company_id,
-            "session_id": str(session_id),
-            "department": item.department,
-            "category": item.category,
-            "item_type": item.item_type,
-            "title": item.title,
-            "content": item.content,
-            "conditions": item.conditions,
-            "examples": item.examples,
-            "exceptions": item.exceptions,
-            "source_type": "explicit",
-            "source_user_id": user_id,
-            "confidence": item.confidence,
-        }
-        for item in items
-    ]
+    rows = [_item_row(company_id, user_id, session_id, item) for item in items]
     if rows:
         client.table("knowledge_items").insert(rows).execute()
+        _invalidate_agent_roles(company_id)
+
+
+def _invalidate_agent_roles(company_id: str) -> None:
+    """BPOエージェントのロールキャッシュ（注入済みナレッジ）を破棄する。"""
+    from workers.bpo.engine.agent_factory import invalidate_agent_roles
+    invalidate_agent_roles(company_id)
 
 
 async def _update_session_status(
@@ -172,3 +443,14 @@ async def _update_session_status(
     if model_used is not None:
         update["model_used"] = model_used
     client.table("knowledge_sessions").update(update).eq("id", str(session_id)).execute()
+
+
+async def _update_session_progress(client, session_id: UUID, progress: dict) -> None:
+    try:
+        await execute(
+            client.table("knowledge_sessions")
+            .update({"extraction_progress": progress})
+            .eq("id", str(session_id))
+        )
+    except Exception as e:
+        logger.debug(f"Progress update failed for session {session_id}: {e}")
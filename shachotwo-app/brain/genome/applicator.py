@@ -207,6 +207,10 @@ async def apply_template(
     # Batch insert (Supabase handles up to 1000 rows)
     db.table("knowledge_items").insert(all_rows).execute()
 
+    # BPOエージェントのロールキャッシュ（注入済みナレッジ）を破棄
+    from workers.bpo.engine.agent_factory import invalidate_agent_roles
+    invalidate_agent_roles(company_id)
+
     # Store template info
     applied_templates = [template_id]
     if include_common and template_id != COMMON_TEMPLATE_ID:
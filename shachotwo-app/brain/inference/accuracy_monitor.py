@@ -147,6 +147,15 @@ async def get_accuracy_report(
     return sorted(reports, key=lambda r: r.avg_confidence)
 
 
+def _invalidate_hitl_cache() -> None:
+    """このプロセスの TaskRouter が保持する HITL 要件テーブルを破棄する（他プロセスは更新間隔で追従）。"""
+    try:
+        from workers.bpo.manager.pipeline_resolver import invalidate_hitl_requirements
+        invalidate_hitl_requirements()
+    except Exception as e:
+        logger.debug("accuracy_monitor: HITLキャッシュ破棄スキップ: %s", e)
+
+
 async def _demote_pipeline(pipeline_key: str) -> bool:
     """bpo_hitl_requirements テーブルでパイプラインの min_confidence_for_auto を引き上げる。
 
@@ -172,6 +181,7 @@ async def _demote_pipeline(pipeline_key: str) -> bool:
             "min_confidence_for_auto": 0.95,
             "description": f"精度劣化により自動生成: {pipeline_key}",
         }).execute()
+        _invalidate_hitl_cache()
         logger.info(
             "accuracy_monitor: 降格 pipeline=%s 新規エントリ作成 min_confidence_for_auto=0.95",
             pipeline_key,
@@ -201,6 +211,7 @@ async def _demote_pipeline(pipeline_key: str) -> bool:
     db.table("bpo_hitl_requirements").update({
         "min_confidence_for_auto": new_value,
     }).eq("pipeline_key", pipeline_key).execute()
+    _invalidate_hitl_cache()
     logger.info(
         "accuracy_monitor: 降格 pipeline=%s %.4f → %.4f",
         pipeline_key,
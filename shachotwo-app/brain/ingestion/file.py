@@ -9,6 +9,7 @@ import logging
 from uuid import UUID
 
 from brain.extraction import ExtractionResult, extract_knowledge
+from brain.extraction.chunking import PAGE_BREAK
 from db.supabase import get_service_client
 
 logger = logging.getLogger(__name__)
@@ -127,7 +128,8 @@ async def _extract_pdf(content: bytes) -> str:
             text = page.extract_text()
             if text:
                 texts.append(text)
-        return "\n\n".join(texts)
+        # ページ境界はチャンク抽出の分割点になる
+        return f"\n\n{PAGE_BREAK}".join(texts)
     except ImportError:
         raise ValueError(
             "PDF extraction requires pypdf. Install with: pip install pypdf"
@@ -141,19 +143,23 @@ async def _extract_excel(content: bytes, filename: str) -> str:
     try:
         import openpyxl
         wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True)
-        texts = []
+        sheets = []
         for sheet in wb.sheetnames:
             ws = wb[sheet]
             rows = list(ws.iter_rows(values_only=True))
             if not rows:
                 continue
             headers = [str(h) if h else f"列{i}" for i, h in enumerate(rows[0])]
+            texts = []
             for row in rows[1:]:
                 parts = [f"{h}: {v}" for h, v in zip(headers, row) if v is not None]
                 if parts:
                     texts.append("、".join(parts))
+            if texts:
+                sheets.append("\n".join(texts))
         wb.close()
-        return "\n".join(texts)
+        # シート境界はチャンク抽出の分割点になる
+        return f"\n{PAGE_BREAK}".join(sheets)
     except ImportError:
         raise ValueError(
             "Excel extraction requires openpyxl. Install with: pip install openpyxl"
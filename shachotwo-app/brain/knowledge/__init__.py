@@ -1,9 +1,10 @@
-from brain.knowledge.embeddings import generate_embedding, generate_embeddings, update_item_embedding, backfill_embeddings
+from brain.knowledge.embeddings import generate_embedding, generate_embeddings, update_item_embedding, backfill_embeddings, embed_stale_items
 from brain.knowledge.search import vector_search, keyword_search, hybrid_search, SearchResult
 from brain.knowledge.qa import answer_question, QAResult, SourceInfo
 
 __all__ = [
     "generate_embedding", "generate_embeddings", "update_item_embedding", "backfill_embeddings",
+    "embed_stale_items",
     "vector_search", "keyword_search", "hybrid_search", "SearchResult",
     "answer_question", "QAResult", "SourceInfo",
 ]
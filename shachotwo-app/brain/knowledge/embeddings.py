@@ -1,4 +1,14 @@
-"""Gemini embedding generation for knowledge items."""
+"""Gemini embedding generation for knowledge items.
+
+埋め込みの鮮度は knowledge_items.content_hash（タイトル+本文の md5, DB 側で自動計算）と
+embedding_hash（埋め込み生成時の content_hash）で判定する（migration 058）。
+内容が変わっていないアイテムは再埋め込みしない。埋め込みワーカーは両者が異なる行を
+テナント横断でまとめて取得し、1 回の RPC で書き戻す。
+バッチが失敗したら 1 行ずつ処理し直し、それでも失敗した行は record_embedding_failures で
+記録して指数バックオフさせる（migration 065）。1 行の不正データでキュー全体が止まらない。
+"""
+import asyncio
+import hashlib
 import logging
 import os
 from typing import Optional
@@ -6,14 +16,22 @@ from typing import Optional
 from google import genai
 from google.genai import types
 
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 
 logger = logging.getLogger(__name__)
 
 EMBEDDING_MODEL = "gemini-embedding-001"
 DIMENSIONS = 768
+# batchEmbedContents 1 回あたりの上限
+EMBEDDING_BATCH_SIZE = 100
+# 処理対象が無いときのポーリング間隔
+EMBEDDING_WORKER_INTERVAL_SEC = float(os.environ.get("EMBEDDING_WORKER_INTERVAL_SEC", "10"))
+# 失敗した行を再取得するまでの待ち時間（失敗のたびに倍、上限まで）
+EMBEDDING_RETRY_BASE_SEC = int(os.environ.get("EMBEDDING_RETRY_BASE_SEC", "60"))
+EMBEDDING_RETRY_MAX_SEC = int(os.environ.get("EMBEDDING_RETRY_MAX_SEC", "21600"))
 
 _client: Optional[genai.Client] = None
+_worker_task: asyncio.Task | None = None
 
 
 def _ensure_client() -> genai.Client:
@@ -58,10 +76,9 @@ async def generate_embeddings(texts: list[str]) -> list[list[float]]:
     """Batch embedding generation."""
     client = _ensure_client()
     all_embeddings: list[list[float]] = []
-    batch_size = 100
 
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
+    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = texts[i:i + EMBEDDING_BATCH_SIZE]
         result = await client.aio.models.embed_content(
             model=EMBEDDING_MODEL,
             contents=batch,
@@ -75,35 +92,135 @@ async def generate_embeddings(texts: list[str]) -> list[list[float]]:
     return all_embeddings
 
 
+def content_hash(title: str, content: str) -> str:
+    """Same value as knowledge_items.content_hash (md5 of title + newline + content)."""
+    return hashlib.md5(f"{title}\n{content}".encode("utf-8")).hexdigest()
+
+
 async def update_item_embedding(item_id: str, company_id: str) -> None:
-    """Generate and save embedding for a single knowledge_item."""
+    """Generate and save embedding for a single knowledge_item.
+
+    No-op when the item's title and content are unchanged since the last embedding.
+    """
     db = get_service_client()
-    row = db.table("knowledge_items").select("title, content").eq("id", item_id).single().execute()
+    row = await execute(
+        db.table("knowledge_items")
+        .select("title, content, content_hash, embedding_hash")
+        .eq("id", item_id)
+        .eq("company_id", company_id)
+        .single()
+    )
+    if row.data["embedding_hash"] and row.data["embedding_hash"] == row.data["content_hash"]:
+        logger.debug(f"Embedding for item {item_id} is up to date")
+        return
     text = f"{row.data['title']}\n{row.data['content']}"
     embedding = await generate_embedding(text)
-    db.table("knowledge_items").update({"embedding": embedding}).eq("id", item_id).execute()
+    await _write_embeddings(db, [
+        {"id": item_id, "content_hash": row.data["content_hash"], "embedding": embedding},
+    ])
     logger.info(f"Updated embedding for item {item_id}")
 
 
-async def backfill_embeddings(company_id: str, batch_size: int = 50) -> int:
-    """Generate embeddings for items that don't have one yet. Returns count processed."""
+async def embed_stale_items(limit: int = EMBEDDING_BATCH_SIZE, company_id: str | None = None) -> int:
+    """Embed one batch of new/changed items (all tenants unless company_id). Returns rows written.
+
+    If the batch fails, items are retried one by one; items that still fail are recorded
+    via record_embedding_failures and skipped until their backoff expires or content changes.
+    """
     db = get_service_client()
-    result = db.table("knowledge_items") \
-        .select("id, title, content") \
-        .eq("company_id", company_id) \
-        .is_("embedding", "null") \
-        .eq("is_active", True) \
-        .limit(batch_size) \
-        .execute()
-
-    if not result.data:
+    params: dict = {"p_limit": limit}
+    if company_id:
+        params["p_company_id"] = company_id
+    result = await execute(db.rpc("get_stale_embedding_items", params))
+    rows = result.data or []
+    if not rows:
         return 0
 
-    texts = [f"{r['title']}\n{r['content']}" for r in result.data]
-    embeddings = await generate_embeddings(texts)
-
-    for row, emb in zip(result.data, embeddings):
-        db.table("knowledge_items").update({"embedding": emb}).eq("id", row["id"]).execute()
-
-    logger.info(f"Backfilled {len(result.data)} embeddings for company {company_id}")
-    return len(result.data)
+    try:
+        embeddings = await generate_embeddings([f"{r['title']}\n{r['content']}" for r in rows])
+        return await _write_embeddings(db, [
+            {"id": r["id"], "content_hash": r["content_hash"], "embedding": emb}
+            for r, emb in zip(rows, embeddings)
+        ])
+    except Exception as e:
+        logger.warning(f"embedding batch failed ({len(rows)} rows), retrying row by row: {e}")
+
+    written = 0
+    failures: list[dict] = []
+    for r in rows:
+        try:
+            embedding = await generate_embedding(f"{r['title']}\n{r['content']}")
+            written += await _write_embeddings(db, [
+                {"id": r["id"], "content_hash": r["content_hash"], "embedding": embedding},
+            ])
+        except Exception as e:
+            failures.append({"id": r["id"], "content_hash": r["content_hash"], "error": str(e)[:500]})
+    if failures:
+        logger.error(f"embedding failed for {len(failures)} items, backing off: {[f['id'] for f in failures]}")
+        await execute(db.rpc("record_embedding_failures", {
+            "p_rows": failures,
+            "p_base_sec": EMBEDDING_RETRY_BASE_SEC,
+            "p_max_sec": EMBEDDING_RETRY_MAX_SEC,
+        }))
+    return written
+
+
+async def backfill_embeddings(company_id: str, batch_size: int = EMBEDDING_BATCH_SIZE) -> int:
+    """Embed every new/changed item of a tenant. Returns count processed."""
+    total = 0
+    while True:
+        written = await embed_stale_items(batch_size, company_id)
+        total += written
+        # 0件 = 対象なし、または全行が生成中に更新された（次回に回す）
+        if written < batch_size:
+            break
+
+    logger.info(f"Backfilled {total} embeddings for company {company_id}")
+    return total
+
+
+async def _write_embeddings(db, rows: list[dict]) -> int:
+    """Bulk write via set_knowledge_embeddings; rows edited meanwhile are skipped."""
+    result = await execute(db.rpc("set_knowledge_embeddings", {"p_rows": rows}))
+    return result.data if isinstance(result.data, int) else len(rows)
+
+
+async def _embedding_worker_loop() -> None:
+    while True:
+        try:
+            written = await embed_stale_items()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"embedding worker error: {e}")
+            written = 0
+        # 満杯のバッチを書けたら続けて処理し、そうでなければ待つ
+        if written < EMBEDDING_BATCH_SIZE:
+            await asyncio.sleep(EMBEDDING_WORKER_INTERVAL_SEC)
+
+
+async def start_embedding_worker() -> None:
+    """埋め込みワーカーをバックグラウンドタスクとして起動する。
+
+    複数プロセスで動かしても書き戻しは content_hash 一致行のみなので結果は変わらない
+    （API 呼び出しが重複するだけ）。
+    """
+    global _worker_task
+    if _worker_task and not _worker_task.done():
+        logger.warning("embedding worker: already running")
+        return
+    _worker_task = asyncio.create_task(_embedding_worker_loop())
+    logger.info("embedding worker: started")
+
+
+async def stop_embedding_worker() -> None:
+    """埋め込みワーカーを停止する。"""
+    global _worker_task
+    if _worker_task and not _worker_task.done():
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+    _worker_task = None
+    logger.info("embedding worker: stopped")
@@ -1,15 +1,16 @@
 """Q&A engine: search → context → LLM answer generation."""
+import asyncio
 import json
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
 
 from brain.knowledge.search import SearchResult, enhanced_search, hybrid_search
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 from llm.client import LLMTask, ModelTier, get_llm_client
-from llm.prompts.extraction import SYSTEM_QA
+from llm.prompts.extraction import QA_STREAM_META_MARKER, SYSTEM_QA, SYSTEM_QA_STREAM
 
 logger = logging.getLogger(__name__)
 
@@ -49,23 +50,11 @@ async def answer_question(
                              Falseのとき従来の hybrid_search（速度優先）を使用。
     """
     # 1. Search
-    if use_enhanced_search:
-        results = await enhanced_search(question, company_id, department, top_k)
-        search_mode = "enhanced"
-    else:
-        results = await hybrid_search(question, company_id, department, top_k)
-        search_mode = "hybrid"
-
+    results, search_mode = await _search(
+        question, company_id, department, top_k, use_enhanced_search,
+    )
     if not results:
-        return QAResult(
-            answer="関連するナレッジが登録されていません。先にナレッジを入力してください。",
-            confidence=0.0,
-            sources=[],
-            missing_info="ナレッジベースにデータがありません",
-            model_used="none",
-            cost_yen=0.0,
-            search_mode=search_mode,
-        )
+        return _no_results(search_mode)
 
     # 2. Build context
     context = _build_context(results)
@@ -93,16 +82,171 @@ async def answer_question(
     return qa_result
 
 
+async def answer_question_stream(
+    question: str,
+    company_id: str,
+    department: str | None = None,
+    top_k: int = 5,
+    use_enhanced_search: bool = True,
+) -> AsyncIterator[str | QAResult]:
+    """answer_question のストリーミング版。
+
+    回答本文の差分（str）を逐次 yield し、最後に sources / confidence を含む
+    QAResult を 1 件 yield する。LLM には JSON ではなくプレーンテキスト +
+    末尾メタ行（SYSTEM_QA_STREAM）で回答させ、メタ行は本文として流さない。
+
+    Usage:
+        async for item in answer_question_stream(question, company_id):
+            if isinstance(item, QAResult):
+                ...  # 確定結果
+            else:
+                ...  # 本文の差分
+    """
+    results, search_mode = await _search(
+        question, company_id, department, top_k, use_enhanced_search,
+    )
+    if not results:
+        result = _no_results(search_mode)
+        yield result.answer
+        yield result
+        return
+
+    splitter = _AnswerStreamSplitter()
+    response = None
+    llm = get_llm_client()
+    async for chunk in llm.generate_stream(LLMTask(
+        messages=[
+            {"role": "system", "content": SYSTEM_QA_STREAM},
+            {"role": "user", "content": f"## ナレッジベース\n{_build_context(results)}\n\n## 質問\n{question}"},
+        ],
+        tier=ModelTier.FAST,
+        task_type="qa",
+        company_id=company_id,
+    )):
+        if chunk.done:
+            response = chunk.response
+            continue
+        text = splitter.feed(chunk.delta)
+        if text:
+            yield text
+
+    rest, meta = splitter.finish()
+    if rest:
+        yield rest
+
+    _increment_usage_counts(results)
+
+    yield QAResult(
+        answer=splitter.answer,
+        confidence=_calc_confidence(results, meta.get("confidence", 0.5)),
+        sources=[
+            SourceInfo(knowledge_id=r.item_id, title=r.title, relevance=r.similarity)
+            for r in results
+        ],
+        missing_info=meta.get("missing_info"),
+        model_used=response.model_used if response else "unknown",
+        cost_yen=response.cost_yen if response else 0.0,
+        search_mode=search_mode,
+    )
+
+
+async def _search(
+    question: str,
+    company_id: str,
+    department: str | None,
+    top_k: int,
+    use_enhanced_search: bool,
+) -> tuple[list[SearchResult], str]:
+    if use_enhanced_search:
+        return await enhanced_search(question, company_id, department, top_k), "enhanced"
+    return await hybrid_search(question, company_id, department, top_k), "hybrid"
+
+
+def _no_results(search_mode: str) -> QAResult:
+    return QAResult(
+        answer="関連するナレッジが登録されていません。先にナレッジを入力してください。",
+        confidence=0.0,
+        sources=[],
+        missing_info="ナレッジベースにデータがありません",
+        model_used="none",
+        cost_yen=0.0,
+        search_mode=search_mode,
+    )
+
+
+class _AnswerStreamSplitter:
+    """ストリームを回答本文と末尾のメタ行（QA_STREAM_META_MARKER 以降）に分ける。
+
+    マーカーがチャンク境界で分割されても本文として流さないよう、
+    マーカーの接頭辞になり得る末尾だけを次のチャンクまで保留する。
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._emitted: list[str] = []
+        self._meta: Optional[str] = None
+
+    def feed(self, delta: str) -> str:
+        if self._meta is not None:
+            self._meta += delta
+            return ""
+        buf = self._pending + delta
+        idx = buf.find(QA_STREAM_META_MARKER)
+        if idx >= 0:
+            self._meta = buf[idx + len(QA_STREAM_META_MARKER):]
+            self._pending = ""
+            return self._emit(buf[:idx])
+        hold = 0
+        for k in range(min(len(QA_STREAM_META_MARKER) - 1, len(buf)), 0, -1):
+            if QA_STREAM_META_MARKER.startswith(buf[-k:]):
+                hold = k
+                break
+        self._pending = buf[len(buf) - hold:] if hold else ""
+        return self._emit(buf[:len(buf) - hold])
+
+    def finish(self) -> tuple[str, dict]:
+        """保留分と、パース済みメタ情報（パース失敗時は空 dict）を返す。"""
+        rest = self._emit(self._pending)
+        self._pending = ""
+        meta: dict = {}
+        if self._meta:
+            try:
+                parsed = json.loads(self._meta.strip())
+                if isinstance(parsed, dict):
+                    meta = parsed
+            except json.JSONDecodeError as e:
+                logger.warning(f"QA stream meta parse failed: {e}")
+        return rest, meta
+
+    @property
+    def answer(self) -> str:
+        return "".join(self._emitted).strip()
+
+    def _emit(self, text: str) -> str:
+        if text:
+            self._emitted.append(text)
+        return text
+
+
+# 実行中の qa_usage_count 更新（参照を持っておかないとタスクが GC される）
+_usage_count_tasks: set[asyncio.Task] = set()
+
+
 def _increment_usage_counts(results: list[SearchResult]) -> None:
-    """検索で引用されたナレッジの qa_usage_count を非同期でインクリメントする。
-    失敗しても本体の回答には影響しない。
+    """検索で引用されたナレッジの qa_usage_count をバックグラウンドでインクリメントする。
+    回答は待たせず、失敗しても本体の回答には影響しない。
     """
     if not results:
         return
+    task = asyncio.create_task(_write_usage_counts([str(r.item_id) for r in results]))
+    _usage_count_tasks.add(task)
+    task.add_done_callback(_usage_count_tasks.discard)
+
+
+async def _write_usage_counts(item_ids: list[str]) -> None:
     try:
         db = get_service_client()
-        item_ids = [str(r.item_id) for r in results]
-        db.rpc("increment_qa_usage_count", {"item_ids": item_ids}).execute()
+        await execute(db.rpc("increment_qa_usage_count", {"item_ids": item_ids}))
     except Exception as e:
         logger.warning(f"qa_usage_count increment failed (non-critical): {e}")
 
@@ -1,17 +1,43 @@
-"""Vector search + keyword fallback for knowledge items."""
+"""Vector search + keyword fallback for knowledge items.
+
+enhanced_search はステージを並行に走らせる:
+- 元クエリのベクトル検索を HyDE クエリ拡張と同時に開始し、両者を RRF で統合
+- 上位の類似度が十分に決定的なとき・レイテンシ予算を使い切ったときは LLM リランクを省略
+- クエリ埋め込みは正規化クエリ単位でプロセス内キャッシュ
+"""
+import asyncio
 import json
 import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
 from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
 
 from brain.knowledge.embeddings import generate_query_embedding
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 from llm.client import LLMTask, ModelTier, get_llm_client
 
 logger = logging.getLogger(__name__)
 
+# enhanced_search 全体のレイテンシ予算（超過分のステージは省略する）
+SEARCH_LATENCY_BUDGET_MS = int(os.environ.get("KNOWLEDGE_SEARCH_BUDGET_MS", "4000"))
+# リランク省略条件: 1位の類似度がこれ以上、かつ2位との差が RERANK_SKIP_MARGIN 以上
+RERANK_SKIP_SIMILARITY = 0.85
+RERANK_SKIP_MARGIN = 0.1
+# Reciprocal Rank Fusion の定数（一般的な既定値）
+RRF_K = 60
+# enhanced_search でリランク前に取得する候補数
+_CANDIDATE_COUNT = 10
+
+QUERY_EMBEDDING_CACHE_TTL_SEC = 3600
+QUERY_EMBEDDING_CACHE_MAX_SIZE = 1024
+_query_embedding_cache: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+
 # クエリ拡張用プロンプト
 _SYSTEM_QUERY_EXPAND = """あなたは企業ナレッジベースの検索を補助するアシスタントです。
 ユーザーの質問に対して、その質問への回答として含まれうる内容を1〜2文で予測してください。
@@ -44,6 +70,30 @@ class SearchResult(BaseModel):
     similarity: float
 
 
+def _normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+async def embed_query(text: str) -> list[float]:
+    """クエリ埋め込み（正規化クエリ単位で TTL + LRU キャッシュ）。"""
+    key = _normalize_query(text)
+    cached = _query_embedding_cache.get(key)
+    if cached is not None and cached[0] > time.time():
+        _query_embedding_cache.move_to_end(key)
+        return cached[1]
+
+    vector = await generate_query_embedding(text)
+    _query_embedding_cache[key] = (time.time() + QUERY_EMBEDDING_CACHE_TTL_SEC, vector)
+    _query_embedding_cache.move_to_end(key)
+    while len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_MAX_SIZE:
+        _query_embedding_cache.popitem(last=False)
+    return vector
+
+
+def clear_query_embedding_cache() -> None:
+    _query_embedding_cache.clear()
+
+
 async def vector_search(
     query: str,
     company_id: str,
@@ -52,16 +102,16 @@ async def vector_search(
     similarity_threshold: float = 0.5,
 ) -> list[SearchResult]:
     """Search knowledge items using pgvector cosine similarity."""
-    query_embedding = await generate_query_embedding(query)
+    query_embedding = await embed_query(query)
     db = get_service_client()
 
-    result = db.rpc("match_knowledge_items", {
+    result = await execute(db.rpc("match_knowledge_items", {
         "query_embedding": query_embedding,
         "match_company_id": company_id,
         "match_department": department,
         "match_threshold": similarity_threshold,
         "match_count": top_k,
-    }).execute()
+    }))
 
     return [
         SearchResult(
@@ -96,7 +146,7 @@ async def keyword_search(
 
     # Search in title and content
     q = q.or_(f"title.ilike.%{query}%,content.ilike.%{query}%")
-    result = q.limit(top_k).execute()
+    result = await execute(q.limit(top_k))
 
     return [
         SearchResult(
@@ -132,6 +182,7 @@ async def expand_query(query: str, company_id: str) -> str:
             temperature=0.3,
             task_type="query_expand",
             company_id=company_id,
+            cache=True,
         ))
         hypothetical = response.content.strip()
         expanded = f"{query} {hypothetical}"
@@ -177,6 +228,7 @@ async def rerank_results(
             temperature=0.1,
             task_type="rerank",
             company_id=company_id,
+            cache=True,
         ))
 
         text = response.content.strip()
@@ -195,41 +247,107 @@ async def rerank_results(
             if isinstance(item.get("index"), int) and isinstance(item.get("relevance"), (int, float))
         }
 
-        # relevanceスコアで並び替え（スコアなしは0.0）
+        # relevanceスコアで並び替え（スコアなしは0.0。同点は元の順位を維持）
         ranked = sorted(
-            results,
-            key=lambda r: score_map.get(results.index(r), 0.0),
+            enumerate(results),
+            key=lambda pair: score_map.get(pair[0], 0.0),
             reverse=True,
         )
-        return ranked[:top_n]
+        return [r for _, r in ranked[:top_n]]
 
     except Exception as e:
         logger.warning(f"rerank_results failed, returning original results: {e}")
         return results[:top_n]
 
 
+def reciprocal_rank_fusion(
+    rankings: list[list[SearchResult]],
+    k: int = RRF_K,
+) -> list[SearchResult]:
+    """複数のランキングを RRF（Σ 1/(k + rank)）で統合する。
+
+    同じナレッジが複数のランキングに現れた場合は類似度の高い方を残す。
+    """
+    scores: dict[UUID, float] = {}
+    best: dict[UUID, SearchResult] = {}
+    for ranking in rankings:
+        for rank, r in enumerate(ranking, 1):
+            scores[r.item_id] = scores.get(r.item_id, 0.0) + 1.0 / (k + rank)
+            if r.item_id not in best or r.similarity > best[r.item_id].similarity:
+                best[r.item_id] = r
+    ordered = sorted(scores, key=lambda item_id: scores[item_id], reverse=True)
+    return [best[item_id] for item_id in ordered]
+
+
+def _is_decisive(results: list[SearchResult]) -> bool:
+    """上位の類似度だけで順位が明らかか（LLMリランク不要か）。"""
+    if not results:
+        return True
+    top = sorted((r.similarity for r in results), reverse=True)
+    if top[0] < RERANK_SKIP_SIMILARITY:
+        return False
+    return len(top) == 1 or top[0] - top[1] >= RERANK_SKIP_MARGIN
+
+
 async def enhanced_search(
     query: str,
     company_id: str,
     department: str | None = None,
     top_k: int = 5,
+    latency_budget_ms: int | None = None,
 ) -> list[SearchResult]:
-    """精度優先の3段階RAGパイプライン。
+    """精度優先のRAGパイプライン（並行実行 + レイテンシ予算付き）。
 
-    1. クエリ拡張 (HyDE簡易版)
-    2. ベクトル検索 (top_k=10固定)
+    1. クエリ拡張 (HyDE簡易版) と元クエリのベクトル検索を同時に開始
+    2. 拡張クエリでもベクトル検索し、元クエリの結果と RRF で統合
     3. LLMリランキング → top_k に絞る
+       （上位が決定的なとき・予算超過時は省略し、RRF 順で返す）
     """
-    expanded = await expand_query(query, company_id)
-    # リランクのため多めに取得（固定10件）
-    candidates = await vector_search(expanded, company_id, department, top_k=10)
+    budget_sec = (latency_budget_ms or SEARCH_LATENCY_BUDGET_MS) / 1000
+    deadline = time.monotonic() + budget_sec
 
-    if not candidates:
-        # フォールバック: 元クエリでhybrid_search
-        logger.info("enhanced_search: no vector results, falling back to hybrid_search")
-        return await hybrid_search(query, company_id, department, top_k)
+    expand_task = asyncio.create_task(expand_query(query, company_id))
+    try:
+        # リランクのため多めに取得（固定10件）
+        raw_candidates = await vector_search(
+            query, company_id, department, top_k=_CANDIDATE_COUNT,
+        )
+        expanded = await asyncio.wait_for(
+            asyncio.shield(expand_task), timeout=max(0.0, deadline - time.monotonic()),
+        )
+    except asyncio.TimeoutError:
+        # 予算内に拡張が終わらなければ元クエリの結果だけで進める
+        expanded = query
+        logger.info("enhanced_search: query expansion exceeded latency budget, skipped")
+    finally:
+        if not expand_task.done():
+            expand_task.cancel()
+
+    rankings = [raw_candidates]
+    if expanded != query:
+        rankings.append(
+            await vector_search(expanded, company_id, department, top_k=_CANDIDATE_COUNT)
+        )
+    candidates = reciprocal_rank_fusion(rankings)[:_CANDIDATE_COUNT]
 
-    return await rerank_results(query, candidates, company_id, top_n=top_k)
+    if not candidates:
+        # フォールバック: 元クエリでキーワード検索（元クエリのベクトル検索は実施済み）
+        logger.info("enhanced_search: no vector results, falling back to keyword_search")
+        return await keyword_search(query, company_id, department, top_k)
+
+    if _is_decisive(candidates):
+        return candidates[:top_k]
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        logger.info("enhanced_search: latency budget exhausted, rerank skipped")
+        return candidates[:top_k]
+    try:
+        return await asyncio.wait_for(
+            rerank_results(query, candidates, company_id, top_n=top_k), timeout=remaining,
+        )
+    except asyncio.TimeoutError:
+        logger.info("enhanced_search: rerank exceeded latency budget, using RRF order")
+        return candidates[:top_k]
 
 
 async def hybrid_search(
@@ -238,13 +356,18 @@ async def hybrid_search(
     department: str | None = None,
     top_k: int = 5,
 ) -> list[SearchResult]:
-    """Vector search with keyword fallback when results are insufficient."""
-    results = await vector_search(query, company_id, department, top_k)
+    """Vector search with keyword fill-in when results are insufficient.
+
+    キーワード検索はベクトル検索と並行に実行し、不足分の補完にだけ使う。
+    """
+    # ベクトル検索が n 件なら、キーワード側は重複しうる n 件 + 不足 top_k - n 件 = top_k 件あれば足りる
+    results, kw_results = await asyncio.gather(
+        vector_search(query, company_id, department, top_k),
+        keyword_search(query, company_id, department, top_k),
+    )
 
     if len(results) < top_k:
-        remaining = top_k - len(results)
         existing_ids = {r.item_id for r in results}
-        kw_results = await keyword_search(query, company_id, department, remaining + 5)
         for r in kw_results:
             if r.item_id not in existing_ids and len(results) < top_k:
                 results.append(r)
@@ -1,3 +1,15 @@
-from db.supabase import get_client, service_client, with_company_context
+from db.supabase import (
+    execute,
+    get_async_service_client,
+    get_client,
+    service_client,
+    with_company_context,
+)
 
-__all__ = ["get_client", "service_client", "with_company_context"]
+__all__ = [
+    "execute",
+    "get_async_service_client",
+    "get_client",
+    "service_client",
+    "with_company_context",
+]
@@ -19,7 +19,7 @@ from datetime import date, datetime, timezone
 from typing import Any, Optional
 from uuid import uuid4
 
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 
 logger = logging.getLogger(__name__)
 
@@ -59,20 +59,19 @@ async def create_lead(company_id: str, data: dict[str, Any]) -> dict[str, Any]:
         "version": 1,
         **data,
     }
-    result = _db().table("leads").insert(row).execute()
+    result = await execute(_db().table("leads").insert(row))
     return result.data[0]
 
 
 async def get_lead(company_id: str, lead_id: str) -> dict[str, Any] | None:
     """leads テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("leads")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", lead_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -131,7 +130,7 @@ async def list_leads(
         q = q.lte("annual_revenue", max_revenue)
 
     q = q.order(sort_by, desc=sort_desc).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -160,7 +159,7 @@ async def update_lead(
         q = q.eq("version", expected_version)
         update_data["version"] = expected_version + 1
 
-    result = q.execute()
+    result = await execute(q)
     if not result.data:
         return None
     return result.data[0]
@@ -178,7 +177,7 @@ async def create_activity(company_id: str, data: dict[str, Any]) -> dict[str, An
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("lead_activities").insert(row).execute()
+    result = await execute(_db().table("lead_activities").insert(row))
     return result.data[0]
 
 
@@ -190,7 +189,7 @@ async def list_activities_by_lead(
     offset: int = 0,
 ) -> list[dict[str, Any]]:
     """lead_activities テーブルからリード別に取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("lead_activities")
         .select("*")
@@ -198,7 +197,6 @@ async def list_activities_by_lead(
         .eq("lead_id", lead_id)
         .order("created_at", desc=True)
         .range(offset, offset + limit - 1)
-        .execute()
     )
     return result.data
 
@@ -224,20 +222,19 @@ async def create_opportunity(company_id: str, data: dict[str, Any]) -> dict[str,
     if monthly and "annual_amount" not in row:
         row["annual_amount"] = monthly * 12
 
-    result = _db().table("opportunities").insert(row).execute()
+    result = await execute(_db().table("opportunities").insert(row))
     return result.data[0]
 
 
 async def get_opportunity(company_id: str, opp_id: str) -> dict[str, Any] | None:
     """opportunities テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("opportunities")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", opp_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -260,7 +257,7 @@ async def list_opportunities(
         q = q.eq("stage", stage)
 
     q = q.order("updated_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -292,7 +289,7 @@ async def update_opportunity(
         q = q.eq("version", expected_version)
         update_data["version"] = expected_version + 1
 
-    result = q.execute()
+    result = await execute(q)
     if not result.data:
         return None
     return result.data[0]
@@ -314,20 +311,19 @@ async def create_proposal(company_id: str, data: dict[str, Any]) -> dict[str, An
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("proposals").insert(row).execute()
+    result = await execute(_db().table("proposals").insert(row))
     return result.data[0]
 
 
 async def get_proposal(company_id: str, proposal_id: str) -> dict[str, Any] | None:
     """proposals テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("proposals")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", proposal_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -350,7 +346,7 @@ async def list_proposals(
         q = q.eq("opportunity_id", opportunity_id)
 
     q = q.order("created_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -361,13 +357,12 @@ async def update_proposal(
 ) -> dict[str, Any] | None:
     """proposals テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("proposals")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", proposal_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -388,20 +383,19 @@ async def create_quotation(company_id: str, data: dict[str, Any]) -> dict[str, A
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("quotations").insert(row).execute()
+    result = await execute(_db().table("quotations").insert(row))
     return result.data[0]
 
 
 async def get_quotation(company_id: str, quotation_id: str) -> dict[str, Any] | None:
     """quotations テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("quotations")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", quotation_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -413,13 +407,12 @@ async def update_quotation(
 ) -> dict[str, Any] | None:
     """quotations テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("quotations")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", quotation_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -440,20 +433,19 @@ async def create_contract(company_id: str, data: dict[str, Any]) -> dict[str, An
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("contracts").insert(row).execute()
+    result = await execute(_db().table("contracts").insert(row))
     return result.data[0]
 
 
 async def get_contract(company_id: str, contract_id: str) -> dict[str, Any] | None:
     """contracts テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("contracts")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", contract_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -465,13 +457,12 @@ async def update_contract(
 ) -> dict[str, Any] | None:
     """contracts テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("contracts")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", contract_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -493,20 +484,19 @@ async def create_customer(company_id: str, data: dict[str, Any]) -> dict[str, An
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("customers").insert(row).execute()
+    result = await execute(_db().table("customers").insert(row))
     return result.data[0]
 
 
 async def get_customer(company_id: str, customer_id: str) -> dict[str, Any] | None:
     """customers テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("customers")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", customer_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -529,7 +519,7 @@ async def list_customers(
         q = q.eq("status", status)
 
     q = q.order("created_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -540,13 +530,12 @@ async def update_customer(
 ) -> dict[str, Any] | None:
     """customers テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("customers")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", customer_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -565,7 +554,7 @@ async def create_health_record(company_id: str, data: dict[str, Any]) -> dict[st
         "recorded_at": _now_iso(),
         **data,
     }
-    result = _db().table("customer_health").insert(row).execute()
+    result = await execute(_db().table("customer_health").insert(row))
     return result.data[0]
 
 
@@ -577,7 +566,7 @@ async def list_health_by_customer(
     offset: int = 0,
 ) -> list[dict[str, Any]]:
     """customer_health テーブルから顧客別に取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("customer_health")
         .select("*")
@@ -585,7 +574,6 @@ async def list_health_by_customer(
         .eq("customer_id", customer_id)
         .order("recorded_at", desc=True)
         .range(offset, offset + limit - 1)
-        .execute()
     )
     return result.data
 
@@ -602,7 +590,7 @@ async def create_revenue(company_id: str, data: dict[str, Any]) -> dict[str, Any
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("revenue_records").insert(row).execute()
+    result = await execute(_db().table("revenue_records").insert(row))
     return result.data[0]
 
 
@@ -630,7 +618,7 @@ async def list_revenue_by_period(
         q = q.eq("customer_id", customer_id)
 
     q = q.order("period", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -649,7 +637,7 @@ async def create_request(company_id: str, data: dict[str, Any]) -> dict[str, Any
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("feature_requests").insert(row).execute()
+    result = await execute(_db().table("feature_requests").insert(row))
     return result.data[0]
 
 
@@ -671,7 +659,7 @@ async def list_requests(
         q = q.eq("status", status)
 
     q = q.order("votes", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -682,13 +670,12 @@ async def update_request(
 ) -> dict[str, Any] | None:
     """feature_requests テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("feature_requests")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", request_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -710,20 +697,19 @@ async def create_ticket(company_id: str, data: dict[str, Any]) -> dict[str, Any]
         "updated_at": _now_iso(),
         **data,
     }
-    result = _db().table("support_tickets").insert(row).execute()
+    result = await execute(_db().table("support_tickets").insert(row))
     return result.data[0]
 
 
 async def get_ticket(company_id: str, ticket_id: str) -> dict[str, Any] | None:
     """support_tickets テーブルから 1 件取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("support_tickets")
         .select("*")
         .eq("company_id", company_id)
         .eq("id", ticket_id)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -749,7 +735,7 @@ async def list_tickets(
         q = q.eq("customer_id", customer_id)
 
     q = q.order("created_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -760,13 +746,12 @@ async def update_ticket(
 ) -> dict[str, Any] | None:
     """support_tickets テーブルを更新する。"""
     update_data = {**_strip_none(data), "updated_at": _now_iso()}
-    result = (
+    result = await execute(
         _db()
         .table("support_tickets")
         .update(update_data)
         .eq("company_id", company_id)
         .eq("id", ticket_id)
-        .execute()
     )
     if not result.data:
         return None
@@ -785,7 +770,7 @@ async def create_message(company_id: str, data: dict[str, Any]) -> dict[str, Any
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("ticket_messages").insert(row).execute()
+    result = await execute(_db().table("ticket_messages").insert(row))
     return result.data[0]
 
 
@@ -797,7 +782,7 @@ async def list_messages_by_ticket(
     offset: int = 0,
 ) -> list[dict[str, Any]]:
     """ticket_messages テーブルからチケット別に取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("ticket_messages")
         .select("*")
@@ -805,7 +790,6 @@ async def list_messages_by_ticket(
         .eq("ticket_id", ticket_id)
         .order("created_at", desc=False)
         .range(offset, offset + limit - 1)
-        .execute()
     )
     return result.data
 
@@ -822,7 +806,7 @@ async def create_pattern(company_id: str, data: dict[str, Any]) -> dict[str, Any
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("win_loss_patterns").insert(row).execute()
+    result = await execute(_db().table("win_loss_patterns").insert(row))
     return result.data[0]
 
 
@@ -844,7 +828,7 @@ async def list_patterns(
         q = q.eq("outcome", outcome)
 
     q = q.order("created_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -860,7 +844,7 @@ async def create_performance(company_id: str, data: dict[str, Any]) -> dict[str,
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("outreach_performance").insert(row).execute()
+    result = await execute(_db().table("outreach_performance").insert(row))
     return result.data[0]
 
 
@@ -891,7 +875,7 @@ async def list_performance(
         q = q.eq("email_variant", email_variant)
 
     q = q.order("period", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -907,7 +891,7 @@ async def create_feedback(company_id: str, data: dict[str, Any]) -> dict[str, An
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("cs_feedback").insert(row).execute()
+    result = await execute(_db().table("cs_feedback").insert(row))
     return result.data[0]
 
 
@@ -932,7 +916,7 @@ async def list_feedback(
         q = q.eq("feedback_type", feedback_type)
 
     q = q.order("created_at", desc=True).range(offset, offset + limit - 1)
-    result = q.execute()
+    result = await execute(q)
     return result.data, result.count or 0
 
 
@@ -942,7 +926,7 @@ async def list_feedback(
 
 async def get_active_model(company_id: str) -> dict[str, Any] | None:
     """scoring_model_versions テーブルからアクティブなモデルを取得する。"""
-    result = (
+    result = await execute(
         _db()
         .table("scoring_model_versions")
         .select("*")
@@ -951,7 +935,6 @@ async def get_active_model(company_id: str) -> dict[str, Any] | None:
         .order("created_at", desc=True)
         .limit(1)
         .maybe_single()
-        .execute()
     )
     return result.data
 
@@ -963,9 +946,11 @@ async def create_model_version(company_id: str, data: dict[str, Any]) -> dict[st
     """
     if data.get("is_active", False):
         # 既存の active を全て非活性化
-        _db().table("scoring_model_versions").update(
-            {"is_active": False}
-        ).eq("company_id", company_id).eq("is_active", True).execute()
+        await execute(
+            _db().table("scoring_model_versions").update(
+                {"is_active": False}
+            ).eq("company_id", company_id).eq("is_active", True)
+        )
 
     row = {
         "id": str(uuid4()),
@@ -973,5 +958,5 @@ async def create_model_version(company_id: str, data: dict[str, Any]) -> dict[st
         "created_at": _now_iso(),
         **data,
     }
-    result = _db().table("scoring_model_versions").insert(row).execute()
+    result = await execute(_db().table("scoring_model_versions").insert(row))
     return result.data[0]
@@ -0,0 +1,28 @@
+-- Migration 055: unit_price_master.used_count 一括加算用RPC関数
+-- workers/bpo/construction/unit_price_resolver.py から呼び出される。
+-- 積算1件で参照された過去実績の used_count を、行ごとの UPDATE ではなく1回でまとめて加算する。
+--
+-- 使用例:
+--   SELECT increment_unit_price_used_count('company-uuid', ARRAY['id1', 'id2']::UUID[], ARRAY[3, 1]);
+
+CREATE OR REPLACE FUNCTION increment_unit_price_used_count(
+    p_company_id UUID,
+    p_price_ids UUID[],
+    p_increments INTEGER[]
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    UPDATE unit_price_master AS u
+    SET used_count = COALESCE(u.used_count, 0) + c.n
+    FROM unnest(p_price_ids, p_increments) AS c(id, n)
+    WHERE u.id = c.id
+      AND u.company_id = p_company_id;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。テナント分離は p_company_id で担保する。
+COMMENT ON FUNCTION increment_unit_price_used_count(UUID, UUID[], INTEGER[]) IS
+    '積算で参照された単価マスタの used_count を一括加算する。unit_price_resolver.pyから呼び出し。';
@@ -0,0 +1,69 @@
+-- =============================================================================
+-- 056_llm_cost_monthly.sql
+-- テナント別 LLM 月間コスト（CostTracker の永続化先）
+-- =============================================================================
+--
+-- 目的:
+--   llm/cost_tracker.py のプロセス内集計を複数ワーカー・再起動をまたいで保持する。
+--   LLM_COST_BACKEND=postgres では各プロセスが増分を直接加算し、
+--   LLM_COST_BACKEND=redis では Redis の増分を一定間隔でまとめて書き出す（write-behind）。
+--
+-- 使用例:
+--   SELECT * FROM increment_llm_cost_monthly('2026-10',
+--     '[{"company_id": "company-uuid", "cost_yen": 1.5, "request_count": 3,
+--        "cache_hit_count": 1, "saved_cost_yen": 0.4}]'::JSONB);
+-- =============================================================================
+
+CREATE TABLE llm_cost_monthly (
+    company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    month TEXT NOT NULL,                              -- "YYYY-MM"
+    cost_yen NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    request_count BIGINT NOT NULL DEFAULT 0,
+    cache_hit_count BIGINT NOT NULL DEFAULT 0,
+    saved_cost_yen NUMERIC(14, 4) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (company_id, month)
+);
+
+COMMENT ON TABLE llm_cost_monthly IS 'テナント別LLM月間コスト。CostTracker（llm/cost_tracker.py）が増分を加算する。';
+
+ALTER TABLE llm_cost_monthly ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "llm_cost_monthly_tenant_isolation" ON llm_cost_monthly
+    USING (company_id = (current_setting('app.company_id', true))::UUID);
+
+-- =============================================================================
+-- RPC: 増分の一括加算（行が無ければ作成）
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION increment_llm_cost_monthly(
+    p_month TEXT,
+    p_rows JSONB
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO llm_cost_monthly AS m
+        (company_id, month, cost_yen, request_count, cache_hit_count, saved_cost_yen)
+    SELECT
+        (r->>'company_id')::UUID,
+        p_month,
+        COALESCE((r->>'cost_yen')::NUMERIC, 0),
+        COALESCE((r->>'request_count')::BIGINT, 0),
+        COALESCE((r->>'cache_hit_count')::BIGINT, 0),
+        COALESCE((r->>'saved_cost_yen')::NUMERIC, 0)
+    FROM jsonb_array_elements(p_rows) AS r
+    ON CONFLICT (company_id, month) DO UPDATE SET
+        cost_yen = m.cost_yen + EXCLUDED.cost_yen,
+        request_count = m.request_count + EXCLUDED.request_count,
+        cache_hit_count = m.cache_hit_count + EXCLUDED.cache_hit_count,
+        saved_cost_yen = m.saved_cost_yen + EXCLUDED.saved_cost_yen,
+        updated_at = NOW();
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION increment_llm_cost_monthly(TEXT, JSONB) IS
+    'CostTracker の未同期増分をテナント横断で一括加算する。llm/cost_tracker.pyから呼び出し。';
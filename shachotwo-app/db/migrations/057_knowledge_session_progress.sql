@@ -0,0 +1,10 @@
+-- 057: knowledge_sessions に抽出進捗カラム追加
+-- 大きな文書はチャンク単位で抽出・保存する（brain/extraction/pipeline.py）。
+-- チャンクが完了するたびに進捗を書き込み、フロントエンドはポーリングで表示する。
+--
+-- 例: {"chunks_total": 24, "chunks_done": 10, "chunks_failed": 0, "items_saved": 37}
+
+ALTER TABLE knowledge_sessions
+  ADD COLUMN IF NOT EXISTS extraction_progress JSONB;
+
+COMMENT ON COLUMN knowledge_sessions.extraction_progress IS 'チャンク抽出の進捗 (chunks_total / chunks_done / chunks_failed / items_saved)';
@@ -0,0 +1,85 @@
+-- =============================================================================
+-- 058_knowledge_embedding_hash.sql
+-- knowledge_items の埋め込みを内容ハッシュで差分管理する
+-- =============================================================================
+--
+-- 目的:
+--   brain/knowledge/embeddings.py の埋め込みワーカーが「新規 or 内容が変わった」
+--   アイテムだけをテナント横断でまとめて取得し、ベクトルを 1 回の RPC で書き戻す。
+--   content_hash はタイトル・本文から自動計算され、embedding_hash は埋め込み生成時の
+--   content_hash を保持する。両者が異なる行が再埋め込み対象。
+--
+-- 使用例:
+--   SELECT * FROM get_stale_embedding_items(100);
+--   SELECT set_knowledge_embeddings('[{"id": "item-uuid", "content_hash": "…",
+--     "embedding": [0.1, 0.2, …]}]'::JSONB);
+-- =============================================================================
+
+ALTER TABLE knowledge_items
+  ADD COLUMN IF NOT EXISTS content_hash TEXT
+    GENERATED ALWAYS AS (md5(title || E'\n' || content)) STORED,
+  ADD COLUMN IF NOT EXISTS embedding_hash TEXT;
+
+COMMENT ON COLUMN knowledge_items.content_hash IS 'md5(title || \n || content)。埋め込み対象テキストのハッシュ';
+COMMENT ON COLUMN knowledge_items.embedding_hash IS '現在の embedding を生成した時点の content_hash';
+
+-- 既存の埋め込みは現在の内容から生成済みとみなす（全件再埋め込みを避ける）
+UPDATE knowledge_items SET embedding_hash = content_hash WHERE embedding IS NOT NULL;
+
+-- 再埋め込み対象だけを載せる部分インデックス（通常はほぼ空）
+CREATE INDEX IF NOT EXISTS idx_knowledge_items_embedding_stale
+    ON knowledge_items (created_at)
+    WHERE is_active AND embedding_hash IS DISTINCT FROM content_hash;
+
+-- =============================================================================
+-- RPC: 再埋め込み対象の取得（テナント横断。p_company_id 指定時はそのテナントのみ）
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION get_stale_embedding_items(
+    p_limit INTEGER,
+    p_company_id UUID DEFAULT NULL
+)
+RETURNS TABLE (id UUID, company_id UUID, title TEXT, content TEXT, content_hash TEXT)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT k.id, k.company_id, k.title, k.content, k.content_hash
+    FROM knowledge_items AS k
+    WHERE k.is_active
+      AND k.embedding_hash IS DISTINCT FROM k.content_hash
+      AND (p_company_id IS NULL OR k.company_id = p_company_id)
+    ORDER BY k.created_at
+    LIMIT p_limit;
+$$;
+
+COMMENT ON FUNCTION get_stale_embedding_items(INTEGER, UUID) IS
+    '埋め込みが未生成または内容変更で古くなった knowledge_items を返す。brain/knowledge/embeddings.pyから呼び出し。';
+
+-- =============================================================================
+-- RPC: 埋め込みの一括書き戻し
+-- 生成中に内容が更新された行（content_hash 不一致）は書き込まず、次回の取得に回す。
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION set_knowledge_embeddings(p_rows JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    UPDATE knowledge_items AS k
+    SET embedding = (r->>'embedding')::VECTOR(768),
+        embedding_hash = r->>'content_hash'
+    FROM jsonb_array_elements(p_rows) AS r
+    WHERE k.id = (r->>'id')::UUID
+      AND k.content_hash = r->>'content_hash';
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION set_knowledge_embeddings(JSONB) IS
+    '埋め込みベクトルを一括更新する（content_hash 一致行のみ）。brain/knowledge/embeddings.pyから呼び出し。';
@@ -0,0 +1,243 @@
+-- =============================================================================
+-- 059_bpo_task_queue.sql
+-- BPO タスクキュー（BPO_QUEUE_BACKEND=postgres）・デッドレター・リーダーリース
+-- =============================================================================
+--
+-- 目的:
+--   workers/bpo/manager/orchestrator.py が発見した BPOTask を永続キューに積み、
+--   workers/bpo/manager/queue_worker.py（API とは別プロセス可）が取り出して実行する。
+--   claim は FOR UPDATE SKIP LOCKED で複数ワーカーが同じ行を取り合わない。
+--   ack/fail されないまま locked_until を過ぎた行は再配信される（可視性タイムアウト）。
+--   max_attempts 回失敗した行は bpo_task_dead_letters へ移す。
+--   bpo_leader_leases はトリガー走査を 1 インスタンスに絞るためのリース。
+--
+-- 使用例:
+--   SELECT enqueue_bpo_task('company-uuid', 'common/expense', '{...}'::JSONB, 'schedule:123:...');
+--   SELECT * FROM claim_bpo_tasks('worker-1', 4, 360, 3);
+--   SELECT ack_bpo_task('task-uuid', 'worker-1');
+--   SELECT fail_bpo_task('task-uuid', 'worker-1', 'timeout', 3, 60);
+--   SELECT try_acquire_leader_lease('bpo-orchestrator', 'instance-a', 90);
+-- =============================================================================
+
+CREATE TABLE bpo_task_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    pipeline TEXT NOT NULL,
+    payload JSONB NOT NULL,                      -- BPOTask.model_dump()
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'done')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_by TEXT,
+    locked_until TIMESTAMPTZ,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMPTZ
+);
+
+-- 未完了行だけを載せる部分インデックス（claim 用）
+CREATE INDEX idx_bpo_task_queue_ready ON bpo_task_queue (available_at)
+    WHERE status = 'queued';
+
+COMMENT ON TABLE bpo_task_queue IS 'BPOタスクキュー。完了行は冪等キー保持のため一定期間残し purge_bpo_task_queue で削除する。';
+
+CREATE TABLE bpo_task_dead_letters (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    pipeline TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    idempotency_key TEXT,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_bpo_task_dead_letters_company ON bpo_task_dead_letters (company_id, created_at DESC);
+
+COMMENT ON TABLE bpo_task_dead_letters IS 'リトライ上限に達したBPOタスク。原因調査後に手動で再投入する。';
+
+CREATE TABLE bpo_leader_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE bpo_task_queue ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bpo_task_dead_letters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bpo_leader_leases ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "bpo_task_queue_tenant_isolation" ON bpo_task_queue
+    USING (company_id = (current_setting('app.company_id', true))::UUID);
+CREATE POLICY "bpo_task_dead_letters_tenant_isolation" ON bpo_task_dead_letters
+    USING (company_id = (current_setting('app.company_id', true))::UUID);
+-- bpo_leader_leases はポリシー無し（service role のみ）
+
+-- =============================================================================
+-- RPC（いずれもサーバー側 service role から呼ぶ。RLSをバイパスするためSECURITY DEFINER）
+-- =============================================================================
+
+-- 冪等キーが既存なら積まずに FALSE
+CREATE OR REPLACE FUNCTION enqueue_bpo_task(
+    p_company_id UUID,
+    p_pipeline TEXT,
+    p_payload JSONB,
+    p_idempotency_key TEXT DEFAULT NULL
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO bpo_task_queue (company_id, pipeline, payload, idempotency_key)
+    VALUES (p_company_id, p_pipeline, p_payload, p_idempotency_key)
+    ON CONFLICT (idempotency_key) DO NOTHING;
+    RETURN FOUND;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION claim_bpo_tasks(
+    p_consumer TEXT,
+    p_limit INTEGER,
+    p_visibility_sec INTEGER,
+    p_max_attempts INTEGER
+)
+RETURNS TABLE (id UUID, payload JSONB, attempts INTEGER, idempotency_key TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- 試行上限に達したままロック切れになった行（実行中にワーカーが落ちた）をデッドレターへ
+    WITH expired AS (
+        DELETE FROM bpo_task_queue AS q
+        WHERE q.status = 'queued'
+          AND q.locked_until < NOW()
+          AND q.attempts >= p_max_attempts
+        RETURNING q.company_id, q.pipeline, q.payload, q.idempotency_key, q.attempts, q.last_error
+    )
+    INSERT INTO bpo_task_dead_letters (company_id, pipeline, payload, idempotency_key, attempts, last_error)
+    SELECT e.company_id, e.pipeline, e.payload, e.idempotency_key, e.attempts,
+           COALESCE(e.last_error, 'visibility timeout')
+    FROM expired AS e;
+
+    RETURN QUERY
+    UPDATE bpo_task_queue AS q
+    SET locked_by = p_consumer,
+        locked_until = NOW() + make_interval(secs => p_visibility_sec),
+        attempts = q.attempts + 1
+    FROM (
+        SELECT c.id
+        FROM bpo_task_queue AS c
+        WHERE c.status = 'queued'
+          AND c.available_at <= NOW()
+          AND (c.locked_until IS NULL OR c.locked_until < NOW())
+        ORDER BY c.available_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ) AS picked
+    WHERE q.id = picked.id
+    RETURNING q.id, q.payload, q.attempts, q.idempotency_key;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION extend_bpo_task(p_id UUID, p_consumer TEXT, p_visibility_sec INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    UPDATE bpo_task_queue
+    SET locked_until = NOW() + make_interval(secs => p_visibility_sec)
+    WHERE id = p_id AND locked_by = p_consumer AND status = 'queued';
+    RETURN FOUND;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ack_bpo_task(p_id UUID, p_consumer TEXT)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    UPDATE bpo_task_queue
+    SET status = 'done', completed_at = NOW(), locked_by = NULL, locked_until = NULL
+    WHERE id = p_id AND locked_by = p_consumer AND status = 'queued';
+    RETURN FOUND;
+END;
+$$;
+
+-- 'retry'（available_at を遅らせて再投入）/ 'dead'（デッドレターへ移動）/ 'lost'（他ワーカーに再配信済み）
+CREATE OR REPLACE FUNCTION fail_bpo_task(
+    p_id UUID,
+    p_consumer TEXT,
+    p_error TEXT,
+    p_max_attempts INTEGER,
+    p_retry_delay_sec INTEGER
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_row bpo_task_queue%ROWTYPE;
+BEGIN
+    SELECT * INTO v_row FROM bpo_task_queue
+    WHERE id = p_id AND locked_by = p_consumer AND status = 'queued'
+    FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN 'lost';
+    END IF;
+
+    IF v_row.attempts >= p_max_attempts THEN
+        INSERT INTO bpo_task_dead_letters (company_id, pipeline, payload, idempotency_key, attempts, last_error)
+        VALUES (v_row.company_id, v_row.pipeline, v_row.payload, v_row.idempotency_key, v_row.attempts, p_error);
+        DELETE FROM bpo_task_queue WHERE id = p_id;
+        RETURN 'dead';
+    END IF;
+
+    UPDATE bpo_task_queue
+    SET locked_by = NULL,
+        locked_until = NULL,
+        last_error = p_error,
+        available_at = NOW() + make_interval(secs => p_retry_delay_sec)
+    WHERE id = p_id;
+    RETURN 'retry';
+END;
+$$;
+
+-- 完了行の削除（冪等キーの保持期間を過ぎたもの）
+CREATE OR REPLACE FUNCTION purge_bpo_task_queue(p_older_than_sec INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    DELETE FROM bpo_task_queue
+    WHERE status = 'done' AND completed_at < NOW() - make_interval(secs => p_older_than_sec);
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$;
+
+-- 期限切れ or 自分が保持者ならリースを取得・延長して TRUE
+CREATE OR REPLACE FUNCTION try_acquire_leader_lease(p_name TEXT, p_holder TEXT, p_ttl_sec INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO bpo_leader_leases AS l (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_sec))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW();
+    RETURN FOUND;
+END;
+$$;
+
+COMMENT ON FUNCTION claim_bpo_tasks(TEXT, INTEGER, INTEGER, INTEGER) IS
+    'BPOタスクを SKIP LOCKED で取得しロックする。workers/bpo/manager/task_queue.pyから呼び出し。';
+COMMENT ON FUNCTION try_acquire_leader_lease(TEXT, TEXT, INTEGER) IS
+    'オーケストレータのリーダーリースを取得・延長する。workers/bpo/manager/task_queue.pyから呼び出し。';
@@ -0,0 +1,48 @@
+-- 060: BPOオーケストレータのシャード分担用メンバー表
+-- BPO_ORCHESTRATOR_SHARDING=1 のとき、各レプリカが毎分ハートビートを書き、
+-- 生存メンバーのコンシステントハッシュでテナントを分担して走査する
+-- （workers/bpo/manager/tenant_scan.py, task_queue.py）。
+--
+-- 使用例:
+--   SELECT * FROM heartbeat_orchestrator_member('bpo-orchestrator', 'member-a', 180);
+
+CREATE TABLE bpo_orchestrator_members (
+    group_name TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (group_name, member_id)
+);
+
+ALTER TABLE bpo_orchestrator_members ENABLE ROW LEVEL SECURITY;
+-- ポリシー無し（service role のみ）
+
+-- 自分のハートビートを更新し、期限切れメンバーを削除して生存メンバーを返す
+CREATE OR REPLACE FUNCTION heartbeat_orchestrator_member(
+    p_group TEXT,
+    p_member_id TEXT,
+    p_ttl_sec INTEGER
+)
+RETURNS TABLE (member_id TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+#variable_conflict use_column
+BEGIN
+    INSERT INTO bpo_orchestrator_members (group_name, member_id, heartbeat_at)
+    VALUES (p_group, p_member_id, NOW())
+    ON CONFLICT (group_name, member_id) DO UPDATE SET heartbeat_at = NOW();
+
+    DELETE FROM bpo_orchestrator_members AS m
+    WHERE m.group_name = p_group
+      AND m.heartbeat_at < NOW() - make_interval(secs => p_ttl_sec);
+
+    RETURN QUERY
+    SELECT m.member_id FROM bpo_orchestrator_members AS m
+    WHERE m.group_name = p_group
+    ORDER BY m.member_id;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION heartbeat_orchestrator_member(TEXT, TEXT, INTEGER) IS
+    'オーケストレータのシャード分担メンバーのハートビート。workers/bpo/manager/task_queue.pyから呼び出し。';
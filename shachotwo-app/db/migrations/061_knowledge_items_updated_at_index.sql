@@ -0,0 +1,16 @@
+-- =============================================================================
+-- 061_knowledge_items_updated_at_index.sql
+-- knowledge_items の変更フィード用インデックス
+-- =============================================================================
+--
+-- 目的:
+--   workers/bpo/manager/schedule_watcher.py の ScheduleIndex は毎分 1 回、
+--   「前回以降に updated_at が進んだ行の company_id」を全テナント横断で読み、
+--   該当テナントのコンパイル済みスケジュールだけを再ロードする。
+--   その範囲検索がテーブル全走査にならないよう updated_at にインデックスを張る。
+--
+-- 使用例:
+--   SELECT company_id FROM knowledge_items WHERE updated_at > NOW() - INTERVAL '90 seconds';
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_items_updated_at
+    ON knowledge_items (updated_at);
@@ -0,0 +1,73 @@
+-- =============================================================================
+-- 062_condition_watermarks.sql
+-- 条件連鎖評価の依存テーブル変更検知（ウォーターマーク）
+-- =============================================================================
+--
+-- 目的:
+--   workers/bpo/manager/condition_evaluator.py は条件を参照テーブルごとにまとめて評価し、
+--   前回評価以降に変更のあったテーブルの条件だけを再評価する。
+--   get_condition_watermarks はテナントの各テーブルについて
+--   「最終更新時刻 + 行数」を 1 回の呼び出しで返す（行数を含めるので削除も検知できる）。
+--   proactive_proposals / knowledge_relations は更新を検知できるよう updated_at を追加する。
+--
+-- 使用例:
+--   SELECT * FROM get_condition_watermarks('company-uuid',
+--       ARRAY['customers', 'support_tickets', 'proactive_proposals']);
+-- =============================================================================
+
+ALTER TABLE proactive_proposals
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE knowledge_relations
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trg_proactive_proposals_updated_at ON proactive_proposals;
+CREATE TRIGGER trg_proactive_proposals_updated_at
+    BEFORE UPDATE ON proactive_proposals
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+DROP TRIGGER IF EXISTS trg_knowledge_relations_updated_at ON knowledge_relations;
+CREATE TRIGGER trg_knowledge_relations_updated_at
+    BEFORE UPDATE ON knowledge_relations
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_proactive_proposals_company_updated
+    ON proactive_proposals (company_id, updated_at);
+
+-- テーブル名 → ウォーターマーク列（ホワイトリスト外のテーブルは無視する）
+CREATE OR REPLACE FUNCTION get_condition_watermarks(p_company_id UUID, p_tables TEXT[])
+RETURNS TABLE (table_name TEXT, watermark TEXT)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_table TEXT;
+    v_column TEXT;
+    v_watermark TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY p_tables LOOP
+        v_column := CASE v_table
+            WHEN 'knowledge_items' THEN 'updated_at'
+            WHEN 'knowledge_relations' THEN 'updated_at'
+            WHEN 'customers' THEN 'updated_at'
+            WHEN 'support_tickets' THEN 'updated_at'
+            WHEN 'opportunities' THEN 'updated_at'
+            WHEN 'proactive_proposals' THEN 'updated_at'
+            WHEN 'execution_logs' THEN 'created_at'
+            ELSE NULL
+        END;
+        CONTINUE WHEN v_column IS NULL;
+        EXECUTE format(
+            'SELECT COALESCE(max(%I)::TEXT, '''') || '':'' || count(*) FROM %I WHERE company_id = $1',
+            v_column, v_table
+        ) INTO v_watermark USING p_company_id;
+        table_name := v_table;
+        watermark := v_watermark;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION get_condition_watermarks(UUID, TEXT[]) IS
+    'テナントの条件依存テーブルごとの最終更新時刻+行数を返す。workers/bpo/manager/condition_evaluator.pyから呼び出し。';
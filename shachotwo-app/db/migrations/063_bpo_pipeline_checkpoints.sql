@@ -0,0 +1,46 @@
+-- 063: BPOパイプラインのステップ単位チェックポイント
+-- タイムアウト・途中失敗で同じ入力のパイプラインが再実行されたとき、
+-- 完了済みステップ（OCR・LLM抽出など）を保存済み出力から再開する
+-- （workers/bpo/engine/checkpoint.py, BPO_CHECKPOINT_BACKEND=postgres）。
+-- パイプライン成功時に削除し、残ったものは expires_at 経過後に purge する。
+--
+-- 使用例:
+--   SELECT purge_bpo_pipeline_checkpoints();
+
+CREATE TABLE bpo_pipeline_checkpoints (
+    pipeline TEXT NOT NULL,
+    company_id UUID NOT NULL,
+    input_hash TEXT NOT NULL,          -- 実行入力の sha256
+    step TEXT NOT NULL,
+    step_input_hash TEXT NOT NULL,     -- ステップ入力の sha256（一致時のみ再利用）
+    result JSONB NOT NULL DEFAULT '{}'::jsonb,
+    output JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (pipeline, company_id, input_hash, step)
+);
+
+CREATE INDEX idx_bpo_pipeline_checkpoints_expires_at
+    ON bpo_pipeline_checkpoints (expires_at);
+
+ALTER TABLE bpo_pipeline_checkpoints ENABLE ROW LEVEL SECURITY;
+-- ポリシー無し（service role のみ）
+
+-- 失効したチェックポイントを削除し、削除件数を返す
+CREATE OR REPLACE FUNCTION purge_bpo_pipeline_checkpoints()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    DELETE FROM bpo_pipeline_checkpoints WHERE expires_at < NOW();
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION purge_bpo_pipeline_checkpoints() IS
+    '失効したパイプラインチェックポイントの削除。workers/bpo/manager/queue_worker.pyから呼び出し。';
@@ -0,0 +1,31 @@
+-- Migration 064: 工種ごとの直近単価実績を上限付きで返すRPC関数
+-- workers/bpo/construction/unit_price_resolver.py の prefetch_past_prices から呼び出される。
+-- in_("category", ...) + order だけの一括取得は PostgREST の max-rows で黙って切り詰められ、
+-- 実績の多い工種が他の工種の行を押し出すため、工種ごとに row_number() で件数を絞る。
+--
+-- 使用例:
+--   SELECT * FROM recent_unit_prices_by_category('company-uuid', ARRAY['土工', '舗装工'], 10);
+
+CREATE OR REPLACE FUNCTION recent_unit_prices_by_category(
+    p_company_id UUID,
+    p_categories TEXT[],
+    p_limit INTEGER
+)
+RETURNS SETOF unit_price_master
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT (r.u).*
+    FROM (
+        SELECT u, row_number() OVER (PARTITION BY u.category ORDER BY u.updated_at DESC) AS rn
+        FROM unit_price_master AS u
+        WHERE u.company_id = p_company_id
+          AND u.category = ANY(p_categories)
+    ) AS r
+    WHERE r.rn <= p_limit;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。テナント分離は p_company_id で担保する。
+COMMENT ON FUNCTION recent_unit_prices_by_category(UUID, TEXT[], INTEGER) IS
+    '工種ごとの直近単価実績を最大 p_limit 件ずつ返す。unit_price_resolver.pyから呼び出し。';
@@ -0,0 +1,90 @@
+-- =============================================================================
+-- 065_knowledge_embedding_failures.sql
+-- 埋め込みに失敗し続けるアイテムを行単位でバックオフさせる
+-- =============================================================================
+--
+-- 目的:
+--   get_stale_embedding_items は古い順に返すため、埋め込み生成や書き戻しが必ず失敗する行が
+--   1 件あるとバッチ全体が毎回失敗し、後ろの行が永久に処理されなかった。
+--   brain/knowledge/embeddings.py はバッチ失敗時に 1 行ずつ処理し直し、それでも失敗した行を
+--   record_embedding_failures で記録する。記録された行は embedding_retry_at まで取得対象から外れ、
+--   失敗のたびに待ち時間が倍になる（上限 p_max_sec）。内容が変われば content_hash が変わるので即再試行。
+--
+-- 使用例:
+--   SELECT record_embedding_failures('[{"id": "item-uuid", "content_hash": "…",
+--     "error": "400 INVALID_ARGUMENT"}]'::JSONB, 60, 21600);
+-- =============================================================================
+
+ALTER TABLE knowledge_items
+  ADD COLUMN IF NOT EXISTS embedding_failures INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS embedding_error_hash TEXT,
+  ADD COLUMN IF NOT EXISTS embedding_last_error TEXT,
+  ADD COLUMN IF NOT EXISTS embedding_retry_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN knowledge_items.embedding_failures IS 'embedding_error_hash の内容で埋め込みに連続して失敗した回数';
+COMMENT ON COLUMN knowledge_items.embedding_error_hash IS '失敗を記録した時点の content_hash（内容が変われば失敗履歴は無効）';
+COMMENT ON COLUMN knowledge_items.embedding_last_error IS '直近の失敗理由（先頭500文字）';
+COMMENT ON COLUMN knowledge_items.embedding_retry_at IS 'この時刻までは埋め込みワーカーの取得対象から外す';
+
+-- =============================================================================
+-- RPC: 再埋め込み対象の取得（バックオフ中の行を除く）
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION get_stale_embedding_items(
+    p_limit INTEGER,
+    p_company_id UUID DEFAULT NULL
+)
+RETURNS TABLE (id UUID, company_id UUID, title TEXT, content TEXT, content_hash TEXT)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT k.id, k.company_id, k.title, k.content, k.content_hash
+    FROM knowledge_items AS k
+    WHERE k.is_active
+      AND k.embedding_hash IS DISTINCT FROM k.content_hash
+      AND (p_company_id IS NULL OR k.company_id = p_company_id)
+      AND NOT (k.embedding_error_hash IS NOT DISTINCT FROM k.content_hash
+               AND k.embedding_retry_at > NOW())
+    ORDER BY k.created_at
+    LIMIT p_limit;
+$$;
+
+-- =============================================================================
+-- RPC: 埋め込み失敗の記録（content_hash 一致行のみ。待ち時間 = p_base_sec * 2^(失敗回数-1)、上限 p_max_sec）
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION record_embedding_failures(
+    p_rows JSONB,
+    p_base_sec INTEGER,
+    p_max_sec INTEGER
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    -- SET の右辺は更新前の値を参照するので、失敗回数の式を retry_at でも使える
+    UPDATE knowledge_items AS k
+    SET embedding_failures = CASE WHEN k.embedding_error_hash = r->>'content_hash'
+                                  THEN k.embedding_failures + 1 ELSE 1 END,
+        embedding_error_hash = r->>'content_hash',
+        embedding_last_error = left(r->>'error', 500),
+        embedding_retry_at = NOW() + make_interval(secs => LEAST(
+            p_max_sec,
+            p_base_sec * power(2, CASE WHEN k.embedding_error_hash = r->>'content_hash'
+                                       THEN LEAST(k.embedding_failures, 30) ELSE 0 END)
+        ))
+    FROM jsonb_array_elements(p_rows) AS r
+    WHERE k.id = (r->>'id')::UUID
+      AND k.content_hash = r->>'content_hash';
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- RLSをバイパスするためSECURITY DEFINERを使用。サーバー側（service role）からのみ呼び出す。
+COMMENT ON FUNCTION record_embedding_failures(JSONB, INTEGER, INTEGER) IS
+    '埋め込みに失敗した knowledge_items の失敗回数と再試行時刻を記録する。brain/knowledge/embeddings.pyから呼び出し。';
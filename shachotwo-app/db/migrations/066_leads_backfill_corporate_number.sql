@@ -0,0 +1,51 @@
+-- =============================================================================
+-- 066_leads_backfill_corporate_number.sql
+-- 旧 gbizinfo_bulk_load で取り込んだ leads に corporate_number を埋め戻す
+-- =============================================================================
+--
+-- 目的:
+--   manufacturing_lead_loader は (company_id, corporate_number) で upsert するようになったが、
+--   旧実装は法人番号を leads に書かず lead_activities.activity_data にだけ残していた。
+--   部分ユニークインデックス（031）は NULL／空を対象外にするため、そのままでは次回の取り込みで
+--   旧リードが全件重複挿入される。activity_data から法人番号を埋め戻して upsert の照合対象にする。
+--
+--   lead_activities が残っていない行（旧実装は URL がない企業の活動を記録しなかった）は
+--   lead_ingest.bulk_upsert_leads(legacy_source_detail=...) が company_name で照合して引き継ぐ。
+--
+-- 競合の扱い:
+--   - 1 リードに複数の活動がある場合は最新の活動の法人番号を使う
+--   - 同じ (company_id, corporate_number) に複数の旧リードがある場合は最新のリードだけに埋める
+--   - 既に同じ法人番号を持つリードがあれば埋めない（一意制約 leads_company_corporate_uq 違反を避ける）
+-- =============================================================================
+
+WITH latest_activity AS (
+    SELECT DISTINCT ON (l.id)
+        l.id,
+        l.company_id,
+        l.created_at,
+        btrim(a.activity_data->>'corporate_number') AS corporate_number
+    FROM leads AS l
+    JOIN lead_activities AS a
+      ON a.lead_id = l.id
+     AND a.company_id = l.company_id
+    WHERE l.source_detail = 'gbizinfo_bulk_load'
+      AND (l.corporate_number IS NULL OR btrim(l.corporate_number) = '')
+      AND a.activity_data->>'source' = 'gbizinfo_bulk_load'
+      AND btrim(COALESCE(a.activity_data->>'corporate_number', '')) <> ''
+    ORDER BY l.id, a.created_at DESC
+),
+candidates AS (
+    SELECT DISTINCT ON (company_id, corporate_number) id, company_id, corporate_number
+    FROM latest_activity
+    ORDER BY company_id, corporate_number, created_at DESC
+)
+UPDATE leads AS l
+SET corporate_number = c.corporate_number,
+    updated_at = NOW()
+FROM candidates AS c
+WHERE l.id = c.id
+  AND NOT EXISTS (
+      SELECT 1 FROM leads AS x
+      WHERE x.company_id = c.company_id
+        AND x.corporate_number = c.corporate_number
+  );
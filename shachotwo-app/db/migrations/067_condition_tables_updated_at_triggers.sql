@@ -0,0 +1,30 @@
+-- =============================================================================
+-- 067_condition_tables_updated_at_triggers.sql
+-- 条件連鎖の監視テーブルに updated_at トリガーを付ける
+-- =============================================================================
+--
+-- 目的:
+--   get_condition_watermarks（062）は「max(updated_at) + 行数」で変更を検知するが、
+--   customers / support_tickets / opportunities（021）には updated_at を更新するトリガーがなく、
+--   アプリ側で updated_at を渡さない UPDATE（例: quotation_contract_pipeline の stage=won 更新）は
+--   ウォーターマークが変わらず、依存する条件が再評価されなかった。
+--   knowledge_items（001）・proactive_proposals / knowledge_relations（062）は設定済み、
+--   execution_logs は created_at を使うので対象外。
+--
+-- update_updated_at() 関数は 001_initial_schema.sql で定義済み
+-- =============================================================================
+
+DROP TRIGGER IF EXISTS trg_customers_updated_at ON customers;
+CREATE TRIGGER trg_customers_updated_at
+    BEFORE UPDATE ON customers
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+DROP TRIGGER IF EXISTS trg_support_tickets_updated_at ON support_tickets;
+CREATE TRIGGER trg_support_tickets_updated_at
+    BEFORE UPDATE ON support_tickets
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+DROP TRIGGER IF EXISTS trg_opportunities_updated_at ON opportunities;
+CREATE TRIGGER trg_opportunities_updated_at
+    BEFORE UPDATE ON opportunities
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
@@ -1,13 +1,48 @@
-"""Supabase client wrapper with RLS context management."""
+"""Supabase client wrapper with connection pooling and RLS context management.
+
+All callers share one process-wide client per (url, key) so that HTTP sessions,
+TLS handshakes and PostgREST config are reused across requests. Async code
+should await `execute(query)` instead of calling `query.execute()` directly,
+which keeps the event loop free during the database round trip.
+"""
+import asyncio
+import importlib.util
+import inspect
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
+import httpx
 from supabase import create_client, Client
 
+try:  # supabase>=2.10: httpx client injection + async client
+    from supabase import acreate_client, AsyncClient
+    from supabase.lib.client_options import AsyncClientOptions, SyncClientOptions
+except ImportError:  # pragma: no cover
+    acreate_client = None  # type: ignore[assignment]
+    AsyncClient = Any  # type: ignore[assignment,misc]
+    AsyncClientOptions = None  # type: ignore[assignment,misc]
+    SyncClientOptions = None  # type: ignore[assignment,misc]
+
 logger = logging.getLogger(__name__)
 
+# Pool sizing (override via env for large instances)
+_MAX_CONNECTIONS = int(os.environ.get("DB_POOL_MAX_CONNECTIONS", "100"))
+_MAX_KEEPALIVE = int(os.environ.get("DB_POOL_MAX_KEEPALIVE", "20"))
+_KEEPALIVE_EXPIRY_SEC = float(os.environ.get("DB_POOL_KEEPALIVE_EXPIRY_SEC", "30"))
+_TIMEOUT_SEC = float(os.environ.get("DB_TIMEOUT_SEC", "30"))
+_EXECUTOR_MAX_WORKERS = int(os.environ.get("DB_EXECUTOR_MAX_WORKERS", "32"))
+
+TENANT_HEADER = "x-company-id"
+
+_lock = threading.Lock()
+_sync_clients: dict[tuple[str, str], Client] = {}
+_async_clients: dict[tuple[str, str, int], "AsyncClient"] = {}
+_executor: ThreadPoolExecutor | None = None
+
 
 def _get_url() -> str:
     url = os.environ.get("SUPABASE_URL", "")
@@ -24,44 +59,179 @@ def _get_anon_key() -> str:
     return os.environ.get("SUPABASE_ANON_KEY", "")
 
 
+def _http_kwargs() -> dict[str, Any]:
+    """Shared httpx settings: keep-alive pool, HTTP/2 when `h2` is installed."""
+    return {
+        "http2": importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_connections=_MAX_CONNECTIONS,
+            max_keepalive_connections=_MAX_KEEPALIVE,
+            keepalive_expiry=_KEEPALIVE_EXPIRY_SEC,
+        ),
+        "timeout": httpx.Timeout(_TIMEOUT_SEC),
+        "follow_redirects": True,
+    }
+
+
+def _build_sync_client(url: str, key: str) -> Client:
+    if SyncClientOptions is None:
+        return create_client(url, key)
+    http_client = httpx.Client(**_http_kwargs())
+    try:
+        return create_client(url, key, SyncClientOptions(httpx_client=http_client))
+    except Exception:
+        http_client.close()
+        raise
+
+
+def _pooled_sync_client(url: str, key: str) -> Client:
+    cache_key = (url, key)
+    client = _sync_clients.get(cache_key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _sync_clients.get(cache_key)
+        if client is None:
+            client = _build_sync_client(url, key)
+            _sync_clients[cache_key] = client
+    return client
+
+
 def get_service_client() -> Client:
-    """Service client — bypasses RLS. Use for migrations/admin only."""
-    return create_client(_get_url(), _get_service_key())
+    """Service client — bypasses RLS. Pooled per process; safe to call per request."""
+    return _pooled_sync_client(_get_url(), _get_service_key())
 
 
 def get_client() -> Client:
-    """Anon client — respects RLS."""
-    return create_client(_get_url(), _get_anon_key())
+    """Anon client — respects RLS. Pooled per process."""
+    return _pooled_sync_client(_get_url(), _get_anon_key())
 
 
-# Lazy singleton
-_service_client: Client | None = None
+def service_client() -> Client:
+    """Alias of get_service_client() kept for `from db import service_client`."""
+    return get_service_client()
 
 
-@property
-def service_client() -> Client:
-    global _service_client
-    if _service_client is None:
-        _service_client = get_service_client()
-    return _service_client
+async def get_async_service_client() -> "AsyncClient":
+    """Native async service client (one per event loop).
+
+    Queries built from this client return coroutines from `.execute()`.
+    """
+    if acreate_client is None:  # pragma: no cover
+        raise RuntimeError("supabase>=2.10 is required for the async client")
+    url, key = _get_url(), _get_service_key()
+    cache_key = (url, key, id(asyncio.get_running_loop()))
+    client = _async_clients.get(cache_key)
+    if client is None:
+        http_client = httpx.AsyncClient(**_http_kwargs())
+        try:
+            client = await acreate_client(url, key, AsyncClientOptions(httpx_client=http_client))
+        except Exception:
+            await http_client.aclose()
+            raise
+        _async_clients[cache_key] = client
+    return client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_EXECUTOR_MAX_WORKERS, thread_name_prefix="db-exec",
+                )
+    return _executor
+
+
+async def execute(query: Any) -> Any:
+    """Awaitable `query.execute()` that never blocks the event loop.
+
+    Native async builders are awaited directly; sync builders run on a bounded
+    thread pool so at most DB_EXECUTOR_MAX_WORKERS round trips are in flight.
+
+    Usage:
+        result = await execute(db.table("knowledge_items").select("*").eq("company_id", cid))
+    """
+    if inspect.iscoroutinefunction(query.execute):
+        return await query.execute()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), query.execute)
+
+
+def _scope_builder(builder: Any, company_id: str) -> Any:
+    """Attach the tenant header to a single request builder (not the shared client)."""
+    request = getattr(builder, "request", None)
+    if request is not None:
+        # rpc()/filter builders own a per-request header copy
+        request.headers[TENANT_HEADER] = company_id
+    else:
+        # table() builders share the client's headers — copy before mutating
+        builder.headers = builder.headers.copy()
+        builder.headers[TENANT_HEADER] = company_id
+    return builder
+
+
+class TenantScopedClient:
+    """Per-tenant view over a pooled client.
+
+    Adds the `x-company-id` header to each query instead of mutating the shared
+    session, so concurrent requests for different tenants never leak headers.
+    """
+
+    def __init__(self, client: Client, company_id: str) -> None:
+        self._client = client
+        self.company_id = company_id
+
+    def table(self, table_name: str) -> Any:
+        return _scope_builder(self._client.table(table_name), self.company_id)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict | None = None, **kwargs: Any) -> Any:
+        return _scope_builder(self._client.rpc(fn, params or {}, **kwargs), self.company_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
 
 
 @asynccontextmanager
-async def with_company_context(company_id: str) -> AsyncGenerator[Client, None]:
-    """Context manager that sets RLS company_id for the session.
+async def with_company_context(company_id: str) -> AsyncGenerator[TenantScopedClient, None]:
+    """Context manager that scopes RLS company_id for the queries in the block.
 
     Usage:
         async with with_company_context(company_id) as client:
-            result = client.table("knowledge_items").select("*").execute()
+            result = await execute(client.table("knowledge_items").select("*"))
     """
-    client = get_client()
-    # Set company_id for RLS via PostgREST header
-    # Supabase translates this to: SET LOCAL app.company_id = '<value>'
-    client.postgrest.auth(
-        token=None,
-        headers={"x-company-id": company_id},
-    )
-    try:
-        yield client
-    finally:
-        pass  # Connection cleanup handled by supabase-py
+    # Supabase translates the header to: SET LOCAL app.company_id = '<value>'
+    yield TenantScopedClient(get_client(), company_id)
+
+
+def reset_clients() -> None:
+    """Drop pooled clients (tests / credential rotation). Open sockets close on GC."""
+    with _lock:
+        _sync_clients.clear()
+        _async_clients.clear()
+
+
+async def close_clients() -> None:
+    """Close pooled HTTP sessions and the executor. Call on app shutdown."""
+    global _executor
+    with _lock:
+        sync_clients = list(_sync_clients.values())
+        async_clients = list(_async_clients.values())
+        _sync_clients.clear()
+        _async_clients.clear()
+        executor, _executor = _executor, None
+    for client in sync_clients:
+        try:
+            client.postgrest.aclose()
+        except Exception as e:
+            logger.debug("sync client close failed: %s", e)
+    for client in async_clients:
+        try:
+            await client.postgrest.aclose()
+        except Exception as e:
+            logger.debug("async client close failed: %s", e)
+    if executor is not None:
+        executor.shutdown(wait=False)
@@ -5,8 +5,8 @@ import logging
 import os
 import re
 import time
-from dataclasses import dataclass, field
-from typing import Any, Optional
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
 
 import anthropic
 import openai
@@ -14,7 +14,13 @@ from google import genai
 from google.genai import types
 
 from llm.cost_tracker import get_cost_tracker
-from llm.model_registry import get_fallback_chain, get_model_costs, select_optimal_model
+from llm.model_registry import (
+    MODEL_REGISTRY,
+    get_fallback_chain,
+    get_model_costs,
+    select_optimal_model,
+)
+from llm.response_cache import get_response_cache
 
 # 汎用Enumは shared.enums に一元化。後方互換のため再エクスポート。
 from shared.enums import ModelTier  # noqa: F401
@@ -25,6 +31,9 @@ logger = logging.getLogger(__name__)
 _RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
 _MAX_RETRIES_PER_MODEL: int = 2
 _BACKOFF_BASE_SECONDS: float = 1.0
+# ストリーミング: 最初のトークンまでの待ち時間上限（以降はチャンク間の無通信上限）
+_STREAM_FIRST_TOKEN_TIMEOUT: float = 30.0
+_STREAM_IDLE_TIMEOUT: float = 60.0
 
 # ReasoningTrace付きレスポンスに追加するプロンプト指示
 _REASONING_TRACE_INSTRUCTION = """
@@ -126,6 +135,10 @@ class LLMTask:
     model_override: Optional[str] = None        # 特定モデルを直接指定
     tools: Optional[list[dict[str, Any]]] = None  # Tool Use 定義（Anthropic tools 形式）
     with_trace: bool = False                    # 推論トレース（ReasoningTrace）を返すか
+    cache: bool = False                         # 応答キャッシュ + 同一リクエスト合流（opt-in）
+    semantic_cache: bool = False                # 埋め込み類似でもヒットさせるか（決定的タスクのみ）
+    cache_ttl_sec: Optional[int] = None         # キャッシュTTL（None=既定値）
+    reserve_cost_yen: Optional[float] = None    # 高コストタスク: 見積額を呼び出し前に予算確保
 
 
 @dataclass
@@ -140,6 +153,53 @@ class LLMResponse:
     fallback_used: bool = False
     fallback_from: Optional[str] = None
     reasoning_trace: Optional[ReasoningTrace] = None
+    cache_hit: Optional[str] = None             # "exact" / "semantic" / "coalesced"（ミス時None）
+    saved_cost_yen: float = 0.0                 # キャッシュヒットで節約した金額
+
+
+@dataclass
+class LLMStreamChunk:
+    """generate_stream() が返す 1 チャンク。
+
+    done=False の間は delta にテキスト差分が入る。最後の 1 件だけ done=True で、
+    response に集計済みの LLMResponse（全文・トークン数・コスト）が入る。
+    """
+    delta: str = ""
+    done: bool = False
+    response: Optional[LLMResponse] = None
+
+
+def estimate_max_cost_yen(task: LLMTask) -> float:
+    """task を primary モデルで max_tokens まで出力した場合の上限見積（reserve_cost_yen 用）。
+
+    入力トークンは文字数で近似する（日本語は 1 文字 ≈ 1 トークン以下なので多めに出る）。
+    """
+    model_id = task.model_override or select_optimal_model(
+        tier=task.tier.value,
+        requires_vision=task.requires_vision,
+        requires_structured_output=task.requires_structured_output,
+    )
+    costs = get_model_costs(model_id)
+    tokens_in = sum(len(str(m.get("content") or "")) for m in task.messages)
+    return round(tokens_in / 1000 * costs["in"] + task.max_tokens / 1000 * costs["out"], 4)
+
+
+def _response_to_cache_payload(response: LLMResponse) -> dict[str, Any]:
+    payload = asdict(response)
+    payload.pop("cache_hit", None)
+    payload.pop("saved_cost_yen", None)
+    return payload
+
+
+def _response_from_cache_payload(payload: dict[str, Any]) -> LLMResponse:
+    data = dict(payload)
+    trace = data.pop("reasoning_trace", None)
+    reasoning_trace: Optional[ReasoningTrace] = None
+    if trace:
+        reasoning_trace = ReasoningTrace(
+            **{**trace, "evidence": [Evidence(**e) for e in trace.get("evidence", [])]}
+        )
+    return LLMResponse(**data, reasoning_trace=reasoning_trace)
 
 
 def _is_retryable_exception(exc: Exception) -> bool:
@@ -203,11 +263,222 @@ class LLMClient:
 
         with_trace=True の場合、メッセージの最後のユーザーターンに推論トレース指示を
         追加してLLMに構造化JSONを出力させ、LLMResponseのreasoning_traceに格納する。
+
+        cache=True の場合は llm.response_cache を経由し、同一タスクの応答を再利用する
+        （ヒット時は ¥0 で CostTracker に記録）。同一タスクの同時呼び出しは 1 回に合流する。
+
+        reserve_cost_yen を指定すると見積額を予算から確保してから呼び出し、
+        完了後に確保を解放する（実額は通常どおり record_cost で計上）。
         """
         cost_tracker = get_cost_tracker()
+        reservation = self._reserve_budget(task, cost_tracker)
+        try:
+            return await self._generate_with_cache(task, cost_tracker)
+        finally:
+            if reservation is not None:
+                cost_tracker.release(reservation)
+
+    @staticmethod
+    def _reserve_budget(task: LLMTask, cost_tracker: Any) -> Optional[str]:
+        """予算チェック（reserve_cost_yen 指定時は確保）。超過時は 429。"""
+        if not task.company_id:
+            return None
+        if task.reserve_cost_yen:
+            return cost_tracker.reserve(task.company_id, task.reserve_cost_yen)
+        cost_tracker.check_budget(task.company_id)
+        return None
+
+    async def _generate_with_cache(self, task: LLMTask, cost_tracker: Any) -> LLMResponse:
+        if not task.cache:
+            return await self._generate_uncached(task, cost_tracker)
+
+        cache = get_response_cache()
+        start_ms = int(time.time() * 1000)
+        payload, hit_tier = await cache.lookup(task)
+        if payload is not None:
+            return self._cache_hit_response(
+                task, _response_from_cache_payload(payload), hit_tier, start_ms, cost_tracker,
+            )
+
+        async def _compute() -> LLMResponse:
+            response = await self._generate_uncached(task, cost_tracker)
+            await cache.store(task, _response_to_cache_payload(response), task.cache_ttl_sec)
+            return response
+
+        response, coalesced = await cache.coalesce(task, _compute)
+        if coalesced:
+            return self._cache_hit_response(task, response, "coalesced", start_ms, cost_tracker)
+        return response
+
+    async def generate_stream(self, task: LLMTask) -> AsyncIterator[LLMStreamChunk]:
+        """Stream a response token-by-token with fallback before the first token.
+
+        ModelInfo.supports_streaming=False のモデルは通常呼び出しに切り替え、
+        全文を 1 チャンクで返す。フォールバック・リトライは最初のトークンを
+        返す前まで有効で、それ以降のエラーはそのまま送出する（部分出力を
+        別モデルの出力とつなげない）。コストはストリーム完了時に記録する。
+
+        cache / with_trace は対象外（逐次表示する用途のため）。
+
+        Usage:
+            async for chunk in get_llm_client().generate_stream(task):
+                if chunk.done:
+                    response = chunk.response
+                else:
+                    send(chunk.delta)
+        """
+        cost_tracker = get_cost_tracker()
+        reservation = self._reserve_budget(task, cost_tracker)
+        stream = self._generate_stream_checked(task, cost_tracker)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # 呼び出し側が途中で抜けてもコスト記録（内側の finally）を先に走らせる
+            await stream.aclose()
+            if reservation is not None:
+                cost_tracker.release(reservation)
+
+    async def _generate_stream_checked(
+        self, task: LLMTask, cost_tracker: Any,
+    ) -> AsyncGenerator[LLMStreamChunk, None]:
+        chain = self._build_chain(task)
+        first_model = chain[0]
+        last_error: Optional[Exception] = None
+
+        for i, model_id in enumerate(chain):
+            info = MODEL_REGISTRY.get(model_id)
+            streaming = info is None or info.supports_streaming
+            for attempt in range(_MAX_RETRIES_PER_MODEL):
+                usage: dict[str, int] = {}
+                parts: list[str] = []
+                start_ms = int(time.time() * 1000)
+                if streaming:
+                    stream = self._stream_model(model_id, task, usage)
+                else:
+                    stream = self._call_model_as_stream(model_id, task, usage)
+                try:
+                    first = await asyncio.wait_for(
+                        stream.__anext__(), timeout=_STREAM_FIRST_TOKEN_TIMEOUT,
+                    )
+                except StopAsyncIteration:
+                    first = ""
+                except Exception as exc:
+                    await stream.aclose()
+                    last_error = exc
+                    if _is_retryable_exception(exc) and attempt < _MAX_RETRIES_PER_MODEL - 1:
+                        backoff = _BACKOFF_BASE_SECONDS * (2 ** attempt)
+                        logger.warning(
+                            "LLM stream retryable error (%s) attempt=%d/%d, backoff=%.1fs: %s",
+                            model_id, attempt + 1, _MAX_RETRIES_PER_MODEL, backoff, exc,
+                        )
+                        await asyncio.sleep(backoff)
+                        continue
+                    logger.error("LLM stream error (%s): %s", model_id, exc)
+                    break
+
+                # 最初のトークン以降はフォールバックしない
+                first_token_ms = int(time.time() * 1000) - start_ms
+                if i > 0:
+                    logger.warning(
+                        "LLM fallback: %s -> %s (task=%s, company=%s, stream)",
+                        first_model, model_id, task.task_type, task.company_id,
+                    )
+                response: Optional[LLMResponse] = None
+                try:
+                    if first:
+                        parts.append(first)
+                        yield LLMStreamChunk(delta=first)
+                    while True:
+                        try:
+                            delta = await asyncio.wait_for(
+                                stream.__anext__(), timeout=_STREAM_IDLE_TIMEOUT,
+                            )
+                        except StopAsyncIteration:
+                            break
+                        if delta:
+                            parts.append(delta)
+                            yield LLMStreamChunk(delta=delta)
+                finally:
+                    await stream.aclose()
+                    # 呼び出し側の切断・途中エラーでも消費済みトークン分は記録する
+                    response = self._stream_response(
+                        model_id, task, "".join(parts), usage, start_ms,
+                        fallback_from=first_model if i > 0 else None,
+                    )
+                    if task.company_id:
+                        cost_tracker.record_cost(task.company_id, response.cost_yen)
+                    logger.info(
+                        "LLM call: model=%s tokens=%d+%d cost=¥%.4f latency=%dms task=%s "
+                        "stream=yes first_token=%dms",
+                        model_id, response.tokens_in, response.tokens_out, response.cost_yen,
+                        response.latency_ms, task.task_type, first_token_ms,
+                    )
+
+                yield LLMStreamChunk(done=True, response=response)
+                return
+
+        raise RuntimeError(
+            f"All models in {task.tier.value} chain failed. Last error: {last_error}"
+        )
+
+    @staticmethod
+    def _stream_response(
+        model_id: str,
+        task: LLMTask,
+        content: str,
+        usage: dict[str, int],
+        start_ms: int,
+        fallback_from: Optional[str],
+    ) -> LLMResponse:
+        """ストリーム完了（または中断）時点の集計レスポンスを作る。"""
+        # usage が返らないプロバイダー・中断時は文字数から概算（日本語≒1文字1トークン）
+        tokens_in = usage.get("tokens_in") or sum(
+            len(m.get("content", "")) for m in task.messages
+        )
+        tokens_out = usage.get("tokens_out") or len(content)
+        costs = get_model_costs(model_id)
+        cost_yen = tokens_in / 1000 * costs["in"] + tokens_out / 1000 * costs["out"]
+        return LLMResponse(
+            content=content,
+            model_used=model_id,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            cost_yen=round(cost_yen, 4),
+            latency_ms=int(time.time() * 1000) - start_ms,
+            fallback_used=fallback_from is not None,
+            fallback_from=fallback_from,
+        )
+
+    def _cache_hit_response(
+        self,
+        task: LLMTask,
+        cached: LLMResponse,
+        hit_tier: Optional[str],
+        start_ms: int,
+        cost_tracker: Any,
+    ) -> LLMResponse:
+        """キャッシュヒット時のレスポンス（¥0 で記録し、節約額をログに出す）。"""
+        latency_ms = int(time.time() * 1000) - start_ms
+        response = replace(
+            cached,
+            cost_yen=0.0,
+            latency_ms=latency_ms,
+            cache_hit=hit_tier,
+            saved_cost_yen=cached.cost_yen,
+        )
         if task.company_id:
-            cost_tracker.check_budget(task.company_id)
+            cost_tracker.record_cache_hit(task.company_id, saved_yen=cached.cost_yen)
+        logger.info(
+            "LLM call: model=%s tokens=%d+%d cost=¥0.0000 latency=%dms task=%s "
+            "cache=%s saved=¥%.4f",
+            cached.model_used, cached.tokens_in, cached.tokens_out, latency_ms,
+            task.task_type, hit_tier, cached.cost_yen,
+        )
+        return response
 
+    async def _generate_uncached(self, task: LLMTask, cost_tracker: Any) -> LLMResponse:
+        """プロバイダー呼び出し本体（フォールバック・リトライ・コスト記録）。"""
         # with_trace=True の場合はメッセージを拡張（元のtaskを変更しない）
         effective_task = task
         if task.with_trace:
@@ -227,22 +498,9 @@ class LLMClient:
                     "content": _REASONING_TRACE_INSTRUCTION.strip(),
                 })
             # 元のtaskを変更せずに新しいオブジェクトを作成
-            from dataclasses import replace
             effective_task = replace(task, messages=extended_messages)
 
-        # フォールバックチェイン構築
-        if effective_task.model_override:
-            chain: list[str] = [effective_task.model_override]
-        else:
-            primary = select_optimal_model(
-                tier=effective_task.tier.value,
-                requires_vision=effective_task.requires_vision,
-                requires_structured_output=effective_task.requires_structured_output,
-            )
-            fallback_chain = get_fallback_chain(effective_task.tier.value)
-            # primary が先頭になるよう重複を排除して結合
-            chain = [primary] + [m for m in fallback_chain if m != primary]
-
+        chain = self._build_chain(effective_task)
         first_model = chain[0]
         last_error: Optional[Exception] = None
 
@@ -315,6 +573,19 @@ class LLMClient:
             f"All models in {task.tier.value} chain failed. Last error: {last_error}"
         )
 
+    def _build_chain(self, task: LLMTask) -> list[str]:
+        """フォールバックチェイン（primary が先頭）を構築する。"""
+        if task.model_override:
+            return [task.model_override]
+        primary = select_optimal_model(
+            tier=task.tier.value,
+            requires_vision=task.requires_vision,
+            requires_structured_output=task.requires_structured_output,
+        )
+        fallback_chain = get_fallback_chain(task.tier.value)
+        # primary が先頭になるよう重複を排除して結合
+        return [primary] + [m for m in fallback_chain if m != primary]
+
     # ------------------------------------------------------------------
     # 内部ディスパッチ
     # ------------------------------------------------------------------
@@ -328,13 +599,33 @@ class LLMClient:
             return await self._call_openai(model_id, task)
         raise ValueError(f"Unknown model: {model_id}")
 
+    def _stream_model(
+        self, model_id: str, task: LLMTask, usage: dict[str, int],
+    ) -> AsyncGenerator[str, None]:
+        """テキスト差分を返す非同期イテレータ。usage は完了時に tokens_in/out が入る。"""
+        if model_id.startswith("gemini"):
+            return self._stream_gemini(model_id, task, usage)
+        if model_id.startswith("claude"):
+            return self._stream_anthropic(model_id, task, usage)
+        if model_id.startswith("gpt"):
+            return self._stream_openai(model_id, task, usage)
+        return self._call_model_as_stream(model_id, task, usage)
+
+    async def _call_model_as_stream(
+        self, model_id: str, task: LLMTask, usage: dict[str, int],
+    ) -> AsyncGenerator[str, None]:
+        """ストリーミング非対応モデル用: 通常呼び出しの結果を 1 チャンクで返す。"""
+        result = await asyncio.wait_for(self._call_model(model_id, task), timeout=30.0)
+        usage["tokens_in"] = result["tokens_in"]
+        usage["tokens_out"] = result["tokens_out"]
+        yield result["content"] or ""
+
     # ------------------------------------------------------------------
     # プロバイダー別呼び出し
     # ------------------------------------------------------------------
 
-    async def _call_gemini(self, model_id: str, task: LLMTask) -> dict[str, Any]:
-        client = self._ensure_gemini()
-
+    @staticmethod
+    def _gemini_request(task: LLMTask) -> tuple[list[types.Content], types.GenerateContentConfig]:
         system_msg: Optional[str] = None
         contents: list[types.Content] = []
         for msg in task.messages:
@@ -357,7 +648,11 @@ class LLMClient:
             config_kwargs["response_mime_type"] = "application/json"
             config_kwargs["response_schema"] = task.response_format
 
-        config = types.GenerateContentConfig(**config_kwargs)
+        return contents, types.GenerateContentConfig(**config_kwargs)
+
+    async def _call_gemini(self, model_id: str, task: LLMTask) -> dict[str, Any]:
+        client = self._ensure_gemini()
+        contents, config = self._gemini_request(task)
 
         response = await client.aio.models.generate_content(
             model=model_id,
@@ -371,9 +666,8 @@ class LLMClient:
             "tokens_out": response.usage_metadata.candidates_token_count,
         }
 
-    async def _call_anthropic(self, model_id: str, task: LLMTask) -> dict[str, Any]:
-        client = self._ensure_anthropic()
-
+    @staticmethod
+    def _anthropic_request(model_id: str, task: LLMTask) -> dict[str, Any]:
         # Anthropic プロンプトキャッシング戦略:
         # cache_control: {"type": "ephemeral"} を付与すると、そのブロックまでの
         # 入力がキャッシュされ、5分TTL内の再リクエストでキャッシュヒットする。
@@ -443,11 +737,11 @@ class LLMClient:
         # 実装時: messages の適切な位置の content を
         #   [{"type": "text", "text": msg, "cache_control": _CACHE_CONTROL}]
         # に変換する。
+        return kwargs
 
-        response = await client.messages.create(**kwargs)
-
-        # キャッシュ利用状況をログ出力
-        usage = response.usage
+    @staticmethod
+    def _log_anthropic_cache_usage(usage: Any, model_id: str, task: LLMTask) -> None:
+        """キャッシュ利用状況をログ出力する。"""
         cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
         cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
         if cache_read > 0 or cache_creation > 0:
@@ -457,6 +751,11 @@ class LLMClient:
                 cache_read, cache_creation, model_id, task.task_type,
             )
 
+    async def _call_anthropic(self, model_id: str, task: LLMTask) -> dict[str, Any]:
+        client = self._ensure_anthropic()
+        response = await client.messages.create(**self._anthropic_request(model_id, task))
+        self._log_anthropic_cache_usage(response.usage, model_id, task)
+
         return {
             "content": response.content[0].text,
             "tokens_in": response.usage.input_tokens,
@@ -480,6 +779,65 @@ class LLMClient:
         }
 
 
+    # ------------------------------------------------------------------
+    # プロバイダー別ストリーミング
+    # ------------------------------------------------------------------
+
+    async def _stream_gemini(
+        self, model_id: str, task: LLMTask, usage: dict[str, int],
+    ) -> AsyncGenerator[str, None]:
+        client = self._ensure_gemini()
+        contents, config = self._gemini_request(task)
+
+        stream = await client.aio.models.generate_content_stream(
+            model=model_id,
+            contents=contents,
+            config=config,
+        )
+        async for chunk in stream:
+            # usage_metadata は累積値で届くため最後の値を採用する
+            if chunk.usage_metadata is not None:
+                usage["tokens_in"] = chunk.usage_metadata.prompt_token_count or 0
+                usage["tokens_out"] = chunk.usage_metadata.candidates_token_count or 0
+            if chunk.text:
+                yield chunk.text
+
+    async def _stream_anthropic(
+        self, model_id: str, task: LLMTask, usage: dict[str, int],
+    ) -> AsyncGenerator[str, None]:
+        client = self._ensure_anthropic()
+
+        async with client.messages.stream(**self._anthropic_request(model_id, task)) as stream:
+            async for text in stream.text_stream:
+                yield text
+            final = await stream.get_final_message()
+
+        self._log_anthropic_cache_usage(final.usage, model_id, task)
+        usage["tokens_in"] = final.usage.input_tokens
+        usage["tokens_out"] = final.usage.output_tokens
+
+    async def _stream_openai(
+        self, model_id: str, task: LLMTask, usage: dict[str, int],
+    ) -> AsyncGenerator[str, None]:
+        client = self._ensure_openai()
+
+        stream = await client.chat.completions.create(
+            model=model_id,
+            messages=task.messages,  # type: ignore[arg-type]
+            max_tokens=task.max_tokens,
+            temperature=task.temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            # include_usage 指定時、最後のチャンクは choices が空で usage のみ
+            if chunk.usage is not None:
+                usage["tokens_in"] = chunk.usage.prompt_tokens
+                usage["tokens_out"] = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
 # ------------------------------------------------------------------
 # シングルトン
 # ------------------------------------------------------------------
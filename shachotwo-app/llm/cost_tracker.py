@@ -1,7 +1,21 @@
 """テナント別LLMコスト追跡。
 
 月間コスト上限を超えたテナントのLLM呼び出しをブロックする。
-MVP: インメモリ追跡。Phase 2+でDBに永続化。
+
+check_budget / record_cost はプロセス内の集計ビューだけを読み書きし、LLM呼び出しごとの
+ネットワーク往復は発生しない。共有ストア（env LLM_COST_BACKEND）を設定すると、
+バックグラウンドの同期ループ（start_sync）が未反映の増分をまとめて送り、全プロセス合算の
+値でビューを更新する（他プロセス分の反映は最大 LLM_COST_SYNC_INTERVAL_SEC 遅れ）:
+
+    memory（デフォルト）: プロセス内のみ（再起動で消える）
+    redis: REDIS_URL のハッシュに HINCRBYFLOAT で加算（全プロセス合算）。
+           llm_cost_monthly（Postgres）にも一定間隔でまとめて加算し、Redis 側の
+           キーが消えた場合は Postgres の値から復元する。
+    postgres: llm_cost_monthly を RPC で直接加算（Redis なし構成向け）
+
+高コストなタスクは reserve() で見積額を先に確保し、settle() で実額に精算する。
+確保中の額も予算判定に含める。redis 構成ではプロセスごとの確保額を同期時に
+共有する（更新が途絶えたプロセスの確保額は失効扱い）。
 
 Usage:
     from llm.cost_tracker import CostTracker
@@ -9,12 +23,21 @@ Usage:
     tracker = CostTracker()
     tracker.check_budget(company_id)       # 超過時はHTTPException(429)
     tracker.record_cost(company_id, 0.5)   # ¥0.5を記録
+    tracker.record_cache_hit(company_id, saved_yen=0.5)  # キャッシュヒット（¥0）を記録
     status = tracker.get_status(company_id) # 現在の使用状況
+
+    rid = tracker.reserve(company_id, 30.0)  # 見積額を確保（超過時は429）
+    tracker.settle(rid, actual_yen)          # 確保を解放して実額を記録
 """
+import asyncio
 import logging
+import os
 import time
+import uuid
 from collections import defaultdict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, fields
+from typing import Optional, Protocol
+
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
@@ -25,6 +48,17 @@ DEFAULT_MONTHLY_BUDGET_YEN = 50_000
 # 警告閾値（上限の80%で警告ログ）
 WARNING_THRESHOLD = 0.80
 
+# 共有ストアとの同期間隔
+COST_SYNC_INTERVAL_SEC = float(os.environ.get("LLM_COST_SYNC_INTERVAL_SEC", "5"))
+# redis 構成で Postgres へまとめて書き出す間隔
+COST_DURABLE_FLUSH_INTERVAL_SEC = float(os.environ.get("LLM_COST_DURABLE_FLUSH_SEC", "30"))
+_REDIS_KEY_PREFIX = "llmcost:"
+# 月が変わった後も前月分を参照できるよう少し長めに保持
+_REDIS_KEY_TTL_SEC = 40 * 24 * 3600
+# この時間以上更新のないプロセスの確保額は無視する（クラッシュ時のリーク防止）
+_RESERVATION_STALE_SEC = COST_SYNC_INTERVAL_SEC * 3
+_RESERVED_FIELD_PREFIX = "reserved:"
+
 
 @dataclass
 class TenantCostRecord:
@@ -35,13 +69,240 @@ class TenantCostRecord:
     last_updated: float = 0.0
     budget_yen: float = DEFAULT_MONTHLY_BUDGET_YEN
     warning_sent: bool = False
+    cache_hit_count: int = 0
+    saved_cost_yen: float = 0.0  # 応答キャッシュで節約した金額
+    reserved_yen: float = 0.0    # reserve() で確保中の見積額
+    last_synced: float = 0.0     # 共有ストアの値を最後に反映した時刻
+
+
+@dataclass
+class CostDelta:
+    """共有ストアへ送る増分、またはストア上の合計値。
+
+    reserved_yen はストアから読んだ「他プロセスの確保額」の合計にだけ使う。
+    """
+    cost_yen: float = 0.0
+    request_count: int = 0
+    cache_hit_count: int = 0
+    saved_cost_yen: float = 0.0
+    reserved_yen: float = 0.0
+
+    def add(self, other: "CostDelta") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def is_zero(self) -> bool:
+        return all(not getattr(self, f.name) for f in fields(self))
+
+
+class CostStore(Protocol):
+    async def apply(
+        self, month: str, deltas: dict[str, CostDelta], reserved: dict[str, float],
+    ) -> None: ...
+    async def fetch(self, month: str, company_ids: list[str]) -> dict[str, CostDelta]: ...
+    async def close(self) -> None: ...
+
+
+class PostgresCostStore:
+    """llm_cost_monthly テーブル（RPC increment_llm_cost_monthly で加算）。
+
+    確保額は永続化しない（確保はプロセス内のみで有効）。
+    """
+
+    async def apply(
+        self, month: str, deltas: dict[str, CostDelta], reserved: dict[str, float],
+    ) -> None:
+        # llm → db の依存を import 時に持ち込まないよう遅延インポート
+        from db.supabase import execute, get_service_client
+
+        rows = [
+            {
+                "company_id": company_id,
+                "cost_yen": d.cost_yen,
+                "request_count": d.request_count,
+                "cache_hit_count": d.cache_hit_count,
+                "saved_cost_yen": d.saved_cost_yen,
+            }
+            for company_id, d in deltas.items()
+        ]
+        if not rows:
+            return
+        await execute(get_service_client().rpc(
+            "increment_llm_cost_monthly", {"p_month": month, "p_rows": rows},
+        ))
+
+    async def fetch(self, month: str, company_ids: list[str]) -> dict[str, CostDelta]:
+        from db.supabase import execute, get_service_client
+
+        if not company_ids:
+            return {}
+        result = await execute(
+            get_service_client().table("llm_cost_monthly").select(
+                "company_id, cost_yen, request_count, cache_hit_count, saved_cost_yen"
+            ).eq("month", month).in_("company_id", company_ids)
+        )
+        return {
+            str(row["company_id"]): CostDelta(
+                cost_yen=float(row.get("cost_yen") or 0),
+                request_count=int(row.get("request_count") or 0),
+                cache_hit_count=int(row.get("cache_hit_count") or 0),
+                saved_cost_yen=float(row.get("saved_cost_yen") or 0),
+            )
+            for row in (result.data or [])
+        }
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisCostStore:
+    """Redis ハッシュ（llmcost:{month}:{company_id}）で全プロセスの合計を持つ。
+
+    durable を渡すと、加算分を COST_DURABLE_FLUSH_INTERVAL_SEC ごとにまとめて
+    Postgres へ書き出し、Redis のキーが無いテナントは Postgres の値で初期化する。
+    確保額はプロセスごとのフィールド reserved:{instance_id} = "額:時刻" で上書き共有する。
+    """
+
+    def __init__(self, url: str, durable: Optional[PostgresCostStore] = None) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.durable = durable
+        self.instance_id = uuid.uuid4().hex[:12]
+        # 確保額を書き込んだことのある (month, company_id)（0 に戻す必要があるもの）
+        self._reserved_keys: set[tuple[str, str]] = set()
+        self._durable_pending: dict[tuple[str, str], CostDelta] = defaultdict(CostDelta)
+        self._durable_flushed_at = time.monotonic()
+
+    @staticmethod
+    def _key(month: str, company_id: str) -> str:
+        return f"{_REDIS_KEY_PREFIX}{month}:{company_id}"
+
+    async def apply(
+        self, month: str, deltas: dict[str, CostDelta], reserved: dict[str, float],
+    ) -> None:
+        await self._seed_missing(month, list(deltas))
+
+        pipe = self._redis.pipeline(transaction=False)
+        for company_id, d in deltas.items():
+            key = self._key(month, company_id)
+            pipe.hincrbyfloat(key, "cost_yen", d.cost_yen)
+            pipe.hincrby(key, "request_count", d.request_count)
+            pipe.hincrby(key, "cache_hit_count", d.cache_hit_count)
+            pipe.hincrbyfloat(key, "saved_cost_yen", d.saved_cost_yen)
+            pipe.expire(key, _REDIS_KEY_TTL_SEC)
+        field = _RESERVED_FIELD_PREFIX + self.instance_id
+        now = time.time()
+        for company_id in set(reserved) | {cid for m, cid in self._reserved_keys if m == month}:
+            amount = reserved.get(company_id, 0.0)
+            pipe.hset(self._key(month, company_id), field, f"{amount}:{now}")
+            if amount:
+                self._reserved_keys.add((month, company_id))
+            else:
+                self._reserved_keys.discard((month, company_id))
+        await pipe.execute()
+
+        if self.durable is not None:
+            for company_id, d in deltas.items():
+                self._durable_pending[(month, company_id)].add(d)
+            if time.monotonic() - self._durable_flushed_at >= COST_DURABLE_FLUSH_INTERVAL_SEC:
+                await self.flush_durable()
+
+    async def fetch(self, month: str, company_ids: list[str]) -> dict[str, CostDelta]:
+        if not company_ids:
+            return {}
+        pipe = self._redis.pipeline(transaction=False)
+        for company_id in company_ids:
+            pipe.hgetall(self._key(month, company_id))
+        rows = await pipe.execute()
+        return {
+            company_id: CostDelta(
+                cost_yen=float(row.get("cost_yen", 0)),
+                request_count=int(row.get("request_count", 0)),
+                cache_hit_count=int(row.get("cache_hit_count", 0)),
+                saved_cost_yen=float(row.get("saved_cost_yen", 0)),
+                reserved_yen=self._others_reserved(row),
+            )
+            for company_id, row in zip(company_ids, rows) if row
+        }
+
+    def _others_reserved(self, row: dict[str, str]) -> float:
+        """他プロセスの確保額の合計（更新が途絶えたものは除外）。"""
+        own = _RESERVED_FIELD_PREFIX + self.instance_id
+        cutoff = time.time() - _RESERVATION_STALE_SEC
+        total = 0.0
+        for name, value in row.items():
+            if not name.startswith(_RESERVED_FIELD_PREFIX) or name == own:
+                continue
+            try:
+                amount, updated_at = value.split(":", 1)
+                if float(updated_at) >= cutoff:
+                    total += float(amount)
+            except ValueError:
+                continue
+        return total
+
+    async def _seed_missing(self, month: str, company_ids: list[str]) -> None:
+        """Redis にキーが無いテナントを Postgres の合計値で初期化する（HSETNX で先勝ち）。"""
+        if self.durable is None or not company_ids:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for company_id in company_ids:
+            pipe.exists(self._key(month, company_id))
+        exists = await pipe.execute()
+        missing = [cid for cid, found in zip(company_ids, exists) if not found]
+        if not missing:
+            return
+        try:
+            totals = await self.durable.fetch(month, missing)
+        except Exception as e:
+            logger.warning(f"LLM cost seed from postgres failed: {e}")
+            return
+        if not totals:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for company_id, t in totals.items():
+            key = self._key(month, company_id)
+            pipe.hsetnx(key, "cost_yen", t.cost_yen)
+            pipe.hsetnx(key, "request_count", t.request_count)
+            pipe.hsetnx(key, "cache_hit_count", t.cache_hit_count)
+            pipe.hsetnx(key, "saved_cost_yen", t.saved_cost_yen)
+        await pipe.execute()
+
+    async def flush_durable(self) -> None:
+        """Postgres への write-behind をまとめて実行する（失敗分は次回に持ち越す）。"""
+        if self.durable is None or not self._durable_pending:
+            return
+        batch, self._durable_pending = self._durable_pending, defaultdict(CostDelta)
+        self._durable_flushed_at = time.monotonic()
+        by_month: dict[str, dict[str, CostDelta]] = defaultdict(dict)
+        for (month, company_id), d in batch.items():
+            by_month[month][company_id] = d
+        for month, deltas in by_month.items():
+            try:
+                await self.durable.apply(month, deltas, {})
+            except Exception as e:
+                logger.warning(f"LLM cost write-behind failed (month={month}): {e}")
+                for company_id, d in deltas.items():
+                    self._durable_pending[(month, company_id)].add(d)
+
+    async def close(self) -> None:
+        await self.flush_durable()
+        await self._redis.aclose()
 
 
 class CostTracker:
     """テナント別LLMコスト追跡"""
 
-    def __init__(self) -> None:
+    def __init__(self, store: Optional[CostStore] = None) -> None:
         self._records: dict[str, TenantCostRecord] = defaultdict(TenantCostRecord)
+        self.store = store
+        # (month, company_id) -> 共有ストアへ未送信の増分
+        self._pending: dict[tuple[str, str], CostDelta] = defaultdict(CostDelta)
+        # reservation_id -> (company_id, month, 見積額)
+        self._reservations: dict[str, tuple[str, str, float]] = {}
+        self._sync_lock = asyncio.Lock()
+        self._sync_task: Optional[asyncio.Task] = None
 
     def _current_month_key(self) -> str:
         return time.strftime("%Y-%m")
@@ -55,20 +316,40 @@ class CostTracker:
             record.request_count = 0
             record.month_key = current_month
             record.warning_sent = False
+            record.cache_hit_count = 0
+            record.saved_cost_yen = 0.0
+            record.reserved_yen = 0.0
         return record
 
-    def check_budget(self, company_id: str) -> None:
+    def _local_reserved(self, month: str) -> dict[str, float]:
+        """このプロセスで確保中の額（テナント別）。"""
+        reserved: dict[str, float] = defaultdict(float)
+        for company_id, reserved_month, amount in self._reservations.values():
+            if reserved_month == month:
+                reserved[company_id] += amount
+        return dict(reserved)
+
+    def _track(self, record: TenantCostRecord, company_id: str, delta: CostDelta) -> None:
+        """共有ストア利用時のみ、次回同期で送る増分に積む。"""
+        if self.store is not None:
+            self._pending[(record.month_key, company_id)].add(delta)
+
+    def check_budget(self, company_id: str, estimated_yen: float = 0.0) -> None:
         """
         予算チェック。超過時は429 HTTPExceptionをraise。
 
+        確保中（reserve）の額と estimated_yen も使用額に含めて判定する。
+
         Raises:
             HTTPException(429): 月間コスト上限超過
         """
         record = self._ensure_current_month(company_id)
-        if record.total_cost_yen >= record.budget_yen:
+        committed = record.total_cost_yen + record.reserved_yen
+        if committed + estimated_yen >= record.budget_yen:
             logger.error(
                 f"LLM budget exceeded: company={company_id} "
-                f"cost=¥{record.total_cost_yen:.2f} budget=¥{record.budget_yen:.2f}"
+                f"cost=¥{record.total_cost_yen:.2f} reserved=¥{record.reserved_yen:.2f} "
+                f"estimate=¥{estimated_yen:.2f} budget=¥{record.budget_yen:.2f}"
             )
             raise HTTPException(
                 status_code=429,
@@ -85,6 +366,7 @@ class CostTracker:
         record.total_cost_yen += cost_yen
         record.request_count += 1
         record.last_updated = time.time()
+        self._track(record, company_id, CostDelta(cost_yen=cost_yen, request_count=1))
 
         # 警告閾値チェック
         if (
@@ -98,6 +380,44 @@ class CostTracker:
                 f"({record.total_cost_yen / record.budget_yen:.0%} of ¥{record.budget_yen:,.0f})"
             )
 
+    def record_cache_hit(self, company_id: str, saved_yen: float = 0.0) -> None:
+        """応答キャッシュヒットを ¥0 のリクエストとして記録し、節約額を積算"""
+        self.record_cost(company_id, 0.0)
+        record = self._records[company_id]
+        record.cache_hit_count += 1
+        record.saved_cost_yen += saved_yen
+        self._track(record, company_id, CostDelta(cache_hit_count=1, saved_cost_yen=saved_yen))
+
+    def reserve(self, company_id: str, estimated_yen: float) -> str:
+        """見積額を予算から確保し、reservation_id を返す。
+
+        Raises:
+            HTTPException(429): 確保すると月間上限を超える場合
+        """
+        self.check_budget(company_id, estimated_yen)
+        record = self._ensure_current_month(company_id)
+        record.reserved_yen += estimated_yen
+        reservation_id = uuid.uuid4().hex
+        self._reservations[reservation_id] = (company_id, record.month_key, estimated_yen)
+        return reservation_id
+
+    def release(self, reservation_id: str) -> None:
+        """確保を解放する（呼び出し失敗時など。二重解放は無視）。"""
+        entry = self._reservations.pop(reservation_id, None)
+        if entry is None:
+            return
+        company_id, month, estimated_yen = entry
+        record = self._records[company_id]
+        if record.month_key == month:
+            record.reserved_yen = max(0.0, record.reserved_yen - estimated_yen)
+
+    def settle(self, reservation_id: str, actual_yen: float) -> None:
+        """確保を解放し、実額をコストとして記録する。"""
+        entry = self._reservations.get(reservation_id)
+        self.release(reservation_id)
+        if entry is not None:
+            self.record_cost(entry[0], actual_yen)
+
     def get_status(self, company_id: str) -> dict:
         """テナントのコスト状況を取得"""
         record = self._ensure_current_month(company_id)
@@ -110,6 +430,9 @@ class CostTracker:
             "remaining_yen": round(remaining, 4),
             "usage_rate": round(record.total_cost_yen / record.budget_yen, 4) if record.budget_yen > 0 else 0,
             "request_count": record.request_count,
+            "cache_hit_count": record.cache_hit_count,
+            "saved_cost_yen": round(record.saved_cost_yen, 4),
+            "reserved_yen": round(record.reserved_yen, 4),
         }
 
     def set_budget(self, company_id: str, budget_yen: float) -> None:
@@ -120,6 +443,99 @@ class CostTracker:
     def reset(self, company_id: str) -> None:
         """テスト用: テナントのコスト記録をリセット"""
         self._records.pop(company_id, None)
+        for key in [k for k in self._pending if k[1] == company_id]:
+            del self._pending[key]
+
+    # ------------------------------------------------------------------
+    # 共有ストアとの同期
+    # ------------------------------------------------------------------
+
+    async def sync(self) -> None:
+        """未送信の増分を共有ストアへ送り、全プロセス合算の値でビューを更新する。"""
+        if self.store is None:
+            return
+        async with self._sync_lock:
+            month = self._current_month_key()
+            batch, self._pending = self._pending, defaultdict(CostDelta)
+            by_month: dict[str, dict[str, CostDelta]] = defaultdict(dict)
+            by_month[month] = {}
+            for (delta_month, company_id), d in batch.items():
+                if not d.is_zero():
+                    by_month[delta_month][company_id] = d
+            try:
+                for delta_month, deltas in by_month.items():
+                    await self.store.apply(delta_month, deltas, self._local_reserved(delta_month))
+            except Exception as e:
+                logger.warning(f"LLM cost sync failed, retrying next interval: {e}")
+                for key, d in batch.items():
+                    self._pending[key].add(d)
+                return
+
+            company_ids = [cid for cid, r in self._records.items() if r.month_key == month]
+            try:
+                totals = await self.store.fetch(month, company_ids)
+            except Exception as e:
+                logger.warning(f"LLM cost refresh failed: {e}")
+                return
+
+            now = time.time()
+            local_reserved = self._local_reserved(month)
+            for company_id, t in totals.items():
+                record = self._records.get(company_id)
+                if record is None or record.month_key != month:
+                    continue
+                # fetch 中に積まれた未送信分を上乗せする
+                unsent = self._pending.get((month, company_id)) or CostDelta()
+                record.total_cost_yen = t.cost_yen + unsent.cost_yen
+                record.request_count = t.request_count + unsent.request_count
+                record.cache_hit_count = t.cache_hit_count + unsent.cache_hit_count
+                record.saved_cost_yen = t.saved_cost_yen + unsent.saved_cost_yen
+                record.reserved_yen = t.reserved_yen + local_reserved.get(company_id, 0.0)
+                record.last_synced = now
+
+    async def _sync_loop(self, interval_sec: float) -> None:
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"LLM cost sync loop error: {e}")
+
+    async def start_sync(self, interval_sec: float = COST_SYNC_INTERVAL_SEC) -> None:
+        """同期ループを起動する（共有ストア未設定時は何もしない）。"""
+        if self.store is None or self._sync_task is not None:
+            return
+        await self.sync()
+        self._sync_task = asyncio.create_task(self._sync_loop(interval_sec))
+        logger.info(f"LLM cost sync started: store={type(self.store).__name__}")
+
+    async def stop_sync(self) -> None:
+        """同期ループを止め、残りの増分を送ってストアを閉じる。"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if self.store is not None:
+            await self.sync()
+            await self.store.close()
+
+
+def _build_store() -> Optional[CostStore]:
+    backend = os.environ.get("LLM_COST_BACKEND", "memory").lower()
+    if backend == "postgres":
+        return PostgresCostStore()
+    if backend == "redis":
+        try:
+            return RedisCostStore(
+                os.environ.get("REDIS_URL", "redis://localhost:6379"),
+                durable=PostgresCostStore(),
+            )
+        except Exception as e:
+            logger.warning(f"LLM cost redis backend unavailable, using memory: {e}")
+    return None
 
 
 # シングルトンインスタンス
@@ -127,8 +543,8 @@ _global_tracker: CostTracker | None = None
 
 
 def get_cost_tracker() -> CostTracker:
-    """グローバルCostTrackerを取得"""
+    """グローバルCostTrackerを取得（共有ストアは env LLM_COST_BACKEND で選択）"""
     global _global_tracker
     if _global_tracker is None:
-        _global_tracker = CostTracker()
+        _global_tracker = CostTracker(store=_build_store())
     return _global_tracker
@@ -0,0 +1,320 @@
+"""LLM応答キャッシュ + 同一リクエストの合流（opt-in）。
+
+LLMTask.cache=True のタスクだけが対象。キャッシュキーはテナント・モデル階層・
+メッセージ・temperature・response_format 等のハッシュで、テナント間で共有されない。
+
+- exact tier: キー完全一致
+- semantic tier: LLMTask.semantic_cache=True のとき、最後のユーザーメッセージの
+  埋め込みが既存エントリと閾値以上に近ければヒット（決定的タスク向け）
+- 同一キーの in-flight リクエストは 1 回のプロバイダー呼び出しに合流する
+
+バックエンド（env LLM_CACHE_BACKEND）:
+    memory（デフォルト）: プロセス内 LRU + TTL
+    redis: REDIS_URL に保存（複数プロセスで共有）。semantic index はプロセス内のみ。
+
+Usage:
+    task = LLMTask(messages=[...], task_type="query_expand", cache=True)
+    response = await get_llm_client().generate(task)   # 2回目以降は ¥0
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SEC = int(os.environ.get("LLM_CACHE_TTL_SEC", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_SIMILARITY_THRESHOLD = float(os.environ.get("LLM_CACHE_SEMANTIC_THRESHOLD", "0.97"))
+# semantic index に保持するバケット（テナント×タスク）あたりの最大件数
+SEMANTIC_MAX_PER_BUCKET = 256
+_REDIS_KEY_PREFIX = "llmcache:"
+
+EmbedFn = Callable[[str], Awaitable[list[float]]]
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[dict]: ...
+    async def set(self, key: str, value: dict, ttl_sec: int) -> None: ...
+    async def delete(self, key: str) -> None: ...
+
+
+class InMemoryCacheBackend:
+    """プロセス内 LRU + TTL。"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict, ttl_sec: int) -> None:
+        self._data[key] = (time.time() + ttl_sec, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """Redis バックエンド。障害時はミス扱いで素通しする（キャッシュで本処理を止めない）。"""
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        try:
+            raw = await self._redis.get(_REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"LLM cache redis get failed: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict, ttl_sec: int) -> None:
+        try:
+            await self._redis.set(
+                _REDIS_KEY_PREFIX + key, json.dumps(value, ensure_ascii=False), ex=ttl_sec,
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache redis set failed: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(_REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"LLM cache redis delete failed: {e}")
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _hash(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def build_cache_key(task: Any) -> str:
+    """テナント・モデル階層・メッセージ・生成パラメータから決定的なキーを作る。"""
+    return _hash({
+        "company_id": task.company_id or "",
+        "tier": getattr(task.tier, "value", task.tier),
+        "model_override": task.model_override,
+        "messages": task.messages,
+        "temperature": task.temperature,
+        "max_tokens": task.max_tokens,
+        "response_format": task.response_format,
+        "tools": task.tools,
+        "with_trace": task.with_trace,
+        "requires_vision": task.requires_vision,
+        "requires_structured_output": task.requires_structured_output,
+    })
+
+
+def _semantic_bucket(task: Any) -> str:
+    """最後のユーザーメッセージ以外が一致するタスク同士だけを比較対象にする。"""
+    context = [m for m in task.messages if m.get("role") != "user"]
+    return _hash({
+        "company_id": task.company_id or "",
+        "tier": getattr(task.tier, "value", task.tier),
+        "task_type": task.task_type,
+        "context": context,
+        "temperature": task.temperature,
+        "response_format": task.response_format,
+        "with_trace": task.with_trace,
+    })
+
+
+def _last_user_text(task: Any) -> str:
+    for msg in reversed(task.messages):
+        if msg.get("role") == "user":
+            return str(msg.get("content", ""))
+    return ""
+
+
+async def _default_embed(text: str) -> list[float]:
+    # llm → brain の循環を避けるため遅延インポート
+    from brain.knowledge.embeddings import generate_query_embedding
+
+    return await generate_query_embedding(text)
+
+
+class ResponseCache:
+    """応答キャッシュ本体（exact / semantic / in-flight 合流）。"""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        embed_fn: Optional[EmbedFn] = None,
+        ttl_sec: int = DEFAULT_TTL_SEC,
+        similarity_threshold: float = SEMANTIC_SIMILARITY_THRESHOLD,
+    ) -> None:
+        self.backend: CacheBackend = backend or InMemoryCacheBackend()
+        self.embed_fn: EmbedFn = embed_fn or _default_embed
+        self.ttl_sec = ttl_sec
+        self.similarity_threshold = similarity_threshold
+        self._semantic_index: dict[str, list[tuple[list[float], str, float]]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._recent_vectors: OrderedDict[str, list[float]] = OrderedDict()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "coalesced": 0}
+
+    async def lookup(self, task: Any) -> tuple[Optional[dict], Optional[str]]:
+        """(payload, hit_tier) を返す。ミス時は (None, None)。"""
+        key = build_cache_key(task)
+        payload = await self.backend.get(key)
+        if payload is not None:
+            self.stats["exact_hits"] += 1
+            return payload, "exact"
+
+        if getattr(task, "semantic_cache", False):
+            payload = await self._semantic_lookup(task)
+            if payload is not None:
+                self.stats["semantic_hits"] += 1
+                return payload, "semantic"
+
+        self.stats["misses"] += 1
+        return None, None
+
+    async def store(self, task: Any, payload: dict, ttl_sec: Optional[int] = None) -> None:
+        ttl = ttl_sec or self.ttl_sec
+        key = build_cache_key(task)
+        await self.backend.set(key, payload, ttl)
+        if getattr(task, "semantic_cache", False):
+            await self._semantic_add(task, key, ttl)
+
+    async def _embed(self, task: Any) -> Optional[list[float]]:
+        text = _last_user_text(task)
+        # lookup ミス直後の store で同じテキストを再度埋め込まないよう直近分を保持
+        vector = self._recent_vectors.get(text)
+        if vector is not None:
+            return vector
+        try:
+            vector = await self.embed_fn(text)
+        except Exception as e:
+            logger.warning(f"LLM semantic cache embedding failed: {e}")
+            return None
+        self._recent_vectors[text] = vector
+        while len(self._recent_vectors) > 128:
+            self._recent_vectors.popitem(last=False)
+        return vector
+
+    async def _semantic_lookup(self, task: Any) -> Optional[dict]:
+        entries = self._semantic_index.get(_semantic_bucket(task))
+        if not entries:
+            return None
+        vector = await self._embed(task)
+        if vector is None:
+            return None
+        now = time.time()
+        best_key, best_score = None, self.similarity_threshold
+        for emb, key, expires_at in entries:
+            if expires_at <= now:
+                continue
+            score = _cosine(vector, emb)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        return await self.backend.get(best_key)
+
+    async def _semantic_add(self, task: Any, key: str, ttl_sec: int) -> None:
+        vector = await self._embed(task)
+        if vector is None:
+            return
+        now = time.time()
+        bucket = self._semantic_index.setdefault(_semantic_bucket(task), [])
+        bucket[:] = [e for e in bucket if e[2] > now]
+        bucket.append((vector, key, now + ttl_sec))
+        del bucket[:-SEMANTIC_MAX_PER_BUCKET]
+
+    async def coalesce(self, task: Any, compute: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """同一キーの in-flight 呼び出しを合流させる。(result, coalesced) を返す。
+
+        先行呼び出しがキャンセルされた場合、待機者はキャンセルされず自分で計算し直す
+        （最初に再開した待機者が新しい先行呼び出しになり、残りはそれに合流する）。
+        """
+        key = build_cache_key(task)
+        while (pending := self._inflight.get(key)) is not None:
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # 待機者自身のキャンセル
+                continue
+            self.stats["coalesced"] += 1
+            return result, True
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # 待機者がいない場合の "exception was never retrieved" 警告を抑止
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """テスト用: semantic index と統計をリセット（backend は呼び出し側で）。"""
+        self._semantic_index.clear()
+        self._inflight.clear()
+        self._recent_vectors.clear()
+        for k in self.stats:
+            self.stats[k] = 0
+
+
+# シングルトン
+_global_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """グローバル ResponseCache を取得（backend は env LLM_CACHE_BACKEND で選択）。"""
+    global _global_cache
+    if _global_cache is None:
+        backend: CacheBackend = InMemoryCacheBackend()
+        if os.environ.get("LLM_CACHE_BACKEND", "memory").lower() == "redis":
+            try:
+                backend = RedisCacheBackend(os.environ.get("REDIS_URL", "redis://localhost:6379"))
+            except Exception as e:
+                logger.warning(f"LLM cache redis backend unavailable, using memory: {e}")
+        _global_cache = ResponseCache(backend=backend)
+    return _global_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """テスト・DI 用にグローバルキャッシュを差し替える。"""
+    global _global_cache
+    _global_cache = cache
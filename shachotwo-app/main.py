@@ -72,6 +72,16 @@ from security.headers_middleware import SecurityHeadersMiddleware
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle."""
+    # 監査ログのバッチ書き込み
+    from security.audit_middleware import start_audit_writer
+    await start_audit_writer()
+    # LLMコスト同期 + BPOパイプライン事前import（ENABLE_BPO_ORCHESTRATOR=1 または ENABLE_PIPELINE_WARMUP=1 の場合のみ）
+    # 独立ワーカー（queue_worker.main）と共通
+    from workers.bpo.manager.lifecycle import start_bpo_runtime, stop_bpo_runtime
+    await start_bpo_runtime(warm_pipelines=any(
+        os.environ.get(flag, "").lower() in ("1", "true", "yes")
+        for flag in ("ENABLE_BPO_ORCHESTRATOR", "ENABLE_PIPELINE_WARMUP")
+    ))
     # 営業BPOスケジューラ起動（ENABLE_SALES_SCHEDULER=1 の場合のみ）
     if os.environ.get("ENABLE_SALES_SCHEDULER", "").lower() in ("1", "true", "yes"):
         from workers.bpo.sales.scheduler import start_scheduler
@@ -80,19 +90,48 @@ async def lifespan(app: FastAPI):
     if os.environ.get("ENABLE_BPO_ORCHESTRATOR", "").lower() in ("1", "true", "yes"):
         from workers.bpo.manager.orchestrator import start_orchestrator
         await start_orchestrator()
+    # ナレッジ埋め込みワーカー起動（ENABLE_EMBEDDING_WORKER=1 の場合のみ）
+    if os.environ.get("ENABLE_EMBEDDING_WORKER", "").lower() in ("1", "true", "yes"):
+        from brain.knowledge.embeddings import start_embedding_worker
+        await start_embedding_worker()
     yield
-    # BPOオーケストレータ停止
+    # ナレッジ埋め込みワーカー停止
+    try:
+        from brain.knowledge.embeddings import stop_embedding_worker
+        await stop_embedding_worker()
+    except Exception:
+        pass
+    # BPOオーケストレータ停止（プロセス内キューワーカーの drain を含む）
     try:
         from workers.bpo.manager.orchestrator import stop_orchestrator
         await stop_orchestrator()
     except Exception:
         pass
+    try:
+        from workers.bpo.manager.task_queue import close_task_queue
+        await close_task_queue()
+    except Exception:
+        pass
     # 営業BPOスケジューラ停止
     try:
         from workers.bpo.sales.scheduler import stop_scheduler
         await stop_scheduler()
     except Exception:
         pass
+    # 未同期のLLMコストを書き出し、SaaS コネクタの共有 HTTP 接続プールを閉じる
+    await stop_bpo_runtime()
+    # 未書き込みの監査ログを書き出す
+    try:
+        from security.audit_middleware import stop_audit_writer
+        await stop_audit_writer()
+    except Exception:
+        pass
+    # DB接続プールを閉じる
+    try:
+        from db.supabase import close_clients
+        await close_clients()
+    except Exception:
+        pass
 
 
 app = FastAPI(
@@ -121,7 +160,7 @@ app.add_middleware(
 # SOC2準備: セキュリティヘッダー（全レスポンスに付与）
 app.add_middleware(SecurityHeadersMiddleware)
 
-# SOC2準備: 監査ログミドルウェア（ip_address/user_agentをリクエストstateに付与）
+# SOC2準備: 監査ログミドルウェア（ip_address/user_agentを監査コンテキスト・リクエストstateに付与）
 app.add_middleware(AuditLogMiddleware)
 
 # セキュリティ: グローバル例外ハンドラ（本番で内部エラー情報を隠蔽）
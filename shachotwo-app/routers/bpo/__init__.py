@@ -41,5 +41,5 @@ bpo_router.include_router(staffing_router, prefix="/staffing", tags=["人材派
 bpo_router.include_router(architecture_router, prefix="/architecture", tags=["建築設計"])
 bpo_router.include_router(wholesale_router, prefix="/wholesale", tags=["卸売業"])
 
-# レート制限はエンドポイント内で check_rate_limit(user.company_id, "bpo_pipeline") を呼ぶ
+# レート制限はエンドポイント内で await check_rate_limit(user.company_id, "bpo_pipeline") を呼ぶ
 # APIRouterにはmiddlewareメソッドがないため、app-levelまたはエンドポイント内で適用
@@ -34,7 +34,7 @@ async def run_building_permit_pipeline(
     user=Depends(get_current_user),
 ):
     """確認申請書類パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="architecture/building_permit",
@@ -34,7 +34,7 @@ async def run_repair_quoting_pipeline(
     user=Depends(get_current_user),
 ):
     """見積・請求パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="auto_repair/repair_quoting",
@@ -49,7 +49,7 @@ async def check_dental_receipt(
     user=Depends(get_current_user),
 ):
     """レセプトチェック実行"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     task = BPOTask(
         pipeline="dental/receipt_check",
         company_id=str(user.company_id),
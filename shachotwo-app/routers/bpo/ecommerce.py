@@ -34,7 +34,7 @@ async def run_product_listing_pipeline(
     user=Depends(get_current_user),
 ):
     """商品登録・掲載文パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="ecommerce/product_listing",
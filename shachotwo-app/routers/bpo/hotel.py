@@ -34,7 +34,7 @@ async def run_revenue_mgmt_pipeline(
     user=Depends(get_current_user),
 ):
     """レベニューマネジメントパイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="hotel/revenue_mgmt",
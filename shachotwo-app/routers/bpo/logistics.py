@@ -34,7 +34,7 @@ async def run_dispatch_pipeline(
     user=Depends(get_current_user),
 ):
     """配車計画パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="logistics/dispatch",
@@ -51,7 +51,7 @@ router = APIRouter()
 @router.post("/quotes", response_model=MfgQuoteResponse)
 async def create_quote(body: MfgQuoteCreate, user=Depends(get_current_user)):
     """新規見積作成（図面解析→工程推定→コスト計算を一括実行）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     pipeline = QuotingPipeline()
 
     # Step 1: 解析
@@ -177,7 +177,7 @@ async def finalize_quote(
     user=Depends(get_current_user),
 ):
     """見積確定 + 学習"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     client = get_client()
     company_id = str(user.company_id)
 
@@ -242,7 +242,7 @@ async def finalize_quote(
 @router.post("/quotes/v2", response_model=QuoteResult)
 async def create_quote_v2(body: HearingInput, user=Depends(get_current_user)):
     """3層エンジンによる見積作成（Plugin → YAML → LLM の順で解決）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     hearing = body.model_copy(update={"company_id": str(user.company_id)})
     try:
         result = await ManufacturingQuotingEngine().run(hearing)
@@ -291,7 +291,7 @@ async def list_charge_rates(user=Depends(get_current_user)):
 @router.post("/charge-rates", response_model=ChargeRateResponse)
 async def upsert_charge_rate(body: ChargeRateCreate, user=Depends(get_current_user)):
     """チャージレート登録/更新"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     client = get_client()
     company_id = str(user.company_id)
 
@@ -355,7 +355,7 @@ async def run_production_planning(
     user=Depends(get_current_user),
 ):
     """生産計画AI（受注データ→山積み計算→ガントチャート→生産計画書）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_production_planning_pipeline(
             company_id=str(user.company_id),
@@ -389,7 +389,7 @@ async def run_quality_control(
     user=Depends(get_current_user),
 ):
     """品質管理（検査データ→SPC計算→不良予兆検知→品質月次レポート）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_quality_control_pipeline(
             company_id=str(user.company_id),
@@ -423,7 +423,7 @@ async def run_inventory_optimization(
     user=Depends(get_current_user),
 ):
     """在庫最適化（ABC分析→安全在庫計算→発注点算出→発注推奨リスト）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_inventory_optimization_pipeline(
             company_id=str(user.company_id),
@@ -458,7 +458,7 @@ async def run_sop_management(
     user=Depends(get_current_user),
 ):
     """SOP管理（手順書作成→安全衛生法チェック→改訂管理→PDF出力）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_sop_management_pipeline(
             company_id=str(user.company_id),
@@ -493,7 +493,7 @@ async def run_equipment_maintenance(
     user=Depends(get_current_user),
 ):
     """設備保全（MTBF/MTTR計算→保全期限アラート→月次保全カレンダー生成）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_equipment_maintenance_pipeline(
             company_id=str(user.company_id),
@@ -528,7 +528,7 @@ async def run_procurement(
     user=Depends(get_current_user),
 ):
     """仕入管理（BOM展開→MRP所要量計算→発注先選定→発注書生成）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_procurement_pipeline(
             company_id=str(user.company_id),
@@ -562,7 +562,7 @@ async def run_iso_document(
     user=Depends(get_current_user),
 ):
     """ISO文書管理（条項別チェック→有効期限確認→監査チェックリスト生成）"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     try:
         result = await run_iso_document_pipeline(
             company_id=str(user.company_id),
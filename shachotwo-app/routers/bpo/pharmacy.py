@@ -34,7 +34,7 @@ async def run_dispensing_billing_pipeline(
     user=Depends(get_current_user),
 ):
     """調剤報酬請求パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="pharmacy/dispensing_billing",
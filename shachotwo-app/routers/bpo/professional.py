@@ -86,7 +86,7 @@ async def run_procedure_generation(
     user=Depends(get_current_user),
 ) -> dict[str, Any]:
     """社労士: 各種届出書類（資格取得届・喪失届・算定基礎届等）のドラフトを自動生成"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     t0 = time.monotonic()
     try:
         result = await run_procedure_generation_pipeline(
@@ -134,7 +134,7 @@ async def run_bookkeeping_check(
     user=Depends(get_current_user),
 ) -> dict[str, Any]:
     """税理士: 仕訳データの科目妥当性・消費税区分・金額チェックを自動実行"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     t0 = time.monotonic()
     try:
         result = await run_bookkeeping_check_pipeline(
@@ -194,7 +194,7 @@ async def run_permit_generation(
     user=Depends(get_current_user),
 ) -> dict[str, Any]:
     """行政書士: 建設業許可・産廃収集運搬許可等の申請書ドラフトを自動生成"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     t0 = time.monotonic()
     try:
         result = await run_permit_generation_pipeline(
@@ -253,7 +253,7 @@ async def run_contract_review(
     user=Depends(get_current_user),
 ) -> dict[str, Any]:
     """弁護士: 契約書のリスク条項を自動検出し、修正案を提示"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     t0 = time.monotonic()
     try:
         result = await run_contract_review_pipeline(
@@ -312,7 +312,7 @@ async def run_deadline_management(
     user=Depends(get_current_user),
 ) -> dict[str, Any]:
     """共通: 社労士・税理士・行政書士の各種法定期限を一括管理・アラート生成"""
-    check_rate_limit(str(user.company_id), "bpo_pipeline")
+    await check_rate_limit(str(user.company_id), "bpo_pipeline")
     t0 = time.monotonic()
     try:
         result = await run_deadline_mgmt_pipeline(
@@ -34,7 +34,7 @@ async def run_rent_collection_pipeline(
     user=Depends(get_current_user),
 ):
     """家賃管理・督促パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="realestate/rent_collection",
@@ -34,7 +34,7 @@ async def run_dispatch_contract_pipeline(
     user=Depends(get_current_user),
 ):
     """契約管理・抵触日管理パイプライン実行"""
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
     task = BPOTask(
         company_id=user.company_id,
         pipeline="staffing/dispatch_contract",
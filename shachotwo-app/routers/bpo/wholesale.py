@@ -95,7 +95,7 @@ async def run_wholesale_pipeline(
             ),
         )
 
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
 
     try:
         runner = get_pipeline_runner(pipeline_name)
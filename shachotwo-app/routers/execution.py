@@ -277,7 +277,7 @@ async def run_bpo_pipeline(
     3. execution_logs へ保存
     4. BPORunResponse を返す
     """
-    check_rate_limit(user.company_id, "bpo_pipeline")
+    await check_rate_limit(user.company_id, "bpo_pipeline")
 
     # パイプライン登録確認（未登録なら早期 422 を返す）
     if body.pipeline not in PIPELINE_REGISTRY:
@@ -512,6 +512,7 @@ async def toggle_kill_switch(
     - scope="global": 環境変数 BPO_KILL_SWITCH の参照情報のみ返す（実行環境の変数は変更不可）
     """
     from workers.bpo.manager.notifier import notify_pipeline_event
+    from workers.bpo.manager.orchestrator import invalidate_tenant_cache
 
     company_id = str(user.company_id)
 
@@ -531,6 +532,8 @@ async def toggle_kill_switch(
     except Exception as e:
         logger.error(f"kill switch更新失敗 company={company_id[:8]}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    # オーケストレータのテナント一覧キャッシュ（TTL 300s）を待たずに反映させる
+    invalidate_tenant_cache()
 
     # kill switch ON時は通知を送信
     if body.enabled:
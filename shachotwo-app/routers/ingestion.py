@@ -14,6 +14,7 @@ from db.supabase import get_service_client
 from security.audit import audit_log
 from security.pii_handler import PIIDetector
 from security.rate_limiter import check_rate_limit
+from workers.bpo.engine.agent_factory import invalidate_agent_roles
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +81,7 @@ async def ingest_text(
     user: JWTClaims = Depends(get_current_user),
 ):
     """テキストナレッジ入力 → LLM構造化 → knowledge_items保存"""
-    check_rate_limit(user.company_id, "default")
+    await check_rate_limit(user.company_id, "default")
     try:
         # PII検出・マスク（MVPはブロックせずマスク＋警告ログのみ）
         text_content = body.content
@@ -156,7 +157,7 @@ async def ingest_file(
     user: JWTClaims = Depends(get_current_user),
 ):
     """ファイルナレッジ入力（txt/PDF/Excel/Word） → テキスト抽出 → LLM構造化 → knowledge_items保存"""
-    check_rate_limit(user.company_id, "default")
+    await check_rate_limit(user.company_id, "default")
     from brain.ingestion.file import ingest_file as do_ingest_file
 
     # Validate file extension
@@ -607,6 +608,7 @@ async def import_csv(
         except Exception as e:
             logger.error(f"CSV import insert failed: {e}")
             raise HTTPException(status_code=500, detail=f"知識アイテムの保存に失敗しました: {e}")
+        invalidate_agent_roles(user.company_id)
 
         # embeddingはバックグラウンド生成（既存の非同期フローに委ねる）
         # knowledge_itemsにembeddingがない場合はQ&A検索時に自動生成される
@@ -1,19 +1,22 @@
 """Knowledge Q&A and CRUD endpoints."""
+import json
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from auth.middleware import get_current_user, require_role
 from auth.jwt import JWTClaims
-from brain.knowledge.qa import answer_question
+from brain.knowledge.qa import QAResult, answer_question, answer_question_stream
 from brain.knowledge.embeddings import update_item_embedding
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 from security.audit import audit_log
 from security.pii_handler import PIIDetector
+from workers.bpo.engine.agent_factory import invalidate_agent_roles
 
 logger = logging.getLogger(__name__)
 
@@ -105,51 +108,96 @@ async def ask_question_endpoint(
             top_k=body.top_k,
         )
 
-        # Determine answer_status
-        answer_status = "answered"
-        if not result.sources:
-            answer_status = "no_match"
-        elif result.confidence < 0.5:
-            answer_status = "partial"
-
-        # Save to qa_sessions (fire-and-forget, don't block response)
-        try:
-            db = get_service_client()
-            db.table("qa_sessions").insert({
-                "company_id": str(user.company_id),
-                "user_id": str(user.sub),
-                "question": body.question,
-                "answer": result.answer,
-                "referenced_knowledge_ids": [str(s.knowledge_id) for s in result.sources],
-                "answer_status": answer_status,
-                "model_used": result.model_used,
-                "confidence": result.confidence,
-                "cost_yen": result.cost_yen,
-            }).execute()
-        except Exception as save_err:
-            logger.warning(f"Failed to save qa_session: {save_err}")
-
-        return QAResponse(
-            answer=result.answer,
-            sources=[
-                SourceCitation(
-                    knowledge_id=s.knowledge_id,
-                    title=s.title,
-                    relevance=s.relevance,
-                    excerpt=s.excerpt,
-                )
-                for s in result.sources
-            ],
-            confidence=result.confidence,
-            missing_info=result.missing_info,
-            model_used=result.model_used,
-            cost_yen=result.cost_yen,
-        )
+        await _save_qa_session(user, body.question, result)
+        return _to_qa_response(result)
     except Exception as e:
         logger.error(f"Q&A failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/knowledge/ask/stream")
+async def ask_question_stream_endpoint(
+    body: QARequest,
+    user: JWTClaims = Depends(get_current_user),
+):
+    """Q&A（SSE）— 回答本文を token イベントで逐次送り、最後に done イベントで
+    sources / confidence 等（QAResponse と同じ形）を送る。失敗時は error イベント。
+    """
+
+    async def _events() -> AsyncIterator[str]:
+        try:
+            async for item in answer_question_stream(
+                question=body.question,
+                company_id=user.company_id,
+                department=body.department,
+                top_k=body.top_k,
+            ):
+                if isinstance(item, QAResult):
+                    await _save_qa_session(user, body.question, item)
+                    yield _sse("done", _to_qa_response(item).model_dump(mode="json"))
+                else:
+                    yield _sse("token", {"text": item})
+        except Exception as e:
+            logger.error(f"Q&A stream failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        # プロキシ（nginx 等）のバッファリングを無効化して逐次届ける
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _to_qa_response(result: QAResult) -> QAResponse:
+    return QAResponse(
+        answer=result.answer,
+        sources=[
+            SourceCitation(
+                knowledge_id=s.knowledge_id,
+                title=s.title,
+                relevance=s.relevance,
+                excerpt=s.excerpt,
+            )
+            for s in result.sources
+        ],
+        confidence=result.confidence,
+        missing_info=result.missing_info,
+        model_used=result.model_used,
+        cost_yen=result.cost_yen,
+    )
+
+
+async def _save_qa_session(user: JWTClaims, question: str, result: QAResult) -> None:
+    """qa_sessions に履歴を保存する（失敗しても回答は返す）。"""
+    # Determine answer_status
+    answer_status = "answered"
+    if not result.sources:
+        answer_status = "no_match"
+    elif result.confidence < 0.5:
+        answer_status = "partial"
+
+    try:
+        db = get_service_client()
+        await execute(db.table("qa_sessions").insert({
+            "company_id": str(user.company_id),
+            "user_id": str(user.sub),
+            "question": question,
+            "answer": result.answer,
+            "referenced_knowledge_ids": [str(s.knowledge_id) for s in result.sources],
+            "answer_status": answer_status,
+            "model_used": result.model_used,
+            "confidence": result.confidence,
+            "cost_yen": result.cost_yen,
+        }))
+    except Exception as save_err:
+        logger.warning(f"Failed to save qa_session: {save_err}")
+
+
 @router.get("/knowledge/departments")
 async def list_departments(
     user: JWTClaims = Depends(get_current_user),
@@ -292,6 +340,7 @@ async def update_knowledge_item(
 
     updated = result.data[0]
     updated.pop("embedding", None)
+    invalidate_agent_roles(user.company_id)
 
     # Re-generate embedding if content changed
     if body.title is not None or body.content is not None:
@@ -16,7 +16,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 
 from auth.middleware import get_current_user
-from auth.jwt import JWTClaims
+from auth.jwt import JWTClaims, invalidate_user
 from db.supabase import get_service_client
 from security.audit_middleware import log_audit
 
@@ -234,6 +234,7 @@ async def verify_mfa(
         "is_enabled": True,
         "last_verified_at": now,
     }).eq("user_id", current_user.sub).execute()
+    invalidate_user(current_user.sub)
 
     await log_audit(
         company_id=current_user.company_id,
@@ -285,6 +286,7 @@ async def disable_mfa(
     db.table("mfa_settings").update({
         "is_enabled": False,
     }).eq("user_id", current_user.sub).execute()
+    invalidate_user(current_user.sub)
 
     await log_audit(
         company_id=current_user.company_id,
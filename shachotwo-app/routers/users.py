@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, EmailStr
 
 from auth.middleware import get_current_user, require_role
-from auth.jwt import JWTClaims
+from auth.jwt import JWTClaims, invalidate_user
 from db.supabase import get_service_client
 from security.audit import audit_log
 
@@ -296,6 +296,8 @@ async def update_user(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="認証情報の更新に失敗しました。ロール変更は取り消されました。",
             )
+        # キャッシュ済みの旧ロールを破棄（ローカル検証モードでは旧トークンを再検証させる）
+        invalidate_user(str(user_id))
 
     await audit_log(
         company_id=user.company_id,
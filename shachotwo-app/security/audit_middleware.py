@@ -3,7 +3,6 @@
 使用方法:
     # エンドポイント内での直接呼び出し
     await log_audit(
-        db=get_service_client(),
         company_id=user.company_id,
         actor_user_id=user.sub,
         actor_role=user.role,
@@ -15,35 +14,237 @@
         request=request,
     )
 
-    # FastAPIアプリへのミドルウェア追加
+    # FastAPIアプリへのミドルウェア追加（純粋なASGIミドルウェア）
     app.add_middleware(AuditLogMiddleware)
+
+    # 起動・終了時（main.py の lifespan）: audit_logs への書き込みをバッチ化する
+    await start_audit_writer()
+    await stop_audit_writer()
 """
+import asyncio
+import ipaddress
 import logging
-from typing import Any, Callable, Optional
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import Request
+from postgrest.exceptions import APIError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from db.supabase import get_service_client
+from db.supabase import execute, get_service_client
 
 logger = logging.getLogger(__name__)
 
+AUDIT_FLUSH_INTERVAL_SEC = float(os.environ.get("AUDIT_FLUSH_INTERVAL_SEC", "2"))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+# 書き込み失敗が続いたときにメモリ上に保持する上限（超過分は古い順に破棄してログに残す）
+AUDIT_BUFFER_MAX = int(os.environ.get("AUDIT_BUFFER_MAX", "10000"))
+# 単独でも DB に拒否され続ける行を諦めるまでの試行回数（破棄時は内容をログに残す）
+AUDIT_MAX_ATTEMPTS = int(os.environ.get("AUDIT_MAX_ATTEMPTS", "3"))
+
+
+@dataclass(frozen=True)
+class AuditContext:
+    """リクエスト単位の監査コンテキスト（AuditLogMiddleware が設定する）。"""
+    ip_address: Optional[str]
+    user_agent: str
+
+
+_audit_context: ContextVar[Optional[AuditContext]] = ContextVar("audit_context", default=None)
+
+
+def get_audit_context() -> Optional[AuditContext]:
+    """処理中リクエストの ip_address / user_agent。リクエスト外（バッチ等）では None。"""
+    return _audit_context.get()
+
+
+def _valid_ip(value: Optional[str]) -> Optional[str]:
+    """INET 列に入る形式なら正規化して返す。ヘッダーはクライアントが自由に書けるので不正なら None。"""
+    if not value:
+        return None
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+
+
+def _ip_from_headers(headers: Headers, client_host: Optional[str]) -> Optional[str]:
+    """X-Forwarded-For（リバースプロキシ経由）→ X-Real-IP → 接続元 の順でIPアドレスを決める。"""
+    forwarded_for = headers.get("X-Forwarded-For")
+    if forwarded_for:
+        # カンマ区切りの場合は最初のIP（実クライアント）を使用
+        return _valid_ip(forwarded_for.split(",")[0])
+    real_ip = headers.get("X-Real-IP")
+    if real_ip:
+        return _valid_ip(real_ip)
+    return _valid_ip(client_host)
+
 
 def _extract_ip(request: Request) -> Optional[str]:
     """リクエストからIPアドレスを取得する。
     X-Forwarded-For（リバースプロキシ経由）を優先する。
     """
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        # カンマ区切りの場合は最初のIP（実クライアント）を使用
-        return forwarded_for.split(",")[0].strip()
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip.strip()
-    if request.client:
-        return request.client.host
-    return None
+    return _ip_from_headers(request.headers, request.client.host if request.client else None)
+
+
+# ─── バッチ書き込み ──────────────────────────────────────────────────────────
+
+
+class AuditLogWriter:
+    """audit_logs への書き込みをまとめて行うバックグラウンドライター。
+
+    start() 前（スクリプト・テスト等）は従来どおり1件ずつ即時に書き込む。
+    start() 後は AUDIT_FLUSH_INTERVAL_SEC ごと、または AUDIT_BATCH_SIZE 件たまった時点で
+    1回の insert にまとめる。stop() で残りを書き出す。
+
+    DB がバッチを拒否した場合（APIError）は二分して不正な行だけを切り出し、残りは書き込む。
+    切り出した行は次回以降1件ずつ再試行し、AUDIT_MAX_ATTEMPTS 回拒否されたら破棄する。
+    接続エラー等（DB に届いていない）はバッチをそのまま戻して次回に回す。
+    """
+
+    def __init__(
+        self,
+        flush_interval_sec: float = AUDIT_FLUSH_INTERVAL_SEC,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        max_buffer: int = AUDIT_BUFFER_MAX,
+        max_attempts: int = AUDIT_MAX_ATTEMPTS,
+    ) -> None:
+        self.flush_interval_sec = flush_interval_sec
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.max_attempts = max(1, max_attempts)
+        self._buffer: list[dict[str, Any]] = []
+        self._rejected: list[tuple[dict[str, Any], int]] = []   # (行, 拒否された回数)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer) + len(self._rejected)
+
+    async def write(self, entry: dict[str, Any]) -> None:
+        if not self.running:
+            await self._insert([entry])
+            return
+        self._buffer.append(entry)
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            logger.error("監査ログバッファ超過: 古い %d 件を破棄", overflow)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """バッファを書き出し、書き込んだ件数を返す。DB に届かなかったバッチはバッファに戻す。"""
+        written = 0
+        rejected, self._rejected = self._rejected, []
+        for i, (entry, attempts) in enumerate(rejected):
+            error = await self._insert([entry])
+            if error is None:
+                written += 1
+            elif isinstance(error, APIError):
+                self._reject(entry, attempts + 1)
+            else:
+                self._rejected.extend(rejected[i:])
+                return written
+
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            error = await self._insert(batch)
+            if error is None:
+                written += len(batch)
+            elif isinstance(error, APIError):
+                written += await self._bisect(batch)
+            else:
+                self._buffer[:0] = batch
+                break
+        return written
+
+    async def _bisect(self, batch: list[dict[str, Any]]) -> int:
+        """拒否されたバッチを半分ずつ入れ直し、単独でも拒否された行を _rejected に回す。"""
+        if len(batch) == 1:
+            self._reject(batch[0], 1)
+            return 0
+        written = 0
+        mid = len(batch) // 2
+        for half in (batch[:mid], batch[mid:]):
+            error = await self._insert(half)
+            if error is None:
+                written += len(half)
+            elif isinstance(error, APIError):
+                written += await self._bisect(half)
+            else:
+                self._buffer[:0] = half
+        return written
+
+    def _reject(self, entry: dict[str, Any], attempts: int) -> None:
+        if attempts >= self.max_attempts:
+            logger.error("監査ログを破棄（%d 回拒否）: %s", attempts, entry)
+            return
+        self._rejected.append((entry, attempts))
+
+    async def _insert(self, batch: list[dict[str, Any]]) -> Optional[Exception]:
+        """insert して、失敗したときは例外を返す。"""
+        try:
+            await execute(get_service_client().table("audit_logs").insert(batch))
+            return None
+        except Exception as e:
+            # 監査ログの書き込み失敗はメイン処理を止めない（fire-and-forget）
+            logger.warning("監査ログ書き込み失敗: %d 件: %s", len(batch), e)
+            return e
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_sec)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+        logger.info("audit log writer: started")
+
+    async def stop(self) -> None:
+        """ループを止め、残りを書き出す。"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("audit log writer: stopped")
+
+
+_writer = AuditLogWriter()
+
+
+def get_audit_writer() -> AuditLogWriter:
+    return _writer
+
+
+async def start_audit_writer() -> None:
+    """監査ログのバッチ書き込みを開始する（アプリ起動時）。"""
+    await _writer.start()
+
+
+async def stop_audit_writer() -> None:
+    """監査ログのバッチ書き込みを止めて残りを書き出す（アプリ終了時）。"""
+    await _writer.stop()
 
 
 async def log_audit(
@@ -63,6 +264,8 @@ async def log_audit(
     """監査ログをaudit_logsテーブルに書き込む。
 
     fire-and-forget安全設計: 例外が発生しても呼び出し元の処理を中断しない。
+    書き込みは AuditLogWriter でまとめて行う（db を明示した場合のみその場で insert する）。
+    request を渡さない場合は AuditLogMiddleware が設定したコンテキストから ip_address/user_agent を補完する。
 
     Args:
         company_id:     テナントID（RLS対象）
@@ -75,11 +278,9 @@ async def log_audit(
         new_values:     変更後の値（create/update時）
         request:        FastAPIリクエストオブジェクト（ip_address/user_agentの自動抽出に使用）
         metadata:       追加メタデータ（任意）
-        db:             Supabaseクライアント（省略時はservice clientを使用）
+        db:             Supabaseクライアント（指定時はバッチを通さず即時に書き込む）
     """
     try:
-        _db = db or get_service_client()
-
         entry: dict[str, Any] = {
             "company_id": company_id,
             "action": action,
@@ -98,16 +299,23 @@ async def log_audit(
         if metadata is not None:
             entry["metadata"] = metadata
 
-        # リクエストオブジェクトからip_address/user_agentを自動抽出
+        # リクエストオブジェクト（なければミドルウェアのコンテキスト）からip_address/user_agentを抽出
         if request is not None:
             ip = _extract_ip(request)
-            if ip:
-                entry["ip_address"] = ip
             ua = request.headers.get("User-Agent")
-            if ua:
-                entry["user_agent"] = ua
+        else:
+            context = _audit_context.get()
+            ip = context.ip_address if context else None
+            ua = context.user_agent if context else None
+        if ip:
+            entry["ip_address"] = ip
+        if ua:
+            entry["user_agent"] = ua
 
-        _db.table("audit_logs").insert(entry).execute()
+        if db is not None:
+            await execute(db.table("audit_logs").insert(entry))
+        else:
+            await _writer.write(entry)
         logger.debug(
             "audit: action=%s resource_type=%s resource_id=%s actor=%s company=%s",
             action, resource_type, resource_id, actor_user_id, company_id,
@@ -120,25 +328,39 @@ async def log_audit(
         )
 
 
-class AuditLogMiddleware(BaseHTTPMiddleware):
-    """FastAPIミドルウェア: リクエストのip_address/user_agentをコンテキストに付与する。
+class AuditLogMiddleware:
+    """ASGIミドルウェア: リクエストのip_address/user_agentを監査コンテキストに設定する。
 
     エンドポイント側でlog_audit()を呼ぶ際にrequest引数を渡せば
     このミドルウェアがなくても同等の情報が記録される。
     本ミドルウェアはリクエストオブジェクトを渡せない箇所（サービス層等）向けの
-    コンテキスト補完用として追加する。
+    コンテキスト補完用として追加する（contextvar のため同じリクエスト内の子タスクにも伝わる）。
+    互換のため request.state.audit_ip / audit_user_agent にも同じ値を入れる。
 
     使用例:
         app.add_middleware(AuditLogMiddleware)
     """
 
     def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # リクエストコンテキストをstateに保存（エンドポイント内で参照可能）
-        request.state.audit_ip = _extract_ip(request)
-        request.state.audit_user_agent = request.headers.get("User-Agent", "")
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        context = AuditContext(
+            ip_address=_ip_from_headers(headers, client[0] if client else None),
+            user_agent=headers.get("User-Agent", ""),
+        )
+        state = scope.setdefault("state", {})
+        state["audit_ip"] = context.ip_address
+        state["audit_user_agent"] = context.user_agent
 
-        response = await call_next(request)
-        return response
+        token = _audit_context.set(context)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _audit_context.reset(token)
@@ -7,15 +7,18 @@
 - Strict-Transport-Security: HTTPS強制（HSTS）
 - Content-Security-Policy: XSS・インジェクション攻撃の緩和
 
+純粋な ASGI ミドルウェアとして実装し、http.response.start のヘッダーに
+起動時に組み立てた (name, value) タプルを差し込むだけにしている
+（BaseHTTPMiddleware と違い、リクエストごとのタスク・メモリストリームを作らず、
+StreamingResponse / SSE もそのまま流れる）。
+
 使用例:
     app.add_middleware(SecurityHeadersMiddleware)
 """
 import os
-from typing import Callable
+from typing import Optional
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # 環境判定（開発環境ではHSTS等の一部ヘッダーを緩める）
 _ENV = os.environ.get("ENVIRONMENT", "development")
@@ -39,45 +42,54 @@ _CSP_PRODUCTION = (
 _CSP_DEVELOPMENT = "default-src 'self' 'unsafe-inline' 'unsafe-eval' *;"
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """全レスポンスにセキュリティヘッダーを付与するミドルウェア。
-
-    SOC2 CC6.1（論理アクセス制御）・CC6.6（悪意ある行為の防止）の要件に対応。
-    """
-
-    def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-
+def build_security_headers(is_production: bool = _IS_PRODUCTION) -> list[tuple[bytes, bytes]]:
+    """付与するヘッダーを ASGI 形式（小文字名の bytes タプル）で返す。"""
+    headers: dict[str, str] = {
         # スニッフィング防止（MIME型の推測を禁止）
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
+        "X-Content-Type-Options": "nosniff",
         # クリックジャッキング防止（iframeへの埋め込みを禁止）
-        response.headers["X-Frame-Options"] = "DENY"
-
+        "X-Frame-Options": "DENY",
         # XSS防止（レガシーブラウザ向け）
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-
-        # HSTS（本番・ステージング環境のみ）
-        # 開発環境でHTTPSを使用しない場合に誤って適用されるのを防ぐ
-        if _IS_PRODUCTION:
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains; preload"
-            )
-
-        # CSP（環境に応じて切り替え）
-        response.headers["Content-Security-Policy"] = (
-            _CSP_PRODUCTION if _IS_PRODUCTION else _CSP_DEVELOPMENT
-        )
-
-        # 参照元情報の送信制限
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        "X-XSS-Protection": "1; mode=block",
+    }
+    # HSTS（本番・ステージング環境のみ）
+    # 開発環境でHTTPSを使用しない場合に誤って適用されるのを防ぐ
+    if is_production:
+        headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
+    # CSP（環境に応じて切り替え）
+    headers["Content-Security-Policy"] = _CSP_PRODUCTION if is_production else _CSP_DEVELOPMENT
+    # 参照元情報の送信制限
+    headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    # ブラウザの機能ポリシー（カメラ・マイク・位置情報等へのアクセスを制限）
+    headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=(), payment=()"
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+
+class SecurityHeadersMiddleware:
+    """全レスポンスにセキュリティヘッダーを付与するミドルウェア。
 
-        # ブラウザの機能ポリシー（カメラ・マイク・位置情報等へのアクセスを制限）
-        response.headers["Permissions-Policy"] = (
-            "camera=(), microphone=(), geolocation=(), payment=()"
-        )
+    SOC2 CC6.1（論理アクセス制御）・CC6.6（悪意ある行為の防止）の要件に対応。
+    エンドポイントが同名ヘッダーを設定していても、このミドルウェアの値で上書きする。
+    """
 
-        return response
+    def __init__(self, app: ASGIApp, is_production: Optional[bool] = None) -> None:
+        self.app = app
+        self._headers = build_security_headers(_IS_PRODUCTION if is_production is None else is_production)
+        self._names = frozenset(name for name, _ in self._headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value) for name, value in message.get("headers", ())
+                    if name.lower() not in self._names
+                ]
+                headers.extend(self._headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,26 +1,34 @@
 """テナント別レート制限。
 
-インメモリのスライディングウィンドウカウンタ。
-本番ではRedisに置き換える（MVP段階はインメモリで十分）。
+スライディングウィンドウカウンタ（直前ウィンドウの件数を経過割合で按分して加算）で
+判定する。状態はキーごとに (ウィンドウ番号, 直前件数, 現在件数) の定数サイズで、
+リクエスト数に比例して増えない。
+
+バックエンド（env RATE_LIMIT_BACKEND）:
+    memory（デフォルト）: プロセス内。アイドルなキーは期限切れ順に追い出す。
+    redis: REDIS_URL 上で Lua スクリプトにより原子的に判定・加算（全ワーカーで共有）。
+           Redis に届かない間は RATE_LIMIT_REDIS_RETRY_SEC だけプロセス内判定に切り替える。
 
 Usage in router:
     from security.rate_limiter import check_rate_limit
 
     @router.post("/some-endpoint")
     async def endpoint(user=Depends(get_current_user)):
-        check_rate_limit(user.company_id, "bpo_pipeline", limit=10, window_seconds=60)
+        await check_rate_limit(user.company_id, "bpo_pipeline", limit=10, window_seconds=60)
         ...
 """
-import time
 import logging
-from collections import defaultdict
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
-# テナント別リクエスト履歴: {(company_id, category): [timestamp, ...]}
-_request_history: dict[tuple[str, str], list[float]] = defaultdict(list)
-
 # デフォルト制限
 RATE_LIMITS: dict[str, dict[str, int]] = {
     "bpo_pipeline": {"limit": 10, "window_seconds": 60},     # BPO: 10req/min
@@ -29,8 +37,194 @@ RATE_LIMITS: dict[str, dict[str, int]] = {
     "default": {"limit": 30, "window_seconds": 60},            # その他: 30req/min
 }
 
+# プロセス内で保持するキー数の上限（超えたら最も古いキーから追い出す）
+LOCAL_MAX_KEYS = int(os.environ.get("RATE_LIMIT_LOCAL_MAX_KEYS", "100000"))
+# Redis 障害時にプロセス内判定へ切り替えておく秒数
+REDIS_RETRY_SEC = float(os.environ.get("RATE_LIMIT_REDIS_RETRY_SEC", "30"))
+# ホットパスなので Redis の応答が遅ければ諦めてプロセス内判定にする
+REDIS_TIMEOUT_SEC = float(os.environ.get("RATE_LIMIT_REDIS_TIMEOUT_SEC", "0.05"))
+_REDIS_KEY_PREFIX = "ratelimit:"
+
+# KEYS[1]=現在ウィンドウ, KEYS[2]=直前ウィンドウ, ARGV[1]=上限(按分後の推定件数で比較),
+# ARGV[2]=直前ウィンドウの残り割合, ARGV[3]=TTL秒。{許可(1/0), 直前件数, 現在件数} を返す。
+_HIT_SCRIPT = """
+local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+if prev * tonumber(ARGV[2]) + curr >= tonumber(ARGV[1]) then
+  return {0, prev, curr}
+end
+curr = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, prev, curr}
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    count: float        # 判定に使った推定件数（許可時は今回分を含む）
+    retry_after: int    # 拒否時の再試行までの秒数
+
+
+def _resolve(category: str, limit: int | None, window_seconds: int | None) -> tuple[int, int]:
+    config = RATE_LIMITS.get(category, RATE_LIMITS["default"])
+    return limit or config["limit"], window_seconds or config["window_seconds"]
+
+
+def _estimate(prev: float, curr: float, elapsed: float, window: int) -> float:
+    return prev * (1 - elapsed / window) + curr
+
+
+def _retry_after(prev: float, curr: float, elapsed: float, window: int, limit: int) -> int:
+    """推定件数が上限を下回るまでの秒数。"""
+    if curr >= limit:
+        # 現在ウィンドウだけで上限 → 次のウィンドウで直前件数として按分されるのを待つ
+        wait = window - elapsed + window * (1 - limit / curr)
+    else:
+        wait = window * (1 - (limit - curr) / prev) - elapsed if prev else 0.0
+    return max(1, math.ceil(wait))
+
+
+class LocalRateLimiter:
+    """プロセス内のスライディングウィンドウカウンタ（キーごとに O(1)）。"""
+
+    def __init__(self, max_keys: int = LOCAL_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        # key -> [ウィンドウ番号, 直前件数, 現在件数, 失効時刻]
+        self._state: OrderedDict[str, list] = OrderedDict()
+
+    def _roll(self, key: str, window: int, now: float) -> list:
+        index = int(now // window)
+        state = self._state.get(key)
+        if state is None:
+            state = [index, 0, 0, 0.0]
+            self._state[key] = state
+        elif state[0] != index:
+            # 1つ先のウィンドウなら現在件数が直前件数になる。2つ以上空いたら両方 0
+            state[1] = state[2] if state[0] == index - 1 else 0
+            state[2] = 0
+            state[0] = index
+        state[3] = (index + 2) * window
+        self._state.move_to_end(key)
+        return state
+
+    def _evict(self, now: float) -> None:
+        # 先頭（最も長く触られていないキー）から失効済みのものを少しずつ追い出す
+        for _ in range(2):
+            if not self._state:
+                return
+            key, state = next(iter(self._state.items()))
+            if state[3] > now:
+                break
+            del self._state[key]
+        while len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> RateLimitDecision:
+        state = self._roll(key, window, now)
+        elapsed = now - state[0] * window
+        estimated = _estimate(state[1], state[2], elapsed, window)
+        self._evict(now)
+        if estimated >= limit:
+            return RateLimitDecision(
+                False, estimated, _retry_after(state[1], state[2], elapsed, window, limit),
+            )
+        state[2] += 1
+        return RateLimitDecision(True, estimated + 1, 0)
+
+    def peek(self, key: str, window: int, now: float) -> float:
+        state = self._state.get(key)
+        if state is None:
+            return 0.0
+        index = int(now // window)
+        prev, curr = state[1], state[2]
+        if state[0] != index:
+            prev, curr = (curr if state[0] == index - 1 else 0), 0
+        return _estimate(prev, curr, now - index * window, window)
+
+    def reset(self, key: str) -> None:
+        self._state.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+
+class RedisRateLimiter:
+    """Redis 上のスライディングウィンドウカウンタ（Lua で判定と加算を原子的に行う）。"""
 
-def check_rate_limit(
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        # リクエスト処理中に呼ぶのでイベントループを止めない非同期クライアントを短いタイムアウトで使う
+        self._redis = redis_asyncio.from_url(
+            url,
+            socket_timeout=REDIS_TIMEOUT_SEC,
+            socket_connect_timeout=REDIS_TIMEOUT_SEC,
+        )
+        self._script = self._redis.register_script(_HIT_SCRIPT)
+
+    @staticmethod
+    def _keys(key: str, window: int, now: float) -> tuple[str, str, int]:
+        index = int(now // window)
+        base = f"{_REDIS_KEY_PREFIX}{key}:{window}"
+        return f"{base}:{index}", f"{base}:{index - 1}", index
+
+    async def hit(self, key: str, limit: int, window: int, now: float) -> RateLimitDecision:
+        curr_key, prev_key, index = self._keys(key, window, now)
+        elapsed = now - index * window
+        allowed, prev, curr = await self._script(
+            keys=[curr_key, prev_key],
+            args=[limit, 1 - elapsed / window, window * 2],
+        )
+        prev, curr = int(prev), int(curr)
+        if allowed:
+            return RateLimitDecision(True, _estimate(prev, curr, elapsed, window), 0)
+        return RateLimitDecision(
+            False,
+            _estimate(prev, curr, elapsed, window),
+            _retry_after(prev, curr, elapsed, window, limit),
+        )
+
+    async def peek(self, key: str, window: int, now: float) -> float:
+        curr_key, prev_key, index = self._keys(key, window, now)
+        curr, prev = await self._redis.mget(curr_key, prev_key)
+        return _estimate(int(prev or 0), int(curr or 0), now - index * window, window)
+
+    async def reset(self, key: str) -> None:
+        async for name in self._redis.scan_iter(match=f"{_REDIS_KEY_PREFIX}{key}:*"):
+            await self._redis.delete(name)
+
+
+_local_limiter = LocalRateLimiter()
+_redis_limiter: Optional[RedisRateLimiter] = None
+_redis_disabled_until = 0.0
+
+
+def _get_redis_limiter() -> Optional[RedisRateLimiter]:
+    global _redis_limiter, _redis_disabled_until
+    if os.environ.get("RATE_LIMIT_BACKEND", "memory").lower() != "redis":
+        return None
+    if time.monotonic() < _redis_disabled_until:
+        return None
+    if _redis_limiter is None:
+        try:
+            _redis_limiter = RedisRateLimiter(os.environ.get("REDIS_URL", "redis://localhost:6379"))
+        except Exception as e:
+            logger.warning(f"Rate limit redis backend unavailable, using local: {e}")
+            _redis_disabled_until = time.monotonic() + REDIS_RETRY_SEC
+            return None
+    return _redis_limiter
+
+
+def _redis_failed(e: Exception) -> None:
+    global _redis_disabled_until
+    logger.warning(
+        f"Rate limit redis error, falling back to local for {REDIS_RETRY_SEC:.0f}s: {e}"
+    )
+    _redis_disabled_until = time.monotonic() + REDIS_RETRY_SEC
+
+
+async def check_rate_limit(
     company_id: str,
     category: str = "default",
     limit: int | None = None,
@@ -45,52 +239,74 @@ def check_rate_limit(
         limit: リクエスト上限（Noneの場合はカテゴリデフォルト）
         window_seconds: ウィンドウ秒数（Noneの場合はカテゴリデフォルト）
     """
-    config = RATE_LIMITS.get(category, RATE_LIMITS["default"])
-    max_requests = limit or config["limit"]
-    window = window_seconds or config["window_seconds"]
-
-    key = (company_id, category)
+    max_requests, window = _resolve(category, limit, window_seconds)
+    key = f"{company_id}:{category}"
     now = time.time()
-    cutoff = now - window
 
-    # 期限切れエントリを削除
-    history = _request_history[key]
-    _request_history[key] = [t for t in history if t > cutoff]
-    history = _request_history[key]
+    decision: Optional[RateLimitDecision] = None
+    redis_limiter = _get_redis_limiter()
+    if redis_limiter is not None:
+        try:
+            decision = await redis_limiter.hit(key, max_requests, window, now)
+        except Exception as e:
+            _redis_failed(e)
+    if decision is None:
+        decision = _local_limiter.hit(key, max_requests, window, now)
 
-    if len(history) >= max_requests:
-        retry_after = int(history[0] + window - now) + 1
+    if not decision.allowed:
         logger.warning(
             f"Rate limit exceeded: company={company_id} category={category} "
-            f"count={len(history)}/{max_requests} window={window}s"
+            f"count={decision.count:.1f}/{max_requests} window={window}s"
         )
         raise HTTPException(
             status_code=429,
-            detail=f"リクエスト制限を超過しました。{retry_after}秒後に再試行してください。",
-            headers={"Retry-After": str(retry_after)},
+            detail=f"リクエスト制限を超過しました。{decision.retry_after}秒後に再試行してください。",
+            headers={"Retry-After": str(decision.retry_after)},
         )
 
-    history.append(now)
-
 
-def reset_rate_limit(company_id: str, category: str = "default") -> None:
+async def reset_rate_limit(company_id: str, category: str = "default") -> None:
     """テスト用: 特定テナント×カテゴリのレート制限をリセット"""
-    key = (company_id, category)
-    _request_history.pop(key, None)
+    key = f"{company_id}:{category}"
+    _local_limiter.reset(key)
+    redis_limiter = _get_redis_limiter()
+    if redis_limiter is not None:
+        try:
+            await redis_limiter.reset(key)
+        except Exception as e:
+            _redis_failed(e)
 
 
-def get_rate_limit_status(company_id: str, category: str = "default") -> dict:
-    """現在のレート制限状況を取得"""
-    config = RATE_LIMITS.get(category, RATE_LIMITS["default"])
-    key = (company_id, category)
+async def get_rate_limit_status(
+    company_id: str,
+    category: str = "default",
+    limit: int | None = None,
+    window_seconds: int | None = None,
+) -> dict:
+    """現在のレート制限状況を取得（redis 構成では全ワーカー合算の件数）"""
+    max_requests, window = _resolve(category, limit, window_seconds)
+    key = f"{company_id}:{category}"
     now = time.time()
-    cutoff = now - config["window_seconds"]
-    history = [t for t in _request_history.get(key, []) if t > cutoff]
+
+    count: Optional[float] = None
+    backend = "memory"
+    redis_limiter = _get_redis_limiter()
+    if redis_limiter is not None:
+        try:
+            count = await redis_limiter.peek(key, window, now)
+            backend = "redis"
+        except Exception as e:
+            _redis_failed(e)
+    if count is None:
+        count = _local_limiter.peek(key, window, now)
+
+    current = math.ceil(count)
     return {
         "company_id": company_id,
         "category": category,
-        "current_count": len(history),
-        "limit": config["limit"],
-        "window_seconds": config["window_seconds"],
-        "remaining": max(0, config["limit"] - len(history)),
+        "current_count": current,
+        "limit": max_requests,
+        "window_seconds": window,
+        "remaining": max(0, max_requests - current),
+        "backend": backend,
     }
@@ -0,0 +1,150 @@
+"""auth/jwt.py のユニットテスト（ローカル検証・クレームキャッシュ・無効化フック）。"""
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from jose import jwt as jose_jwt
+
+from auth.jwt import (
+    TTLCache,
+    clear_auth_caches,
+    invalidate_user,
+    mfa_status_cache,
+    verify_jwt,
+)
+
+SECRET = "test-secret-0123456789abcdef0123456789"
+USER_ID = "user-001"
+COMPANY_ID = "company-001"
+
+
+def _make_token(
+    role: str = "editor",
+    secret: str = SECRET,
+    iat: int | None = None,
+    exp_in: int = 3600,
+) -> str:
+    now = int(time.time())
+    payload = {
+        "sub": USER_ID,
+        "email": "a@example.com",
+        "aud": "authenticated",
+        "iat": now if iat is None else iat,
+        "exp": now + exp_in,
+        "app_metadata": {"company_id": COMPANY_ID, "role": role},
+    }
+    return jose_jwt.encode(payload, secret, algorithm="HS256")
+
+
+def _mock_remote_user(role: str = "admin") -> MagicMock:
+    user = MagicMock()
+    user.id = USER_ID
+    user.email = "a@example.com"
+    user.app_metadata = {"company_id": COMPANY_ID, "role": role}
+    db = MagicMock()
+    db.auth.get_user.return_value = MagicMock(user=user)
+    return db
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setenv("JWT_VERIFY_MODE", "local")
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.delenv("SUPABASE_JWT_SECRETS_PREVIOUS", raising=False)
+    clear_auth_caches()
+    yield
+    clear_auth_caches()
+
+
+class TestLocalVerification:
+    @pytest.mark.asyncio
+    async def test_verifies_hs256_without_remote_call(self):
+        with patch("auth.jwt.get_service_client") as mock_client:
+            claims = await verify_jwt(_make_token())
+        assert claims.sub == USER_ID
+        assert claims.company_id == COMPANY_ID
+        assert claims.role == "editor"
+        mock_client.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rejects_bad_signature(self):
+        with pytest.raises(ValueError, match="Invalid JWT"):
+            await verify_jwt(_make_token(secret="wrong-secret-wrong-secret-wrong"))
+
+    @pytest.mark.asyncio
+    async def test_rejects_expired_token(self):
+        with pytest.raises(ValueError, match="Invalid JWT"):
+            await verify_jwt(_make_token(exp_in=-10))
+
+    @pytest.mark.asyncio
+    async def test_accepts_previous_secret_during_rotation(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_JWT_SECRET", "new-secret-new-secret-new-secret-00")
+        monkeypatch.setenv("SUPABASE_JWT_SECRETS_PREVIOUS", SECRET)
+        claims = await verify_jwt(_make_token())
+        assert claims.sub == USER_ID
+
+    @pytest.mark.asyncio
+    async def test_missing_app_metadata_requires_setup(self):
+        token = jose_jwt.encode(
+            {"sub": USER_ID, "aud": "authenticated", "exp": int(time.time()) + 60},
+            SECRET, algorithm="HS256",
+        )
+        with pytest.raises(ValueError, match="SETUP_REQUIRED"):
+            await verify_jwt(token)
+
+    @pytest.mark.asyncio
+    async def test_asymmetric_key_looked_up_in_jwks(self):
+        token = _make_token()
+        with patch("auth.jwt.jose_jwt.get_unverified_header", return_value={"alg": "ES256", "kid": "k1"}), \
+             patch("auth.jwt._jwks_cache.get_key", new=AsyncMock(return_value=None)) as get_key:
+            with pytest.raises(ValueError, match="signing key not found"):
+                await verify_jwt(token)
+        get_key.assert_awaited_once_with("k1")
+
+
+class TestClaimsCache:
+    @pytest.mark.asyncio
+    async def test_remote_mode_caches_claims(self, monkeypatch):
+        monkeypatch.setenv("JWT_VERIFY_MODE", "remote")
+        db = _mock_remote_user()
+        token = _make_token()
+        with patch("auth.jwt.get_service_client", return_value=db):
+            await verify_jwt(token)
+            await verify_jwt(token)
+        assert db.auth.get_user.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_forces_remote_recheck(self):
+        """ロール変更後は旧トークンの app_metadata を信用せず Admin API で再確認する。"""
+        token = _make_token(role="admin", iat=int(time.time()) - 5)
+        assert (await verify_jwt(token)).role == "admin"
+
+        invalidate_user(USER_ID)
+        db = _mock_remote_user(role="viewer")
+        with patch("auth.jwt.get_service_client", return_value=db):
+            claims = await verify_jwt(token)
+
+        assert claims.role == "viewer"
+        db.auth.get_user.assert_called_once()
+
+    def test_invalidate_user_drops_mfa_status(self):
+        mfa_status_cache.set(USER_ID, True)
+        invalidate_user(USER_ID)
+        assert mfa_status_cache.get(USER_ID, "missing") == "missing"
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache: TTLCache[int] = TTLCache(max_size=2, ttl_sec=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+    def test_expiry(self):
+        cache: TTLCache[int] = TTLCache(max_size=10, ttl_sec=60)
+        cache.set("a", 1, ttl_sec=0.01)
+        time.sleep(0.02)
+        assert cache.get("a") is None
@@ -5,8 +5,9 @@ from uuid import UUID, uuid4
 
 import pytest
 
+from brain.extraction.chunking import PAGE_BREAK, split_text
 from brain.extraction.models import ExtractedItem, ExtractionResult
-from brain.extraction.pipeline import _parse_items, extract_knowledge
+from brain.extraction.pipeline import _normalize_title, _parse_items, extract_knowledge
 
 
 MOCK_LLM_RESPONSE_JSON = json.dumps([
@@ -148,3 +149,113 @@ class TestExtractKnowledge:
         # All items should have department overridden
         for item in result.items:
             assert item.department == "総務"
+
+
+
+class TestSplitText:
+    def test_short_text_single_chunk(self):
+        chunks = split_text("短いテキスト", max_chars=100)
+        assert len(chunks) == 1
+        assert chunks[0].text == "短いテキスト"
+
+    def test_splits_on_page_breaks(self):
+        pages = [f"ページ{i}\n" + "あ" * 80 for i in range(5)]
+        chunks = split_text(PAGE_BREAK.join(pages), max_chars=100)
+        assert len(chunks) == 5
+        assert all(c.text.startswith(f"ページ{c.index}") for c in chunks)
+        assert all(PAGE_BREAK not in c.text for c in chunks)
+
+    def test_splits_on_headings_before_lines(self):
+        sections = [f"# 第{i}章\n" + "\n".join(f"行{i}-{j}" for j in range(10)) for i in range(4)]
+        chunks = split_text("\n".join(sections), max_chars=80)
+        assert [c.text.splitlines()[0] for c in chunks] == [f"# 第{i}章" for i in range(4)]
+
+    def test_overlap_prefixes_previous_lines(self):
+        text = "\n".join(f"行{i:03d}" for i in range(100))
+        chunks = split_text(text, max_chars=100, overlap_chars=20)
+        assert len(chunks) > 1
+        # 2つ目以降のチャンクは直前チャンク末尾の行から始まる
+        prev_last_line = text[:chunks[1].start].rstrip("\n").splitlines()[-1]
+        assert prev_last_line in chunks[1].text.splitlines()[:4]
+
+    def test_hard_split_without_boundaries(self):
+        chunks = split_text("x" * 250, max_chars=100)
+        assert [len(c.text) for c in chunks] == [100, 100, 50]
+
+
+class TestChunkedExtraction:
+    @pytest.mark.asyncio
+    async def test_large_text_merges_duplicates_across_chunks(self):
+        session_id = str(uuid4())
+        mock_db = MagicMock()
+        mock_db.table.return_value.insert.return_value.execute.return_value = MagicMock(
+            data=[{"id": session_id}]
+        )
+        mock_db.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
+
+        duplicate = json.loads(MOCK_LLM_RESPONSE_JSON)[0]
+        duplicate["title"] = "見積もり 承認ルール"  # 正規化後は同一タイトル
+        duplicate["examples"] = ["新規顧客の見積もり"]
+        mock_llm = AsyncMock()
+        mock_llm.generate.side_effect = [
+            MagicMock(content=MOCK_LLM_RESPONSE_JSON, model_used="gemini-2.5-flash", cost_yen=0.01),
+            MagicMock(content=json.dumps([duplicate]), model_used="gemini-2.5-flash", cost_yen=0.02),
+        ]
+
+        text = "第一部\n" + "あ" * 90 + PAGE_BREAK + "第二部\n" + "い" * 90
+        with patch("brain.extraction.pipeline.EXTRACTION_CHUNK_CHARS", 100), \
+             patch("brain.extraction.pipeline.EXTRACTION_CHUNK_OVERLAP_CHARS", 0), \
+             patch("brain.extraction.pipeline.generate_embeddings", side_effect=RuntimeError("no key")), \
+             patch("brain.extraction.pipeline.get_service_client", return_value=mock_db), \
+             patch("brain.extraction.pipeline.get_llm_client", return_value=mock_llm):
+            result = await extract_knowledge(
+                text=text,
+                company_id=str(uuid4()),
+                user_id=str(uuid4()),
+            )
+
+        assert mock_llm.generate.call_count == 2
+        assert len(result.items) == 2
+        merged = next(i for i in result.items if _normalize_title(i.title) == _normalize_title("見積もり承認ルール"))
+        assert merged.examples == ["大型案件の見積もり", "新規顧客の見積もり"]
+        assert result.cost_yen == pytest.approx(0.03)
+        progress_updates = [
+            c.args[0] for c in mock_db.table.return_value.update.call_args_list
+            if "extraction_progress" in c.args[0]
+        ]
+        assert progress_updates[-1]["extraction_progress"]["chunks_done"] == 2
+
+    @pytest.mark.asyncio
+    async def test_partial_chunk_failure_still_completes(self):
+        session_id = str(uuid4())
+        mock_db = MagicMock()
+        mock_db.table.return_value.insert.return_value.execute.return_value = MagicMock(
+            data=[{"id": session_id}]
+        )
+        mock_db.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
+
+        mock_llm = AsyncMock()
+        mock_llm.generate.side_effect = [
+            MagicMock(content=MOCK_LLM_RESPONSE_JSON, model_used="gemini-2.5-flash", cost_yen=0.01),
+            RuntimeError("timeout"),
+        ]
+
+        text = "あ" * 90 + PAGE_BREAK + "い" * 90
+        with patch("brain.extraction.pipeline.EXTRACTION_CHUNK_CHARS", 100), \
+             patch("brain.extraction.pipeline.EXTRACTION_MAX_CONCURRENCY", 1), \
+             patch("brain.extraction.pipeline.generate_embeddings", side_effect=RuntimeError("no key")), \
+             patch("brain.extraction.pipeline.get_service_client", return_value=mock_db), \
+             patch("brain.extraction.pipeline.get_llm_client", return_value=mock_llm):
+            result = await extract_knowledge(
+                text=text,
+                company_id=str(uuid4()),
+                user_id=str(uuid4()),
+            )
+
+        assert len(result.items) == 2
+        statuses = [
+            c.args[0] for c in mock_db.table.return_value.update.call_args_list
+            if "extraction_status" in c.args[0]
+        ]
+        assert statuses[-1]["extraction_status"] == "completed"
+        assert statuses[-1]["extraction_error"] == {"message": "1/2 chunks failed"}
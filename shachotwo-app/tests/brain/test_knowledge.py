@@ -1,4 +1,5 @@
 """Tests for brain/knowledge (embeddings, search, Q&A)."""
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
@@ -97,6 +98,38 @@ class TestHybridSearch:
 
         assert len(results) == 2
 
+    @pytest.mark.asyncio
+    async def test_hybrid_runs_vector_and_keyword_concurrently(self):
+        keyword_started = asyncio.Event()
+
+        async def vector(*args):
+            # キーワード検索が始まるまで待つ（逐次実行ならタイムアウトする）
+            await asyncio.wait_for(keyword_started.wait(), timeout=1)
+            return [MOCK_SEARCH_RESULTS[0]]
+
+        async def keyword(*args):
+            keyword_started.set()
+            return [MOCK_SEARCH_RESULTS[1]]
+
+        with patch("brain.knowledge.search.vector_search", side_effect=vector), \
+             patch("brain.knowledge.search.keyword_search", side_effect=keyword):
+            results = await hybrid_search("テスト", str(uuid4()), top_k=5)
+
+        assert [r.item_id for r in results] == [r.item_id for r in MOCK_SEARCH_RESULTS[:2]]
+
+    @pytest.mark.asyncio
+    async def test_hybrid_keyword_asks_for_shortfall_plus_duplicates(self):
+        company_id = str(uuid4())
+        with patch("brain.knowledge.search.vector_search", new_callable=AsyncMock,
+                   return_value=[MOCK_SEARCH_RESULTS[0]]), \
+             patch("brain.knowledge.search.keyword_search", new_callable=AsyncMock,
+                   return_value=list(MOCK_SEARCH_RESULTS)) as mock_keyword:
+            results = await hybrid_search("テスト", company_id, top_k=5)
+
+        # ベクトル側と重複しうる 1 件 + 不足 4 件
+        mock_keyword.assert_awaited_once_with("テスト", company_id, None, 5)
+        assert [r.item_id for r in results] == [r.item_id for r in MOCK_SEARCH_RESULTS]
+
 
 class TestParseQAResponse:
     def test_valid_json(self):
@@ -187,3 +220,89 @@ class TestAnswerQuestion:
 
         assert result.answer == "回答テスト（ハイブリッド）"
         assert result.search_mode == "hybrid"
+
+
+class TestEmbeddingWorker:
+    @pytest.mark.asyncio
+    async def test_update_item_embedding_skips_unchanged(self):
+        from brain.knowledge.embeddings import update_item_embedding
+
+        mock_db = MagicMock()
+        mock_db.table.return_value.select.return_value.eq.return_value.eq.return_value.single.return_value.execute.return_value = MagicMock(
+            data={"title": "t", "content": "c", "content_hash": "h1", "embedding_hash": "h1"}
+        )
+        mock_embed = AsyncMock()
+
+        with patch("brain.knowledge.embeddings.get_service_client", return_value=mock_db), \
+             patch("brain.knowledge.embeddings.generate_embedding", mock_embed):
+            await update_item_embedding(str(uuid4()), str(uuid4()))
+
+        mock_embed.assert_not_called()
+        mock_db.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_embed_stale_items_writes_one_bulk_rpc(self):
+        from brain.knowledge.embeddings import content_hash, embed_stale_items
+
+        stale = [
+            {"id": str(uuid4()), "company_id": str(uuid4()), "title": f"t{i}", "content": f"c{i}",
+             "content_hash": content_hash(f"t{i}", f"c{i}")}
+            for i in range(3)
+        ]
+        mock_db = MagicMock()
+        mock_db.rpc.return_value.execute.side_effect = [MagicMock(data=stale), MagicMock(data=3)]
+
+        with patch("brain.knowledge.embeddings.get_service_client", return_value=mock_db), \
+             patch("brain.knowledge.embeddings.generate_embeddings", new_callable=AsyncMock,
+                   return_value=[[0.1] * 4] * 3) as mock_embed:
+            written = await embed_stale_items()
+
+        assert written == 3
+        mock_embed.assert_awaited_once_with(["t0\nc0", "t1\nc1", "t2\nc2"])
+        rpc_names = [c.args[0] for c in mock_db.rpc.call_args_list]
+        assert rpc_names == ["get_stale_embedding_items", "set_knowledge_embeddings"]
+        written_rows = mock_db.rpc.call_args_list[1].args[1]["p_rows"]
+        assert [r["content_hash"] for r in written_rows] == [r["content_hash"] for r in stale]
+        mock_db.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_embed_stale_items_isolates_bad_row_and_records_backoff(self):
+        from brain.knowledge.embeddings import content_hash, embed_stale_items
+
+        stale = [
+            {"id": f"item-{i}", "company_id": str(uuid4()), "title": f"t{i}", "content": f"c{i}",
+             "content_hash": content_hash(f"t{i}", f"c{i}")}
+            for i in range(3)
+        ]
+        mock_db = MagicMock()
+        mock_db.rpc.return_value.execute.side_effect = [MagicMock(data=stale), MagicMock(data=1), MagicMock(data=1), MagicMock(data=1)]
+
+        async def embed_one(text):
+            if text == "t1\nc1":
+                raise ValueError("400 INVALID_ARGUMENT")
+            return [0.1] * 4
+
+        with patch("brain.knowledge.embeddings.get_service_client", return_value=mock_db), \
+             patch("brain.knowledge.embeddings.generate_embeddings", new_callable=AsyncMock,
+                   side_effect=ValueError("400 INVALID_ARGUMENT")), \
+             patch("brain.knowledge.embeddings.generate_embedding", side_effect=embed_one):
+            written = await embed_stale_items()
+
+        assert written == 2
+        rpc_names = [c.args[0] for c in mock_db.rpc.call_args_list]
+        assert rpc_names == ["get_stale_embedding_items", "set_knowledge_embeddings",
+                             "set_knowledge_embeddings", "record_embedding_failures"]
+        failed = mock_db.rpc.call_args_list[-1].args[1]["p_rows"]
+        assert [(f["id"], f["content_hash"]) for f in failed] == [("item-1", stale[1]["content_hash"])]
+        assert "INVALID_ARGUMENT" in failed[0]["error"]
+
+    @pytest.mark.asyncio
+    async def test_backfill_loops_until_drained(self):
+        from brain.knowledge.embeddings import backfill_embeddings
+
+        with patch("brain.knowledge.embeddings.embed_stale_items", new_callable=AsyncMock,
+                   side_effect=[2, 2, 1]) as mock_batch:
+            total = await backfill_embeddings(str(uuid4()), batch_size=2)
+
+        assert total == 5
+        assert mock_batch.await_count == 3
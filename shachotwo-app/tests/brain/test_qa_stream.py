@@ -0,0 +1,85 @@
+"""answer_question_stream（ストリーミングQ&A）のテスト。"""
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from brain.knowledge.qa import QAResult, _AnswerStreamSplitter, answer_question_stream
+from brain.knowledge.search import SearchResult
+from llm.client import LLMResponse, LLMStreamChunk
+
+COMPANY_ID = str(uuid4())
+
+SEARCH_RESULTS = [
+    SearchResult(
+        item_id=uuid4(),
+        title="有給休暇の申請手順",
+        content="有給休暇は2週間前までに上長に申請する。",
+        department="総務部",
+        category="rule",
+        item_type="text",
+        confidence=0.9,
+        similarity=0.85,
+    ),
+]
+
+
+def _mock_llm(deltas: list[str]) -> MagicMock:
+    async def _stream(task):
+        for delta in deltas:
+            yield LLMStreamChunk(delta=delta)
+        yield LLMStreamChunk(done=True, response=LLMResponse(
+            content="".join(deltas), model_used="gemini-2.5-flash",
+            tokens_in=100, tokens_out=20, cost_yen=0.01, latency_ms=500,
+        ))
+
+    llm = MagicMock()
+    llm.generate_stream = _stream
+    return llm
+
+
+class TestAnswerStreamSplitter:
+    def test_marker_split_across_chunks_is_not_emitted(self):
+        splitter = _AnswerStreamSplitter()
+        out = [splitter.feed(d) for d in ["回答です。\n<<<ME", "TA>>>{\"confidence\": 0.8,", " \"missing_info\": null}"]]
+        rest, meta = splitter.finish()
+
+        assert "".join(out) + rest == "回答です。\n"
+        assert meta == {"confidence": 0.8, "missing_info": None}
+        assert splitter.answer == "回答です。"
+
+    def test_text_resembling_marker_prefix_is_released(self):
+        splitter = _AnswerStreamSplitter()
+        out = splitter.feed("a<<<") + splitter.feed("b")
+        rest, meta = splitter.finish()
+        assert out + rest == "a<<<b"
+        assert meta == {}
+
+
+class TestAnswerQuestionStream:
+    @pytest.mark.asyncio
+    async def test_yields_tokens_then_result(self):
+        deltas = ["有給は", "2週間前までに申請します。", '\n<<<META>>>{"confidence": 0.8}']
+        with patch("brain.knowledge.qa.enhanced_search", new=AsyncMock(return_value=SEARCH_RESULTS)), \
+             patch("brain.knowledge.qa.get_llm_client", return_value=_mock_llm(deltas)), \
+             patch("brain.knowledge.qa._increment_usage_counts") as inc:
+            items = [item async for item in answer_question_stream("有給の申請方法は？", COMPANY_ID)]
+
+        texts = [i for i in items if isinstance(i, str)]
+        result = items[-1]
+        assert isinstance(result, QAResult)
+        assert "<<<META>>>" not in "".join(texts)
+        assert result.answer == "有給は2週間前までに申請します。"
+        assert result.sources[0].title == "有給休暇の申請手順"
+        assert result.model_used == "gemini-2.5-flash"
+        assert result.cost_yen == 0.01
+        inc.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_no_results_yields_fixed_message(self):
+        with patch("brain.knowledge.qa.enhanced_search", new=AsyncMock(return_value=[])):
+            items = [item async for item in answer_question_stream("質問", COMPANY_ID)]
+
+        assert isinstance(items[-1], QAResult)
+        assert items[-1].model_used == "none"
+        assert items[0] == items[-1].answer
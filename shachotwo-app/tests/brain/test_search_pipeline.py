@@ -0,0 +1,118 @@
+"""enhanced_search の並行パイプライン・RRF・リランク省略・埋め込みキャッシュのテスト。"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from brain.knowledge.search import (
+    SearchResult,
+    embed_query,
+    enhanced_search,
+    reciprocal_rank_fusion,
+    rerank_results,
+)
+
+COMPANY_ID = str(uuid4())
+
+
+def _result(title: str, similarity: float) -> SearchResult:
+    return SearchResult(
+        item_id=uuid4(), title=title, content=f"{title}の内容", department="総務",
+        category="rule", item_type="text", confidence=0.9, similarity=similarity,
+    )
+
+
+class TestReciprocalRankFusion:
+    def test_items_in_both_rankings_rise(self):
+        a, b, c = _result("A", 0.7), _result("B", 0.6), _result("C", 0.65)
+        fused = reciprocal_rank_fusion([[a, b], [c, b]])
+        assert fused[0].item_id == b.item_id
+        assert {r.item_id for r in fused} == {a.item_id, b.item_id, c.item_id}
+
+
+class TestEnhancedSearch:
+    @pytest.mark.asyncio
+    async def test_raw_vector_search_overlaps_expansion(self):
+        """元クエリのベクトル検索は HyDE 拡張の完了を待たずに始まる。"""
+        order: list[str] = []
+
+        async def _expand(query, company_id):
+            order.append("expand:start")
+            await asyncio.sleep(0.02)
+            order.append("expand:end")
+            return f"{query} 仮想回答"
+
+        async def _vector(query, *args, **kwargs):
+            order.append(f"vector:{query}")
+            return [_result(query, 0.7), _result(f"{query}-2", 0.68)]
+
+        with patch("brain.knowledge.search.expand_query", side_effect=_expand), \
+             patch("brain.knowledge.search.vector_search", side_effect=_vector), \
+             patch("brain.knowledge.search.rerank_results", new=AsyncMock(side_effect=lambda q, r, c, top_n: r[:top_n])):
+            results = await enhanced_search("有給", COMPANY_ID, top_k=3)
+
+        assert order.index("vector:有給") < order.index("expand:end")
+        assert "vector:有給 仮想回答" in order
+        assert len(results) == 3
+
+    @pytest.mark.asyncio
+    async def test_decisive_top_result_skips_rerank(self):
+        candidates = [_result("A", 0.95), _result("B", 0.6)]
+        rerank = AsyncMock()
+        with patch("brain.knowledge.search.expand_query", new=AsyncMock(side_effect=lambda q, c: q)), \
+             patch("brain.knowledge.search.vector_search", new=AsyncMock(return_value=candidates)), \
+             patch("brain.knowledge.search.rerank_results", new=rerank):
+            results = await enhanced_search("質問", COMPANY_ID, top_k=5)
+
+        rerank.assert_not_awaited()
+        assert results[0].title == "A"
+
+    @pytest.mark.asyncio
+    async def test_slow_rerank_falls_back_to_rrf_order(self):
+        candidates = [_result("A", 0.7), _result("B", 0.69)]
+
+        async def _slow_rerank(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        with patch("brain.knowledge.search.expand_query", new=AsyncMock(side_effect=lambda q, c: q)), \
+             patch("brain.knowledge.search.vector_search", new=AsyncMock(return_value=candidates)), \
+             patch("brain.knowledge.search.rerank_results", side_effect=_slow_rerank):
+            results = await enhanced_search("質問", COMPANY_ID, latency_budget_ms=50)
+
+        assert [r.title for r in results] == ["A", "B"]
+
+    @pytest.mark.asyncio
+    async def test_no_vector_results_falls_back_to_keyword(self):
+        keyword = [_result("KW", 0.5)]
+        with patch("brain.knowledge.search.expand_query", new=AsyncMock(side_effect=lambda q, c: q)), \
+             patch("brain.knowledge.search.vector_search", new=AsyncMock(return_value=[])), \
+             patch("brain.knowledge.search.keyword_search", new=AsyncMock(return_value=keyword)):
+            results = await enhanced_search("質問", COMPANY_ID)
+
+        assert results == keyword
+
+
+class TestRerankResults:
+    @pytest.mark.asyncio
+    async def test_orders_by_llm_relevance(self):
+        results = [_result("A", 0.7), _result("B", 0.7), _result("C", 0.7)]
+        llm = MagicMock()
+        llm.generate = AsyncMock(return_value=MagicMock(
+            content='[{"index": 0, "relevance": 0.2}, {"index": 2, "relevance": 0.9}]',
+        ))
+        with patch("brain.knowledge.search.get_llm_client", return_value=llm):
+            ranked = await rerank_results("質問", results, COMPANY_ID, top_n=2)
+
+        assert [r.title for r in ranked] == ["C", "A"]
+
+
+class TestQueryEmbeddingCache:
+    @pytest.mark.asyncio
+    async def test_normalized_query_reuses_embedding(self):
+        embed = AsyncMock(return_value=[0.1, 0.2])
+        with patch("brain.knowledge.search.generate_query_embedding", new=embed):
+            await embed_query("有給の 申請")
+            await embed_query("  有給の　申請 ")
+
+        assert embed.await_count == 1
@@ -20,3 +20,59 @@ def pytest_collection_modifyitems(config, items):
         for item in items:
             if "integration" in item.keywords:
                 item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def _reset_llm_response_cache():
+    """LLM応答キャッシュはプロセス内シングルトンのため、テスト間で持ち越さない。"""
+    from llm.response_cache import set_response_cache
+
+    set_response_cache(None)
+    yield
+    set_response_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def _reset_query_embedding_cache():
+    """クエリ埋め込みキャッシュもプロセス内のため、テスト間で持ち越さない。"""
+    from brain.knowledge.search import clear_query_embedding_cache
+
+    clear_query_embedding_cache()
+    yield
+    clear_query_embedding_cache()
+
+
+@pytest.fixture(autouse=True)
+def _reset_bpo_tenant_scan():
+    """オーケストレータのテナント一覧・スケジュールインデックス・条件評価状態・走査メトリクス・
+    パイプライン解決キャッシュ・実行枠スケジューラ・ステップチェックポイント・ロールキャッシュ・
+    コネクタ HTTP ランタイムをテスト間で持ち越さない。"""
+    from workers.bpo.engine.agent_factory import invalidate_agent_roles
+    from workers.bpo.engine.checkpoint import reset_checkpoint_store
+    from workers.bpo.manager import orchestrator
+    from workers.bpo.manager.condition_evaluator import reset_condition_state
+    from workers.bpo.manager.fair_scheduler import reset_fair_scheduler
+    from workers.bpo.manager.pipeline_resolver import reset_pipeline_cache
+    from workers.bpo.manager.schedule_watcher import invalidate_schedule_index
+    from workers.bpo.manager.tenant_scan import reset_cycle_stats
+    from workers.connector.base import reset_connector_runtime
+
+    orchestrator._tenant_cache.invalidate()
+    invalidate_schedule_index()
+    reset_condition_state()
+    reset_cycle_stats()
+    reset_pipeline_cache()
+    reset_fair_scheduler()
+    reset_checkpoint_store()
+    invalidate_agent_roles()
+    reset_connector_runtime()
+    yield
+    orchestrator._tenant_cache.invalidate()
+    invalidate_schedule_index()
+    reset_condition_state()
+    reset_cycle_stats()
+    reset_pipeline_cache()
+    reset_fair_scheduler()
+    reset_checkpoint_store()
+    invalidate_agent_roles()
+    reset_connector_runtime()
@@ -0,0 +1,114 @@
+"""db/supabase.py のユニットテスト（接続プール・非同期 execute・テナントスコープ）。"""
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from db import supabase as db_supabase
+from db.supabase import (
+    TENANT_HEADER,
+    TenantScopedClient,
+    execute,
+    get_service_client,
+    reset_clients,
+    with_company_context,
+)
+
+FAKE_URL = "https://example.supabase.co"
+FAKE_KEY = "k" * 40
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", FAKE_URL)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", FAKE_KEY)
+    monkeypatch.setenv("SUPABASE_ANON_KEY", FAKE_KEY)
+    reset_clients()
+    yield
+    reset_clients()
+
+
+class TestPooledClient:
+    def test_service_client_is_reused(self):
+        """同一プロセスでは同じクライアントを返す（毎回 create_client しない）。"""
+        with patch("db.supabase.create_client", return_value=MagicMock()) as mock_create:
+            first = get_service_client()
+            second = get_service_client()
+        assert first is second
+        assert mock_create.call_count == 1
+
+    def test_key_change_builds_new_client(self, monkeypatch):
+        """キーが変わったら別クライアントを作る（ローテーション対応）。"""
+        with patch("db.supabase.create_client", side_effect=[MagicMock(), MagicMock()]):
+            first = get_service_client()
+            monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "rotated" * 6)
+            second = get_service_client()
+        assert first is not second
+
+    def test_failed_creation_is_not_cached(self):
+        with patch("db.supabase.create_client", side_effect=[Exception("boom"), MagicMock()]):
+            with pytest.raises(Exception):
+                get_service_client()
+            assert get_service_client() is not None
+
+
+class TestExecute:
+    @pytest.mark.asyncio
+    async def test_sync_builder_runs_off_loop(self):
+        """同期クエリはイベントループ外のスレッドで実行される。"""
+        loop_thread = threading.get_ident()
+        seen: dict[str, int] = {}
+
+        def _run():
+            seen["thread"] = threading.get_ident()
+            return MagicMock(data=[{"id": 1}])
+
+        query = MagicMock()
+        query.execute.side_effect = _run
+
+        result = await execute(query)
+
+        assert result.data == [{"id": 1}]
+        assert seen["thread"] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_async_builder_is_awaited(self):
+        query = MagicMock()
+        query.execute = AsyncMock(return_value=MagicMock(data=[]))
+
+        result = await execute(query)
+
+        assert result.data == []
+        query.execute.assert_awaited_once()
+
+
+class TestTenantScope:
+    def test_table_header_does_not_leak_to_shared_client(self):
+        """テナントヘッダーはクエリ単位で付与され、共有クライアントを汚染しない。"""
+        client = get_service_client()
+        scoped = TenantScopedClient(client, "company-a")
+
+        builder = scoped.table("knowledge_items")
+
+        assert builder.headers[TENANT_HEADER] == "company-a"
+        assert TENANT_HEADER not in client.table("knowledge_items").headers
+
+    def test_rpc_header_is_scoped(self):
+        client = get_service_client()
+        builder = TenantScopedClient(client, "company-b").rpc("match_knowledge", {"q": 1})
+        assert builder.request.headers[TENANT_HEADER] == "company-b"
+
+    @pytest.mark.asyncio
+    async def test_with_company_context_reuses_pool(self):
+        async with with_company_context("company-a") as a:
+            async with with_company_context("company-b") as b:
+                assert a._client is b._client
+                assert a.table("x").headers[TENANT_HEADER] == "company-a"
+                assert b.table("x").headers[TENANT_HEADER] == "company-b"
+
+
+@pytest.mark.asyncio
+async def test_close_clients_clears_pool():
+    get_service_client()
+    await db_supabase.close_clients()
+    assert db_supabase._sync_clients == {}
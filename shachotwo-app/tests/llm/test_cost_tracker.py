@@ -0,0 +1,168 @@
+"""CostTracker の共有ストア同期・予算確保（reserve/settle）のテスト。"""
+from collections import defaultdict
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from llm.client import LLMClient, LLMTask, ModelTier, estimate_max_cost_yen
+from llm.cost_tracker import CostDelta, CostTracker
+
+COMPANY_ID = "company-a"
+
+
+class FakeSharedStore:
+    """複数プロセスが共有する Redis 相当（プロセスごとの確保額も保持）。"""
+
+    def __init__(self) -> None:
+        self.totals: dict[tuple[str, str], CostDelta] = defaultdict(CostDelta)
+        self.reserved: dict[tuple[str, str], dict[int, float]] = defaultdict(dict)
+        self.apply_calls = 0
+        self.fail = False
+
+    def view(self, instance: int) -> "_StoreView":
+        return _StoreView(self, instance)
+
+
+class _StoreView:
+    def __init__(self, shared: FakeSharedStore, instance: int) -> None:
+        self.shared = shared
+        self.instance = instance
+
+    async def apply(self, month, deltas, reserved):
+        if self.shared.fail:
+            raise ConnectionError("store down")
+        self.shared.apply_calls += 1
+        for company_id, d in deltas.items():
+            self.shared.totals[(month, company_id)].add(d)
+        for company_id, amount in reserved.items():
+            self.shared.reserved[(month, company_id)][self.instance] = amount
+        for (m, company_id), per_instance in self.shared.reserved.items():
+            if m == month and company_id not in reserved:
+                per_instance.pop(self.instance, None)
+
+    async def fetch(self, month, company_ids):
+        result = {}
+        for company_id in company_ids:
+            if (month, company_id) not in self.shared.totals and not self.shared.reserved.get((month, company_id)):
+                continue
+            t = self.shared.totals[(month, company_id)]
+            others = sum(
+                v for k, v in self.shared.reserved[(month, company_id)].items() if k != self.instance
+            )
+            result[company_id] = CostDelta(
+                t.cost_yen, t.request_count, t.cache_hit_count, t.saved_cost_yen, others,
+            )
+        return result
+
+    async def close(self):
+        return None
+
+
+class TestSharedStoreSync:
+    @pytest.mark.asyncio
+    async def test_processes_see_combined_spend_after_sync(self):
+        shared = FakeSharedStore()
+        a, b = CostTracker(store=shared.view(1)), CostTracker(store=shared.view(2))
+        a.record_cost(COMPANY_ID, 30_000)
+        b.record_cost(COMPANY_ID, 25_000)
+
+        # 同期前はそれぞれ自分の分しか見えない
+        a.check_budget(COMPANY_ID)
+        b.check_budget(COMPANY_ID)
+
+        await a.sync()
+        await b.sync()
+        await a.sync()
+
+        assert a.get_status(COMPANY_ID)["total_cost_yen"] == 55_000
+        assert b.get_status(COMPANY_ID)["request_count"] == 2
+        with pytest.raises(HTTPException):
+            a.check_budget(COMPANY_ID)
+
+    @pytest.mark.asyncio
+    async def test_failed_sync_keeps_pending_for_next_round(self):
+        shared = FakeSharedStore()
+        tracker = CostTracker(store=shared.view(1))
+        tracker.record_cost(COMPANY_ID, 10.0)
+
+        shared.fail = True
+        await tracker.sync()
+        assert tracker.get_status(COMPANY_ID)["total_cost_yen"] == 10.0
+
+        shared.fail = False
+        await tracker.sync()
+        month = tracker._current_month_key()
+        assert shared.totals[(month, COMPANY_ID)].cost_yen == 10.0
+        assert tracker.get_status(COMPANY_ID)["total_cost_yen"] == 10.0
+
+    @pytest.mark.asyncio
+    async def test_check_budget_does_not_touch_store(self):
+        shared = FakeSharedStore()
+        tracker = CostTracker(store=shared.view(1))
+        for _ in range(100):
+            tracker.check_budget(COMPANY_ID)
+            tracker.record_cost(COMPANY_ID, 0.1)
+        assert shared.apply_calls == 0
+
+
+class TestReservations:
+    def test_reservation_counts_against_budget(self):
+        tracker = CostTracker()
+        tracker.set_budget(COMPANY_ID, 100)
+        rid = tracker.reserve(COMPANY_ID, 80)
+
+        with pytest.raises(HTTPException):
+            tracker.reserve(COMPANY_ID, 30)
+
+        tracker.settle(rid, 20)
+        status = tracker.get_status(COMPANY_ID)
+        assert status["reserved_yen"] == 0
+        assert status["total_cost_yen"] == 20
+        tracker.reserve(COMPANY_ID, 30)
+
+    @pytest.mark.asyncio
+    async def test_reservations_shared_across_processes(self):
+        shared = FakeSharedStore()
+        a, b = CostTracker(store=shared.view(1)), CostTracker(store=shared.view(2))
+        for t in (a, b):
+            t.set_budget(COMPANY_ID, 100)
+        rid = a.reserve(COMPANY_ID, 90)
+
+        await a.sync()
+        await b.sync()
+        with pytest.raises(HTTPException):
+            b.reserve(COMPANY_ID, 20)
+
+        a.release(rid)
+        await a.sync()
+        await b.sync()
+        b.reserve(COMPANY_ID, 20)
+
+    @pytest.mark.asyncio
+    async def test_llm_client_releases_reservation_after_call(self):
+        tracker = CostTracker()
+        client = LLMClient()
+        call_model = AsyncMock(return_value={"content": "ok", "tokens_in": 1000, "tokens_out": 1000})
+        with patch.object(client, "_call_model", new=call_model), \
+             patch("llm.client.get_cost_tracker", return_value=tracker), \
+             patch("llm.client.select_optimal_model", return_value="gemini-2.5-flash"), \
+             patch("llm.client.get_fallback_chain", return_value=["gemini-2.5-flash"]), \
+             patch("llm.client.get_model_costs", return_value={"in": 1.0, "out": 2.0}):
+            await client.generate(LLMTask(
+                messages=[{"role": "user", "content": "見積"}],
+                tier=ModelTier.PREMIUM,
+                company_id=COMPANY_ID,
+                reserve_cost_yen=50.0,
+            ))
+
+        status = tracker.get_status(COMPANY_ID)
+        assert status["reserved_yen"] == 0
+        assert status["total_cost_yen"] == pytest.approx(3.0)
+
+
+def test_estimate_max_cost_yen_uses_primary_model_and_max_tokens():
+    task = LLMTask(messages=[{"role": "user", "content": "あ" * 1000}], tier=ModelTier.STANDARD, max_tokens=2000)
+    with patch("llm.client.select_optimal_model", return_value="m"), \
+         patch("llm.client.get_model_costs", return_value={"in": 1.0, "out": 2.0}):
+        assert estimate_max_cost_yen(task) == pytest.approx(1.0 + 4.0)
@@ -0,0 +1,225 @@
+"""llm/response_cache.py と LLMClient.generate のキャッシュ経路のテスト。"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from llm.client import LLMClient, LLMTask, ModelTier
+from llm.cost_tracker import CostTracker
+from llm.response_cache import (
+    InMemoryCacheBackend,
+    ResponseCache,
+    build_cache_key,
+    set_response_cache,
+)
+
+COMPANY_A = "company-a"
+COMPANY_B = "company-b"
+
+
+def _task(content: str = "有給休暇の申請方法は？", company_id: str = COMPANY_A, **kwargs) -> LLMTask:
+    return LLMTask(
+        messages=[
+            {"role": "system", "content": "検索クエリ拡張"},
+            {"role": "user", "content": content},
+        ],
+        tier=ModelTier.FAST,
+        task_type="query_expand",
+        company_id=company_id,
+        cache=True,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def tracker():
+    return CostTracker()
+
+
+@pytest.fixture
+def client_with_mock(tracker):
+    """_call_model をモックした LLMClient と、そのモックを返す。"""
+    client = LLMClient()
+    call_model = AsyncMock(return_value={"content": "回答", "tokens_in": 100, "tokens_out": 50})
+    with patch.object(client, "_call_model", new=call_model), \
+         patch("llm.client.get_cost_tracker", return_value=tracker), \
+         patch("llm.client.select_optimal_model", return_value="gemini-2.5-flash"), \
+         patch("llm.client.get_fallback_chain", return_value=["gemini-2.5-flash"]), \
+         patch("llm.client.get_model_costs", return_value={"in": 1.0, "out": 2.0}):
+        yield client, call_model
+
+
+class TestCacheKey:
+    def test_key_isolated_per_tenant(self):
+        assert build_cache_key(_task(company_id=COMPANY_A)) != build_cache_key(_task(company_id=COMPANY_B))
+
+    def test_key_depends_on_temperature_and_format(self):
+        base = build_cache_key(_task())
+        assert base != build_cache_key(_task(temperature=0.9))
+        assert base != build_cache_key(_task(response_format={"type": "object"}))
+        assert base == build_cache_key(_task())
+
+
+class TestInMemoryBackend:
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        await backend.set("a", {"v": 1}, 60)
+        await backend.set("b", {"v": 2}, 60)
+        await backend.get("a")
+        await backend.set("c", {"v": 3}, 60)
+        assert await backend.get("b") is None
+        assert await backend.get("a") == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        backend = InMemoryCacheBackend()
+        await backend.set("a", {"v": 1}, 0)
+        assert await backend.get("a") is None
+
+
+class TestGenerateWithCache:
+    @pytest.mark.asyncio
+    async def test_exact_hit_skips_provider_and_costs_zero(self, client_with_mock, tracker):
+        client, call_model = client_with_mock
+
+        first = await client.generate(_task())
+        second = await client.generate(_task())
+
+        assert call_model.await_count == 1
+        assert first.cache_hit is None
+        assert first.cost_yen > 0
+        assert second.cache_hit == "exact"
+        assert second.cost_yen == 0.0
+        assert second.saved_cost_yen == first.cost_yen
+        assert second.content == first.content
+
+        status = tracker.get_status(COMPANY_A)
+        assert status["request_count"] == 2
+        assert status["cache_hit_count"] == 1
+        assert status["total_cost_yen"] == pytest.approx(first.cost_yen)
+        assert status["saved_cost_yen"] == pytest.approx(first.cost_yen)
+
+    @pytest.mark.asyncio
+    async def test_other_tenant_does_not_hit(self, client_with_mock):
+        client, call_model = client_with_mock
+        await client.generate(_task(company_id=COMPANY_A))
+        response = await client.generate(_task(company_id=COMPANY_B))
+        assert response.cache_hit is None
+        assert call_model.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_opt_in(self, client_with_mock):
+        client, call_model = client_with_mock
+        task = _task()
+        task.cache = False
+        await client.generate(task)
+        await client.generate(task)
+        assert call_model.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_identical_inflight_requests_coalesce(self, tracker):
+        client = LLMClient()
+
+        async def _slow(*_args, **_kwargs):
+            await asyncio.sleep(0.05)
+            return {"content": "回答", "tokens_in": 10, "tokens_out": 5}
+
+        call_model = AsyncMock(side_effect=_slow)
+        with patch.object(client, "_call_model", new=call_model), \
+             patch("llm.client.get_cost_tracker", return_value=tracker), \
+             patch("llm.client.select_optimal_model", return_value="gemini-2.5-flash"), \
+             patch("llm.client.get_fallback_chain", return_value=["gemini-2.5-flash"]), \
+             patch("llm.client.get_model_costs", return_value={"in": 1.0, "out": 2.0}):
+            responses = await asyncio.gather(*[client.generate(_task()) for _ in range(5)])
+
+        assert call_model.await_count == 1
+        assert sum(1 for r in responses if r.cache_hit == "coalesced") == 4
+        assert all(r.content == "回答" for r in responses)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        cache = ResponseCache()
+        started = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return f"結果{calls}"
+
+        leader = asyncio.create_task(cache.coalesce(_task(), compute))
+        await started.wait()
+        followers = [asyncio.create_task(cache.coalesce(_task(), compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # 待機者のうち 1 つが計算し直し、残りはそれに合流する
+        assert calls == 2
+        assert sorted(results) == [("結果2", False), ("結果2", True), ("結果2", True)]
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_not_cached(self, client_with_mock):
+        client, call_model = client_with_mock
+        call_model.side_effect = [ValueError("bad request"), {"content": "ok", "tokens_in": 1, "tokens_out": 1}]
+
+        with pytest.raises(RuntimeError):
+            await client.generate(_task())
+        response = await client.generate(_task())
+
+        assert response.content == "ok"
+        assert response.cache_hit is None
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_for_similar_query(self, client_with_mock):
+        client, call_model = client_with_mock
+        vectors = {
+            "有給休暇の申請方法は？": [1.0, 0.0, 0.0],
+            "有給の申請方法を教えて": [0.999, 0.01, 0.0],
+            "経費精算の締め日は？": [0.0, 1.0, 0.0],
+        }
+        set_response_cache(ResponseCache(embed_fn=AsyncMock(side_effect=lambda t: vectors[t])))
+
+        await client.generate(_task("有給休暇の申請方法は？", semantic_cache=True))
+        similar = await client.generate(_task("有給の申請方法を教えて", semantic_cache=True))
+        different = await client.generate(_task("経費精算の締め日は？", semantic_cache=True))
+
+        assert similar.cache_hit == "semantic"
+        assert different.cache_hit is None
+        assert call_model.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reasoning_trace_survives_cache_roundtrip(self, client_with_mock):
+        client, call_model = client_with_mock
+        call_model.return_value = {
+            "content": '結果\n```json\n{"reasoning_trace": {"action_summary": "要約", "confidence_score": 0.8, '
+                       '"evidence": [{"description": "根拠", "source": "db", "confidence": 0.9}]}}\n```',
+            "tokens_in": 10,
+            "tokens_out": 5,
+        }
+
+        await client.generate(_task(with_trace=True))
+        cached = await client.generate(_task(with_trace=True))
+
+        assert cached.cache_hit == "exact"
+        assert cached.reasoning_trace is not None
+        assert cached.reasoning_trace.evidence[0].source == "db"
+
+
+class TestRedisBackendFailOpen:
+    @pytest.mark.asyncio
+    async def test_redis_errors_are_misses(self):
+        from llm.response_cache import RedisCacheBackend
+
+        backend = RedisCacheBackend("redis://localhost:1")
+        backend._redis = MagicMock()
+        backend._redis.get = AsyncMock(side_effect=ConnectionError("down"))
+        backend._redis.set = AsyncMock(side_effect=ConnectionError("down"))
+
+        assert await backend.get("k") is None
+        await backend.set("k", {"v": 1}, 60)
@@ -0,0 +1,120 @@
+"""LLMClient.generate_stream のテスト（フォールバック・コスト記録）。"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from llm.client import LLMClient, LLMTask, ModelTier
+from llm.cost_tracker import CostTracker
+from llm.model_registry import ModelInfo
+
+COMPANY_ID = "company-a"
+
+
+def _task() -> LLMTask:
+    return LLMTask(
+        messages=[{"role": "user", "content": "有給の申請方法は？"}],
+        tier=ModelTier.FAST,
+        task_type="qa",
+        company_id=COMPANY_ID,
+    )
+
+
+def _fake_stream(deltas: list[str], usage_out: dict | None = None, fail_at: int | None = None):
+    async def _gen(model_id, task, usage):
+        for i, delta in enumerate(deltas):
+            if fail_at == i:
+                raise ValueError("stream broken")
+            yield delta
+        if usage_out:
+            usage.update(usage_out)
+    return _gen
+
+
+async def _collect(client: LLMClient, task: LLMTask):
+    deltas, final = [], None
+    async for chunk in client.generate_stream(task):
+        if chunk.done:
+            final = chunk.response
+        else:
+            deltas.append(chunk.delta)
+    return deltas, final
+
+
+@pytest.fixture
+def tracker():
+    return CostTracker()
+
+
+@pytest.fixture
+def patched(tracker):
+    with patch("llm.client.get_cost_tracker", return_value=tracker), \
+         patch("llm.client.select_optimal_model", return_value="gemini-2.5-flash"), \
+         patch("llm.client.get_fallback_chain", return_value=["gemini-2.5-flash", "claude-haiku"]), \
+         patch("llm.client.get_model_costs", return_value={"in": 1.0, "out": 2.0}):
+        yield
+
+
+class TestGenerateStream:
+    @pytest.mark.asyncio
+    async def test_streams_deltas_then_final_response(self, patched, tracker):
+        client = LLMClient()
+        stream = _fake_stream(["有給は", "2週間前", "に申請"], {"tokens_in": 100, "tokens_out": 50})
+        with patch.object(client, "_stream_model", side_effect=stream):
+            deltas, final = await _collect(client, _task())
+
+        assert deltas == ["有給は", "2週間前", "に申請"]
+        assert final.content == "有給は2週間前に申請"
+        assert final.tokens_in == 100
+        assert final.cost_yen == pytest.approx(0.2)
+        assert tracker.get_status(COMPANY_ID)["total_cost_yen"] == pytest.approx(0.2)
+
+    @pytest.mark.asyncio
+    async def test_falls_back_before_first_token(self, patched):
+        client = LLMClient()
+
+        def _by_model(model_id, task, usage):
+            if model_id == "gemini-2.5-flash":
+                return _fake_stream(["x"], fail_at=0)(model_id, task, usage)
+            return _fake_stream(["代替モデル"])(model_id, task, usage)
+
+        with patch.object(client, "_stream_model", side_effect=_by_model):
+            deltas, final = await _collect(client, _task())
+
+        assert deltas == ["代替モデル"]
+        assert final.model_used == "claude-haiku"
+        assert final.fallback_from == "gemini-2.5-flash"
+
+    @pytest.mark.asyncio
+    async def test_error_after_first_token_is_raised_and_cost_recorded(self, patched, tracker):
+        client = LLMClient()
+        stream = _fake_stream(["途中まで", "続き"], fail_at=1)
+        received = []
+        with patch.object(client, "_stream_model", side_effect=stream):
+            with pytest.raises(ValueError):
+                async for chunk in client.generate_stream(_task()):
+                    received.append(chunk.delta)
+
+        assert received == ["途中まで"]
+        assert tracker.get_status(COMPANY_ID)["total_cost_yen"] > 0
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_model_returns_single_chunk(self, patched):
+        client = LLMClient()
+        registry = {"gemini-2.5-flash": ModelInfo(id="gemini-2.5-flash", supports_streaming=False)}
+        call_model = AsyncMock(return_value={"content": "一括回答", "tokens_in": 10, "tokens_out": 5})
+        stream_model = AsyncMock()
+        with patch("llm.client.MODEL_REGISTRY", registry), \
+             patch.object(client, "_call_model", new=call_model), \
+             patch.object(client, "_stream_model", new=stream_model):
+            deltas, final = await _collect(client, _task())
+
+        assert deltas == ["一括回答"]
+        assert final.tokens_out == 5
+        stream_model.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_all_models_fail_raises(self, patched):
+        client = LLMClient()
+        with patch.object(client, "_stream_model", side_effect=_fake_stream(["x"], fail_at=0)):
+            with pytest.raises(RuntimeError):
+                await _collect(client, _task())
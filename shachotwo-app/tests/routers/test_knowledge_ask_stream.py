@@ -0,0 +1,72 @@
+"""POST /knowledge/ask/stream（SSE）のテスト。"""
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth.jwt import JWTClaims
+from auth.middleware import get_current_user
+from brain.knowledge.qa import QAResult, SourceInfo
+from routers.knowledge import router
+
+USER = JWTClaims(
+    sub=str(uuid.uuid4()),
+    company_id=str(uuid.uuid4()),
+    role="editor",
+    email="editor@example.com",
+)
+
+app = FastAPI()
+app.include_router(router)
+app.dependency_overrides[get_current_user] = lambda: USER
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_streams_tokens_then_done_and_saves_session():
+    result = QAResult(
+        answer="有給は2週間前までに申請します。",
+        confidence=0.7,
+        sources=[SourceInfo(knowledge_id=uuid.uuid4(), title="有給休暇の申請手順", relevance=0.85)],
+        model_used="gemini-2.5-flash",
+        cost_yen=0.01,
+    )
+
+    async def _stream(**kwargs):
+        yield "有給は"
+        yield "2週間前までに申請します。"
+        yield result
+
+    db = MagicMock()
+    with patch("routers.knowledge.answer_question_stream", side_effect=_stream), \
+         patch("routers.knowledge.get_service_client", return_value=db):
+        resp = TestClient(app).post("/knowledge/ask/stream", json={"question": "有給の申請方法は？"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(resp.text)
+    assert [e for e, _ in events] == ["token", "token", "done"]
+    assert events[0][1]["text"] == "有給は"
+    assert events[-1][1]["confidence"] == 0.7
+    assert events[-1][1]["sources"][0]["title"] == "有給休暇の申請手順"
+    inserted = db.table.return_value.insert.call_args[0][0]
+    assert inserted["answer_status"] == "answered"
+
+
+def test_error_is_sent_as_event():
+    async def _stream(**kwargs):
+        raise RuntimeError("All models failed")
+        yield  # pragma: no cover
+
+    with patch("routers.knowledge.answer_question_stream", side_effect=_stream):
+        resp = TestClient(app).post("/knowledge/ask/stream", json={"question": "質問"})
+
+    assert _parse_sse(resp.text) == [("error", {"detail": "All models failed"})]
@@ -0,0 +1,152 @@
+"""Tests for security.audit_middleware — audit context and batched log_audit."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from security.audit_middleware import (
+    AuditLogMiddleware,
+    AuditLogWriter,
+    _ip_from_headers,
+    get_audit_context,
+    log_audit,
+)
+
+
+def _mock_client() -> MagicMock:
+    client = MagicMock()
+    client.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[])
+    return client
+
+
+def _inserted(client: MagicMock) -> list:
+    return [c.args[0] for c in client.table.return_value.insert.call_args_list]
+
+
+def test_middleware_sets_context_and_request_state():
+    app = FastAPI()
+    app.add_middleware(AuditLogMiddleware)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        context = get_audit_context()
+        return {
+            "ip": context.ip_address,
+            "ua": context.user_agent,
+            "state_ip": request.state.audit_ip,
+        }
+
+    response = TestClient(app).get(
+        "/whoami", headers={"X-Forwarded-For": "203.0.113.5, 10.0.0.1", "User-Agent": "pytest-ua"},
+    )
+
+    assert response.json() == {"ip": "203.0.113.5", "ua": "pytest-ua", "state_ip": "203.0.113.5"}
+    assert get_audit_context() is None
+
+
+@pytest.mark.asyncio
+async def test_log_audit_writes_immediately_when_writer_not_started():
+    client = _mock_client()
+    with patch("security.audit_middleware.get_service_client", return_value=client):
+        await log_audit(company_id="comp-1", action="update", resource_type="mfa_settings")
+
+    assert _inserted(client) == [[{"company_id": "comp-1", "action": "update", "resource_type": "mfa_settings"}]]
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_entries_and_flushes_on_stop():
+    client = _mock_client()
+    writer = AuditLogWriter(flush_interval_sec=60, batch_size=3)
+    with patch("security.audit_middleware.get_service_client", return_value=client):
+        await writer.start()
+        for i in range(3):
+            await writer.write({"company_id": "comp-1", "action": "read", "resource_type": f"r{i}"})
+        await asyncio.sleep(0.01)   # 3件たまった時点でループが書き出す
+        assert [len(batch) for batch in _inserted(client)] == [3]
+        await writer.write({"company_id": "comp-1", "action": "read", "resource_type": "r3"})
+        await writer.stop()
+
+    assert [len(batch) for batch in _inserted(client)] == [3, 1]
+    assert writer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_kept_for_retry():
+    failing = MagicMock()
+    failing.table.return_value.insert.return_value.execute.side_effect = Exception("db down")
+    writer = AuditLogWriter(flush_interval_sec=60, batch_size=10, max_buffer=2)
+    writer._task = asyncio.create_task(asyncio.sleep(60))   # running 扱い
+    try:
+        for i in range(3):
+            await writer.write({"company_id": "comp-1", "action": "read", "resource_type": f"r{i}"})
+        assert writer.pending == 2   # 上限超過分（最古）は破棄
+
+        with patch("security.audit_middleware.get_service_client", return_value=failing):
+            assert await writer.flush() == 0
+        assert writer.pending == 2
+
+        client = _mock_client()
+        with patch("security.audit_middleware.get_service_client", return_value=client):
+            assert await writer.flush() == 2
+        assert [e["resource_type"] for e in _inserted(client)[0]] == ["r1", "r2"]
+    finally:
+        writer._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_log_audit_uses_context_without_request():
+    from security.audit_middleware import AuditContext, _audit_context
+
+    client = _mock_client()
+    token = _audit_context.set(AuditContext(ip_address="198.51.100.7", user_agent="svc"))
+    try:
+        with patch("security.audit_middleware.get_service_client", return_value=client):
+            await log_audit(company_id="comp-1", action="export", resource_type="billing")
+    finally:
+        _audit_context.reset(token)
+
+    entry = _inserted(client)[0][0]
+    assert entry["ip_address"] == "198.51.100.7"
+    assert entry["user_agent"] == "svc"
+
+
+def test_invalid_forwarded_ip_is_dropped():
+    from starlette.datastructures import Headers
+
+    assert _ip_from_headers(Headers({"X-Forwarded-For": "not-an-ip, 10.0.0.1"}), "10.0.0.2") is None
+    assert _ip_from_headers(Headers({"X-Real-IP": " 2001:DB8::1 "}), None) == "2001:db8::1"
+    assert _ip_from_headers(Headers({}), "testclient") is None
+
+
+@pytest.mark.asyncio
+async def test_rejected_row_is_isolated_and_dropped_after_max_attempts():
+    client = _mock_client()
+    written: list = []
+
+    def insert(batch):
+        query = MagicMock()
+        if any(e["resource_type"] == "bad" for e in batch):
+            query.execute.side_effect = APIError({"code": "22P02", "message": "invalid input syntax for type inet"})
+        else:
+            query.execute.side_effect = lambda: written.extend(batch) or MagicMock(data=batch)
+        return query
+
+    client.table.return_value.insert.side_effect = insert
+    writer = AuditLogWriter(flush_interval_sec=60, batch_size=10, max_attempts=2)
+    writer._task = asyncio.create_task(asyncio.sleep(60))   # running 扱い
+    try:
+        for name in ["r0", "r1", "bad", "r3", "r4"]:
+            await writer.write({"company_id": "comp-1", "action": "read", "resource_type": name})
+        with patch("security.audit_middleware.get_service_client", return_value=client):
+            assert await writer.flush() == 4
+            assert writer.pending == 1          # 拒否された行だけ再試行に残る
+
+            await writer.write({"company_id": "comp-1", "action": "read", "resource_type": "r5"})
+            assert await writer.flush() == 1    # 2回目の拒否で破棄し、後続は詰まらない
+        assert writer.pending == 0
+        assert sorted(e["resource_type"] for e in written) == ["r0", "r1", "r3", "r4", "r5"]
+    finally:
+        writer._task.cancel()
@@ -0,0 +1,56 @@
+"""Tests for security.headers_middleware — pure ASGI security headers."""
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from security.headers_middleware import SecurityHeadersMiddleware, build_security_headers
+
+
+def _app(is_production: bool) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SecurityHeadersMiddleware, is_production=is_production)
+
+    @app.get("/json")
+    async def json_endpoint():
+        return JSONResponse({"ok": True}, headers={"X-Frame-Options": "SAMEORIGIN", "X-Custom": "1"})
+
+    @app.get("/stream")
+    async def stream_endpoint():
+        async def _chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(_chunks(), media_type="text/event-stream")
+
+    return app
+
+
+def test_headers_added_and_override_endpoint_values():
+    response = TestClient(_app(is_production=False)).get("/json")
+
+    assert response.json() == {"ok": True}
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers.get_list("X-Frame-Options") == ["DENY"]
+    assert response.headers["X-Custom"] == "1"
+    assert "'unsafe-eval'" in response.headers["Content-Security-Policy"]
+    assert "Strict-Transport-Security" not in response.headers
+
+
+def test_production_adds_hsts():
+    response = TestClient(_app(is_production=True)).get("/json")
+
+    assert response.headers["Strict-Transport-Security"].startswith("max-age=31536000")
+    assert "frame-ancestors 'none'" in response.headers["Content-Security-Policy"]
+
+
+def test_streaming_response_passes_through():
+    with TestClient(_app(is_production=False)).stream("GET", "/stream") as response:
+        body = b"".join(response.iter_bytes())
+
+    assert body == b"data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
+
+
+def test_header_names_are_lowercase_bytes():
+    for name, value in build_security_headers(True):
+        assert isinstance(name, bytes) and name == name.lower()
+        assert isinstance(value, bytes)
@@ -0,0 +1,116 @@
+"""security/rate_limiter.py のテスト（スライディングウィンドウカウンタ・Redis フォールバック）。"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from security import rate_limiter
+from security.rate_limiter import (
+    LocalRateLimiter,
+    check_rate_limit,
+    get_rate_limit_status,
+    reset_rate_limit,
+)
+
+COMPANY_ID = "company-rl"
+
+
+@pytest.fixture(autouse=True)
+async def _reset():
+    await reset_rate_limit(COMPANY_ID, "bpo_pipeline")
+    rate_limiter._redis_disabled_until = 0.0
+    yield
+    await reset_rate_limit(COMPANY_ID, "bpo_pipeline")
+
+
+class TestLocalRateLimiter:
+    def test_blocks_after_limit_within_window(self):
+        limiter = LocalRateLimiter()
+        now = 6000.0
+        results = [limiter.hit("k", 3, 60, now + i) for i in range(4)]
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[-1].retry_after >= 1
+
+    def test_previous_window_is_weighted(self):
+        limiter = LocalRateLimiter()
+        for _ in range(10):
+            limiter.hit("k", 10, 60, 6000.0)
+        # 次のウィンドウの半分経過: 直前10件 × 0.5 = 5件相当
+        assert limiter.peek("k", 60, 6090.0) == pytest.approx(5.0)
+        assert limiter.hit("k", 10, 60, 6090.0).allowed
+
+    def test_state_is_constant_per_key(self):
+        limiter = LocalRateLimiter()
+        for i in range(10_000):
+            limiter.hit("k", 1_000_000, 60, 6000.0 + i * 0.001)
+        assert len(limiter) == 1
+
+    def test_idle_keys_are_evicted(self):
+        limiter = LocalRateLimiter()
+        limiter.hit("idle", 5, 60, 6000.0)
+        # 2ウィンドウ以上たってから別キーを叩くと idle は追い出される
+        limiter.hit("active", 5, 60, 6200.0)
+        assert len(limiter) == 1
+
+    def test_max_keys_bound(self):
+        limiter = LocalRateLimiter(max_keys=100)
+        for i in range(1000):
+            limiter.hit(f"k{i}", 5, 60, 6000.0)
+        assert len(limiter) == 100
+
+
+class TestCheckRateLimit:
+    @pytest.mark.asyncio
+    async def test_raises_429_with_retry_after(self):
+        for _ in range(10):
+            await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+        with pytest.raises(HTTPException) as exc:
+            await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+    @pytest.mark.asyncio
+    async def test_status_reflects_count(self):
+        for _ in range(3):
+            await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+        status = await get_rate_limit_status(COMPANY_ID, "bpo_pipeline")
+        assert status["current_count"] == 3
+        assert status["remaining"] == 7
+        assert status["backend"] == "memory"
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_to_local(self, monkeypatch):
+        monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+        broken = MagicMock()
+        broken.hit = AsyncMock(side_effect=ConnectionError("redis down"))
+        with patch.object(rate_limiter, "_redis_limiter", broken):
+            await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+            # 障害後は一定時間 Redis を叩かない
+            await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+
+        assert broken.hit.call_count == 1
+        assert (await get_rate_limit_status(COMPANY_ID, "bpo_pipeline"))["current_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_decision_is_used(self, monkeypatch):
+        monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+        shared = MagicMock()
+        shared.hit = AsyncMock(return_value=rate_limiter.RateLimitDecision(False, 10.0, 12))
+        with patch.object(rate_limiter, "_redis_limiter", shared):
+            with pytest.raises(HTTPException) as exc:
+                await check_rate_limit(COMPANY_ID, "bpo_pipeline")
+        assert exc.value.headers["Retry-After"] == "12"
+
+    @pytest.mark.asyncio
+    async def test_redis_limiter_uses_async_client(self, monkeypatch):
+        import redis.asyncio as redis_asyncio
+
+        client = MagicMock()
+        client.register_script.return_value = AsyncMock(return_value=[1, 4, 3])
+        client.mget = AsyncMock(return_value=[b"3", b"4"])
+        monkeypatch.setattr(redis_asyncio, "from_url", MagicMock(return_value=client))
+
+        limiter = rate_limiter.RedisRateLimiter("redis://example:6379")
+        decision = await limiter.hit("k", 10, 60, 6030.0)
+        assert decision.allowed and decision.count == pytest.approx(5.0)
+        assert await limiter.peek("k", 60, 6030.0) == pytest.approx(5.0)
@@ -37,7 +37,7 @@ class TestTenantIsolation:
         captured = {}
         mock_fn = _make_mock_pipeline(captured)
 
-        with patch("workers.bpo.manager.task_router.importlib.import_module") as mock_import:
+        with patch("workers.bpo.manager.pipeline_resolver.importlib.import_module") as mock_import:
             mock_import.return_value = types.SimpleNamespace(run_dispatch_pipeline=mock_fn)
 
             task = BPOTask(
@@ -56,7 +56,7 @@ class TestTenantIsolation:
         """異なるテナントの結果が混ざらない"""
         mock_fn = _make_mock_pipeline()
 
-        with patch("workers.bpo.manager.task_router.importlib.import_module") as mock_import:
+        with patch("workers.bpo.manager.pipeline_resolver.importlib.import_module") as mock_import:
             mock_import.return_value = types.SimpleNamespace(run_care_billing_pipeline=mock_fn)
 
             results = {}
@@ -77,7 +77,7 @@ class TestTenantIsolation:
         """並行実行時にデータが干渉しない"""
         mock_fn = _make_mock_pipeline()
 
-        with patch("workers.bpo.manager.task_router.importlib.import_module") as mock_import:
+        with patch("workers.bpo.manager.pipeline_resolver.importlib.import_module") as mock_import:
             mock_import.return_value = types.SimpleNamespace(run_expense_pipeline=mock_fn)
 
             tasks = []
@@ -145,27 +145,31 @@ class TestLevel2PriceSuggestion:
 
         # unit_price_master（過去実績3件）
         past_prices = [
-            {"id": str(uuid4()), "unit_price": "650", "updated_at": "2026-02-01T00:00:00",
+            {"id": str(uuid4()), "category": "土工", "unit_price": "650", "updated_at": "2026-02-01T00:00:00",
              "region": "東京都", "accuracy_rate": 0.85, "used_count": 3},
-            {"id": str(uuid4()), "unit_price": "680", "updated_at": "2025-11-01T00:00:00",
+            {"id": str(uuid4()), "category": "土工", "unit_price": "680", "updated_at": "2025-11-01T00:00:00",
              "region": "東京都", "accuracy_rate": 0.90, "used_count": 5},
-            {"id": str(uuid4()), "unit_price": "620", "updated_at": "2025-06-01T00:00:00",
+            {"id": str(uuid4()), "category": "土工", "unit_price": "620", "updated_at": "2025-06-01T00:00:00",
              "region": "埼玉県", "accuracy_rate": None, "used_count": 1},
         ]
 
         # DB呼び出しを段階的にモック
         def table_side_effect(name):
             mock_table = MagicMock()
-            if name == "unit_price_master":
-                # select("*").eq("company_id", ...).eq("category", ...).order(...).limit(...).execute()
-                mock_table.select.return_value.eq.return_value.eq.return_value.order.return_value.limit.return_value.execute.return_value = MagicMock(data=past_prices)
-                mock_table.update.return_value.eq.return_value.execute.return_value = MagicMock()
-            elif name == "public_labor_rates":
+            if name == "public_labor_rates":
                 mock_table.select.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
             return mock_table
 
+        def rpc_side_effect(name, params):
+            mock_rpc = MagicMock()
+            if name == "recent_unit_prices_by_category":
+                # 工種ごとの直近実績（件数上限は RPC 側）
+                mock_rpc.execute.return_value = MagicMock(data=past_prices)
+            return mock_rpc
+
         mock_db = MagicMock()
         mock_db.table.side_effect = table_side_effect
+        mock_db.rpc.side_effect = rpc_side_effect
 
         with patch("workers.bpo.construction.estimator.LLMClient"), \
              patch("workers.bpo.construction.estimator.get_client", return_value=mock_db):
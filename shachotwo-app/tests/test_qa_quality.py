@@ -7,6 +7,7 @@ Usage:
   # 実環境テスト（LLM + Supabase必要、--run-integration フラグ付き）
   pytest tests/test_qa_quality.py -k "integration" --run-integration
 """
+import asyncio
 import json
 import time
 from pathlib import Path
@@ -181,6 +182,34 @@ class TestResponseTimeMock:
         # 処理ロジック自体は100ms以内であるべき
         assert elapsed < 0.1
 
+    @pytest.mark.asyncio
+    async def test_usage_count_write_does_not_delay_answer(self):
+        """qa_usage_count の RPC はバックグラウンドで実行し、回答を待たせない"""
+        from brain.knowledge import qa
+
+        search_results = [_make_search_result("テスト", "テスト内容", "営業")]
+        mock_llm = AsyncMock()
+        mock_llm.generate.return_value = MagicMock(
+            content=json.dumps({"answer": "回答", "confidence": 0.8, "sources": [], "missing_info": None}),
+            model_used="mock",
+            cost_yen=0.0,
+        )
+
+        async def slow_execute(query):
+            await asyncio.sleep(0.3)
+
+        with patch("brain.knowledge.qa.enhanced_search", new_callable=AsyncMock, return_value=search_results), \
+             patch("brain.knowledge.qa.get_llm_client", return_value=mock_llm), \
+             patch("brain.knowledge.qa.get_service_client"), \
+             patch("brain.knowledge.qa.execute", side_effect=slow_execute) as mock_execute:
+            start = time.time()
+            await answer_question("テスト", str(uuid4()))
+            elapsed = time.time() - start
+            await asyncio.gather(*qa._usage_count_tasks)
+
+        assert elapsed < 0.1
+        mock_execute.assert_awaited_once()
+
 
 # ============================================================================
 # Integration Tests（実環境用 — --run-integration フラグ必要）
@@ -0,0 +1,169 @@
+"""建設業 単価候補一括解決（UnitPriceResolver）テスト。"""
+from collections import Counter
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from workers.bpo.construction.models import PriceSource
+from workers.bpo.construction.unit_price_resolver import (
+    PAST_PRICE_LIMIT_PER_CATEGORY,
+    UnitPriceResolver,
+    apply_used_count_increments,
+    clear_labor_rate_cache,
+    prefetch_past_prices,
+)
+
+COMPANY_ID = "test-company-001"
+
+
+def _past(pid: str, category: str, price: int, region: str = "東京都") -> dict:
+    return {
+        "id": pid, "category": category, "unit_price": str(price),
+        "updated_at": "2026-02-01T00:00:00", "region": region,
+        "accuracy_rate": None, "used_count": 0,
+    }
+
+
+def _make_db(past_rows: list[dict], labor_rows: list[dict]) -> MagicMock:
+    past_rpc = MagicMock()
+    past_rpc.execute.return_value = MagicMock(data=past_rows)
+    past_table = MagicMock()
+    labor_table = MagicMock()
+    labor_table.select.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=labor_rows)
+
+    db = MagicMock()
+    db.table.side_effect = lambda name: past_table if name == "unit_price_master" else labor_table
+    db.rpc.side_effect = lambda name, params: past_rpc if name == "recent_unit_prices_by_category" else MagicMock()
+    db.past_table = past_table
+    db.labor_table = labor_table
+    return db
+
+
+def _rpc_calls(db: MagicMock, name: str) -> list:
+    return [c for c in db.rpc.call_args_list if c.args[0] == name]
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    clear_labor_rate_cache()
+    yield
+    clear_labor_rate_cache()
+
+
+class TestUnitPriceResolver:
+    @pytest.mark.asyncio
+    async def test_prefetches_all_categories_in_one_query(self):
+        """明細数に関係なく過去実績クエリは1回。"""
+        db = _make_db(
+            [_past("p1", "土工", 600), _past("p2", "舗装工", 2800)],
+            [],
+        )
+        items = [{"category": "土工", "detail": "掘削"}] * 50 + [{"category": "舗装工", "detail": "路盤"}] * 50
+
+        resolver = UnitPriceResolver(db, COMPANY_ID, "東京都", 2026)
+        await resolver.prefetch(items)
+        candidates = [resolver.candidates_for(item) for item in items]
+
+        (prefetch,) = _rpc_calls(db, "recent_unit_prices_by_category")
+        assert prefetch.args[1] == {
+            "p_company_id": COMPANY_ID,
+            "p_categories": ["土工", "舗装工"],
+            "p_limit": PAST_PRICE_LIMIT_PER_CATEGORY,
+        }
+        db.past_table.select.assert_not_called()
+        assert candidates[0][0]["source"] == PriceSource.PAST_RECORD.value
+        assert candidates[0][0]["unit_price"] == 600
+        assert candidates[-1][0]["unit_price"] == 2800
+
+    @pytest.mark.asyncio
+    async def test_limits_rows_per_category(self):
+        rows = [_past(f"p{i}", "土工", 600) for i in range(PAST_PRICE_LIMIT_PER_CATEGORY + 5)]
+        db = _make_db(rows, [])
+
+        resolver = UnitPriceResolver(db, COMPANY_ID, "東京都", 2026)
+        await resolver.prefetch([{"category": "土工", "detail": ""}])
+        candidate = resolver.candidates_for({"category": "土工", "detail": ""})[0]
+
+        assert f"{PAST_PRICE_LIMIT_PER_CATEGORY}件" in candidate["detail"]
+
+    @pytest.mark.asyncio
+    async def test_labor_rates_loaded_once_per_year_and_region(self):
+        labor = [{"occupation": "普通作業員", "daily_rate": 25000, "fiscal_year": 2026}]
+        db = _make_db([], labor)
+        items = [{"category": "土工", "detail": "普通作業員 人力掘削"}]
+
+        for _ in range(3):
+            resolver = UnitPriceResolver(db, COMPANY_ID, "東京都", 2026)
+            await resolver.prefetch(items)
+            candidates = resolver.candidates_for(items[0])
+
+        assert db.labor_table.select.call_count == 1
+        assert candidates[0]["source"] == PriceSource.LABOR_RATE.value
+        assert candidates[0]["unit_price"] == 25000
+
+    @pytest.mark.asyncio
+    async def test_no_candidates_falls_back_to_ai_estimate(self):
+        db = _make_db([], [])
+        resolver = UnitPriceResolver(db, COMPANY_ID, "東京都", 2026)
+        await resolver.prefetch([{"category": "土工", "detail": ""}])
+        candidates = resolver.candidates_for({"category": "土工", "detail": ""})
+        assert candidates[0]["source"] == PriceSource.AI_ESTIMATED.value
+
+    @pytest.mark.asyncio
+    async def test_used_counts_flushed_in_single_rpc(self):
+        """参照回数を合算して RPC 1 回で加算する。"""
+        db = _make_db([_past("p1", "土工", 600), _past("p2", "土工", 650)], [])
+        items = [{"category": "土工", "detail": ""}] * 3
+
+        resolver = UnitPriceResolver(db, COMPANY_ID, "東京都", 2026)
+        await resolver.prefetch(items)
+        for item in items:
+            resolver.candidates_for(item)
+        await resolver.flush_used_counts()
+
+        assert _rpc_calls(db, "increment_unit_price_used_count") == [call("increment_unit_price_used_count", {
+            "p_company_id": COMPANY_ID,
+            "p_price_ids": ["p1", "p2"],
+            "p_increments": [3, 3],
+        })]
+        db.past_table.update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_falls_back_to_limited_query_per_category(self):
+        """RPC 未適用なら工種ごとに limit 付きで取る（一括 order は max-rows で切り詰められる）。"""
+        db = MagicMock()
+        db.rpc.return_value.execute.side_effect = Exception("function does not exist")
+        query = db.table.return_value.select.return_value.eq.return_value.eq.return_value.order.return_value.limit.return_value
+        query.execute.side_effect = [
+            MagicMock(data=[_past("p1", "土工", 600)]),
+            MagicMock(data=[_past("p2", "舗装工", 2800)]),
+        ]
+
+        by_category = await prefetch_past_prices(db, COMPANY_ID, ["土工", "舗装工"])
+
+        assert [r["id"] for r in by_category["土工"]] == ["p1"]
+        assert [r["id"] for r in by_category["舗装工"]] == ["p2"]
+        query_limit = db.table.return_value.select.return_value.eq.return_value.eq.return_value.order.return_value.limit
+        assert query_limit.call_args_list == [call(PAST_PRICE_LIMIT_PER_CATEGORY)] * 2
+
+
+class TestApplyUsedCountIncrements:
+    @pytest.mark.asyncio
+    async def test_falls_back_to_row_updates_when_rpc_missing(self):
+        db = MagicMock()
+        db.rpc.return_value.execute.side_effect = Exception("function does not exist")
+        table = MagicMock()
+        table.select.return_value.in_.return_value.execute.return_value = MagicMock(
+            data=[{"id": "p1", "used_count": 4}],
+        )
+        db.table.return_value = table
+
+        await apply_used_count_increments(db, COMPANY_ID, Counter({"p1": 2}))
+
+        table.update.assert_called_once_with({"used_count": 6})
+
+    @pytest.mark.asyncio
+    async def test_noop_when_empty(self):
+        db = MagicMock()
+        await apply_used_count_increments(db, COMPANY_ID, Counter())
+        db.rpc.assert_not_called()
@@ -5,7 +5,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from workers.bpo.engine.agent_factory import AgentFactory, BPOAgentRole
+from workers.bpo.engine.agent_factory import AgentFactory, BPOAgentRole, invalidate_agent_roles
 
 COMPANY_ID = "test-company-001"
 
@@ -533,3 +533,67 @@ class TestBPOAgentRoleModel:
         updated = role.model_copy(update={"knowledge_context": [{"id": "x"}]})
         assert role.knowledge_context == []
         assert len(updated.knowledge_context) == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 関連度順の注入・ロールキャッシュ
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestKnowledgeRankingAndCache:
+    def test_knowledge_ordered_by_relevance(self, factory):
+        role = BPOAgentRole(
+            role_name="見積担当AI",
+            industry="construction",
+            responsibilities=["図面からの見積作成", "コスト計算"],
+        )
+        items = [
+            _make_knowledge_item("k-low", "備考", "計算は切り捨て", item_type="fact", domain="construction"),
+            _make_knowledge_item("k-high", "見積作成手順", "図面から見積作成しコスト計算する", domain="construction"),
+        ]
+        updated = factory._inject_knowledge(role, items)
+
+        assert [c["id"] for c in updated.knowledge_context] == ["k-high", "k-low"]
+        assert [r["knowledge_item_id"] for r in updated.domain_rules] == ["k-high"]
+
+    def test_empty_domain_still_counts_as_relevant(self, factory):
+        """従来どおり domain が担当業務テキストに含まれれば（空文字含む）関連とみなす。"""
+        role = BPOAgentRole(role_name="経理担当AI", industry="common", responsibilities=["経費精算"])
+        items = [_make_knowledge_item("k-1", "xyz", "abc", item_type="fact", domain="")]
+        updated = factory._inject_knowledge(role, items)
+        assert [c["id"] for c in updated.knowledge_context] == ["k-1"]
+
+    @pytest.mark.asyncio
+    async def test_create_roles_cached_until_invalidated(self, factory):
+        fetch = AsyncMock(return_value=[])
+        with (
+            patch.object(factory, "_fetch_knowledge_items", new=fetch),
+            patch.object(factory, "_fetch_trust_score", new=AsyncMock(return_value=None)),
+        ):
+            first = await factory.create_roles(COMPANY_ID, "construction")
+            first[0].responsibilities.append("呼び出し側の変更")
+            second = await AgentFactory().create_roles(COMPANY_ID, "construction")
+            assert fetch.await_count == 1
+            # キャッシュはコピーを返すので呼び出し側の変更は漏れない
+            assert "呼び出し側の変更" not in second[0].responsibilities
+
+            invalidate_agent_roles(COMPANY_ID)
+            await factory.create_roles(COMPANY_ID, "construction")
+            assert fetch.await_count == 2
+
+            # 他社の破棄・ゲノム違いは別エントリ
+            invalidate_agent_roles("other-company")
+            await factory.create_roles(COMPANY_ID, "construction")
+            await factory.create_roles(COMPANY_ID, "construction", genome_data={"rules": ["x"]})
+            assert fetch.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_get_role_only_builds_industries_with_that_role(self, factory):
+        fetch = AsyncMock(return_value=[])
+        with (
+            patch.object(factory, "_fetch_knowledge_items", new=fetch),
+            patch.object(factory, "_fetch_trust_score", new=AsyncMock(return_value=None)),
+        ):
+            role = await factory.get_role(COMPANY_ID, "医事担当AI")
+
+        assert role is not None and role.industry == "clinic"
+        assert [c.args[1] for c in fetch.await_args_list] == ["clinic"]
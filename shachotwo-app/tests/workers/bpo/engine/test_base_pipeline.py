@@ -3,11 +3,12 @@
 外部依存（LLM, OCR）は全てモック。
 各ステップの分岐（スキップ・実行・失敗）と、オーバーライドによる拡張を検証する。
 """
+import asyncio
 import pytest
 from typing import Any, Optional
 from unittest.mock import AsyncMock, patch, MagicMock, call
 
-from workers.bpo.engine.base_pipeline import BasePipeline, PipelineStepResult
+from workers.bpo.engine.base_pipeline import BasePipeline, PipelineStepResult, StepSpec
 from workers.micro.models import MicroAgentOutput
 
 
@@ -808,3 +809,193 @@ class TestCompensation:
 
         assert result["success"] is False
         assert "compensation_needed" not in result
+
+
+# ---------------------------------------------------------------------------
+# ステップDAG（並列実行・独自ステップ・タイミング）
+# ---------------------------------------------------------------------------
+
+
+class ParallelReadPipeline(BasePipeline):
+    """抽出後に独立した2つの読み取りを並列に行い、計算で合流する。"""
+    pipeline_name = "parallel_read"
+    steps = (
+        StepSpec("ocr", stop_on_failure=True),
+        StepSpec("extract", ("ocr",), stop_on_failure=True),
+        StepSpec("fetch_crm", ("extract",)),
+        StepSpec("fetch_accounting", ("extract",)),
+        StepSpec("calculate", ("fetch_crm", "fetch_accounting")),
+    )
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+
+    async def _read(self, name: str, data: dict[str, Any], extra: dict[str, Any]):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.1)
+        self.active -= 1
+        return {**data, **extra}, PipelineStepResult(name=name, success=True)
+
+    async def _step_fetch_crm(self, company_id: str, data: dict[str, Any]):
+        return await self._read("fetch_crm", data, {"deal": "A社"})
+
+    async def _step_fetch_accounting(self, company_id: str, data: dict[str, Any]):
+        return await self._read("fetch_accounting", data, {"balance": 1000})
+
+    async def _step_calculate(self, company_id: str, data: dict[str, Any]):
+        return {**data, "joined": True}, PipelineStepResult(name="calculate", success=True)
+
+
+class TestStepDag:
+    """steps の depends_on に従った並列実行。"""
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently_and_join(self):
+        pipeline = ParallelReadPipeline()
+        result = await pipeline.run(company_id="cid", payload={"text": "本文", "x": 1})
+
+        assert result["success"] is True
+        assert pipeline.peak == 2
+        assert result["data"] == {"x": 1, "deal": "A社", "balance": 1000, "joined": True}
+        assert [s["name"] for s in result["steps"]] == [
+            "ocr", "extract", "fetch_crm", "fetch_accounting", "calculate",
+        ]
+        # 2つの読み取りは重なっているので壁時計時間は合計より短い
+        timing = result["timing"]
+        assert timing["wall_ms"] < 180
+        assert timing["critical_path"][0] == "ocr"
+        assert timing["critical_path"][-1] == "calculate"
+        assert timing["critical_path"][2] in ("fetch_crm", "fetch_accounting")
+
+    @pytest.mark.asyncio
+    async def test_validate_anomaly_generate_run_in_parallel_by_default(self):
+        class SlowChecks(AnomalyPipeline):
+            validation_rules = {"required_fields": ["total_amount"]}
+            generate_template = "summary"
+
+        started: list[str] = []
+
+        def _slow(name: str, output: MicroAgentOutput):
+            async def _run(_inp):
+                started.append(name)
+                await asyncio.sleep(0.1)
+                return output
+            return _run
+
+        with patch("workers.micro.validator.run_output_validator", side_effect=_slow("validate", _mock_validator_output())), \
+             patch("workers.micro.anomaly_detector.run_anomaly_detector", side_effect=_slow("anomaly", _mock_anomaly_output())), \
+             patch("workers.micro.generator.run_document_generator", side_effect=_slow("generate", _mock_generator_output())):
+            result = await SlowChecks().run(company_id="cid", payload={"total_amount": 50000, "unit_price": 10000})
+
+        assert result["success"] is True
+        assert sorted(started) == ["anomaly", "generate", "validate"]
+        assert result["timing"]["wall_ms"] < 250
+        assert result["data"]["total_amount"] == 50000
+        assert "content" in result["data"]
+
+    @pytest.mark.asyncio
+    async def test_stop_on_failure_does_not_start_dependents(self):
+        class FailingFetch(ParallelReadPipeline):
+            steps = ParallelReadPipeline.steps[:2] + (
+                StepSpec("fetch_crm", ("extract",), stop_on_failure=True),
+                StepSpec("fetch_accounting", ("extract",)),
+                StepSpec("calculate", ("fetch_crm", "fetch_accounting")),
+            )
+
+            async def _step_fetch_crm(self, company_id, data):
+                return data, PipelineStepResult(name="fetch_crm", success=False)
+
+            async def _step_calculate(self, company_id, data):  # pragma: no cover - 呼ばれないこと
+                raise AssertionError("calculate must not run")
+
+        with patch("asyncio.sleep", new_callable=AsyncMock):
+            result = await FailingFetch().run(company_id="cid", payload={"text": "本文"})
+
+        assert result["success"] is False
+        assert result["failed_step"] == "fetch_crm"
+        # 並行していた fetch_accounting は完了まで待って結果に残る
+        assert [s["name"] for s in result["steps"]] == ["ocr", "extract", "fetch_crm", "fetch_accounting"]
+
+    def test_invalid_graphs_rejected_at_class_definition(self):
+        with pytest.raises(ValueError, match="未定義"):
+            type("Bad", (BasePipeline,), {"steps": (StepSpec("ocr", ("missing",)),)})
+        with pytest.raises(ValueError, match="循環"):
+            type("Cyclic", (BasePipeline,), {"steps": (
+                StepSpec("enrich", ("calculate",)), StepSpec("calculate", ("enrich",)),
+            )})
+        with pytest.raises(ValueError, match="実装されていません"):
+            type("NoImpl", (BasePipeline,), {"steps": (StepSpec("fetch_erp"),)})
+
+
+class TestStepCheckpoints:
+    """失敗・タイムアウト後の再実行で完了済みステップを再開する。"""
+
+    class FlakyCalculate(ExtractValidatePipeline):
+        pipeline_name = "flaky_calculate"
+        steps = BasePipeline.steps[:3] + (
+            StepSpec("calculate", ("enrich",), stop_on_failure=True),
+        ) + BasePipeline.steps[4:]
+        fail = True
+
+        async def _step_calculate(self, company_id, data):
+            if type(self).fail:
+                return data, PipelineStepResult(name="calculate", success=False)
+            return data, PipelineStepResult(name="calculate", success=True, confidence=1.0)
+
+    @pytest.mark.asyncio
+    async def test_rerun_resumes_completed_extract(self):
+        extractor = AsyncMock(return_value=_mock_extractor_output())
+        payload = {"text": "株式会社テスト 御中\n合計 100,000円"}
+        pipeline_cls = self.FlakyCalculate
+
+        with patch("workers.micro.extractor.run_structured_extractor", extractor), \
+             patch("workers.micro.validator.run_output_validator",
+                   AsyncMock(return_value=_mock_validator_output(valid=True))), \
+             patch("asyncio.sleep", new_callable=AsyncMock):
+            pipeline_cls.fail = True
+            first = await pipeline_cls().run(company_id="cid", payload=payload)
+            pipeline_cls.fail = False
+            second = await pipeline_cls().run(company_id="cid", payload=payload)
+            # 成功後はチェックポイントを消すので、3回目は最初から実行する
+            third = await pipeline_cls().run(company_id="cid", payload=payload)
+
+        assert first["success"] is False and first["failed_step"] == "calculate"
+        assert second["success"] is True
+        assert second["resumed_steps"] == ["extract"]
+        extract_step = next(s for s in second["steps"] if s["name"] == "extract")
+        assert extract_step["resumed"] is True
+        assert extract_step["cost_yen"] == 0.0
+        assert second["data"]["company_name"] == "株式会社テスト"
+        assert third["resumed_steps"] == []
+        assert extractor.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_different_payload_does_not_resume(self):
+        extractor = AsyncMock(return_value=_mock_extractor_output())
+        pipeline_cls = self.FlakyCalculate
+        pipeline_cls.fail = True
+
+        with patch("workers.micro.extractor.run_structured_extractor", extractor), \
+             patch("asyncio.sleep", new_callable=AsyncMock):
+            await pipeline_cls().run(company_id="cid", payload={"text": "A"})
+            result = await pipeline_cls().run(company_id="cid", payload={"text": "B"})
+
+        assert result["resumed_steps"] == []
+        assert extractor.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_checkpointing_disabled_by_class_attribute(self):
+        class NoCheckpoint(self.FlakyCalculate):
+            checkpointing = False
+
+        extractor = AsyncMock(return_value=_mock_extractor_output())
+        NoCheckpoint.fail = True
+        with patch("workers.micro.extractor.run_structured_extractor", extractor), \
+             patch("asyncio.sleep", new_callable=AsyncMock):
+            await NoCheckpoint().run(company_id="cid", payload={"text": "A"})
+            result = await NoCheckpoint().run(company_id="cid", payload={"text": "A"})
+
+        assert result["resumed_steps"] == []
+        assert extractor.await_count == 2
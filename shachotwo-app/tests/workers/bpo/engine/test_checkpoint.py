@@ -0,0 +1,103 @@
+"""workers/bpo/engine/checkpoint.py のテスト。"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from workers.bpo.engine.checkpoint import (
+    MemoryCheckpointStore,
+    PipelineCheckpointer,
+    StepCheckpoint,
+    get_checkpoint_store,
+    input_hash,
+    reset_checkpoint_store,
+)
+from workers.micro.models import MicroAgentOutput
+
+
+def _ocr_output(success: bool = True) -> MicroAgentOutput:
+    return MicroAgentOutput(
+        agent_name="document_ocr",
+        success=success,
+        result={"text": "見積書 本文"},
+        confidence=0.9,
+        cost_yen=12.0,
+        duration_ms=800,
+    )
+
+
+def test_input_hash_ignores_key_order():
+    assert input_hash({"a": 1, "b": [1, 2]}) == input_hash({"b": [1, 2], "a": 1})
+    assert input_hash({"a": 1}) != input_hash({"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_and_purges():
+    store = MemoryCheckpointStore(ttl_sec=60)
+    await store.save("p", "cid", "h", StepCheckpoint(step="ocr", step_input_hash="x"))
+    assert set(await store.load("p", "cid", "h")) == {"ocr"}
+
+    with patch("workers.bpo.engine.checkpoint.time.time", return_value=10**12):
+        assert await store.purge_expired() == 1
+    assert await store.load("p", "cid", "h") == {}
+
+
+@pytest.mark.asyncio
+async def test_micro_step_replays_saved_output_without_cost():
+    store = MemoryCheckpointStore()
+    factory = AsyncMock(return_value=_ocr_output())
+
+    first = PipelineCheckpointer("construction/estimation", "cid", {"file": "a.pdf"}, store=store, enabled=True)
+    out1 = await first.micro_step("document_ocr", {"file": "a.pdf"}, factory)
+
+    retry = PipelineCheckpointer("construction/estimation", "cid", {"file": "a.pdf"}, store=store, enabled=True)
+    out2 = await retry.micro_step("document_ocr", {"file": "a.pdf"}, factory)
+
+    assert factory.await_count == 1
+    assert out1.cost_yen == 12.0
+    assert out2.result == {"text": "見積書 本文"}
+    assert out2.cost_yen == 0.0 and out2.duration_ms == 0
+    assert retry.resumed_steps == ["document_ocr"]
+
+
+@pytest.mark.asyncio
+async def test_changed_step_input_or_failure_is_not_replayed():
+    store = MemoryCheckpointStore()
+    failing = AsyncMock(return_value=_ocr_output(success=False))
+    ckpt = PipelineCheckpointer("p", "cid", {"run": 1}, store=store, enabled=True)
+    await ckpt.micro_step("document_ocr", {"file": "a.pdf"}, failing)
+    assert await store.load("p", "cid", ckpt.run_hash) == {}
+
+    factory = AsyncMock(return_value=_ocr_output())
+    await ckpt.micro_step("document_ocr", {"file": "a.pdf"}, factory)
+    retry = PipelineCheckpointer("p", "cid", {"run": 1}, store=store, enabled=True)
+    await retry.micro_step("document_ocr", {"file": "b.pdf"}, factory)
+
+    assert factory.await_count == 2
+    assert retry.resumed_steps == []
+
+
+@pytest.mark.asyncio
+async def test_complete_clears_and_store_errors_are_ignored():
+    store = MemoryCheckpointStore()
+    ckpt = PipelineCheckpointer("p", "cid", {"run": 1}, store=store, enabled=True)
+    await ckpt.record("ocr", {"x": 1}, {"success": True})
+    await ckpt.complete()
+    assert await store.load("p", "cid", ckpt.run_hash) == {}
+
+    broken = MemoryCheckpointStore()
+    broken.load = AsyncMock(side_effect=RuntimeError("db down"))
+    broken.save = AsyncMock(side_effect=RuntimeError("db down"))
+    ckpt = PipelineCheckpointer("p", "cid", {"run": 1}, store=broken, enabled=True)
+    assert await ckpt.lookup("ocr", {"x": 1}) is None
+    await ckpt.record("ocr", {"x": 1}, {"success": True})
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("BPO_CHECKPOINT_BACKEND", "postgres")
+    reset_checkpoint_store()
+    assert type(get_checkpoint_store()).__name__ == "PostgresCheckpointStore"
+
+    monkeypatch.delenv("BPO_CHECKPOINT_BACKEND")
+    monkeypatch.setenv("BPO_QUEUE_BACKEND", "memory")
+    reset_checkpoint_store()
+    assert isinstance(get_checkpoint_store(), MemoryCheckpointStore)
@@ -623,3 +623,30 @@ async def test_unknown_pipeline_gets_inferred_module_path():
     finally:
         import shutil
         shutil.rmtree(tmp)
+
+
+# ─────────────────────────────────────────
+# 変更検知による再ロード
+# ─────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_reload_if_changed_only_when_json_changes():
+    """JSON が変わらなければ再ロードせず、追加・更新されたら再ロードする。"""
+    tmp = make_temp_genome_dir(
+        top_jsons={},
+        bpo_jsons={"clinic.json": {"id": "clinic", "pipeline_config": {"medical_receipt": {}}}},
+    )
+    try:
+        registry = GenomeRegistry(genome_dir=tmp)
+        await registry.load()
+        assert await registry.reload_if_changed() is False
+
+        with open(os.path.join(tmp, "bpo", "nursing.json"), "w", encoding="utf-8") as f:
+            json.dump({"id": "nursing", "pipeline_config": {"care_billing": {}}}, f)
+
+        assert await registry.reload_if_changed() is True
+        assert registry.list_pipelines() == ["clinic/medical_receipt", "nursing/care_billing"]
+        assert await registry.reload_if_changed() is False
+    finally:
+        import shutil
+        shutil.rmtree(tmp)
@@ -0,0 +1,36 @@
+"""KeywordMatcher（Aho-Corasick）のテスト。"""
+import random
+
+from workers.bpo.engine.keyword_matcher import KeywordMatcher
+
+
+def _naive(keywords, *texts):
+    return {k for k in keywords if any(k in t for t in texts)}
+
+
+def test_finds_overlapping_and_nested_keywords():
+    matcher = KeywordMatcher(["見積", "見積作成", "積作", "作成", "コスト"])
+    assert set(matcher.matched_keywords("図面から見積作成する")) == {"見積", "見積作成", "積作", "作成"}
+    assert matcher.count_matches("コスト計算", "見積") == 2
+
+
+def test_match_does_not_span_text_boundary():
+    matcher = KeywordMatcher(["ab"])
+    assert matcher.count_matches("xa", "bx") == 0
+    assert matcher.count_matches("xab") == 1
+
+
+def test_empty_matcher():
+    matcher = KeywordMatcher([])
+    assert not matcher
+    assert matcher.count_matches("何でも") == 0
+
+
+def test_agrees_with_substring_search():
+    rng = random.Random(0)
+    alphabet = "見積作成コスト計算ab "
+    for _ in range(200):
+        keywords = {"".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 15))}
+        texts = ["".join(rng.choices(alphabet, k=rng.randint(0, 30))) for _ in range(2)]
+        matcher = KeywordMatcher(keywords)
+        assert set(matcher.matched_keywords(*texts)) == _naive(keywords, *texts)
@@ -0,0 +1,115 @@
+"""ステージグラフ（bounded queue ストリーミング）とトークンバケットのテスト。"""
+import asyncio
+import time
+
+import pytest
+
+from workers.bpo.engine.streaming import Stage, TokenBucket, run_stages
+
+
+@pytest.mark.asyncio
+async def test_items_flow_through_all_stages():
+    async def double(x):
+        return x * 2
+
+    async def inc(x):
+        return x + 1
+
+    result = await run_stages(range(5), [Stage("double", double, 2), Stage("inc", inc, 3)], queue_size=1)
+    assert sorted(result.outputs) == [1, 3, 5, 7, 9]
+    assert result.stats["double"].emitted == 5
+    assert result.stats["inc"].received == 5
+
+
+@pytest.mark.asyncio
+async def test_ready_items_reach_last_stage_before_slow_items_finish():
+    """遅い要素が前段に残っていても、準備できた要素は最終段まで進む。"""
+    order: list[str] = []
+
+    async def first(x):
+        await asyncio.sleep(0.2 if x == "slow" else 0)
+        return x
+
+    async def last(x):
+        order.append(x)
+        return x
+
+    await run_stages(["slow", "fast"], [Stage("first", first, 2), Stage("last", last)])
+    assert order == ["fast", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_per_stage():
+    active = 0
+    peak = 0
+
+    async def work(x):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return x
+
+    result = await run_stages(range(12), [Stage("work", work, concurrency=3)])
+    assert len(result.outputs) == 12
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_none_drops_and_exceptions_are_isolated():
+    async def filt(x):
+        if x == 1:
+            raise RuntimeError("boom")
+        return None if x == 2 else x
+
+    result = await run_stages(range(4), [Stage("filt", filt, 2)])
+    assert sorted(result.outputs) == [0, 3]
+    assert result.stats["filt"].failed == 1
+    assert result.stats["filt"].dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_event_discards_remaining_items():
+    stop = asyncio.Event()
+
+    async def take(x):
+        if x == 2:
+            stop.set()
+        return x
+
+    result = await run_stages(range(100), [Stage("take", take)], queue_size=1, stop=stop)
+    assert result.stopped
+    assert result.outputs[-1] == 2
+    assert len(result.outputs) <= 3
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate_per_sec=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    # バースト2件は即時、残り2件は 1/20 秒ずつ待つ
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_unlimited_when_rate_is_zero():
+    bucket = TokenBucket(rate_per_sec=0)
+    start = time.monotonic()
+    for _ in range(100):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+@pytest.mark.asyncio
+async def test_stage_bucket_is_acquired_per_item():
+    bucket = TokenBucket(rate_per_sec=50, burst=1)
+
+    async def echo(x):
+        return x
+
+    start = time.monotonic()
+    await run_stages(range(4), [Stage("echo", echo, concurrency=4, bucket=bucket)])
+    assert time.monotonic() - start >= 0.05
@@ -681,3 +681,136 @@ class TestBuiltinConditionChainsStructure:
         assert "sla_breach" in keys
         assert "upsell_high" in keys
         assert "lost_reengagement" in keys
+
+
+# ─── グループ化・メモ化・ウォーターマーク ─────────────────────────────────────
+
+class _CountingDB:
+    """テーブル別の呼び出し回数と、get_condition_watermarks の戻り値を制御できる DB モック。"""
+
+    def __init__(self, table_data: dict[str, list], watermarks: dict[str, str]):
+        self.table_data = table_data
+        self.watermarks = watermarks
+        self.calls: dict[str, int] = {}
+        self.selects: list[tuple[str, str]] = []
+
+    def table(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        tbl = MagicMock()
+        for m in ("eq", "in_", "lte", "gte", "lt", "gt", "limit"):
+            getattr(tbl, m).return_value = tbl
+        tbl.not_.in_ = MagicMock(return_value=tbl)
+
+        def select(columns):
+            self.selects.append((name, columns))
+            return tbl
+
+        tbl.select.side_effect = select
+        tbl.execute.return_value = MagicMock(data=self.table_data.get(name, []))
+        return tbl
+
+    def rpc(self, name: str, params: dict):
+        query = MagicMock()
+        query.execute.return_value = MagicMock(data=[
+            {"table_name": t, "watermark": w} for t, w in self.watermarks.items()
+        ])
+        return query
+
+
+def _relation_data(conditions: list[dict]) -> dict[str, list]:
+    relations, items = [], []
+    for i, cond in enumerate(conditions):
+        relations.append({"source_id": f"src-{i}", "target_id": f"tgt-{i}", "metadata": {}})
+        items.append({"id": f"src-{i}", "is_active": True, "confidence": 0.9, "metadata": {"condition": cond}})
+        items.append({"id": f"tgt-{i}", "confidence": 0.8, "metadata": {"pipeline": "sales/cancellation"}})
+    return {"knowledge_relations": relations, "knowledge_items": items}
+
+
+class TestConditionEngine:
+    @pytest.mark.asyncio
+    async def test_dynamic_conditions_grouped_into_one_query_per_table(self):
+        data = _relation_data([
+            {"field": "health_score", "operator": "<=", "threshold": 30, "table": "customers"},
+            {"field": "nps_score", "operator": "<", "threshold": 5, "table": "customers"},
+            {"field": "health_score", "operator": ">=", "threshold": 95, "table": "customers"},
+        ])
+        data["customers"] = [{"id": "c1", "health_score": 20, "nps_score": 9}]
+        db = _CountingDB(data, {})
+
+        with patch("db.supabase.get_service_client", return_value=db):
+            tasks = await evaluate_knowledge_triggers(COMPANY_ID)
+
+        dynamic_selects = [cols for table, cols in db.selects if table == "customers" and "nps_score" in cols]
+        assert dynamic_selects == ["id, health_score, nps_score"]
+        relation_tasks = [t for t in tasks if t.knowledge_item_ids]
+        assert [t.knowledge_item_ids for t in relation_tasks] == [["src-0", "tgt-0"]]
+
+    @pytest.mark.asyncio
+    async def test_memoized_within_window(self):
+        db = _CountingDB({}, {})
+        with patch("db.supabase.get_service_client", return_value=db) as get_db:
+            await evaluate_knowledge_triggers(COMPANY_ID)
+            await evaluate_knowledge_triggers(COMPANY_ID)
+            assert await evaluate_knowledge_triggers(COMPANY_ID, changed_only=True) == []
+        assert get_db.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_watermarks_skip_reevaluation(self):
+        import workers.bpo.manager.condition_evaluator as ce
+
+        data = {"customers": [{"id": "c1", "health_score": 10}]}
+        db = _CountingDB(data, {"customers": "t1:1", "support_tickets": "t1:0"})
+        with patch("db.supabase.get_service_client", return_value=db), \
+             patch.object(ce, "BPO_CONDITION_MEMO_SEC", 0):
+            first = await evaluate_knowledge_triggers(COMPANY_ID)
+            calls_after_first = dict(db.calls)
+            second = await evaluate_knowledge_triggers(COMPANY_ID)
+            chained = await evaluate_knowledge_triggers(COMPANY_ID, changed_only=True)
+
+        assert db.calls == calls_after_first
+        assert [t.pipeline for t in second] == [t.pipeline for t in first]
+        assert "sales/cancellation" in [t.pipeline for t in second]
+        assert chained == []
+
+    @pytest.mark.asyncio
+    async def test_changed_table_reevaluates_only_dependent_groups(self):
+        import workers.bpo.manager.condition_evaluator as ce
+
+        db = _CountingDB({"customers": [{"id": "c1", "health_score": 10}]}, {"customers": "t1:1"})
+        with patch("db.supabase.get_service_client", return_value=db), \
+             patch.object(ce, "BPO_CONDITION_MEMO_SEC", 0):
+            await evaluate_knowledge_triggers(COMPANY_ID)
+            before = dict(db.calls)
+            db.watermarks = {"customers": "t2:1"}
+            chained = await evaluate_knowledge_triggers(COMPANY_ID, changed_only=True)
+
+        assert db.calls["customers"] > before["customers"]
+        assert db.calls.get("support_tickets") == before.get("support_tickets")
+        assert db.calls.get("knowledge_relations") == before.get("knowledge_relations")
+        assert {t.pipeline for t in chained} == {"sales/cancellation", "sales/upsell_briefing"}
+
+    @pytest.mark.asyncio
+    async def test_time_dependent_chain_reevaluated_after_stale_window(self):
+        import workers.bpo.manager.condition_evaluator as ce
+
+        db = _CountingDB({}, {"support_tickets": "t1:0"})
+        with patch("db.supabase.get_service_client", return_value=db), \
+             patch.object(ce, "BPO_CONDITION_MEMO_SEC", 0), \
+             patch.object(ce, "BPO_CONDITION_TIME_STALE_SEC", 0):
+            await evaluate_knowledge_triggers(COMPANY_ID)
+            before = db.calls["support_tickets"]
+            await evaluate_knowledge_triggers(COMPANY_ID)
+
+        assert db.calls["support_tickets"] == before + 1
+
+    @pytest.mark.asyncio
+    async def test_sales_chains_single_query_any_row_threshold(self):
+        db = _CountingDB({"proactive_proposals": [
+            {"id": "p1", "proposal_type": "health_alert", "status": "active", "impact_score": 0.2},
+            {"id": "p2", "proposal_type": "health_alert", "status": "active", "impact_score": 0.9},
+            {"id": "p3", "proposal_type": "sla_breach", "status": "closed", "impact_score": 0.9},
+        ]}, {})
+        tasks = await _evaluate_builtin_sales_chains(COMPANY_ID, db)
+
+        assert db.calls["proactive_proposals"] == 1
+        assert [(t.pipeline, t.context["source_record_id"]) for t in tasks] == [("sales/cancellation", "p2")]
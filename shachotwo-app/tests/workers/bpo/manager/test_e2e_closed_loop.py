@@ -16,6 +16,7 @@ import pytest
 
 from shared.enums import ExecutionLevel, TriggerType
 from workers.bpo.manager.models import BPOTask, PipelineResult
+from workers.bpo.manager.task_queue import MemoryTaskQueue
 
 
 # ── ヘルパー ──────────────────────────────────────────────
@@ -171,6 +172,53 @@ class TestRouteAndExecute:
         assert result.approval_pending is False
         mock_pipeline.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_chained_tasks_are_enqueued(self):
+        """パイプライン完了 → 連鎖タスクは永続キューに積まれる（同一周期の重複は 1 件）。"""
+        cid = _cid()
+        t = _task(cid, pipeline="common/expense", level=ExecutionLevel.DATA_COLLECT)
+        chained = _task(cid, pipeline="common/cashflow", trigger=TriggerType.CONDITION)
+
+        mock_result = MagicMock()
+        mock_result.success = True
+        mock_result.steps = []
+        mock_result.final_output = {}
+        mock_result.total_cost_yen = 0.0
+        mock_result.total_duration_ms = 10
+        mock_result.failed_step = None
+        queue = MemoryTaskQueue()
+
+        with patch(
+            "workers.bpo.manager.task_router._get_effective_registry",
+            new_callable=AsyncMock,
+            return_value={"common/expense": "test_module.run"},
+        ), patch(
+            "workers.bpo.manager.task_router.notify_pipeline_event",
+            new_callable=AsyncMock,
+        ), patch(
+            "db.supabase.get_service_client",
+            side_effect=Exception("skip"),
+        ), patch(
+            "workers.bpo.manager.condition_evaluator.evaluate_knowledge_triggers",
+            new_callable=AsyncMock,
+            return_value=[chained, chained],
+        ), patch(
+            "workers.bpo.manager.task_router.get_task_queue",
+            return_value=queue,
+        ), patch(
+            # 他の patch 対象の解決にも import_module が使われるので最後に当てる
+            "importlib.import_module",
+        ) as mock_import:
+            mock_import.return_value = MagicMock(run=AsyncMock(return_value=mock_result))
+
+            from workers.bpo.manager.task_router import route_and_execute
+            result = await route_and_execute(t)
+
+        assert result.success is True
+        assert queue.pending_count() == 1
+        claimed = await queue.claim("w1", 10, 60)
+        assert claimed[0].task.pipeline == "common/cashflow"
+
     @pytest.mark.asyncio
     async def test_unregistered_pipeline_returns_error(self):
         """未登録パイプライン → エラー返却。"""
@@ -196,9 +244,10 @@ class TestOrchestratorLoop:
 
     @pytest.mark.asyncio
     async def test_schedule_cycle_dispatches_tasks(self):
-        """スケジュールサイクル → タスク生成 → route_and_execute。"""
+        """スケジュールサイクル → タスク生成 → キュー投入。"""
         cid = _cid()
         mock_tasks = [_task(cid, trigger=TriggerType.SCHEDULE)]
+        queue = MemoryTaskQueue()
 
         with patch(
             "workers.bpo.manager.orchestrator._get_active_company_ids",
@@ -209,20 +258,20 @@ class TestOrchestratorLoop:
             new_callable=AsyncMock,
             return_value=mock_tasks,
         ), patch(
-            "workers.bpo.manager.task_router.route_and_execute",
-            new_callable=AsyncMock,
-            return_value=PipelineResult(success=True, pipeline="common/expense"),
-        ) as mock_route:
+            "workers.bpo.manager.orchestrator.get_task_queue",
+            return_value=queue,
+        ):
             from workers.bpo.manager.orchestrator import _run_schedule_cycle
             await _run_schedule_cycle()
 
-        assert mock_route.call_count >= 1
+        assert queue.pending_count() == 1
 
     @pytest.mark.asyncio
     async def test_condition_cycle_dispatches_tasks(self):
-        """条件連鎖サイクル → タスク生成 → route_and_execute。"""
+        """条件連鎖サイクル → タスク生成 → キュー投入。"""
         cid = _cid()
         mock_tasks = [_task(cid, trigger=TriggerType.CONDITION)]
+        queue = MemoryTaskQueue()
 
         with patch(
             "workers.bpo.manager.orchestrator._get_active_company_ids",
@@ -233,20 +282,20 @@ class TestOrchestratorLoop:
             new_callable=AsyncMock,
             return_value=mock_tasks,
         ), patch(
-            "workers.bpo.manager.task_router.route_and_execute",
-            new_callable=AsyncMock,
-            return_value=PipelineResult(success=True, pipeline="common/expense"),
-        ) as mock_route:
+            "workers.bpo.manager.orchestrator.get_task_queue",
+            return_value=queue,
+        ):
             from workers.bpo.manager.orchestrator import _run_condition_cycle
             await _run_condition_cycle()
 
-        assert mock_route.call_count >= 1
+        assert queue.pending_count() == 1
 
     @pytest.mark.asyncio
     async def test_proactive_cycle_dispatches_tasks(self):
-        """能動提案サイクル → タスク生成 → route_and_execute。"""
+        """能動提案サイクル → タスク生成 → キュー投入。"""
         cid = _cid()
         mock_tasks = [_task(cid, trigger=TriggerType.PROACTIVE)]
+        queue = MemoryTaskQueue()
 
         with patch(
             "workers.bpo.manager.orchestrator._get_active_company_ids",
@@ -257,14 +306,13 @@ class TestOrchestratorLoop:
             new_callable=AsyncMock,
             return_value=mock_tasks,
         ), patch(
-            "workers.bpo.manager.task_router.route_and_execute",
-            new_callable=AsyncMock,
-            return_value=PipelineResult(success=True, pipeline="common/expense"),
-        ) as mock_route:
+            "workers.bpo.manager.orchestrator.get_task_queue",
+            return_value=queue,
+        ):
             from workers.bpo.manager.orchestrator import _run_proactive_cycle
             await _run_proactive_cycle()
 
-        assert mock_route.call_count >= 1
+        assert queue.pending_count() == 1
 
 
 # ── 4. 閉ループ統合テスト ───────────────────────────────
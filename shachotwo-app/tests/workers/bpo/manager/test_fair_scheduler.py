@@ -0,0 +1,202 @@
+"""fair_scheduler（重み付き公平キュー付き実行枠）のユニットテスト。"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from shared.enums import TriggerType
+from workers.bpo.manager.fair_scheduler import FairScheduler, SchedulerRejected, task_priority
+from workers.bpo.manager.models import BPOTask, ExecutionLevel
+
+
+def _task(company_id: str, level: ExecutionLevel = ExecutionLevel.DRAFT_CREATE, impact: float = 0.5, **kw) -> BPOTask:
+    return BPOTask(
+        company_id=company_id,
+        pipeline="common/expense",
+        trigger_type=TriggerType.SCHEDULE,
+        execution_level=level,
+        estimated_impact=impact,
+        **kw,
+    )
+
+
+def _scheduler(weights: dict[str, float] | None = None, **kw) -> FairScheduler:
+    async def weight(cid: str) -> float:
+        return (weights or {}).get(cid, 1.0)
+    return FairScheduler(weight_fn=weight, **kw)
+
+
+async def _run_jobs(scheduler: FairScheduler, tasks: list[BPOTask], order: list[str], hold: float = 0.001):
+    async def job(task: BPOTask):
+        await scheduler.acquire(task)
+        try:
+            order.append(task.company_id)
+            await asyncio.sleep(hold)
+        finally:
+            scheduler.release(task.company_id)
+    await asyncio.gather(*(job(t) for t in tasks))
+
+
+class TestFairScheduler:
+    @pytest.mark.asyncio
+    async def test_waits_instead_of_rejecting_when_tenant_is_full(self):
+        scheduler = _scheduler(slots=10, per_tenant=2)
+        order: list[str] = []
+        await _run_jobs(scheduler, [_task("a") for _ in range(6)], order)
+
+        assert len(order) == 6
+        stats = scheduler.stats()
+        assert stats["granted"] == 6 and stats["rejected"] == 0
+        assert stats["running"] == 0 and stats["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_global_slots_are_respected(self):
+        scheduler = _scheduler(slots=3, per_tenant=3)
+        peak = 0
+
+        async def job(task: BPOTask):
+            nonlocal peak
+            await scheduler.acquire(task)
+            try:
+                peak = max(peak, scheduler.stats()["running"])
+                await asyncio.sleep(0.005)
+            finally:
+                scheduler.release(task.company_id)
+
+        await asyncio.gather(*(job(_task(f"t{i}")) for i in range(12)))
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_weighted_share_under_contention(self):
+        scheduler = _scheduler({"gold": 3.0, "basic": 1.0}, slots=1, per_tenant=1)
+        # 枠を塞いでから両テナントを 20 件ずつ積む
+        await scheduler.acquire(_task("blocker"))
+        order: list[str] = []
+        jobs = asyncio.gather(_run_jobs(scheduler, [_task("gold") for _ in range(20)] + [_task("basic") for _ in range(20)], order))
+        await asyncio.sleep(0.01)
+        scheduler.release("blocker")
+        await jobs
+
+        first = order[:16]
+        assert first.count("gold") == 12
+        assert first.count("basic") == 4
+
+    @pytest.mark.asyncio
+    async def test_priority_then_deadline_within_tenant(self):
+        scheduler = _scheduler(slots=1, per_tenant=1)
+        await scheduler.acquire(_task("a"))
+        soon = datetime.now(timezone.utc) + timedelta(seconds=30)
+        later = datetime.now(timezone.utc) + timedelta(seconds=60)
+        tasks = [
+            _task("a", ExecutionLevel.DATA_COLLECT, input_data={"n": "read"}),
+            _task("a", ExecutionLevel.APPROVAL_GATED, deadline=later, input_data={"n": "approved-later"}),
+            _task("a", ExecutionLevel.APPROVAL_GATED, deadline=soon, input_data={"n": "approved-soon"}),
+        ]
+        order: list[str] = []
+
+        async def job(task: BPOTask):
+            await scheduler.acquire(task)
+            order.append(task.input_data["n"])
+            scheduler.release(task.company_id)
+
+        jobs = asyncio.gather(*(job(t) for t in tasks))
+        await asyncio.sleep(0.01)
+        scheduler.release("a")
+        await jobs
+
+        assert order == ["approved-soon", "approved-later", "read"]
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue_rejects_overflow(self):
+        scheduler = _scheduler(slots=1, per_tenant=1, queue_per_tenant=2)
+        await scheduler.acquire(_task("a"))
+        waiting = [asyncio.create_task(scheduler.acquire(_task("a"))) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerRejected) as exc:
+            await scheduler.acquire(_task("a"))
+        assert exc.value.reason == "concurrency_limit"
+        assert scheduler.stats()["tenants"]["a"]["queued"] == 2
+
+        for _ in range(3):
+            scheduler.release("a")
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiting)
+
+    @pytest.mark.asyncio
+    async def test_deadline_expiry_returns_queue_timeout(self):
+        scheduler = _scheduler(slots=1, per_tenant=1, max_wait_sec=0.02)
+        await scheduler.acquire(_task("a"))
+
+        with pytest.raises(SchedulerRejected) as exc:
+            await scheduler.acquire(_task("b"))
+
+        assert exc.value.reason == "queue_timeout"
+        stats = scheduler.stats()
+        assert stats["expired"] == 1 and stats["queued"] == 0
+        scheduler.release("a")
+        assert scheduler.stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        scheduler = _scheduler(slots=1, per_tenant=1)
+        await scheduler.acquire(_task("a"))
+        waiter = asyncio.create_task(scheduler.acquire(_task("b")))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release("a")
+
+        stats = scheduler.stats()
+        assert stats["running"] == 0 and stats["queued"] == 0
+        await asyncio.wait_for(scheduler.acquire(_task("c")), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_release_during_weight_lookup_does_not_orphan_waiter(self):
+        gate = asyncio.Event()
+
+        async def slow_weight(cid: str) -> float:
+            await gate.wait()
+            return 1.0
+
+        scheduler = FairScheduler(weight_fn=slow_weight, slots=2, per_tenant=1, max_wait_sec=0.5)
+        await scheduler.acquire(_task("a"))
+        waiting = asyncio.create_task(scheduler.acquire(_task("a")))
+        await asyncio.sleep(0)
+        # 重み取得の await 中に最後の枠が返り、テナント状態が一度消える
+        scheduler.release("a")
+        assert "a" not in scheduler.stats()["tenants"]
+        gate.set()
+
+        await asyncio.wait_for(waiting, timeout=0.2)
+        scheduler.release("a")
+        stats = scheduler.stats()
+        assert stats["running"] == 0 and stats["queued"] == 0 and stats["expired"] == 0
+
+    def test_priority_orders_by_level_then_impact(self):
+        assert task_priority(_task("a", ExecutionLevel.APPROVAL_GATED, 0.1)) > task_priority(_task("a", ExecutionLevel.DRAFT_CREATE, 0.9))
+        assert task_priority(_task("a", impact=0.9)) > task_priority(_task("a", impact=0.1))
+
+
+class TestRouteAndExecuteScheduling:
+    @pytest.mark.asyncio
+    async def test_queue_timeout_is_returned_as_retryable_failure(self):
+        from workers.bpo.manager import fair_scheduler
+        from workers.bpo.manager.queue_worker import _RETRYABLE_FAILED_STEPS
+        from workers.bpo.manager.task_router import route_and_execute
+
+        scheduler = _scheduler(slots=1, per_tenant=1, max_wait_sec=0.01)
+        cid = str(uuid4())
+        await scheduler.acquire(_task(cid))
+        pipeline = AsyncMock()
+        with patch.object(fair_scheduler, "_scheduler", scheduler), \
+             patch("db.supabase.get_service_client", side_effect=Exception("skip")), \
+             patch("importlib.import_module", return_value=MagicMock(run_expense_pipeline=pipeline)):
+            result = await route_and_execute(_task(cid, ExecutionLevel.DATA_COLLECT))
+
+        assert result.success is False
+        assert result.failed_step == "queue_timeout"
+        assert result.failed_step in _RETRYABLE_FAILED_STEPS
+        pipeline.assert_not_awaited()
@@ -0,0 +1,33 @@
+"""lifecycle（API / 独立ワーカー共通の起動・停止処理）のユニットテスト。"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from workers.bpo.manager.lifecycle import start_bpo_runtime, stop_bpo_runtime
+
+
+class TestBpoRuntime:
+    @pytest.mark.asyncio
+    async def test_start_syncs_costs_and_warms_pipelines(self):
+        tracker = MagicMock(start_sync=AsyncMock())
+        with patch("llm.cost_tracker.get_cost_tracker", return_value=tracker), \
+             patch("workers.bpo.manager.task_router.warm_pipelines", new_callable=AsyncMock) as warm:
+            await start_bpo_runtime()
+        tracker.start_sync.assert_awaited_once()
+        warm.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_start_without_warmup(self):
+        tracker = MagicMock(start_sync=AsyncMock())
+        with patch("llm.cost_tracker.get_cost_tracker", return_value=tracker), \
+             patch("workers.bpo.manager.task_router.warm_pipelines", new_callable=AsyncMock) as warm:
+            await start_bpo_runtime(warm_pipelines=False)
+        warm.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stop_closes_pools_even_if_cost_flush_fails(self):
+        tracker = MagicMock(stop_sync=AsyncMock(side_effect=RuntimeError("redis down")))
+        with patch("llm.cost_tracker.get_cost_tracker", return_value=tracker), \
+             patch("workers.connector.base.close_connector_pools", new_callable=AsyncMock) as close:
+            await stop_bpo_runtime()
+        close.assert_awaited_once()
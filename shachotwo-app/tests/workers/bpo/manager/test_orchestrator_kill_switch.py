@@ -166,6 +166,34 @@ class TestGetActiveCompanyIds:
         assert ids == []
 
 
+# ─────────────────────────────────────────────────────────────────
+# toggle_kill_switch — テナント一覧キャッシュの無効化
+# ─────────────────────────────────────────────────────────────────
+
+class TestToggleKillSwitchInvalidatesTenantCache:
+    @pytest.mark.asyncio
+    async def test_next_cycle_sees_kill_switch_without_waiting_for_ttl(self):
+        """kill switch ON 直後のサイクルでは、キャッシュ済みでも対象テナントを走査しない。"""
+        from routers.execution import KillSwitchRequest, toggle_kill_switch
+        from workers.bpo.manager import orchestrator
+
+        active = ["company-001", "company-002"]
+        loader = AsyncMock(side_effect=lambda: list(active))
+        orchestrator.invalidate_tenant_cache()
+        with patch.object(orchestrator, "_get_active_company_ids", loader):
+            assert await orchestrator._get_cycle_company_ids() == active
+
+            user = MagicMock(company_id="company-001", sub="user-001")
+            active.remove("company-001")
+            with patch("routers.execution.get_service_client", return_value=MagicMock()), \
+                 patch("workers.bpo.manager.notifier.notify_pipeline_event", new_callable=AsyncMock):
+                await toggle_kill_switch(KillSwitchRequest(enabled=True), user=user)
+
+            assert await orchestrator._get_cycle_company_ids() == ["company-002"]
+        assert loader.await_count == 2
+        orchestrator.invalidate_tenant_cache()
+
+
 # ─────────────────────────────────────────────────────────────────
 # _orchestrator_loop — グローバルkill switchでスキップ
 # ─────────────────────────────────────────────────────────────────
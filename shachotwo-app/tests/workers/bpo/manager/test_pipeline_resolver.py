@@ -0,0 +1,177 @@
+"""pipeline_resolver（マージ済みレジストリ・関数メモ・HITL テーブル）のユニットテスト。"""
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from shared.enums import TriggerType
+from workers.bpo.manager import pipeline_resolver
+from workers.bpo.manager.models import BPOTask, ExecutionLevel
+from workers.bpo.manager.pipeline_resolver import (
+    HitlRequirements,
+    ResolvedRegistry,
+    invalidate_hitl_requirements,
+    resolve_pipeline_callable,
+    warm_pipeline_cache,
+)
+
+
+def _genome(entries: dict[str, str], changed: bool = False) -> MagicMock:
+    genome = MagicMock()
+    genome.list_entries.return_value = [MagicMock(key=k, module_path=v) for k, v in entries.items()]
+    genome.reload_if_changed = AsyncMock(return_value=changed)
+    return genome
+
+
+def _hitl_db(rows: list[dict]) -> MagicMock:
+    db = MagicMock()
+    db.table.return_value.select.return_value.execute.return_value = MagicMock(data=rows)
+    return db
+
+
+class TestResolvedRegistry:
+    @pytest.mark.asyncio
+    async def test_static_wins_and_genome_fills_gaps(self):
+        static = {"common/expense": "static.run"}
+        genome = _genome({"common/expense": "genome.run", "clinic/medical_receipt": "clinic.run"})
+        with patch(
+            "workers.bpo.engine.genome_registry.get_loaded_genome_registry",
+            AsyncMock(return_value=genome),
+        ):
+            view = await ResolvedRegistry().get(static)
+
+        assert view["common/expense"] == "static.run"
+        assert view["clinic/medical_receipt"] == "clinic.run"
+        static["common/new"] = "new.run"  # 静的 dict の変更はそのまま見える
+        assert "common/new" in view
+
+    @pytest.mark.asyncio
+    async def test_genome_checked_at_most_once_per_interval(self):
+        genome = _genome({"clinic/medical_receipt": "clinic.run"})
+        loader = AsyncMock(return_value=genome)
+        registry = ResolvedRegistry(check_sec=60)
+        static: dict[str, str] = {}
+        with patch("workers.bpo.engine.genome_registry.get_loaded_genome_registry", loader):
+            for _ in range(5):
+                await registry.get(static)
+
+        assert loader.await_count == 1
+        assert genome.list_entries.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_when_genome_changes(self):
+        registry = ResolvedRegistry(check_sec=0)
+        with patch(
+            "workers.bpo.engine.genome_registry.get_loaded_genome_registry",
+            AsyncMock(return_value=_genome({"a/x": "a.run"})),
+        ):
+            assert "a/x" in await registry.get({})
+        with patch(
+            "workers.bpo.engine.genome_registry.get_loaded_genome_registry",
+            AsyncMock(return_value=_genome({"b/y": "b.run"}, changed=True)),
+        ):
+            view = await registry.get({})
+
+        assert "b/y" in view and "a/x" not in view
+
+    @pytest.mark.asyncio
+    async def test_genome_failure_falls_back_to_static(self):
+        with patch(
+            "workers.bpo.engine.genome_registry.get_loaded_genome_registry",
+            AsyncMock(side_effect=RuntimeError("broken json")),
+        ):
+            view = await ResolvedRegistry().get({"common/expense": "static.run"})
+
+        assert dict(view) == {"common/expense": "static.run"}
+
+
+class TestPipelineCallables:
+    def test_import_happens_once_per_path(self):
+        module = MagicMock()
+        with patch("importlib.import_module", return_value=module) as mock_import:
+            first = resolve_pipeline_callable("pkg.mod.run")
+            second = resolve_pipeline_callable("pkg.mod.run")
+
+        assert first is second is module.run
+        mock_import.assert_called_once_with("pkg.mod")
+
+    def test_import_failure_is_not_cached(self):
+        with patch("importlib.import_module", side_effect=ImportError("nope")):
+            with pytest.raises(ImportError):
+                resolve_pipeline_callable("pkg.missing.run")
+        with patch("importlib.import_module", return_value=MagicMock()) as mock_import:
+            resolve_pipeline_callable("pkg.missing.run")
+        mock_import.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_imports_all_registered(self):
+        with patch(
+            "workers.bpo.engine.genome_registry.get_loaded_genome_registry",
+            AsyncMock(side_effect=RuntimeError("skip genome")),
+        ), patch(
+            "importlib.import_module",
+            side_effect=lambda name: MagicMock() if name != "pkg.broken" else (_ for _ in ()).throw(ImportError()),
+        ):
+            counts = await warm_pipeline_cache({"a/x": "pkg.a.run", "b/y": "pkg.b.run", "c/z": "pkg.broken.run"})
+
+        assert counts == {"loaded": 2, "failed": 1}
+        assert set(pipeline_resolver._pipeline_callables) == {"pkg.a.run", "pkg.b.run"}
+
+
+class TestHitlRequirements:
+    @pytest.mark.asyncio
+    async def test_table_loaded_once_for_many_lookups(self):
+        db = _hitl_db([
+            {"pipeline_key": "common/expense", "requires_approval": True, "min_confidence_for_auto": 0.9},
+        ])
+        table = HitlRequirements(refresh_sec=60)
+        with patch("db.supabase.get_service_client", return_value=db):
+            assert (await table.get("common/expense"))["min_confidence_for_auto"] == 0.9
+            assert await table.get("common/payroll") is None
+            await table.get("common/expense")
+
+        assert db.table.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_reload(self):
+        table = HitlRequirements(refresh_sec=60)
+        with patch("db.supabase.get_service_client", return_value=_hitl_db([])):
+            assert await table.get("common/expense") is None
+        table.invalidate()
+        with patch("db.supabase.get_service_client", return_value=_hitl_db([
+            {"pipeline_key": "common/expense", "requires_approval": True, "min_confidence_for_auto": 0.95},
+        ])):
+            assert (await table.get("common/expense"))["min_confidence_for_auto"] == 0.95
+
+    @pytest.mark.asyncio
+    async def test_load_failure_keeps_previous_rows(self):
+        table = HitlRequirements(refresh_sec=0)
+        with patch("db.supabase.get_service_client", return_value=_hitl_db([
+            {"pipeline_key": "common/expense", "min_confidence_for_auto": 0.9},
+        ])):
+            await table.get("common/expense")
+        with patch("db.supabase.get_service_client", side_effect=RuntimeError("db down")):
+            assert (await table.get("common/expense"))["min_confidence_for_auto"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_route_and_execute_auto_approves_from_cached_table(self):
+        from workers.bpo.manager.task_router import route_and_execute
+
+        task = BPOTask(
+            company_id=str(uuid4()),
+            pipeline="common/expense",
+            trigger_type=TriggerType.EVENT,
+            execution_level=ExecutionLevel.APPROVAL_GATED,
+        )
+        pipeline = AsyncMock(return_value=MagicMock(success=True, final_output={}, failed_step=None))
+        db = _hitl_db([{"pipeline_key": "common/expense", "min_confidence_for_auto": 0.8}])
+        with patch("db.supabase.get_service_client", return_value=db), \
+             patch("importlib.import_module", return_value=MagicMock(run_expense_pipeline=pipeline)), \
+             patch("workers.bpo.manager.task_router.notify_pipeline_event", new_callable=AsyncMock), \
+             patch("workers.bpo.manager.task_router._save_approval_pending", new_callable=AsyncMock) as save:
+            invalidate_hitl_requirements()
+            result = await route_and_execute(task, trust_score=0.85)
+
+        assert result.approval_pending is False
+        save.assert_not_awaited()
+        pipeline.assert_awaited_once()
@@ -0,0 +1,175 @@
+"""cron コンパイラと ScheduleIndex のユニットテスト。"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from workers.bpo.manager.cron import compile_cron
+from workers.bpo.manager.schedule_watcher import (
+    BUILTIN_SCHEDULE_TRIGGERS,
+    ScheduleIndex,
+    _matches_cron,
+    scan_schedule_triggers,
+)
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def _schedule_item(item_id: str, cron_expr: str, pipeline: str = "common/payroll") -> dict:
+    return {
+        "id": item_id,
+        "confidence": 0.9,
+        "metadata": {"trigger_type": "schedule", "cron_expr": cron_expr, "pipeline": pipeline},
+    }
+
+
+class TestCronCompiler:
+    def test_steps_ranges_and_lists(self):
+        cron = compile_cron("*/15 9-17/2 1,15 * *")
+        assert cron.matches(_utc(2025, 3, 1, 9, 45))
+        assert cron.matches(_utc(2025, 3, 15, 17, 0))
+        assert not cron.matches(_utc(2025, 3, 15, 10, 0))
+        assert not cron.matches(_utc(2025, 3, 15, 9, 10))
+        assert not cron.matches(_utc(2025, 3, 2, 9, 0))
+
+    def test_last_day_of_month(self):
+        cron = compile_cron("0 9 L * *")
+        assert cron.matches(_utc(2024, 2, 29, 9, 0))
+        assert not cron.matches(_utc(2025, 2, 28, 8, 0))
+        assert cron.matches(_utc(2025, 2, 28, 9, 0))
+        assert not cron.matches(_utc(2025, 3, 30, 9, 0))
+
+    def test_invalid_expressions(self):
+        for expr in ("0 9 * *", "60 * * * *", "0 9 32 * *", "*/0 * * * *", "a * * * *"):
+            with pytest.raises(ValueError):
+                compile_cron(expr)
+        assert _matches_cron("0 9 L * 8", _utc(2025, 3, 31, 9, 0)) is False
+
+    def test_next_fire(self):
+        assert compile_cron("0 9 * * *").next_fire(_utc(2025, 3, 17, 9, 0, 30)) == _utc(2025, 3, 17, 9, 0)
+        assert compile_cron("0 9 * * *").next_fire(_utc(2025, 3, 17, 9, 1)) == _utc(2025, 3, 18, 9, 0)
+        assert compile_cron("30 * * * *").next_fire(_utc(2025, 3, 17, 23, 45)) == _utc(2025, 3, 18, 0, 30)
+        assert compile_cron("0 9 L * *").next_fire(_utc(2025, 2, 1)) == _utc(2025, 2, 28, 9, 0)
+        assert compile_cron("0 0 29 2 *").next_fire(_utc(2025, 3, 1)) == _utc(2028, 2, 29, 0, 0)
+        # 2025-03-17 は月曜 → 次の日曜（weekday 6）は 3/23
+        assert compile_cron("0 3 * * 6").next_fire(_utc(2025, 3, 17)) == _utc(2025, 3, 23, 3, 0)
+
+    def test_next_fire_agrees_with_matches(self):
+        cron = compile_cron("*/20 6-8 * * 0-4")
+        t = _utc(2025, 3, 14, 8, 50)  # 金曜
+        fire = cron.next_fire(t)
+        assert fire == _utc(2025, 3, 17, 6, 0)
+        probe = t
+        while probe < fire:
+            assert not cron.matches(probe)
+            probe += timedelta(minutes=1)
+        assert cron.matches(fire)
+
+
+class TestScheduleIndex:
+    def test_only_due_entries_are_returned(self):
+        index = ScheduleIndex()
+        now = _utc(2025, 3, 17, 8, 0)
+        index.load("c1", [_schedule_item("k1", "0 9 25 * *")], now)
+
+        index.pop_due(now)
+        pipelines = sorted(e.pipeline for e in index.take("c1", now))
+        assert pipelines == ["internal/gws_pending_sync", "sales/outreach"]
+
+        later = now + timedelta(minutes=1)
+        index.pop_due(later)
+        assert index.take("c1", later) == []
+
+    def test_db_item_overrides_builtin(self):
+        index = ScheduleIndex()
+        now = _utc(2025, 3, 25, 9, 0)
+        index.load("c1", [_schedule_item("k1", "0 9 25 * *", pipeline="common/payroll")], now)
+        index.pop_due(now)
+        due = [e for e in index.take("c1", now) if e.pipeline == "common/payroll"]
+        assert len(due) == 1
+        assert due[0].knowledge_item_ids == ["k1"]
+
+    def test_missed_minute_fires_once_on_next_scan(self):
+        index = ScheduleIndex()
+        start = _utc(2025, 3, 17, 8, 58)
+        index.load("c1", [_schedule_item("k1", "59 8 * * *")], start)
+        index.pop_due(start)
+        index.take("c1", start)
+
+        late = _utc(2025, 3, 17, 9, 0, 10)  # 8:59 のスキャンが飛んだ
+        index.pop_due(late)
+        pipelines = [e.pipeline for e in index.take("c1", late)]
+        assert pipelines.count("common/payroll") == 1
+
+    def test_invalidated_entries_are_dropped(self):
+        index = ScheduleIndex()
+        now = _utc(2025, 3, 17, 8, 0)
+        index.load("c1", [], now)
+        index.invalidate("c1")
+        index.pop_due(now)
+        assert index.take("c1", now) == []
+        assert index.needs_load("c1")
+
+    def test_reload_same_minute_does_not_refire(self):
+        index = ScheduleIndex()
+        now = _utc(2025, 3, 17, 8, 0)
+        index.load("c1", [], now)
+        index.pop_due(now)
+        assert index.take("c1", now)
+        index.load("c1", [], now)
+        index.pop_due(now)
+        assert index.take("c1", now) == []
+
+    @pytest.mark.asyncio
+    async def test_change_feed_invalidates_changed_tenants(self):
+        index = ScheduleIndex()
+        t0 = _utc(2025, 3, 17, 8, 0)
+        await index.poll_changes(t0)
+        index.load("c1", [], t0)
+        index.load("c2", [], t0)
+
+        db = MagicMock()
+        feed = MagicMock(data=[{"company_id": "c2"}, {"company_id": "unloaded"}])
+        with patch("db.supabase.get_service_client", return_value=db), \
+             patch("workers.bpo.manager.schedule_watcher.execute", AsyncMock(return_value=feed)) as execute:
+            await index.poll_changes(t0 + timedelta(minutes=1))
+            await index.poll_changes(t0 + timedelta(minutes=1, seconds=30))
+
+        execute.assert_awaited_once()
+        assert not index.needs_load("c1")
+        assert index.needs_load("c2")
+
+
+class TestScanScheduleTriggers:
+    @pytest.mark.asyncio
+    async def test_items_loaded_once_per_tenant(self):
+        loader = AsyncMock(return_value=[])
+        with patch("workers.bpo.manager.schedule_watcher._load_schedule_items", loader), \
+             patch("workers.bpo.manager.schedule_watcher.datetime") as mock_dt:
+            mock_dt.now.return_value = _utc(2025, 3, 17, 8, 0)
+            first = await scan_schedule_triggers("c1")
+            mock_dt.now.return_value = _utc(2025, 3, 17, 8, 1)
+            second = await scan_schedule_triggers("c1")
+
+        assert loader.await_count == 1
+        assert "sales/outreach" in [t.pipeline for t in first]
+        assert second == []
+
+    @pytest.mark.asyncio
+    async def test_db_error_still_fires_builtins_and_retries(self):
+        loader = AsyncMock(side_effect=[RuntimeError("db down"), []])
+        with patch("workers.bpo.manager.schedule_watcher._load_schedule_items", loader), \
+             patch("workers.bpo.manager.schedule_watcher.datetime") as mock_dt:
+            mock_dt.now.return_value = _utc(2025, 3, 17, 8, 0)
+            tasks = await scan_schedule_triggers("c1")
+            mock_dt.now.return_value = _utc(2025, 3, 17, 8, 1)
+            await scan_schedule_triggers("c1")
+
+        assert "sales/outreach" in [t.pipeline for t in tasks]
+        assert loader.await_count == 2
+
+    def test_month_end_builtins_use_last_day_token(self):
+        month_end = [t for t in BUILTIN_SCHEDULE_TRIGGERS if t["cron_expr"].split()[2] == "L"]
+        assert {t["pipeline"] for t in month_end} == {"sales/cs_feedback", "backoffice/invoice_issue"}
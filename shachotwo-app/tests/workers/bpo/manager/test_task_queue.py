@@ -0,0 +1,277 @@
+"""task_queue / queue_worker のユニットテスト。"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from shared.enums import TriggerType
+from workers.bpo.manager.models import BPOTask, PipelineResult
+from workers.bpo.manager.queue_worker import TaskWorker
+from workers.bpo.manager.task_queue import (
+    MemoryTaskQueue,
+    PostgresTaskQueue,
+    RedisTaskQueue,
+    deserialize_task,
+    idempotency_key,
+    serialize_task,
+)
+
+
+def _task(pipeline: str = "common/expense", **input_data) -> BPOTask:
+    return BPOTask(
+        company_id=str(uuid4()),
+        pipeline=pipeline,
+        trigger_type=TriggerType.SCHEDULE,
+        input_data=input_data,
+    )
+
+
+class TestSerialization:
+    def test_round_trip(self):
+        task = _task(amount=1000, note="交通費")
+        restored = deserialize_task(serialize_task(task))
+        assert restored == task
+
+    def test_idempotency_key_same_bucket(self):
+        task = _task(a=1)
+        assert idempotency_key(task, "schedule", 60, now=120) == idempotency_key(task, "schedule", 60, now=179)
+        assert idempotency_key(task, "schedule", 60, now=120) != idempotency_key(task, "schedule", 60, now=180)
+
+    def test_idempotency_key_depends_on_input(self):
+        assert idempotency_key(_task(a=1), "schedule", 60, now=0) != idempotency_key(_task(a=2), "schedule", 60, now=0)
+
+
+class TestMemoryTaskQueue:
+    @pytest.mark.asyncio
+    async def test_duplicate_idempotency_key_rejected(self):
+        queue = MemoryTaskQueue()
+        task = _task()
+        assert await queue.enqueue(task, idempotency_key="k1") is True
+        assert await queue.enqueue(task, idempotency_key="k1") is False
+        assert queue.pending_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_claim_hides_task_until_visibility_timeout(self):
+        queue = MemoryTaskQueue()
+        await queue.enqueue(_task())
+        first = await queue.claim("w1", 10, visibility_sec=0)
+        assert len(first) == 1
+        # ack されないまま可視性タイムアウト → 再配信（試行回数が増える）
+        again = await queue.claim("w2", 10, visibility_sec=60)
+        assert [q.id for q in again] == [first[0].id]
+        assert again[0].attempts == 2
+        assert await queue.claim("w3", 10, visibility_sec=60) == []
+
+    @pytest.mark.asyncio
+    async def test_fail_retries_then_dead_letters(self):
+        queue = MemoryTaskQueue()
+        await queue.enqueue(_task())
+        with patch("workers.bpo.manager.task_queue.BPO_QUEUE_MAX_ATTEMPTS", 2), \
+             patch("workers.bpo.manager.task_queue.retry_delay_sec", return_value=0):
+            queued = (await queue.claim("w1", 1, 60))[0]
+            assert await queue.fail("w1", queued, "boom") is True
+            queued = (await queue.claim("w1", 1, 60))[0]
+            assert queued.attempts == 2
+            assert await queue.fail("w1", queued, "boom") is False
+        assert queue.pending_count() == 0
+        assert queue.dead_letters[0][1] == "boom"
+
+
+class TestPostgresTaskQueue:
+    @pytest.mark.asyncio
+    async def test_claim_parses_rpc_rows(self):
+        task = _task(x=1)
+        mock_db = MagicMock()
+        mock_db.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"id": "q1", "payload": task.model_dump(mode="json"), "attempts": 1, "idempotency_key": "k"},
+        ])
+        with patch("db.supabase.get_service_client", return_value=mock_db):
+            claimed = await PostgresTaskQueue().claim("w1", 4, 360)
+
+        assert claimed[0].task == task
+        assert mock_db.rpc.call_args.args[0] == "claim_bpo_tasks"
+        assert mock_db.rpc.call_args.args[1]["p_limit"] == 4
+
+    @pytest.mark.asyncio
+    async def test_fail_reports_dead_letter(self):
+        mock_db = MagicMock()
+        mock_db.rpc.return_value.execute.return_value = MagicMock(data="dead")
+        queue = PostgresTaskQueue()
+        queued = MagicMock(id="q1", attempts=3)
+        with patch("db.supabase.get_service_client", return_value=mock_db):
+            assert await queue.fail("w1", queued, "boom") is False
+
+
+class _FakeRedis:
+    """RedisTaskQueue.claim が使う分だけの Stream/Hash をメモリで再現する（アイドル時間は常に満了扱い）。"""
+
+    def __init__(self) -> None:
+        self.stream: dict[str, dict] = {}
+        self.pending: set[str] = set()
+        self.hashes: dict[str, dict] = {}
+        self._seq = 0
+
+    async def xgroup_create(self, *args, **kwargs):
+        return True
+
+    async def zrangebyscore(self, *args, **kwargs):
+        return []
+
+    async def xadd(self, stream, fields):
+        self._seq += 1
+        entry_id = f"{self._seq}-0"
+        self.stream[entry_id] = {k: str(v) for k, v in fields.items()}
+        return entry_id
+
+    async def xautoclaim(self, stream, group, consumer, min_idle_time, start_id, count):
+        ids = sorted(self.pending)[:count]
+        return "0-0", [(i, self.stream[i]) for i in ids], []
+
+    async def xreadgroup(self, group, consumer, streams, count):
+        new = [i for i in sorted(self.stream) if i not in self.pending][:count]
+        self.pending.update(new)
+        return [("bpo:tasks", [(i, self.stream[i]) for i in new])] if new else []
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hincrby(self, name, key, amount):
+        h = self.hashes.setdefault(name, {})
+        h[key] = int(h.get(key, 0)) + amount
+        return h[key]
+
+    def pipeline(self, transaction=True):
+        fake = self
+        ops = []
+
+        class _Pipe:
+            def xack(self, stream, group, entry_id):
+                ops.append(lambda: fake.pending.discard(entry_id))
+
+            def xdel(self, stream, entry_id):
+                ops.append(lambda: fake.stream.pop(entry_id, None))
+
+            def hdel(self, name, key):
+                ops.append(lambda: fake.hashes.get(name, {}).pop(key, None))
+
+            async def execute(self):
+                for op in ops:
+                    op()
+
+        return _Pipe()
+
+
+class TestRedisTaskQueue:
+    @pytest.mark.asyncio
+    async def test_unacked_task_dead_letters_after_max_attempts(self):
+        queue = RedisTaskQueue.__new__(RedisTaskQueue)
+        queue._redis = _FakeRedis()
+        queue._group_ready = False
+        await queue.enqueue(_task())
+
+        with patch("workers.bpo.manager.task_queue.BPO_QUEUE_MAX_ATTEMPTS", 2), \
+             patch("workers.bpo.manager.task_queue._write_dead_letter", new_callable=AsyncMock) as dead:
+            # ワーカーが ack せずに落ち続ける → 可視性タイムアウトで再配信
+            first = await queue.claim("w1", 1, visibility_sec=0)
+            assert first[0].attempts == 1
+            second = await queue.claim("w2", 1, visibility_sec=0)
+            assert [q.id for q in second] == [first[0].id]
+            assert second[0].attempts == 2
+            # 上限到達後は再配信せずデッドレターに回して Stream から消す
+            assert await queue.claim("w3", 1, visibility_sec=0) == []
+
+        dead.assert_awaited_once()
+        queued, reason = dead.call_args.args
+        assert queued.id == first[0].id
+        assert queued.attempts == 2
+        assert reason == "visibility timeout"
+        assert queue._redis.stream == {}
+        assert queue._redis.pending == set()
+
+
+class TestTaskWorker:
+    @pytest.mark.asyncio
+    async def test_drains_with_bounded_concurrency(self):
+        queue = MemoryTaskQueue()
+        for i in range(6):
+            await queue.enqueue(_task(i=i))
+
+        running = 0
+        peak = 0
+
+        async def fake_route(task, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return PipelineResult(success=True, pipeline=task.pipeline)
+
+        worker = TaskWorker(queue, concurrency=2, poll_interval_sec=0.01)
+        with patch("workers.bpo.manager.task_router.route_and_execute", side_effect=fake_route):
+            run = asyncio.create_task(worker.run())
+            for _ in range(100):
+                if queue.pending_count() == 0:
+                    break
+                await asyncio.sleep(0.01)
+            await worker.stop()
+            await run
+
+        assert queue.pending_count() == 0
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_and_concurrency_limit_are_retried(self):
+        queue = MemoryTaskQueue()
+        await queue.enqueue(_task())
+        await queue.enqueue(_task())
+        worker = TaskWorker(queue, concurrency=2)
+        route = AsyncMock(side_effect=[
+            RuntimeError("crash"),
+            PipelineResult(success=False, pipeline="common/expense", failed_step="concurrency_limit"),
+        ])
+        with patch("workers.bpo.manager.task_router.route_and_execute", route):
+            for queued in await queue.claim(worker.consumer, 2, 60):
+                await worker._handle(queued)
+
+        # 2件ともリトライ待ち（_delayed）に入る
+        assert len(queue._delayed) == 2
+        assert queue.dead_letters == []
+
+    @pytest.mark.asyncio
+    async def test_business_failure_is_acked(self):
+        queue = MemoryTaskQueue()
+        await queue.enqueue(_task())
+        worker = TaskWorker(queue, concurrency=1)
+        route = AsyncMock(return_value=PipelineResult(
+            success=False, pipeline="common/expense", failed_step="circuit_breaker",
+        ))
+        with patch("workers.bpo.manager.task_router.route_and_execute", route):
+            queued = (await queue.claim(worker.consumer, 1, 60))[0]
+            await worker._handle(queued)
+
+        assert queue.pending_count() == 0
+
+
+class TestOrchestratorLeaderElection:
+    @pytest.mark.asyncio
+    async def test_non_leader_skips_cycles(self):
+        from workers.bpo.manager import orchestrator as orch_module
+
+        lease = MagicMock()
+        lease.acquire = AsyncMock(return_value=False)
+        schedule = AsyncMock()
+
+        async def fake_sleep(n):
+            raise asyncio.CancelledError()
+
+        with patch.dict("os.environ", {"BPO_KILL_SWITCH": ""}), \
+             patch.object(orch_module, "_get_leader_lease", return_value=lease), \
+             patch.object(orch_module, "_run_schedule_cycle", schedule), \
+             patch("asyncio.sleep", fake_sleep):
+            with pytest.raises(asyncio.CancelledError):
+                await orch_module._orchestrator_loop()
+
+        lease.acquire.assert_awaited_once()
+        schedule.assert_not_called()
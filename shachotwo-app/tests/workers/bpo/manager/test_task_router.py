@@ -441,16 +441,14 @@ class TestScheduleWatcher:
         assert _matches_cron(win_loss["cron_expr"], dt) is False
 
     def test_builtin_cs_feedback_fires_on_last_day(self):
-        """月末日 09:00 に cs_feedback が発火すること（28〜31日 + last_day_only フラグ）"""
-        from workers.bpo.manager.schedule_watcher import (
-            BUILTIN_SCHEDULE_TRIGGERS, _matches_cron, _is_last_day_of_month,
-        )
+        """月末日 09:00 に cs_feedback が発火すること（cron の日フィールド L = 月末日）"""
+        from workers.bpo.manager.schedule_watcher import BUILTIN_SCHEDULE_TRIGGERS, _matches_cron
         from datetime import datetime, timezone
-        # 2025-03-31 は月末
-        dt = datetime(2025, 3, 31, 9, 0, tzinfo=timezone.utc)
         cs = next(t for t in BUILTIN_SCHEDULE_TRIGGERS if t["pipeline"] == "sales/cs_feedback")
-        assert _matches_cron(cs["cron_expr"], dt) is True
-        assert _is_last_day_of_month(dt) is True
+        # 2025-03-31・2025-02-28 は月末、2025-03-30 は月末ではない
+        assert _matches_cron(cs["cron_expr"], datetime(2025, 3, 31, 9, 0, tzinfo=timezone.utc)) is True
+        assert _matches_cron(cs["cron_expr"], datetime(2025, 2, 28, 9, 0, tzinfo=timezone.utc)) is True
+        assert _matches_cron(cs["cron_expr"], datetime(2025, 3, 30, 9, 0, tzinfo=timezone.utc)) is False
 
     def test_builtin_cs_feedback_does_not_fire_mid_month(self):
         """月中（例: 20日）には cs_feedback が発火しないこと"""
@@ -217,7 +217,7 @@ class TestSalesPipelinesRouting:
             failed_step=None,
         ))
 
-        with patch(f"workers.bpo.manager.task_router.importlib.import_module") as mock_import:
+        with patch(f"workers.bpo.manager.pipeline_resolver.importlib.import_module") as mock_import:
             mock_module = MagicMock()
             setattr(mock_module, expected_func, mock_pipeline)
             mock_import.return_value = mock_module
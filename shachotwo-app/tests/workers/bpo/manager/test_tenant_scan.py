@@ -0,0 +1,174 @@
+"""tenant_scan（並列テナント走査・シャーディング・キャッシュ）のユニットテスト。"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from shared.enums import TriggerType
+from workers.bpo.manager.models import BPOTask
+from workers.bpo.manager.task_queue import MemoryShardMembership, MemoryTaskQueue
+from workers.bpo.manager.tenant_scan import (
+    ConsistentHashRing,
+    TenantCache,
+    get_cycle_stats,
+    record_overlap_skip,
+    scan_tenants,
+)
+
+
+def _task(company_id: str) -> BPOTask:
+    return BPOTask(company_id=company_id, pipeline="common/expense", trigger_type=TriggerType.SCHEDULE)
+
+
+class TestScanTenants:
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        active = 0
+        peak = 0
+
+        async def scan(cid: str) -> list[BPOTask]:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return [_task(cid)]
+
+        dispatch = AsyncMock(return_value=True)
+        ids = [str(uuid4()) for _ in range(20)]
+        stats = await scan_tenants("schedule", ids, scan, dispatch, deadline_sec=5, concurrency=4)
+
+        assert peak == 4
+        assert dispatch.await_count == 20
+        assert stats.last_scanned == 20
+        assert stats.last_enqueued == 20
+        assert stats.overruns == 0
+
+    @pytest.mark.asyncio
+    async def test_tenant_error_does_not_stop_others(self):
+        async def scan(cid: str) -> list[BPOTask]:
+            if cid == "bad":
+                raise RuntimeError("db down")
+            return [_task(cid)]
+
+        stats = await scan_tenants("condition", ["a", "bad", "c"], scan, AsyncMock(return_value=False), deadline_sec=5)
+
+        assert stats.last_scanned == 2
+        assert stats.last_failed == 1
+        assert stats.last_enqueued == 0  # 全て重複扱い
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_slow_tenants_and_records_overrun(self):
+        async def scan(cid: str) -> list[BPOTask]:
+            if cid == "slow":
+                await asyncio.sleep(10)
+            return []
+
+        stats = await scan_tenants("proactive", ["fast", "slow"], scan, AsyncMock(), deadline_sec=0.05)
+
+        assert stats.last_timed_out == 1
+        assert stats.last_scanned == 1
+        assert stats.overruns == 1
+        assert stats.last_duration_ms < 5000
+        assert get_cycle_stats()["proactive"]["overruns"] == 1
+
+    def test_overlap_skip_counts_as_overrun(self):
+        record_overlap_skip("condition")
+        stats = get_cycle_stats()["condition"]
+        assert stats["overruns"] == 1
+        assert stats["skipped_overlaps"] == 1
+
+
+class TestConsistentHashRing:
+    def test_distribution_is_roughly_even(self):
+        ring = ConsistentHashRing(["a", "b", "c"])
+        counts = {"a": 0, "b": 0, "c": 0}
+        for i in range(3000):
+            counts[ring.owner(f"tenant-{i}")] += 1
+        assert all(600 < c < 1400 for c in counts.values())
+
+    def test_adding_member_moves_only_its_share(self):
+        keys = [f"tenant-{i}" for i in range(2000)]
+        before = ConsistentHashRing(["a", "b", "c"])
+        after = ConsistentHashRing(["a", "b", "c", "d"])
+        moved = [k for k in keys if before.owner(k) != after.owner(k)]
+        assert all(after.owner(k) == "d" for k in moved)
+        assert len(moved) < len(keys) / 2
+
+    def test_empty_ring(self):
+        assert ConsistentHashRing([]).owner("x") is None
+
+
+class TestTenantCache:
+    @pytest.mark.asyncio
+    async def test_reuses_until_ttl(self):
+        loader = AsyncMock(return_value=["a", "b"])
+        cache = TenantCache(ttl_sec=300)
+        assert await cache.get(loader) == ["a", "b"]
+        assert await cache.get(loader) == ["a", "b"]
+        assert loader.await_count == 1
+
+        cache.invalidate()
+        await cache.get(loader)
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_keeps_previous_list_when_reload_returns_empty(self):
+        cache = TenantCache(ttl_sec=0)
+        await cache.get(AsyncMock(return_value=["a"]))
+        assert await cache.get(AsyncMock(return_value=[])) == ["a"]
+
+
+class TestOrchestratorSharding:
+    @pytest.mark.asyncio
+    async def test_cycle_company_ids_filtered_by_shard(self):
+        from workers.bpo.manager import orchestrator as orch_module
+
+        membership = MemoryShardMembership()
+        ring = ConsistentHashRing([membership.member_id, "other-replica"])
+        ids = [str(uuid4()) for _ in range(200)]
+
+        with patch.dict("os.environ", {"BPO_ORCHESTRATOR_SHARDING": "1"}), \
+             patch.object(orch_module, "_get_active_company_ids", AsyncMock(return_value=ids)), \
+             patch.object(orch_module, "_membership", membership), \
+             patch.object(orch_module, "_shard_ring", ring):
+            mine = await orch_module._get_cycle_company_ids()
+
+        assert 0 < len(mine) < len(ids)
+        assert all(ring.owner(cid) == membership.member_id for cid in mine)
+
+    @pytest.mark.asyncio
+    async def test_active_company_ids_cached_across_cycles(self):
+        from workers.bpo.manager import orchestrator as orch_module
+
+        loader = AsyncMock(return_value=[str(uuid4())])
+        with patch.object(orch_module, "_get_active_company_ids", loader), \
+             patch.object(orch_module, "get_task_queue", return_value=MemoryTaskQueue()), \
+             patch("workers.bpo.manager.schedule_watcher.scan_schedule_triggers", AsyncMock(return_value=[])), \
+             patch("workers.bpo.manager.condition_evaluator.evaluate_knowledge_triggers", AsyncMock(return_value=[])):
+            await orch_module._run_schedule_cycle()
+            await orch_module._run_condition_cycle()
+
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_spawn_cycle_skips_while_previous_running(self):
+        from workers.bpo.manager import orchestrator as orch_module
+
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow_cycle():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+
+        orch_module._spawn_cycle("condition", slow_cycle)
+        await asyncio.sleep(0)
+        orch_module._spawn_cycle("condition", slow_cycle)
+        release.set()
+        await orch_module._cancel_cycles()
+
+        assert calls == 1
+        assert get_cycle_stats()["condition"]["skipped_overlaps"] == 1
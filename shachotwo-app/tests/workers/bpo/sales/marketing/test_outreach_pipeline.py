@@ -441,3 +441,114 @@ class TestOutreachPipelineAbVariant:
         )
         assert composer_payload is not None
         assert composer_payload["data"].get("variant_instruction", "") == ""
+
+
+# ---------------------------------------------------------------------------
+# ストリーミング実行・日次上限・途中再開
+# ---------------------------------------------------------------------------
+
+class _Crash(BaseException):
+    """プロセス停止の代わり（パイプライン内の except Exception で握りつぶされない）。"""
+
+
+class TestOutreachStreaming:
+
+    def _companies(self, n: int) -> list[dict]:
+        return [
+            {
+                "name": f"テスト建設{i}株式会社",
+                "industry": "建設業",
+                "form_url": f"https://c{i}.example.com/contact",
+            }
+            for i in range(n)
+        ]
+
+    def _gen(self, inp):
+        return _compose_gen_out("A") if inp.agent_name == "outreach_composer" else _lp_gen_out()
+
+    @pytest.mark.asyncio
+    async def test_daily_limit_stops_stream(self, monkeypatch):
+        monkeypatch.setattr("workers.bpo.sales.marketing.outreach_pipeline.DAILY_OUTREACH_LIMIT", 2)
+        monkeypatch.setattr("workers.bpo.sales.marketing.outreach_pipeline.OUTREACH_LLM_RPS", 0)
+        patches = TestOutreachPipelineAbVariant()._all_patches(self._gen)
+        with patches[0], patches[1], patches[2], patches[3], patches[4], patches[5], patches[6]:
+            result = await run_outreach_pipeline(
+                company_id=COMPANY_ID,
+                input_data={
+                    "source": "direct",
+                    "target_industry": "construction",
+                    "companies": self._companies(6),
+                    "dry_run": True,
+                },
+            )
+
+        assert result.success
+        assert result.final_output["sent_count"] == 2
+        step5 = next(s for s in result.steps if s.step_name == "outreach_executor")
+        assert step5.result["limit_reached"] is True
+
+    @pytest.mark.asyncio
+    async def test_crashed_batch_resumes_without_resending(self, monkeypatch):
+        monkeypatch.setattr("workers.bpo.sales.marketing.outreach_pipeline.INTER_COMPANY_DELAY_SEC", 0)
+        form = MagicMock()
+        form.write_record = AsyncMock(return_value={"status": "success"})
+        researcher = AsyncMock(return_value=_researcher_out())
+        signal = AsyncMock(side_effect=[_Crash(), _signal_out()])
+        input_data = {
+            "source": "direct",
+            "target_industry": "construction",
+            "companies": self._companies(3),
+            "signals": [{"event_type": "lp_view", "company_id": "x", "metadata": {}}],
+        }
+
+        with patch(BASE_PATCHES["run_company_researcher"], researcher), \
+                patch(BASE_PATCHES["run_document_generator"], new_callable=AsyncMock, side_effect=self._gen), \
+                patch(BASE_PATCHES["run_signal_detector"], signal), \
+                patch(BASE_PATCHES["run_calendar_booker"], new_callable=AsyncMock, return_value=_calendar_out()), \
+                patch(BASE_PATCHES["get_ab_variant"], new_callable=AsyncMock, return_value="A"), \
+                patch(BASE_PATCHES["playwright_form"], MagicMock(return_value=form)), \
+                patch(BASE_PATCHES["connector_config"], MagicMock()):
+            with pytest.raises(_Crash):
+                await run_outreach_pipeline(company_id=COMPANY_ID, input_data=input_data)
+            assert form.write_record.await_count == 3
+
+            result = await run_outreach_pipeline(company_id=COMPANY_ID, input_data=input_data)
+
+        assert result.success
+        # 送信済み企業には再送しない・LLM も再実行しない
+        assert form.write_record.await_count == 3
+        assert researcher.await_count == 3
+        assert result.final_output["sent_count"] == 3
+        assert result.final_output["resumed_count"] == 12  # research / lp / compose / send × 3社
+        assert [r.company_name for r in result.records] == [c["name"] for c in self._companies(3)]
+
+    @pytest.mark.asyncio
+    async def test_same_day_rerun_does_not_resend(self, monkeypatch):
+        """完了した実行の後でも、入力や文面が変わった同日の再実行は送信済み企業に再送しない。"""
+        monkeypatch.setattr("workers.bpo.sales.marketing.outreach_pipeline.INTER_COMPANY_DELAY_SEC", 0)
+        form = MagicMock()
+        form.write_record = AsyncMock(return_value={"status": "success"})
+        companies = self._companies(2)
+
+        with patch(BASE_PATCHES["run_company_researcher"], AsyncMock(return_value=_researcher_out())), \
+                patch(BASE_PATCHES["run_document_generator"], new_callable=AsyncMock, side_effect=self._gen), \
+                patch(BASE_PATCHES["run_signal_detector"], AsyncMock(return_value=_signal_out())), \
+                patch(BASE_PATCHES["run_calendar_booker"], new_callable=AsyncMock, return_value=_calendar_out()), \
+                patch(BASE_PATCHES["get_ab_variant"], new_callable=AsyncMock, return_value="A"), \
+                patch(BASE_PATCHES["playwright_form"], MagicMock(return_value=form)), \
+                patch(BASE_PATCHES["connector_config"], MagicMock()):
+            first = await run_outreach_pipeline(
+                company_id=COMPANY_ID,
+                input_data={"source": "direct", "target_industry": "construction", "companies": companies[:1]},
+            )
+            assert first.success
+            assert form.write_record.await_count == 1
+
+            result = await run_outreach_pipeline(
+                company_id=COMPANY_ID,
+                input_data={"source": "direct", "target_industry": "construction", "companies": companies},
+            )
+
+        assert result.success
+        assert form.write_record.await_count == 2
+        assert result.final_output["sent_count"] == 2
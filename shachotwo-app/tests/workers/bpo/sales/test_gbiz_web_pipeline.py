@@ -6,6 +6,7 @@ import tempfile
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from workers.bpo.sales.gbiz_detail_batch import (
+    main,
     step2_web_search_and_extract,
     summarize,
     _save_progress,
@@ -299,3 +300,32 @@ def test_save_progress_overwrites():
         assert loaded[0]["name"] == "新データ"
     finally:
         os.unlink(filepath)
+
+
+@pytest.mark.asyncio
+async def test_main_rerun_keeps_web_progress(tmp_path):
+    """再実行: 詳細取得（Step 1.5）が Step 2 の進捗ファイルを上書きせず、Serper 検索をやり直さない。"""
+    from workers.connector.gbizinfo_fetcher import DetailResult
+
+    companies = _make_companies(2)
+    output = tmp_path / "leads.json"
+    done = {**companies[0], "web_fetched": True, "website_url": "https://done.co.jp"}
+    output.write_text(json.dumps([done], ensure_ascii=False), encoding="utf-8")
+
+    async def fetch(numbers):
+        return [DetailResult(cn, "cached", record={"employee_number": 30}) for cn in numbers]
+
+    search = AsyncMock(return_value=None)
+    with (
+        patch(
+            "workers.bpo.sales.gbiz_detail_batch.step1_collect_corporate_numbers",
+            AsyncMock(return_value={"金属加工": [dict(c) for c in companies]}),
+        ),
+        patch("workers.bpo.sales.gbiz_detail_batch.GBizDetailFetcher.fetch", side_effect=fetch),
+        patch("workers.micro.web_searcher.search_company_website", search),
+    ):
+        await main("tok", str(output), delay=0.0, concurrency=2, cache_dir=str(tmp_path / "cache"))
+
+    assert search.await_count == 1   # 未完了の1社だけ
+    saved = {c["corporate_number"]: c for c in json.loads(output.read_text(encoding="utf-8"))}
+    assert saved[done["corporate_number"]]["website_url"] == "https://done.co.jp"
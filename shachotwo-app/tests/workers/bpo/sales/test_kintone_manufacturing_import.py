@@ -216,3 +216,41 @@ def test_default_field_mappings_includes_all_tsr_fields() -> None:
     for field_key, kintone_field_code in _DEFAULT_FIELD_MAPPINGS.items():
         assert isinstance(kintone_field_code, str), f"{field_key} のマッピング値が文字列ではありません"
         assert len(kintone_field_code) > 0, f"{field_key} のマッピング値が空です"
+
+
+@pytest.mark.asyncio
+async def test_runner_upserts_each_page_in_bulk(monkeypatch) -> None:
+    from unittest.mock import AsyncMock, MagicMock
+
+    from workers.bpo.sales import kintone_lead_import_runner as runner
+    from workers.bpo.sales.lead_ingest import LeadUpsertResult
+
+    records = [
+        {"$id": {"value": str(i)}, "name": {"value": f"社{i}"}, "corporate_number": {"value": f"{i:013d}"}}
+        for i in range(1, 1 + 2 + runner.KINTONE_MAX_LIMIT + 3)
+    ]
+
+    async def read_page(self, app_id, *, query, limit):
+        min_id = int(query.split("$id > ")[1].split(" ")[0]) if "$id >" in query else 0
+        return [r for r in records if int(r["$id"]["value"]) > min_id][:limit]
+
+    pages: list[int] = []
+
+    async def bulk(db, rows, **kw):
+        pages.append(len(rows))
+        return LeadUpsertResult(inserted=len(rows))
+
+    monkeypatch.setattr(runner.KintoneConnector, "read_records_page", read_page)
+    monkeypatch.setattr(runner, "bulk_upsert_leads", AsyncMock(side_effect=bulk))
+    monkeypatch.setattr("db.supabase.get_service_client", MagicMock())
+
+    result = await runner.run_kintone_lead_import(
+        subdomain="x", api_token="t", app_id="1", company_id="c1",
+        base_query="", probe_size=2, dry_run=False,
+        canonical_field_keys=_DEFAULT_FIELD_CODES, field_mappings=None,
+        map_flat_to_row=lambda flat, cid, app: map_flat_to_lead_row(flat, company_id=cid, app_id=app),
+    )
+    assert pages == [2, runner.KINTONE_MAX_LIMIT, 3]
+    assert result["total_received"] == len(records)
+    assert result["total_inserted"] == len(records)
+    assert result["probe_ok"] is True
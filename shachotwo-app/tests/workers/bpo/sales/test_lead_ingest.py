@@ -0,0 +1,199 @@
+"""leads 一括 upsert（lead_ingest）のテスト。"""
+import itertools
+
+import pytest
+
+from workers.bpo.sales.lead_ingest import LEAD_REQUIRED_COLUMNS, bulk_upsert_leads
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = None
+        self.payload = None
+        self.filters: dict = {}
+
+    def select(self, columns):
+        self.op = "select"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def is_(self, column, value):
+        assert value == "null"
+        self.filters[column] = [None]
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def upsert(self, payload, on_conflict=""):
+        self.op, self.payload = "upsert", payload
+        assert on_conflict == "company_id,corporate_number"
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op))
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        if self.table == "lead_activities":
+            self.db.activities.extend(rows)
+            return _Result(rows)
+        if self.op == "select":
+            return _Result([
+                dict(r) for r in self.db.leads.values()
+                if all(r.get(c) in v for c, v in self.filters.items())
+            ])
+        if self.op == "update":
+            (key,) = [k for k, r in self.db.leads.items() if r["id"] in self.filters["id"]]
+            lead = {**self.db.leads.pop(key), **self.payload}
+            self.db.leads[(lead["company_id"], lead["corporate_number"])] = lead
+            return _Result([lead])
+        if any(r.get("corporate_number") in self.db.reject for r in rows):
+            raise ValueError("invalid row")
+        # Postgres は ON CONFLICT の前に NOT NULL を検査する（既存行の更新でも列が要る）
+        if any(r.get(c) is None for r in rows for c in LEAD_REQUIRED_COLUMNS):
+            raise ValueError("null value in column violates not-null constraint")
+        self.db.upserts.append(rows)
+        saved = []
+        for row in rows:
+            key = (row["company_id"], row["corporate_number"])
+            current = self.db.leads.get(key) or {"id": f"lead-{next(self.db.ids)}"}
+            current.update(row)
+            self.db.leads[key] = current
+            saved.append(dict(current))
+        return _Result(saved)
+
+
+class _FakeDB:
+    def __init__(self, reject=()):
+        self.leads: dict = {}
+        self.activities: list = []
+        self.calls: list = []
+        self.upserts: list = []
+        self.reject = set(reject)
+        self.ids = itertools.count(1)
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _row(cn, **kw):
+    return {
+        "company_id": "c1", "corporate_number": cn, "company_name": f"社{cn}",
+        "source": "outbound", "status": "new", **kw,
+    }
+
+
+@pytest.mark.asyncio
+async def test_chunks_split_inserted_and_updated():
+    db = _FakeDB()
+    db.leads[("c1", "2")] = {"id": "old-2", "company_id": "c1", "corporate_number": "2", "status": "contacted"}
+
+    result = await bulk_upsert_leads(db, (_row(str(i)) for i in range(5)), chunk_size=2)
+    assert result.chunks == 3
+    assert (result.inserted, result.updated) == (4, 1)
+    assert result.updated_ids == ["old-2"]
+    assert len(result.inserted_ids) == 4
+    # チャンクあたり select 1 回 + upsert（新規・更新）だけ
+    assert db.calls.count(("leads", "select")) == 3
+    assert ("leads", "upsert") in db.calls and len(db.calls) <= 3 * 3
+
+
+@pytest.mark.asyncio
+async def test_update_columns_keep_sales_progress_and_id():
+    db = _FakeDB()
+    db.leads[("c1", "1")] = {"id": "old-1", "company_id": "c1", "corporate_number": "1", "status": "contacted", "score": 10}
+
+    result = await bulk_upsert_leads(db, [_row("1", id="new-uuid", score=80)], update_columns=("score",))
+    lead = db.leads[("c1", "1")]
+    assert result.updated == 1 and result.failed == 0
+    assert lead["id"] == "old-1"
+    assert lead["status"] == "contacted"
+    assert lead["score"] == 80
+
+
+@pytest.mark.asyncio
+async def test_activities_are_inserted_once_per_chunk():
+    db = _FakeDB()
+
+    def activity(row, lead_id):
+        if row.get("website_url"):
+            return {"lead_id": lead_id, "activity_type": "research"}
+        return None
+
+    rows = [_row("1", website_url="https://a.example"), _row("2"), _row("3", website_url="https://c.example")]
+    result = await bulk_upsert_leads(db, rows, activity_for=activity)
+    assert result.activities == 2
+    assert db.calls.count(("lead_activities", "insert")) == 1
+    assert {a["lead_id"] for a in db.activities} == {db.leads[("c1", "1")]["id"], db.leads[("c1", "3")]["id"]}
+
+
+@pytest.mark.asyncio
+async def test_bad_row_falls_back_without_losing_the_chunk():
+    db = _FakeDB(reject={"2"})
+    result = await bulk_upsert_leads(db, [_row("1"), _row("2"), _row("3")])
+    assert result.inserted == 2
+    assert result.failed == 1
+    assert set(db.leads) == {("c1", "1"), ("c1", "3")}
+
+
+@pytest.mark.asyncio
+async def test_streams_async_input_and_skips_rows_without_key():
+    db = _FakeDB()
+
+    async def rows():
+        yield _row("1")
+        yield _row("")
+        yield _row("1", company_name="後勝ち")
+
+    result = await bulk_upsert_leads(db, rows(), collect_ids=False)
+    assert (result.inserted, result.skipped) == (1, 1)
+    assert result.inserted_ids == []
+    assert db.leads[("c1", "1")]["company_name"] == "後勝ち"
+
+
+@pytest.mark.asyncio
+async def test_update_payload_carries_not_null_columns():
+    db = _FakeDB()
+    db.leads[("c1", "1")] = {"id": "old-1", "company_id": "c1", "corporate_number": "1", "company_name": "旧", "source": "kintone"}
+
+    result = await bulk_upsert_leads(db, [_row("1", score=80)], update_columns=("score",))
+    assert result.updated == 1
+    (payload,) = db.upserts[-1]
+    assert set(payload) == {"company_id", "corporate_number", "score", *LEAD_REQUIRED_COLUMNS}
+
+
+@pytest.mark.asyncio
+async def test_legacy_rows_without_corporate_number_are_claimed():
+    db = _FakeDB()
+    # 旧 gbizinfo_bulk_load は corporate_number を leads に書いていなかった
+    db.leads[("c1", None)] = {
+        "id": "legacy-1", "company_id": "c1", "corporate_number": None,
+        "company_name": "社1", "source_detail": "gbizinfo_bulk_load", "status": "contacted",
+    }
+
+    result = await bulk_upsert_leads(
+        db, [_row("1"), _row("2")], update_columns=("score",), legacy_source_detail="gbizinfo_bulk_load",
+    )
+    assert (result.inserted, result.updated) == (1, 1)
+    assert result.updated_ids == ["legacy-1"]
+    assert db.leads[("c1", "1")]["id"] == "legacy-1"
+    assert db.leads[("c1", "1")]["status"] == "contacted"
+    assert ("c1", None) not in db.leads
@@ -362,6 +362,8 @@ class TestProposalGenerationPipelineHappyPath:
         assert "message" in step_names
 
         assert result.total_cost_yen > 0
+        # 提案書生成は高コストなので見積額を予算確保してから呼ぶ
+        assert mock_llm.generate.await_args_list[0].args[0].reserve_cost_yen > 0
 
     @pytest.mark.asyncio
     async def test_final_output_contains_required_keys(self):
@@ -96,7 +96,7 @@ class TestBacklogReadRecords:
         resp = _make_response(200, issues)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("issues")
 
         client.get.assert_called_once()
@@ -112,7 +112,7 @@ class TestBacklogReadRecords:
         resp = _make_response(200, projects)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("projects")
 
         url = client.get.call_args[0][0]
@@ -124,7 +124,7 @@ class TestBacklogReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("issues")
 
         params = client.get.call_args[1]["params"]
@@ -135,7 +135,7 @@ class TestBacklogReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records(
                 "issues",
                 {"count": 50, "keyword": "バグ"},
@@ -159,7 +159,7 @@ class TestBacklogReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("issues")
 
@@ -168,7 +168,7 @@ class TestBacklogReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("issues")
 
@@ -177,7 +177,7 @@ class TestBacklogReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("issues")
 
@@ -189,7 +189,7 @@ class TestBacklogReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("issues")
 
@@ -208,7 +208,7 @@ class TestBacklogWriteRecord:
         resp = _make_response(201, created)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "issues",
                 {
@@ -229,7 +229,7 @@ class TestBacklogWriteRecord:
         resp = _make_response(201, {})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.write_record(
                 "issues",
                 {"projectId": 10, "summary": "テスト", "issueTypeId": 1, "priorityId": 3},
@@ -248,7 +248,7 @@ class TestBacklogWriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record(
                     "issues",
@@ -260,7 +260,7 @@ class TestBacklogWriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record(
                     "issues",
@@ -275,7 +275,7 @@ class TestBacklogWriteRecord:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.write_record(
                     "issues",
@@ -296,7 +296,7 @@ class TestBacklogHealthCheck:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -308,7 +308,7 @@ class TestBacklogHealthCheck:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.health_check()
 
         params = client.get.call_args[1]["params"]
@@ -319,7 +319,7 @@ class TestBacklogHealthCheck:
         resp = _make_response(401, {"error": "unauthorized"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -329,7 +329,7 @@ class TestBacklogHealthCheck:
         resp = _make_response(500, {"error": "server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -340,7 +340,7 @@ class TestBacklogHealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("ネットワーク障害"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.backlog.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -42,6 +42,27 @@ def _make_gmail_service_mock(send_response: dict | None = None) -> MagicMock:
     return service
 
 
+class _FakeBatch:
+    """service.new_batch_http_request() の代わり。execute で各リクエストを実行し callback を呼ぶ。"""
+
+    instances: list["_FakeBatch"] = []
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests: list[tuple[str, object]] = []
+        _FakeBatch.instances.append(self)
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
 def _make_gmail_message(
     msg_id: str = "msg_001",
     subject: str = "テスト件名",
@@ -338,6 +359,7 @@ class TestFetchInbound:
         service_mock.users.return_value.messages.return_value.get.return_value.execute.return_value = (
             _make_gmail_message("msg_001", "受信テスト", "client@example.com")
         )
+        service_mock.new_batch_http_request.side_effect = _FakeBatch
 
         with patch.object(connector, "_get_service", return_value=service_mock):
             result = await connector.fetch_inbound()
@@ -347,6 +369,34 @@ class TestFetchInbound:
         assert result[0]["subject"] == "受信テスト"
         assert result[0]["from"] == "client@example.com"
 
+    @pytest.mark.asyncio
+    async def test_fetch_inbound_gets_messages_in_one_batch(self) -> None:
+        """本文取得は1件ずつではなく batch にまとめ、失敗したメッセージだけ除外すること。"""
+        connector = _make_connector()
+        service_mock = MagicMock()
+        service_mock.users.return_value.messages.return_value.list.return_value.execute.return_value = (
+            self._make_list_result(["msg_001", "msg_002", "msg_003"])
+        )
+
+        def _get(userId, id, format):
+            request = MagicMock()
+            if id == "msg_002":
+                request.execute.side_effect = Exception("404")
+            else:
+                request.execute.return_value = _make_gmail_message(id, f"件名{id}")
+            return request
+
+        service_mock.users.return_value.messages.return_value.get.side_effect = _get
+        _FakeBatch.instances.clear()
+        service_mock.new_batch_http_request.side_effect = _FakeBatch
+
+        with patch.object(connector, "_get_service", return_value=service_mock):
+            result = await connector.fetch_inbound()
+
+        assert [m["id"] for m in result] == ["msg_001", "msg_003"]
+        assert len(_FakeBatch.instances) == 1
+        assert len(_FakeBatch.instances[0].requests) == 3
+
     @pytest.mark.asyncio
     async def test_fetch_inbound_with_since_adds_query(self) -> None:
         """since 指定時に after: クエリが付与されること。"""
@@ -91,7 +91,7 @@ class TestJobcanReadRecords:
         resp = _make_response(200, records)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("attendance_records")
 
         client.get.assert_called_once()
@@ -108,7 +108,7 @@ class TestJobcanReadRecords:
         resp = _make_response(200, employees)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("employees")
 
         url = client.get.call_args[0][0]
@@ -120,7 +120,7 @@ class TestJobcanReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("attendance_records")
 
         params = client.get.call_args[1]["params"]
@@ -131,7 +131,7 @@ class TestJobcanReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records(
                 "attendance_records",
                 {"start_date": "2024-01-01", "end_date": "2024-01-31"},
@@ -149,7 +149,7 @@ class TestJobcanReadRecords:
         )
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("attendance_records")
 
         assert result == [{"employee_id": "EMP001"}]
@@ -168,7 +168,7 @@ class TestJobcanReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("attendance_records")
 
@@ -177,7 +177,7 @@ class TestJobcanReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("attendance_records")
 
@@ -186,7 +186,7 @@ class TestJobcanReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("attendance_records")
 
@@ -198,7 +198,7 @@ class TestJobcanReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("attendance_records")
 
@@ -217,7 +217,7 @@ class TestJobcanWriteRecord:
         resp = _make_response(201, created)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "attendance_records",
                 {"employee_id": "EMP001", "date": "2024-01-15", "clock_in": "09:05"},
@@ -235,7 +235,7 @@ class TestJobcanWriteRecord:
         resp = _make_response(200, updated)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "attendance_records",
                 {"id": "att-1", "clock_in": "09:00"},
@@ -252,7 +252,7 @@ class TestJobcanWriteRecord:
         resp = _make_response(201, {})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.write_record(
                 "attendance_records",
                 {"employee_id": "EMP001"},
@@ -271,7 +271,7 @@ class TestJobcanWriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record(
                     "attendance_records", {"employee_id": "EMP001"}
@@ -282,7 +282,7 @@ class TestJobcanWriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record(
                     "attendance_records", {"employee_id": "EMP001"}
@@ -296,7 +296,7 @@ class TestJobcanWriteRecord:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.write_record(
                     "attendance_records", {"employee_id": "EMP001"}
@@ -316,7 +316,7 @@ class TestJobcanHealthCheck:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -328,7 +328,7 @@ class TestJobcanHealthCheck:
         resp = _make_response(401, {"error": "unauthorized"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -338,7 +338,7 @@ class TestJobcanHealthCheck:
         resp = _make_response(500, {"error": "internal server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -349,7 +349,7 @@ class TestJobcanHealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("ネットワーク障害"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.jobcan.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -87,7 +87,7 @@ class TestKingOfTimeReadRecords:
         resp = _make_response(200, records)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("daily_workings")
 
         client.get.assert_called_once()
@@ -100,7 +100,7 @@ class TestKingOfTimeReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records(
                 "monthly_workings",
                 {"start_date": "2024-01-01", "end_date": "2024-01-31"},
@@ -118,7 +118,7 @@ class TestKingOfTimeReadRecords:
         resp = _make_response(200, employees)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("employees")
 
         url = client.get.call_args[0][0]
@@ -133,7 +133,7 @@ class TestKingOfTimeReadRecords:
         resp = _make_response(200, timerecords)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records(
                 "timerecords", {"employee_key": "EMP001", "date": "2024-01-15"}
             )
@@ -149,7 +149,7 @@ class TestKingOfTimeReadRecords:
         resp = _make_response(200, divisions)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("divisions")
 
         url = client.get.call_args[0][0]
@@ -165,7 +165,7 @@ class TestKingOfTimeReadRecords:
         )
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("employees")
 
         assert result == [{"employee_key": "EMP001"}]
@@ -184,7 +184,7 @@ class TestKingOfTimeReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("daily_workings")
 
@@ -193,7 +193,7 @@ class TestKingOfTimeReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("daily_workings")
 
@@ -202,7 +202,7 @@ class TestKingOfTimeReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("daily_workings")
 
@@ -214,7 +214,7 @@ class TestKingOfTimeReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("daily_workings")
 
@@ -233,7 +233,7 @@ class TestKingOfTimeWriteRecord:
         resp = _make_response(201, new_record)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "timerecords",
                 {
@@ -255,7 +255,7 @@ class TestKingOfTimeWriteRecord:
         resp = _make_response(200, updated_record)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "timerecords",
                 {"id": "tr-1", "datetime": "2024-01-15T09:00:00"},
@@ -272,7 +272,7 @@ class TestKingOfTimeWriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record(
                     "timerecords", {"employee_key": "EMP001"}
@@ -283,7 +283,7 @@ class TestKingOfTimeWriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record(
                     "timerecords", {"employee_key": "EMP001"}
@@ -297,7 +297,7 @@ class TestKingOfTimeWriteRecord:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.write_record(
                     "timerecords", {"employee_key": "EMP001"}
@@ -317,7 +317,7 @@ class TestKingOfTimeHealthCheck:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -330,7 +330,7 @@ class TestKingOfTimeHealthCheck:
         resp = _make_response(401, {"error": "unauthorized"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -340,7 +340,7 @@ class TestKingOfTimeHealthCheck:
         resp = _make_response(500, {"error": "internal server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -351,7 +351,7 @@ class TestKingOfTimeHealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("ネットワーク障害"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.king_of_time.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -96,7 +96,7 @@ class TestMicrosoft365ReadRecords:
         resp = _make_response(200, {"value": messages})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("me/messages")
 
         client.get.assert_called_once()
@@ -112,7 +112,7 @@ class TestMicrosoft365ReadRecords:
         resp = _make_response(200, {"value": events})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("me/events")
 
         url = client.get.call_args[0][0]
@@ -128,7 +128,7 @@ class TestMicrosoft365ReadRecords:
         resp = _make_response(200, {"value": teams})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("me/joinedTeams")
 
         url = client.get.call_args[0][0]
@@ -140,7 +140,7 @@ class TestMicrosoft365ReadRecords:
         resp = _make_response(200, {"value": []})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records(
                 "me/messages",
                 {"$top": 10, "$filter": "isRead eq false"},
@@ -157,7 +157,7 @@ class TestMicrosoft365ReadRecords:
         resp = _make_response(200, data)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("me/joinedTeams")
 
         assert result == data
@@ -176,7 +176,7 @@ class TestMicrosoft365ReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("me/messages")
 
@@ -185,7 +185,7 @@ class TestMicrosoft365ReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("me/messages")
 
@@ -194,7 +194,7 @@ class TestMicrosoft365ReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("me/messages")
 
@@ -206,7 +206,7 @@ class TestMicrosoft365ReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("me/messages")
 
@@ -231,7 +231,7 @@ class TestMicrosoft365WriteRecord:
                 "toRecipients": [{"emailAddress": {"address": "to@example.com"}}],
             }
         }
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record("me/messages/send", mail_data)
 
         client.post.assert_called_once()
@@ -245,7 +245,7 @@ class TestMicrosoft365WriteRecord:
         resp = _make_response(200, created, content=b'{"id": "msg-new"}')
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "me/messages/send",
                 {"message": {"subject": "テスト", "toRecipients": []}},
@@ -266,7 +266,7 @@ class TestMicrosoft365WriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record(
                     "me/messages/send",
@@ -278,7 +278,7 @@ class TestMicrosoft365WriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record(
                     "me/messages/send",
@@ -293,7 +293,7 @@ class TestMicrosoft365WriteRecord:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.write_record(
                     "me/messages/send",
@@ -314,7 +314,7 @@ class TestMicrosoft365HealthCheck:
         resp = _make_response(200, {"id": "user-1", "displayName": "テストユーザー"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -326,7 +326,7 @@ class TestMicrosoft365HealthCheck:
         resp = _make_response(401, {"error": {"code": "InvalidAuthenticationToken"}})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -336,7 +336,7 @@ class TestMicrosoft365HealthCheck:
         resp = _make_response(500, {"error": "server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -347,7 +347,7 @@ class TestMicrosoft365HealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("ネットワーク障害"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.microsoft365.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
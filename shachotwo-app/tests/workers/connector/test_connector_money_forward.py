@@ -62,7 +62,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("invoices")
 
         assert result == fake_invoices
@@ -85,7 +85,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("expenses")
 
         assert result == fake_expenses
@@ -104,7 +104,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("journal_entries")
 
         assert result == fake_entries
@@ -120,7 +120,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.read_records("invoices", filters={"page": 2, "per_page": 50})
 
         call_params = async_client.get.call_args[1]["params"]
@@ -140,7 +140,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("invoices")
 
         assert result == fake_data
@@ -164,7 +164,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.read_records("invoices")
 
@@ -179,7 +179,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.read_records("invoices")
 
@@ -193,7 +193,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(side_effect=httpx.ConnectTimeout("timeout"))
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.ConnectTimeout):
                 await connector.read_records("invoices")
 
@@ -216,7 +216,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.write_record("invoices", {"title": "新規請求書", "amount": 200000})
 
         assert result == created_invoice
@@ -233,7 +233,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.write_record("invoices", {"title": "テスト"})
 
         call_json = async_client.post.call_args[1]["json"]
@@ -267,7 +267,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.write_record("invoices", {"title": "テスト"})
 
@@ -290,7 +290,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is True
@@ -307,7 +307,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is False
@@ -322,7 +322,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(side_effect=httpx.ConnectTimeout("timeout"))
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is False
@@ -339,7 +339,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.money_forward.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.health_check()
 
         call_url = async_client.get.call_args[0][0]
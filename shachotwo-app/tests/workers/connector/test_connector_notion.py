@@ -89,7 +89,7 @@ class TestNotionReadRecords:
         ctx, client = _async_client_ctx(resp)
 
         db_id = "db-12345678"
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records(f"databases/{db_id}/query")
 
         client.post.assert_called_once()
@@ -105,7 +105,7 @@ class TestNotionReadRecords:
         resp = _make_response(200, {"results": results, "next_cursor": None})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records(
                 "search", {"query": "プロジェクト計画"}
             )
@@ -123,7 +123,7 @@ class TestNotionReadRecords:
             "filter": {"property": "ステータス", "select": {"equals": "完了"}},
             "page_size": 50,
         }
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("databases/db-1/query", filters)
 
         body = client.post.call_args[1]["json"]
@@ -135,7 +135,7 @@ class TestNotionReadRecords:
         resp = _make_response(200, {"results": [], "next_cursor": None})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("search", {"query": "存在しないページ"})
 
         assert result == []
@@ -154,7 +154,7 @@ class TestNotionReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("search")
 
@@ -163,7 +163,7 @@ class TestNotionReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("databases/db-1/query")
 
@@ -172,7 +172,7 @@ class TestNotionReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("search")
 
@@ -184,7 +184,7 @@ class TestNotionReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("search")
 
@@ -213,7 +213,7 @@ class TestNotionWriteRecord:
                 "タイトル": {"title": [{"text": {"content": "新しいページ"}}]}
             },
         }
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record("pages", page_data)
 
         client.post.assert_called_once()
@@ -233,7 +233,7 @@ class TestNotionWriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record(
                     "pages",
@@ -245,7 +245,7 @@ class TestNotionWriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record(
                     "pages",
@@ -260,7 +260,7 @@ class TestNotionWriteRecord:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.write_record(
                     "pages",
@@ -281,7 +281,7 @@ class TestNotionHealthCheck:
         resp = _make_response(200, {"id": "user-1", "type": "bot"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -293,7 +293,7 @@ class TestNotionHealthCheck:
         resp = _make_response(401, {"code": "unauthorized"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -303,7 +303,7 @@ class TestNotionHealthCheck:
         resp = _make_response(500, {"error": "server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -314,7 +314,7 @@ class TestNotionHealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("ネットワーク障害"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.notion.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
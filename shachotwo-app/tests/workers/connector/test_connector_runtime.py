@@ -0,0 +1,166 @@
+"""コネクタ共通 HTTP ランタイム（共有プール・流量制御・再試行・メトリクス）のテスト。"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from workers.connector import base
+from workers.connector.base import (
+    ConnectorConfig,
+    ConnectorTransport,
+    get_connector_metrics,
+)
+from workers.connector.kintone import KintoneConnector
+
+
+class _Upstream(httpx.AsyncBaseTransport):
+    """ホスト別プールの代わりに使う応答キュー。"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests: list[httpx.Request] = []
+        self.active = 0
+        self.peak = 0
+        self.closed = False
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            item = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+            if isinstance(item, Exception):
+                raise item
+            return item
+        finally:
+            self.active -= 1
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    def install(*responses):
+        fake = _Upstream(responses)
+        monkeypatch.setattr(base, "_host_transport", lambda url: fake)
+        return fake
+
+    monkeypatch.setattr(base, "CONNECTOR_BACKOFF_BASE_SEC", 0.001)
+    return install
+
+
+def _client(service="kintone", tenant="t1", **kw) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=ConnectorTransport(service, tenant, **kw), timeout=5.0)
+
+
+@pytest.mark.asyncio
+async def test_host_transport_is_shared_per_host():
+    a = base._host_transport(httpx.URL("https://a.example.com/x"))
+    assert base._host_transport(httpx.URL("https://a.example.com/y")) is a
+    assert base._host_transport(httpx.URL("https://b.example.com/")) is not a
+
+
+@pytest.mark.asyncio
+async def test_closing_client_keeps_shared_pool_open(upstream):
+    fake = upstream(httpx.Response(200, json={}))
+    async with _client() as client:
+        await client.get("https://x.cybozu.com/k/v1/records.json")
+    async with _client() as client:
+        await client.get("https://x.cybozu.com/k/v1/records.json")
+    assert not fake.closed
+    assert len(fake.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_429_honouring_retry_after(upstream):
+    fake = upstream(
+        httpx.Response(429, headers={"Retry-After": "0.1"}),
+        httpx.Response(200, json={"ok": True}),
+    )
+    start = time.monotonic()
+    async with _client() as client:
+        resp = await client.post("https://x.cybozu.com/k/v1/record.json", json={"a": 1})
+    assert resp.status_code == 200
+    assert time.monotonic() - start >= 0.1
+    # 再送でも同じ本文を送る
+    assert fake.requests[0].content == fake.requests[1].content == b'{"a":1}'
+    assert get_connector_metrics()["kintone"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried_on_server_error(upstream):
+    fake = upstream(httpx.Response(503), httpx.Response(200))
+    async with _client() as client:
+        resp = await client.post("https://x.cybozu.com/k/v1/record.json", json={})
+    assert resp.status_code == 503
+    assert len(fake.requests) == 1
+    assert get_connector_metrics()["kintone"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_gives_up_after_max_retries(upstream):
+    fake = upstream(httpx.Response(502))
+    async with _client(max_retries=2) as client:
+        resp = await client.get("https://x.cybozu.com/k/v1/records.json")
+    assert resp.status_code == 502
+    assert len(fake.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_connect_error_is_retried_then_raised(upstream):
+    fake = upstream(httpx.ConnectError("refused"))
+    async with _client(max_retries=1) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.post("https://x.cybozu.com/k/v1/record.json", json={})
+    assert len(fake.requests) == 2
+    metrics = get_connector_metrics()["kintone"]
+    assert metrics["errors"] == 1
+    assert metrics["last_error"].startswith("ConnectError")
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_per_tenant_and_service(upstream):
+    fake = upstream(httpx.Response(200))
+
+    async def call(tenant):
+        async with _client(tenant=tenant, concurrency=2, rate_per_sec=0) as client:
+            await client.get("https://x.cybozu.com/k/v1/records.json")
+
+    await asyncio.gather(*(call("t1") for _ in range(6)))
+    assert fake.peak == 2
+
+    fake.peak = 0
+    await asyncio.gather(*(call(f"t{i}") for i in range(6)))
+    assert fake.peak > 2
+
+
+@pytest.mark.asyncio
+async def test_non_positive_concurrency_is_unlimited(upstream):
+    fake = upstream(httpx.Response(200))
+
+    async def call():
+        async with _client(tenant="unlimited", concurrency=0, rate_per_sec=0) as client:
+            await client.get("https://x.cybozu.com/k/v1/records.json")
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert fake.peak == 6
+
+
+@pytest.mark.asyncio
+async def test_connector_uses_runtime_by_default(upstream):
+    fake = upstream(httpx.Response(200, json={"records": [{"id": {"value": "1"}}]}))
+    connector = KintoneConnector(ConnectorConfig(
+        tool_name="kintone",
+        credentials={"subdomain": "x", "api_token": "tok"},
+        company_id="c1",
+    ))
+    records = await connector.read_records("1")
+    assert records
+    assert fake.requests[0].url.host == "x.cybozu.com"
+    metrics = get_connector_metrics()["kintone"]
+    assert metrics["requests"] == 1
+    assert metrics["last_status"] == 200
+    assert metrics["avg_ms"] > 0
@@ -92,7 +92,7 @@ class TestSmartHRReadRecords:
         resp = _make_response(200, employees)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("employees")
 
         client.get.assert_called_once()
@@ -106,7 +106,7 @@ class TestSmartHRReadRecords:
         resp = _make_response(200, employee)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("employees/emp-1")
 
         assert result == [employee]
@@ -117,7 +117,7 @@ class TestSmartHRReadRecords:
         resp = _make_response(200, departments)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("departments")
 
         url = client.get.call_args[0][0]
@@ -129,7 +129,7 @@ class TestSmartHRReadRecords:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("employees", {"page": 2, "per_page": 50})
 
         params = client.get.call_args[1]["params"]
@@ -142,7 +142,7 @@ class TestSmartHRReadRecords:
         resp = _make_response(200, dependents)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("dependents/emp-1")
 
         url = client.get.call_args[0][0]
@@ -163,7 +163,7 @@ class TestSmartHRReadRecordsErrors:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("employees")
 
@@ -172,7 +172,7 @@ class TestSmartHRReadRecordsErrors:
         resp = _make_error_response(403)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.read_records("employees")
 
@@ -181,7 +181,7 @@ class TestSmartHRReadRecordsErrors:
         resp = _make_error_response(429, retry_after="60")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.read_records("employees")
 
@@ -193,7 +193,7 @@ class TestSmartHRReadRecordsErrors:
         ctx.__aenter__ = AsyncMock(return_value=client)
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(httpx.TimeoutException):
                 await self.connector.read_records("employees")
 
@@ -212,7 +212,7 @@ class TestSmartHRWriteRecord:
         resp = _make_response(201, new_emp)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "employees", {"last_name": "新規", "first_name": "社員"}
             )
@@ -229,7 +229,7 @@ class TestSmartHRWriteRecord:
         resp = _make_response(200, updated_emp)
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "employees", {"id": "emp-1", "email": "yamada@example.com"}
             )
@@ -245,7 +245,7 @@ class TestSmartHRWriteRecord:
         resp = _make_response(201, {"id": "dep-1"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.write_record(
                 "dependents/emp-1",
                 {"last_name": "山田", "first_name": "次郎", "relation": "child"},
@@ -259,7 +259,7 @@ class TestSmartHRWriteRecord:
         resp = _make_error_response(401)
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(PermissionError, match="認証エラー"):
                 await self.connector.write_record("employees", {"last_name": "テスト"})
 
@@ -268,7 +268,7 @@ class TestSmartHRWriteRecord:
         resp = _make_error_response(429, retry_after="30")
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             with pytest.raises(RuntimeError, match="レート制限"):
                 await self.connector.write_record("employees", {"last_name": "テスト"})
 
@@ -286,7 +286,7 @@ class TestSmartHRHealthCheck:
         resp = _make_response(200, [])
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -299,7 +299,7 @@ class TestSmartHRHealthCheck:
         resp = _make_response(401, {"error": "unauthorized"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -309,7 +309,7 @@ class TestSmartHRHealthCheck:
         resp = _make_response(500, {"error": "internal server error"})
         ctx, _ = _async_client_ctx(resp)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -320,7 +320,7 @@ class TestSmartHRHealthCheck:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("接続拒否"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.smarthr.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
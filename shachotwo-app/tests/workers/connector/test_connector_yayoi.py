@@ -62,7 +62,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("sales")
 
         assert result == fake_sales
@@ -85,7 +85,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("expenses")
 
         assert result == fake_expenses
@@ -104,7 +104,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("journal_entries")
 
         assert result == fake_entries
@@ -120,7 +120,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.read_records("sales", filters={"fiscal_year": 2025, "month": 4})
 
         call_params = async_client.get.call_args[1]["params"]
@@ -140,7 +140,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.read_records("sales")
 
         assert result == fake_data
@@ -164,7 +164,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.read_records("sales")
 
@@ -179,7 +179,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.read_records("sales")
 
@@ -193,7 +193,7 @@ class TestReadRecords:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(side_effect=httpx.ConnectTimeout("timeout"))
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.ConnectTimeout):
                 await connector.read_records("expenses")
 
@@ -221,7 +221,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.write_record(
                 "journal_entries",
                 {"description": "売上高", "debit_amount": 200000},
@@ -241,7 +241,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.write_record(
                 "journal_entries",
                 {"description": "仕訳テスト"},
@@ -278,7 +278,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             with pytest.raises(httpx.HTTPStatusError):
                 await connector.write_record("journal_entries", {"description": "テスト"})
 
@@ -293,7 +293,7 @@ class TestWriteRecord:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.post = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.write_record("journal_entries", {"description": "テスト"})
 
         call_url = async_client.post.call_args[0][0]
@@ -318,7 +318,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is True
@@ -335,7 +335,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is False
@@ -350,7 +350,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(side_effect=httpx.ConnectTimeout("timeout"))
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             result = await connector.health_check()
 
         assert result is False
@@ -367,7 +367,7 @@ class TestHealthCheck:
         async_client.__aexit__ = AsyncMock(return_value=False)
         async_client.get = AsyncMock(return_value=mock_resp)
 
-        with patch("workers.connector.yayoi.httpx.AsyncClient", return_value=async_client):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=async_client):
             await connector.health_check()
 
         call_url = async_client.get.call_args[0][0]
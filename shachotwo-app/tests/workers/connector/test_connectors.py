@@ -63,7 +63,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {"records": records})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("42")
 
         client.get.assert_called_once()
@@ -77,7 +77,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {"records": []})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("42", {"query": "status = \"open\""})
 
         call_kwargs = client.get.call_args
@@ -90,7 +90,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {"records": records})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records_page(
                 "99", query="order by $id asc", limit=10
             )
@@ -106,7 +106,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {"id": "100", "revision": "1"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record("42", {"title": {"value": "新規"}})
 
         client.post.assert_called_once()
@@ -118,7 +118,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {"revision": "2"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "42", {"id": "100", "title": {"value": "更新"}}
             )
@@ -135,7 +135,7 @@ class TestKintoneConnector:
         resp = _make_response(200, {})
         ctx, _client = _async_client_ctx(resp)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -146,7 +146,7 @@ class TestKintoneConnector:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("network error"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -163,7 +163,7 @@ class TestKintoneConnector:
             },
         )
         ctx, client = _async_client_ctx(resp)
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             out = await self.connector.list_apps()
         assert out == [
             {"appId": "1", "name": "AppA", "spaceId": "s"},
@@ -188,7 +188,7 @@ class TestKintoneConnector:
             },
         )
         ctx, client = _async_client_ctx(resp)
-        with patch("workers.connector.kintone.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             fields = await self.connector.list_form_fields("42")
         assert len(fields) == 1
         assert fields[0]["code"] == "company"
@@ -221,7 +221,7 @@ class TestFreeeConnector:
         resp = _make_response(200, {"deals": deals})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.freee.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("deals")
 
         client.get.assert_called_once()
@@ -234,7 +234,7 @@ class TestFreeeConnector:
         resp = _make_response(200, {"invoices": []})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.freee.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.read_records("invoices")
 
         params = client.get.call_args[1]["params"]
@@ -245,7 +245,7 @@ class TestFreeeConnector:
         resp = _make_response(200, {"deal": {"id": 99}})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.freee.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             await self.connector.write_record("deals", {"amount": 50000})
 
         payload = client.post.call_args[1]["json"]
@@ -257,7 +257,7 @@ class TestFreeeConnector:
         resp = _make_response(200, {"company": {"id": 12345}})
         ctx, _client = _async_client_ctx(resp)
 
-        with patch("workers.connector.freee.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -268,7 +268,7 @@ class TestFreeeConnector:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("timeout"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.freee.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -292,7 +292,7 @@ class TestSlackConnector:
         resp = _make_response(200, {"channels": channels})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records("channels")
 
         url = client.get.call_args[0][0]
@@ -305,7 +305,7 @@ class TestSlackConnector:
         resp = _make_response(200, {"messages": messages})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.read_records(
                 "messages", {"channel": "C001", "oldest": "1234567890.000000"}
             )
@@ -324,7 +324,7 @@ class TestSlackConnector:
         resp = _make_response(200, {"ok": True, "ts": "1234567890.000002"})
         ctx, client = _async_client_ctx(resp)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             result = await self.connector.write_record(
                 "message", {"channel": "C001", "text": "テスト送信"}
             )
@@ -340,7 +340,7 @@ class TestSlackConnector:
         resp = _make_response(200, {"ok": True, "team": "TestTeam"})
         ctx, _client = _async_client_ctx(resp)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is True
@@ -350,7 +350,7 @@ class TestSlackConnector:
         resp = _make_response(200, {"ok": False, "error": "invalid_auth"})
         ctx, _client = _async_client_ctx(resp)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
@@ -361,7 +361,7 @@ class TestSlackConnector:
         ctx.__aenter__ = AsyncMock(side_effect=Exception("connection refused"))
         ctx.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("workers.connector.slack.httpx.AsyncClient", return_value=ctx):
+        with patch("workers.connector.base.httpx.AsyncClient", return_value=ctx):
             ok = await self.connector.health_check()
 
         assert ok is False
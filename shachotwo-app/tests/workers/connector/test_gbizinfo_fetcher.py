@@ -0,0 +1,177 @@
+"""gBizINFO 詳細取得エンジン（適応レート制御・内容アドレスキャッシュ）のテスト。"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from workers.connector import base
+from workers.connector.base import ConnectorConfig
+from workers.connector.gbizinfo import GBizInfoConnector
+from workers.connector.gbizinfo_fetcher import (
+    AdaptiveRateLimiter,
+    GBizDetailCache,
+    GBizDetailFetcher,
+)
+
+
+def _body(cn: str, employees: int = 50) -> bytes:
+    return json.dumps({"hojin-infos": [{"corporate_number": cn, "name": f"社{cn}", "employee_number": employees}]}).encode()
+
+
+class _GBiz(httpx.AsyncBaseTransport):
+    """詳細 API のフェイク。handler(cn, request) が Response を返す。"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests: list[httpx.Request] = []
+        self.active = 0
+        self.peak = 0
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.005)
+            return self.handler(request.url.path.rsplit("/", 1)[-1], request)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def gbiz(monkeypatch):
+    def install(handler):
+        fake = _GBiz(handler)
+        monkeypatch.setattr(base, "_host_transport", lambda url: fake)
+        return fake
+
+    return install
+
+
+@pytest.fixture
+def connector():
+    connector = GBizInfoConnector(ConnectorConfig(tool_name="gbizinfo", credentials={"api_token": "tok"}))
+    connector.http_rate_per_sec = 0  # 共有ランタイム側の上限はテストでは外す
+    return connector
+
+
+def _fetcher(connector, cache, **kw) -> GBizDetailFetcher:
+    kw.setdefault("rate_per_sec", 1000)
+    kw.setdefault("max_rate_per_sec", 1000)
+    return GBizDetailFetcher(connector, cache, **kw)
+
+
+@pytest.mark.asyncio
+async def test_fetches_in_parallel_and_serves_reruns_from_cache(gbiz, connector, tmp_path):
+    fake = gbiz(lambda cn, req: httpx.Response(200, content=_body(cn)))
+    numbers = [f"{i:013d}" for i in range(20)]
+    cache = GBizDetailCache(tmp_path)
+
+    results = await _fetcher(connector, cache, concurrency=4).fetch(numbers + numbers[:3])
+    assert sorted(r.corporate_number for r in results) == numbers
+    assert all(r.status == "fetched" and r.changed for r in results)
+    assert results[0].record["employee_number"] == 50
+    assert fake.peak == 4
+    assert fake.requests[0].headers["X-hojinInfo-api-token"] == "tok"
+
+    fetcher = _fetcher(connector, GBizDetailCache(tmp_path))
+    again = await fetcher.fetch(numbers)
+    assert len(fake.requests) == 20
+    assert {r.status for r in again} == {"cached"}
+    assert not any(r.changed for r in again)
+    assert fetcher.stats.cached == 20
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_revalidated_with_etag(gbiz, connector, tmp_path):
+    def handler(cn, req):
+        if req.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=_body(cn), headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2026 00:00:00 GMT"})
+
+    fake = gbiz(handler)
+    cache = GBizDetailCache(tmp_path)
+    await _fetcher(connector, cache).fetch(["1"])
+
+    results = await _fetcher(connector, cache, ttl_hours=0).fetch(["1"])
+    assert results[0].status == "not_modified"
+    assert results[0].changed is False
+    assert results[0].record["corporate_number"] == "1"
+    assert fake.requests[1].headers["if-modified-since"] == "Wed, 01 Oct 2026 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_changed_flag_follows_content(gbiz, connector, tmp_path):
+    employees = {"1": 50, "2": 10}
+    gbiz(lambda cn, req: httpx.Response(200, content=_body(cn, employees[cn])))
+    cache = GBizDetailCache(tmp_path)
+    await _fetcher(connector, cache).fetch(["1", "2"])
+
+    employees["2"] = 12
+    results = {r.corporate_number: r for r in await _fetcher(connector, cache, ttl_hours=0).fetch(["1", "2"])}
+    assert results["1"].changed is False
+    assert results["2"].changed is True
+    assert results["2"].record["employee_number"] == 12
+
+
+@pytest.mark.asyncio
+async def test_429_slows_down_and_retries(gbiz, connector, tmp_path):
+    throttled: set[str] = set()
+
+    def handler(cn, req):
+        if cn not in throttled:
+            throttled.add(cn)
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        return httpx.Response(200, content=_body(cn))
+
+    gbiz(handler)
+    fetcher = _fetcher(connector, GBizDetailCache(tmp_path), rate_per_sec=40, max_rate_per_sec=40)
+    results = await fetcher.fetch(["1", "2", "3"])
+    assert {r.status for r in results} == {"fetched"}
+    assert fetcher.stats.throttled == 3
+    assert fetcher.stats.final_rate_per_sec < 40
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_cached(gbiz, connector, tmp_path):
+    fake = gbiz(lambda cn, req: httpx.Response(404))
+    cache = GBizDetailCache(tmp_path)
+    first = await _fetcher(connector, cache).fetch(["9"])
+    second = await _fetcher(connector, cache).fetch(["9"])
+    assert first[0].status == second[0].status == "not_found"
+    assert len(fake.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_connector_fetch_details_uses_engine(gbiz, connector, tmp_path):
+    gbiz(lambda cn, req: httpx.Response(200, content=_body(cn)))
+    results = await connector.fetch_details(["1"], cache=GBizDetailCache(tmp_path))
+    assert results[0].record["name"] == "社1"
+
+
+def test_cache_index_is_append_only_and_survives_torn_lines(tmp_path):
+    cache = GBizDetailCache(tmp_path)
+    cache.put("1", b'{"a": 1}')
+    cache.put("2", b'{"a": 1}')
+    with open(tmp_path / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"corporate_number": "3", "sha')
+
+    reloaded = GBizDetailCache(tmp_path)
+    assert len(reloaded) == 2
+    # 同じ内容は1ファイルだけ保存する
+    assert len(list((tmp_path / "objects").rglob("*.json"))) == 1
+    assert reloaded.load(reloaded.get("2")) == b'{"a": 1}'
+
+    reloaded.put("4", b'{"a": 4}')
+    assert GBizDetailCache(tmp_path).get("4") is not None
+
+
+def test_adaptive_limiter_halves_once_per_burst_and_recovers():
+    limiter = AdaptiveRateLimiter(rate_per_sec=8, max_rate_per_sec=8, min_rate_per_sec=1, increase=1, success_window=2)
+    limiter.on_throttle(0)
+    limiter.on_throttle(0)
+    assert limiter.rate_per_sec == 4
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.rate_per_sec == 6
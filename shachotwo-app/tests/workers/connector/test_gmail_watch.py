@@ -47,9 +47,25 @@ def _mock_gmail_service() -> MagicMock:
         return mock
 
     svc.users().messages().get = _get_message
+    svc.new_batch_http_request.side_effect = _FakeBatch
     return svc
 
 
+class _FakeBatch:
+    """service.new_batch_http_request() の代わり。execute で各リクエストを実行し callback を呼ぶ。"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
 class TestGmailWatch:
     @pytest.mark.asyncio
     async def test_register_watch(self):
@@ -0,0 +1,175 @@
+"""google_runtime（スレッドプール実行・batch・Sheets 書き込みバッファ）のテスト。"""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from workers.connector import google_runtime
+from workers.connector.base import ConnectorConfig
+from workers.connector.google_runtime import (
+    SheetsWriteBuffer,
+    batch_execute,
+    execute_request,
+    get_credentials,
+    reset_google_runtime,
+)
+from workers.connector.google_sheets import GoogleSheetsConnector
+
+
+@pytest.fixture(autouse=True)
+def _reset_runtime():
+    reset_google_runtime()
+    yield
+    reset_google_runtime()
+
+
+class _Batch:
+    def __init__(self, callback, fail: bool = False):
+        self.callback = callback
+        self.fail = fail
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        if self.fail:
+            raise ConnectionError("batch down")
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
+def _request(value=None, error=None):
+    request = MagicMock()
+    if error is not None:
+        request.execute.side_effect = error
+    else:
+        request.execute.return_value = value
+    return request
+
+
+@pytest.mark.asyncio
+async def test_execute_request_runs_off_event_loop():
+    loop_thread = threading.get_ident()
+    request = MagicMock()
+    request.execute.side_effect = lambda: threading.get_ident()
+    assert await execute_request(request) != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_batch_execute_chunks_and_keeps_order():
+    batches: list[_Batch] = []
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: batches.append(_Batch(callback)) or batches[-1]
+
+    requests = [_request({"n": i}) for i in range(5)]
+    requests[3] = _request(error=ValueError("404"))
+    results = await batch_execute(service, requests, batch_size=2)
+
+    assert [len(b.requests) for b in batches] == [2, 2, 1]
+    assert [r[0] for r in results] == [{"n": 0}, {"n": 1}, {"n": 2}, None, {"n": 4}]
+    assert isinstance(results[3][1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_marks_every_request_failed():
+    service = MagicMock()
+    service.new_batch_http_request.side_effect = lambda callback: _Batch(callback, fail=True)
+    results = await batch_execute(service, [_request({}), _request({})])
+    assert all(resp is None and isinstance(err, ConnectionError) for resp, err in results)
+
+
+def test_credentials_are_cached_per_subject():
+    with patch("google.oauth2.service_account.Credentials.from_service_account_file") as load:
+        load.return_value.with_subject.side_effect = lambda s: f"creds:{s}"
+        a = get_credentials("/fake.json", ["scope"], "a@example.com")
+        again = get_credentials("/fake.json", ["scope"], "a@example.com")
+        b = get_credentials("/fake.json", ["scope"], "b@example.com")
+    assert a == again == "creds:a@example.com"
+    assert b == "creds:b@example.com"
+    assert load.call_count == 2
+
+
+class TestSheetsWriteBuffer:
+    @pytest.mark.asyncio
+    async def test_flushes_on_size_with_last_write_winning(self):
+        sent: list[list[dict]] = []
+
+        async def send(data):
+            sent.append(data)
+
+        buffer = SheetsWriteBuffer(send, batch_size=2, flush_interval_sec=60)
+        await buffer.add("S!A1", [["old"]])
+        await buffer.add("S!A1", [["new"]])
+        assert sent == []
+        await buffer.add("S!B1", [["x"]])
+        assert sent == [[{"range": "S!A1", "values": [["new"]]}, {"range": "S!B1", "values": [["x"]]}]]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_interval(self):
+        sent: list[list[dict]] = []
+
+        async def send(data):
+            sent.append(data)
+
+        buffer = SheetsWriteBuffer(send, batch_size=100, flush_interval_sec=0.01)
+        await buffer.add("S!A1", [["1"]])
+        await buffer.add("S!A2", [["2"]])
+        await asyncio.sleep(0.05)
+        assert len(sent) == 1 and len(sent[0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_writes(self):
+        async def send(data):
+            raise ConnectionError("quota")
+
+        buffer = SheetsWriteBuffer(send, batch_size=100, flush_interval_sec=60)
+        await buffer.add("S!A1", [["1"]])
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        assert buffer.pending == 1
+
+
+class TestSheetsConnectorBatching:
+    def _connector(self) -> tuple[GoogleSheetsConnector, MagicMock]:
+        connector = GoogleSheetsConnector(ConnectorConfig(
+            tool_name="google_sheets",
+            credentials={"credentials_path": "/fake.json", "spreadsheet_id": "sheet-1"},
+        ))
+        service = MagicMock()
+        connector._get_service = lambda: service
+        return connector, service
+
+    @pytest.mark.asyncio
+    async def test_row_updates_are_sent_as_one_batch_update(self):
+        connector, service = self._connector()
+        await connector.mark_sent(5, "form", "2026-10-16 09:00:00")
+        await connector.mark_failed(6, "timeout")
+        await connector.update_lp_url(5, "https://lp.example.com")
+        service.spreadsheets().values().batchUpdate.assert_not_called()
+
+        await connector.flush()
+
+        values_api = service.spreadsheets().values()
+        values_api.update.assert_not_called()
+        values_api.batchUpdate.assert_called_once()
+        body = values_api.batchUpdate.call_args.kwargs["body"]
+        assert body["valueInputOption"] == "USER_ENTERED"
+        assert [d["range"] for d in body["data"]] == ["営業リスト!D5:F5", "営業リスト!G6", "営業リスト!H5"]
+
+    @pytest.mark.asyncio
+    async def test_read_flushes_pending_writes_first(self):
+        connector, service = self._connector()
+        calls: list[str] = []
+        values_api = service.spreadsheets().values()
+        values_api.batchUpdate.side_effect = lambda **kw: calls.append("batchUpdate") or _request({})
+        values_api.get.side_effect = lambda **kw: calls.append("get") or _request({"values": []})
+
+        await connector.mark_sent(5, "form", "2026-10-16 09:00:00")
+        await connector.get_unsent_companies()
+        assert calls == ["batchUpdate", "get"]
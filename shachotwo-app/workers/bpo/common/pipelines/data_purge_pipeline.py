@@ -21,6 +21,7 @@ from datetime import datetime, timezone, timedelta
 from typing import Any
 
 from workers.bpo.common.pipelines.pipeline_utils import StepResult
+from workers.bpo.engine.agent_factory import invalidate_agent_roles
 
 logger = logging.getLogger(__name__)
 
@@ -227,6 +228,7 @@ async def run_data_purge_pipeline(
             db.table("knowledge_items").delete().eq(
                 "company_id", company_id
             ).lt("expires_at", now_iso).not_.is_("expires_at", "null").execute()
+            invalidate_agent_roles(company_id)
             deleted = counts.get("knowledge_items", 0)
             result.purged_counts["knowledge_items"] = max(deleted, 0)
             step_duration = int(time.time() * 1000) - step_start
@@ -3,7 +3,6 @@ import json
 import logging
 import math
 from decimal import Decimal
-from datetime import datetime, timezone
 from typing import Optional
 
 from db.supabase import get_service_client as get_client
@@ -20,6 +19,7 @@ from workers.bpo.construction.models import (
     PriceSource,
     ProjectType,
 )
+from workers.bpo.construction.unit_price_resolver import UnitPriceResolver
 
 logger = logging.getLogger(__name__)
 
@@ -418,6 +418,9 @@ class EstimationPipeline:
         3. 自社過去実績（類似工種）
         4. LLM推定
 
+        過去実績・労務単価は UnitPriceResolver で一括取得し、used_count は
+        RPC 1 回でまとめて加算する。
+
         Args:
             items_override: DBを介さずに直接アイテムを渡す場合（project_idが非UUIDの場合等）
         """
@@ -435,88 +438,18 @@ class EstimationPipeline:
         if not items_data:
             return []
 
-        results = []
-        for item_data in items_data:
-            candidates = []
-
-            # 1. 自社過去実績（加重平均 + 動的confidence）
-            past_prices = client.table("unit_price_master").select("*").eq(
-                "company_id", company_id
-            ).eq("category", item_data["category"]).order(
-                "updated_at", desc=True
-            ).limit(10).execute()
-
-            past_data = past_prices.data or []
-            if past_data:
-                now = datetime.now(timezone.utc)
-                weighted_sum = 0.0
-                weight_total = 0.0
-                for pp in past_data:
-                    # 直近重視の重み（月数が増えるほど重みが下がる）
-                    updated = pp.get("updated_at", "")
-                    try:
-                        months_ago = max(0, (now.year * 12 + now.month) - (int(updated[:4]) * 12 + int(updated[5:7]))) if updated else 6
-                    except (ValueError, IndexError):
-                        months_ago = 6
-                    w = 1.0 / (1.0 + months_ago * 0.1)
-                    weighted_sum += float(pp["unit_price"]) * w
-                    weight_total += w
-
-                weighted_avg = weighted_sum / weight_total if weight_total > 0 else 0
-                count = len(past_data)
-
-                # 動的confidence計算
-                base = 0.5
-                count_bonus = min(count * 0.05, 0.3)  # 実績件数ボーナス（最大+0.3）
-                region_match = sum(1 for p in past_data if p.get("region") == region)
-                region_bonus = 0.1 if region_match > 0 else 0.0
-                # accuracy_rateがある場合はペナルティ判定
-                acc_rates = [float(p["accuracy_rate"]) for p in past_data if p.get("accuracy_rate") is not None]
-                acc_penalty = -0.1 if acc_rates and (sum(acc_rates) / len(acc_rates)) < 0.8 else 0.0
-                dyn_confidence = max(0.1, min(0.95, base + count_bonus + region_bonus + acc_penalty))
-
-                candidates.append({
-                    "source": PriceSource.PAST_RECORD.value,
-                    "unit_price": round(weighted_avg, 2),
-                    "confidence": round(dyn_confidence, 2),
-                    "detail": f"自社実績 加重平均（{count}件、地域一致{region_match}件）",
-                })
-
-                # used_count を更新（参照されたレコードのカウントを+1）
-                for pp in past_data:
-                    current_count = pp.get("used_count") or 0
-                    client.table("unit_price_master").update({
-                        "used_count": current_count + 1,
-                    }).eq("id", pp["id"]).execute()
-
-            # 2. 公共工事設計労務単価
-            labor_rates = client.table("public_labor_rates").select("*").eq(
-                "fiscal_year", fiscal_year
-            ).eq("region", region).execute()
-
-            for lr in (labor_rates.data or []):
-                if lr["occupation"].lower() in item_data.get("detail", "").lower():
-                    candidates.append({
-                        "source": PriceSource.LABOR_RATE.value,
-                        "unit_price": lr["daily_rate"],
-                        "confidence": 0.95,
-                        "detail": f"公共工事設計労務単価 {lr['occupation']} {lr['fiscal_year']}年度",
-                    })
-
-            # 候補がない場合のみLLM推定
-            if not candidates:
-                candidates.append({
-                    "source": PriceSource.AI_ESTIMATED.value,
-                    "unit_price": None,
-                    "confidence": 0.3,
-                    "detail": "AI推定（要確認）",
-                })
-
-            item_with_price = EstimationItemWithPrice(
+        # 工種・労務単価をまとめて先読みし、明細ごとの DB 往復をなくす
+        resolver = UnitPriceResolver(client, company_id, region, fiscal_year)
+        await resolver.prefetch(items_data)
+
+        results = [
+            EstimationItemWithPrice(
                 **item_data,
-                price_candidates=candidates,
+                price_candidates=resolver.candidates_for(item_data),
             )
-            results.append(item_with_price)
+            for item_data in items_data
+        ]
+        await resolver.flush_used_counts()
 
         return results
 
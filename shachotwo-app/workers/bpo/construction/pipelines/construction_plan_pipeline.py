@@ -487,9 +487,9 @@ async def run_construction_plan_pipeline(
 
     try:
         s4_start = int(time.time() * 1000)
-        from llm.client import get_llm_client, LLMTask, ModelTier
+        from llm.client import estimate_max_cost_yen, get_llm_client, LLMTask, ModelTier
         llm = get_llm_client()
-        sections_response = await llm.generate(LLMTask(
+        sections_task = LLMTask(
             messages=[
                 {
                     "role": "system",
@@ -507,7 +507,10 @@ async def run_construction_plan_pipeline(
             temperature=0.3,
             company_id=company_id,
             task_type="construction_plan_generator",
-        ))
+        )
+        # 高コスト呼び出しなので見積額を先に予算確保（並列実行で月間上限を超えない）
+        sections_task.reserve_cost_yen = estimate_max_cost_yen(sections_task)
+        sections_response = await llm.generate(sections_task)
         raw_json = sections_response.content.strip()
         if raw_json.startswith("```"):
             raw_json = raw_json.split("```")[1]
@@ -23,6 +23,10 @@ kintone連携:
     - kintone_app_id: str     工事案件アプリのID
     - kintone_query: str      (省略可) kintoneクエリ文字列。デフォルト: ステータス in ("見積依頼")
     - kintone_field_map: dict (省略可) kintoneフィールドコード → パイプライン内部キーのマッピング
+
+チェックポイント:
+  Step 1（OCR）と Step 2（数量抽出・LLM）の成功結果を保存し、タイムアウトや後続ステップの失敗で
+  同じ入力が再実行されたときは再利用する（workers/bpo/engine/checkpoint.py）。
 """
 import time
 import logging
@@ -31,6 +35,7 @@ from decimal import Decimal
 from typing import Any, Optional
 
 from llm.client import ReasoningTrace
+from workers.bpo.engine.checkpoint import PipelineCheckpointer
 from workers.micro.models import MicroAgentInput, MicroAgentOutput
 from workers.micro.ocr import run_document_ocr
 from workers.micro.validator import run_output_validator
@@ -152,6 +157,12 @@ async def run_estimation_pipeline(
         "fiscal_year": fiscal_year,
         "project_type": project_type,
     }
+    checkpointer = PipelineCheckpointer(
+        "construction/estimation",
+        company_id,
+        {"input_data": input_data, "project_id": project_id, "region": region,
+         "fiscal_year": fiscal_year, "project_type": project_type},
+    )
 
     def _add_step(
         step_no: int,
@@ -302,13 +313,18 @@ async def run_estimation_pipeline(
             return _fail("document_ocr")
     else:
         # c) 通常OCR処理
+        ocr_payload = {k: v for k, v in input_data.items() if k in ("text", "file_path")}
         try:
-            ocr_out = await run_document_ocr(MicroAgentInput(
-                company_id=company_id,
-                agent_name="document_ocr",
-                payload={k: v for k, v in input_data.items() if k in ("text", "file_path")},
-                context=context,
-            ))
+            ocr_out = await checkpointer.micro_step(
+                "document_ocr",
+                ocr_payload,
+                lambda: run_document_ocr(MicroAgentInput(
+                    company_id=company_id,
+                    agent_name="document_ocr",
+                    payload=ocr_payload,
+                    context=context,
+                )),
+            )
         except Exception as e:
             ocr_out = MicroAgentOutput(
                 agent_name="document_ocr", success=False,
@@ -323,56 +339,69 @@ async def run_estimation_pipeline(
     # ─── Step 2: quantity_extractor ─────────────────────────────────────
     s2_start = int(time.time() * 1000)
     s2_reasoning_trace = None
-    try:
-        ep = EstimationPipeline()
-        if context.get("raw_text"):
-            items, s2_reasoning_trace = await ep.extract_quantities(
-                project_id=project_id or "pipeline_run",
-                company_id=company_id,
-                raw_text=context.get("raw_text", ""),
-            )
-        else:
-            items = []
+    ep: Optional[EstimationPipeline] = None
 
-        # items直渡しの場合
-        if not items and context.get("raw_items"):
-            raw_items = context["raw_items"]
-        else:
-            raw_items = [item.model_dump(mode="json") for item in items]
+    async def _extract_quantities() -> MicroAgentOutput:
+        nonlocal s2_reasoning_trace, ep
+        try:
+            ep = EstimationPipeline()
+            if context.get("raw_text"):
+                items, s2_reasoning_trace = await ep.extract_quantities(
+                    project_id=project_id or "pipeline_run",
+                    company_id=company_id,
+                    raw_text=context.get("raw_text", ""),
+                )
+            else:
+                items = []
+
+            # items直渡しの場合
+            if not items and context.get("raw_items"):
+                raw_items = context["raw_items"]
+            else:
+                raw_items = [item.model_dump(mode="json") for item in items]
+
+            s2_duration = int(time.time() * 1000) - s2_start
+            if raw_items:
+                s2_confidence = 0.9
+                s2_success = True
+            else:
+                # 工事費内訳なし → 工事費計算書（合計のみ）PDFの可能性
+                # テキストから合計金額を抽出して部分結果として返す
+                raw_text = context.get("raw_text", "")
+                summary_amounts = _extract_summary_amounts(raw_text)
+                s2_confidence = 0.50 if summary_amounts else 0.10
+                s2_success = bool(summary_amounts)  # 合計金額があれば部分成功
+                if summary_amounts:
+                    logger.info(f"quantity_extractor: 工事費計算書モード（合計金額のみ）")
+
+            return MicroAgentOutput(
+                agent_name="quantity_extractor",
+                success=s2_success,
+                result={"items": raw_items, "count": len(raw_items),
+                        "summary_amounts": _extract_summary_amounts(context.get("raw_text", "")) if not raw_items else {}},
+                confidence=s2_confidence,
+                cost_yen=0.0,
+                duration_ms=s2_duration,
+            )
+        except Exception as e:
+            logger.error(f"quantity_extractor error: {e}")
+            return MicroAgentOutput(
+                agent_name="quantity_extractor",
+                success=False,
+                result={"error": str(e)},
+                confidence=0.0,
+                cost_yen=0.0,
+                duration_ms=int(time.time() * 1000) - s2_start,
+            )
 
-        s2_duration = int(time.time() * 1000) - s2_start
-        if raw_items:
-            s2_confidence = 0.9
-            s2_success = True
-        else:
-            # 工事費内訳なし → 工事費計算書（合計のみ）PDFの可能性
-            # テキストから合計金額を抽出して部分結果として返す
-            raw_text = context.get("raw_text", "")
-            summary_amounts = _extract_summary_amounts(raw_text)
-            s2_confidence = 0.50 if summary_amounts else 0.10
-            s2_success = bool(summary_amounts)  # 合計金額があれば部分成功
-            if summary_amounts:
-                logger.info(f"quantity_extractor: 工事費計算書モード（合計金額のみ）")
-
-        s2_out = MicroAgentOutput(
-            agent_name="quantity_extractor",
-            success=s2_success,
-            result={"items": raw_items, "count": len(raw_items),
-                    "summary_amounts": _extract_summary_amounts(context.get("raw_text", "")) if not raw_items else {}},
-            confidence=s2_confidence,
-            cost_yen=0.0,
-            duration_ms=s2_duration,
-        )
-    except Exception as e:
-        logger.error(f"quantity_extractor error: {e}")
-        s2_out = MicroAgentOutput(
-            agent_name="quantity_extractor",
-            success=False,
-            result={"error": str(e)},
-            confidence=0.0,
-            cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s2_start,
-        )
+    s2_out = await checkpointer.micro_step(
+        "quantity_extractor",
+        {"raw_text": context.get("raw_text", ""), "raw_items": context.get("raw_items")},
+        _extract_quantities,
+    )
+    if ep is None:
+        # チェックポイントから再開した場合も Step 3 以降で使う
+        ep = EstimationPipeline()
 
     step2 = _add_step(2, "quantity_extractor", "quantity_extractor", s2_out)
     # LLMフォールバック時に取得したReasoningTraceを蓄積
@@ -741,6 +770,7 @@ async def run_estimation_pipeline(
         f"{total_duration}ms"
     )
 
+    await checkpointer.complete()
     return EstimationPipelineResult(
         success=True,
         steps=steps,
@@ -0,0 +1,252 @@
+"""建設業 単価候補の一括解決（EstimationPipeline.suggest_unit_prices 用）
+
+明細ごとに DB を叩く代わりに、見積全体をまとめて解決する:
+- 自社過去実績: 明細の工種（category）をまとめて RPC recent_unit_prices_by_category 1 回で先読みし、
+  工種ごとに加重平均を 1 回だけ計算
+- 公共工事設計労務単価: (年度, 地域) ごとにプロセス内インデックスとしてキャッシュ
+- used_count: RPC increment_unit_price_used_count で 1 回にまとめて加算
+"""
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any
+
+from db.supabase import execute
+from workers.bpo.construction.models import PriceSource
+
+logger = logging.getLogger(__name__)
+
+# 工種ごとに参照する直近実績件数（従来の .limit(10) と同じ）
+PAST_PRICE_LIMIT_PER_CATEGORY = 10
+# in_() に渡す工種数の上限（URL長対策）
+CATEGORY_CHUNK_SIZE = 100
+# 労務単価は年度単位でしか変わらないため長めにキャッシュ
+LABOR_RATE_CACHE_TTL_SEC = 3600
+
+_PAST_PRICE_COLUMNS = "id, category, unit_price, updated_at, region, accuracy_rate, used_count"
+
+
+class LaborRateIndex:
+    """1 つの (年度, 地域) の労務単価を職種名で引けるようにしたもの。"""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self._entries = [
+            (str(r.get("occupation", "")).lower(), r) for r in rows if r.get("occupation")
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, detail: str) -> list[dict]:
+        """明細の細別に職種名が含まれる労務単価を返す。"""
+        text = (detail or "").lower()
+        return [row for occupation, row in self._entries if occupation in text]
+
+
+_labor_rate_cache: dict[tuple[int, str], tuple[float, LaborRateIndex]] = {}
+
+
+async def load_labor_rate_index(client: Any, fiscal_year: int, region: str) -> LaborRateIndex:
+    """労務単価インデックスを取得（(年度, 地域) ごとに TTL キャッシュ）。"""
+    key = (fiscal_year, region)
+    cached = _labor_rate_cache.get(key)
+    if cached and time.monotonic() - cached[0] < LABOR_RATE_CACHE_TTL_SEC:
+        return cached[1]
+
+    result = await execute(
+        client.table("public_labor_rates").select("*").eq(
+            "fiscal_year", fiscal_year
+        ).eq("region", region)
+    )
+    index = LaborRateIndex(result.data or [])
+    _labor_rate_cache[key] = (time.monotonic(), index)
+    return index
+
+
+def clear_labor_rate_cache() -> None:
+    _labor_rate_cache.clear()
+
+
+async def prefetch_past_prices(
+    client: Any, company_id: str, categories: list[str],
+) -> dict[str, list[dict]]:
+    """工種ごとの直近実績（updated_at 降順、最大 PAST_PRICE_LIMIT_PER_CATEGORY 件）を一括取得。
+
+    件数の上限は RPC 側で工種ごとにかける（まとめて order するだけだと PostgREST の max-rows で
+    切り詰められ、実績の多い工種が他を押し出す）。RPC が未適用の環境では工種ごとの limit 付きクエリにフォールバックする。
+    """
+    by_category: dict[str, list[dict]] = {c: [] for c in categories}
+    try:
+        for start in range(0, len(categories), CATEGORY_CHUNK_SIZE):
+            chunk = categories[start:start + CATEGORY_CHUNK_SIZE]
+            result = await execute(client.rpc("recent_unit_prices_by_category", {
+                "p_company_id": company_id,
+                "p_categories": chunk,
+                "p_limit": PAST_PRICE_LIMIT_PER_CATEGORY,
+            }))
+            _collect_past_prices(by_category, result.data or [])
+        return by_category
+    except Exception as e:
+        logger.warning(f"recent_unit_prices_by_category RPC failed, falling back to per-category query: {e}")
+
+    by_category = {c: [] for c in categories}
+    for category in categories:
+        result = await execute(
+            client.table("unit_price_master").select(_PAST_PRICE_COLUMNS).eq(
+                "company_id", company_id
+            ).eq("category", category).order("updated_at", desc=True).limit(PAST_PRICE_LIMIT_PER_CATEGORY)
+        )
+        _collect_past_prices(by_category, result.data or [])
+    return by_category
+
+
+def _collect_past_prices(by_category: dict[str, list[dict]], rows: list[dict]) -> None:
+    for row in sorted(rows, key=lambda r: r.get("updated_at") or "", reverse=True):
+        bucket = by_category.get(row.get("category"))
+        if bucket is not None and len(bucket) < PAST_PRICE_LIMIT_PER_CATEGORY:
+            bucket.append(row)
+
+
+def _months_ago(updated: str, now: datetime) -> int:
+    try:
+        return max(0, (now.year * 12 + now.month) - (int(updated[:4]) * 12 + int(updated[5:7]))) if updated else 6
+    except (ValueError, IndexError):
+        return 6
+
+
+def past_price_candidate(past_data: list[dict], region: str, now: datetime) -> dict:
+    """自社実績の加重平均単価と動的 confidence から候補を作る。"""
+    weighted_sum = 0.0
+    weight_total = 0.0
+    for pp in past_data:
+        # 直近重視の重み（月数が増えるほど重みが下がる）
+        w = 1.0 / (1.0 + _months_ago(pp.get("updated_at", ""), now) * 0.1)
+        weighted_sum += float(pp["unit_price"]) * w
+        weight_total += w
+
+    weighted_avg = weighted_sum / weight_total if weight_total > 0 else 0
+    count = len(past_data)
+
+    # 動的confidence計算
+    base = 0.5
+    count_bonus = min(count * 0.05, 0.3)  # 実績件数ボーナス（最大+0.3）
+    region_match = sum(1 for p in past_data if p.get("region") == region)
+    region_bonus = 0.1 if region_match > 0 else 0.0
+    # accuracy_rateがある場合はペナルティ判定
+    acc_rates = [float(p["accuracy_rate"]) for p in past_data if p.get("accuracy_rate") is not None]
+    acc_penalty = -0.1 if acc_rates and (sum(acc_rates) / len(acc_rates)) < 0.8 else 0.0
+    dyn_confidence = max(0.1, min(0.95, base + count_bonus + region_bonus + acc_penalty))
+
+    return {
+        "source": PriceSource.PAST_RECORD.value,
+        "unit_price": round(weighted_avg, 2),
+        "confidence": round(dyn_confidence, 2),
+        "detail": f"自社実績 加重平均（{count}件、地域一致{region_match}件）",
+    }
+
+
+async def apply_used_count_increments(
+    client: Any, company_id: str, increments: Counter,
+) -> None:
+    """参照された unit_price_master の used_count を一括加算する。
+
+    RPC が未適用の環境では行ごとの UPDATE にフォールバックする（参照回数は合算済み）。
+    """
+    if not increments:
+        return
+    ids = list(increments.keys())
+    try:
+        await execute(client.rpc("increment_unit_price_used_count", {
+            "p_company_id": company_id,
+            "p_price_ids": ids,
+            "p_increments": [increments[i] for i in ids],
+        }))
+        return
+    except Exception as e:
+        logger.warning(f"increment_unit_price_used_count RPC failed, falling back to per-row update: {e}")
+
+    current = await execute(
+        client.table("unit_price_master").select("id, used_count").in_("id", ids)
+    )
+    for row in current.data or []:
+        await execute(
+            client.table("unit_price_master").update({
+                "used_count": (row.get("used_count") or 0) + increments[row["id"]],
+            }).eq("id", row["id"])
+        )
+
+
+class UnitPriceResolver:
+    """見積 1 件分の単価候補をまとめて解決する。
+
+    Usage:
+        resolver = UnitPriceResolver(client, company_id, region, fiscal_year)
+        await resolver.prefetch(items_data)
+        candidates = [resolver.candidates_for(item) for item in items_data]
+        await resolver.flush_used_counts()
+    """
+
+    def __init__(self, client: Any, company_id: str, region: str, fiscal_year: int) -> None:
+        self.client = client
+        self.company_id = company_id
+        self.region = region
+        self.fiscal_year = fiscal_year
+        self._past_by_category: dict[str, list[dict]] = {}
+        self._past_candidate: dict[str, dict] = {}
+        self._labor_index = LaborRateIndex([])
+        self._used_counts: Counter = Counter()
+
+    async def prefetch(self, items_data: list[dict]) -> None:
+        categories = list(dict.fromkeys(
+            item["category"] for item in items_data if item.get("category")
+        ))
+        self._past_by_category = await prefetch_past_prices(
+            self.client, self.company_id, categories,
+        )
+        now = datetime.now(timezone.utc)
+        self._past_candidate = {
+            category: past_price_candidate(rows, self.region, now)
+            for category, rows in self._past_by_category.items() if rows
+        }
+        self._labor_index = await load_labor_rate_index(
+            self.client, self.fiscal_year, self.region,
+        )
+
+    def candidates_for(self, item_data: dict) -> list[dict]:
+        candidates: list[dict] = []
+
+        # 1. 自社過去実績（加重平均 + 動的confidence）
+        category = item_data.get("category")
+        past_candidate = self._past_candidate.get(category)
+        if past_candidate is not None:
+            candidates.append(dict(past_candidate))
+            # used_count を更新（参照されたレコードのカウントを+1）
+            self._used_counts.update(pp["id"] for pp in self._past_by_category[category])
+
+        # 2. 公共工事設計労務単価
+        for lr in self._labor_index.match(item_data.get("detail", "")):
+            candidates.append({
+                "source": PriceSource.LABOR_RATE.value,
+                "unit_price": lr["daily_rate"],
+                "confidence": 0.95,
+                "detail": f"公共工事設計労務単価 {lr['occupation']} {lr['fiscal_year']}年度",
+            })
+
+        # 候補がない場合のみLLM推定
+        if not candidates:
+            candidates.append({
+                "source": PriceSource.AI_ESTIMATED.value,
+                "unit_price": None,
+                "confidence": 0.3,
+                "detail": "AI推定（要確認）",
+            })
+        return candidates
+
+    async def flush_used_counts(self) -> None:
+        increments, self._used_counts = self._used_counts, Counter()
+        try:
+            await apply_used_count_increments(self.client, self.company_id, increments)
+        except Exception as e:
+            # 学習指標の更新失敗で単価提示を止めない
+            logger.warning(f"used_count update failed: {e}")
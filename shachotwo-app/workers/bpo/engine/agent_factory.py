@@ -2,16 +2,29 @@
 
 会社ごとにカスタマイズされたAIエージェントの役割定義（BPOAgentRole）を、
 業種デフォルト設定とDB上のknowledge_itemsを組み合わせて構築する。
+
+キャッシュ:
+    - 担当業務ごとのキーワード照合器（KeywordMatcher）はプロセス内で1回だけ構築する
+    - 構築済みロールは (company_id, industry, genome) 単位で BPO_ROLE_CACHE_TTL_SEC 保持する。
+      knowledge_items を書き換えた箇所は invalidate_agent_roles(company_id) を呼ぶ
 """
 from __future__ import annotations
 
+import json
 import logging
+import os
+import time
+from functools import lru_cache
 from typing import Optional, Any
 
 from pydantic import BaseModel, Field
 
+from workers.bpo.engine.keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
+BPO_ROLE_CACHE_TTL_SEC = int(os.environ.get("BPO_ROLE_CACHE_TTL_SEC", "300"))
+
 
 # ─────────────────────────────────────
 # BPOAgentRoleモデル
@@ -48,6 +61,51 @@ class BPOAgentRole(BaseModel):
     """draft / auto_review / auto_execute。trust_levelから導出される。"""
 
 
+# ─────────────────────────────────────
+# キーワード照合器・ロールキャッシュ
+# ─────────────────────────────────────
+
+def _ngrams(text: str, min_n: int = 2, max_n: int = 4) -> set[str]:
+    """テキストから重複なしN-gramを生成する（日本語対応）。
+
+    日本語は split() で単語分割できないため、スペース区切りのトークン（英数字向け）と
+    文字N-gram（2〜4文字、日本語向け）の両方をキーワードにする。
+    """
+    tokens: set[str] = {word for word in text.split() if len(word) >= min_n}
+    for n in range(min_n, max_n + 1):
+        for i in range(len(text) - n + 1):
+            tokens.add(text[i:i + n])
+    return tokens
+
+
+@lru_cache(maxsize=256)
+def _responsibility_matcher(responsibilities: tuple[str, ...]) -> tuple[str, KeywordMatcher]:
+    """担当業務 → (小文字化した担当業務テキスト, N-gram照合器)。同じ担当業務なら再利用する。"""
+    text = " ".join(responsibilities).lower()
+    return text, KeywordMatcher(_ngrams(text))
+
+
+_role_cache: dict[tuple[str, str, str], tuple[float, list[BPOAgentRole]]] = {}
+
+
+def _genome_key(genome_data: Optional[dict[str, Any]]) -> str:
+    if not genome_data:
+        return ""
+    return json.dumps(genome_data, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def invalidate_agent_roles(company_id: Optional[str] = None) -> None:
+    """構築済みロールのキャッシュを破棄する。knowledge_items の追加・更新・削除後に呼ぶ。
+
+    company_id を省略すると全社分を破棄する（他プロセスは TTL で追従）。
+    """
+    if company_id is None:
+        _role_cache.clear()
+        return
+    for key in [k for k in _role_cache if k[0] == company_id]:
+        del _role_cache[key]
+
+
 # ─────────────────────────────────────
 # AgentFactory
 # ─────────────────────────────────────
@@ -235,6 +293,7 @@ class AgentFactory:
 
         Returns:
             BPOAgentRoleのリスト。未知の業種の場合は空リストを返す。
+            同じ会社・業種・ゲノムの結果は BPO_ROLE_CACHE_TTL_SEC の間キャッシュから返す。
         """
         # 1. DEFAULT_ROLESから業種のデフォルトロールを取得
         default_templates = self.DEFAULT_ROLES.get(industry, [])
@@ -242,6 +301,11 @@ class AgentFactory:
             logger.warning(f"未知の業種: {industry}。DEFAULT_ROLESに定義がありません。")
             return []
 
+        cache_key = (company_id, industry, _genome_key(genome_data))
+        cached = _role_cache.get(cache_key)
+        if cached is not None and time.monotonic() < cached[0]:
+            return [role.model_copy(deep=True) for role in cached[1]]
+
         # 2. ゲノムデータからルールと追加ロールを展開
         genome_domain_rules: list[dict[str, Any]] = []
         genome_extra_roles: list[dict[str, Any]] = []
@@ -280,6 +344,10 @@ class AgentFactory:
             f"AgentFactory: company={company_id} industry={industry} "
             f"roles={[r.role_name for r in roles]} trust_level={trust_level}"
         )
+        _role_cache[cache_key] = (
+            time.monotonic() + BPO_ROLE_CACHE_TTL_SEC,
+            [role.model_copy(deep=True) for role in roles],
+        )
         return roles
 
     async def get_role(
@@ -298,7 +366,12 @@ class AgentFactory:
         Returns:
             マッチするBPOAgentRole。見つからない場合はNone。
         """
-        industries = [industry] if industry else list(self.DEFAULT_ROLES.keys())
+        # ゲノム無しの create_roles は DEFAULT_ROLES のロールしか返さないので、
+        # role_name を持つ業種だけ構築する（無関係な業種のDB取得を省く）
+        industries = [industry] if industry else [
+            ind for ind, templates in self.DEFAULT_ROLES.items()
+            if any(t["role_name"] == role_name for t in templates)
+        ]
 
         for ind in industries:
             roles = await self.create_roles(company_id, ind)
@@ -327,40 +400,26 @@ class AgentFactory:
         if not knowledge_items:
             return role
 
-        responsibilities_text = " ".join(role.responsibilities).lower()
-        injected_context: list[dict[str, Any]] = []
-        injected_rules: list[dict[str, Any]] = []
-
-        # 日本語は split() で単語分割できないため、N-gram（2〜4文字）でキーワードを生成する
-        def _ngrams(text: str, min_n: int = 2, max_n: int = 4) -> list[str]:
-            """テキストから重複なしN-gramを生成する（日本語対応）。"""
-            tokens: set[str] = set()
-            # スペース区切りのトークン（英数字向け）
-            for word in text.split():
-                if len(word) >= min_n:
-                    tokens.add(word)
-            # 文字N-gram（日本語向け）
-            for n in range(min_n, max_n + 1):
-                for i in range(len(text) - n + 1):
-                    tokens.add(text[i:i + n])
-            return list(tokens)
-
-        responsibility_keywords = _ngrams(responsibilities_text)
+        responsibilities_text, matcher = _responsibility_matcher(tuple(role.responsibilities))
+        relevant: list[tuple[int, dict[str, Any]]] = []
 
         for item in knowledge_items:
             item_domain = str(item.get("domain", "")).lower()
             item_content = str(item.get("content", "")).lower()
             item_title = str(item.get("title", "")).lower()
-            item_type = str(item.get("item_type", "")).lower()
 
-            # responsibilitiesとの関連度チェック（N-gramマッチ）
-            is_relevant = any(
-                keyword in item_content or keyword in item_title
-                for keyword in responsibility_keywords
-            ) or item_domain in responsibilities_text
+            # responsibilitiesとの関連度（タイトル・本文に現れたN-gramの異なり数）
+            score = matcher.count_matches(item_title, item_content)
+            if score or item_domain in responsibilities_text:
+                relevant.append((score, item))
 
-            if not is_relevant:
-                continue
+        injected_context: list[dict[str, Any]] = []
+        injected_rules: list[dict[str, Any]] = []
+
+        # 関連度の高い順に注入する（同点は取得順）
+        relevant.sort(key=lambda pair: -pair[0])
+        for _, item in relevant:
+            item_type = str(item.get("item_type", "")).lower()
 
             context_entry = {
                 "id": item.get("id"),
@@ -444,11 +503,11 @@ class AgentFactory:
         DBに接続できない場合（テスト環境等）は空リストを返す。
         """
         try:
-            from db.supabase import get_service_client
+            from db.supabase import execute, get_service_client
             db = get_service_client()
-            result = db.table("knowledge_items").select(
+            result = await execute(db.table("knowledge_items").select(
                 "id, title, content, item_type, domain, source_type"
-            ).eq("company_id", company_id).eq("domain", domain).execute()
+            ).eq("company_id", company_id).eq("domain", domain))
             return result.data or []
         except Exception as e:
             logger.debug(f"knowledge_items取得スキップ (company={company_id} domain={domain}): {e}")
@@ -3,6 +3,9 @@
 全業種パイプラインが継承するテンプレートメソッドパターン実装。
 OCR -> 抽出 -> 補完 -> 計算 -> 検証 -> 異常検知 -> 生成 の7ステップを共通化する。
 
+ステップは steps（StepSpec の depends_on）で DAG として宣言し、依存が揃ったものから並列に実行する。
+既定では 検証・異常検知・生成 が計算の完了後に同時に走る。
+
 使い方:
     class MyPipeline(BasePipeline):
         pipeline_name = "my_pipeline"
@@ -10,12 +13,19 @@ OCR -> 抽出 -> 補完 -> 計算 -> 検証 -> 異常検知 -> 生成 の7ステ
         validation_rules = {"required_fields": ["field"]}
 
     result = await MyPipeline().run(company_id="cid", payload={"text": "..."})
+
+独自ステップの追加（_step_<name>(company_id, data) を実装する）:
+    class MyPipeline(BasePipeline):
+        steps = BasePipeline.steps + (StepSpec("fetch_crm", depends_on=("extract",)),)
 """
 from abc import ABC
+from dataclasses import dataclass
 from typing import Any, Callable, Coroutine, Optional
 import asyncio
 import logging
+import time
 
+from workers.bpo.engine.checkpoint import PipelineCheckpointer, checkpoints_enabled
 from workers.micro.models import MicroAgentInput, MicroAgentOutput
 
 logger = logging.getLogger(__name__)
@@ -29,6 +39,7 @@ class PipelineStepResult:
             SaaS書き込み等の副作用を持つステップでTrueにする。
         compensation_data: 補償に必要なデータ（IDや変更前の値など）。
             Phase 1ではログに記録するのみ。実際のSaaS取消はPhase 2で実装。
+        resumed: チェックポイントから復元した（今回は実行していない）かどうか。
     """
 
     def __init__(
@@ -52,6 +63,7 @@ class PipelineStepResult:
         self.data = data or {}
         self.compensatable = compensatable
         self.compensation_data = compensation_data or {}
+        self.resumed = False
 
     def to_dict(self) -> dict[str, Any]:
         d: dict[str, Any] = {"name": self.name}
@@ -62,8 +74,81 @@ class PipelineStepResult:
             d["confidence"] = self.confidence
             d["cost_yen"] = self.cost_yen
             d["duration_ms"] = self.duration_ms
+        if self.resumed:
+            d["resumed"] = True
         return d
 
+    def to_checkpoint(self) -> dict[str, Any]:
+        """チェックポイント保存用の全フィールド。"""
+        return {
+            "name": self.name,
+            "success": self.success,
+            "skipped": self.skipped,
+            "confidence": self.confidence,
+            "cost_yen": self.cost_yen,
+            "duration_ms": self.duration_ms,
+            "data": self.data,
+            "compensatable": self.compensatable,
+            "compensation_data": self.compensation_data,
+        }
+
+    @classmethod
+    def from_checkpoint(cls, saved: dict[str, Any]) -> "PipelineStepResult":
+        """保存済みの結果を復元する。今回は実行していないのでコスト・時間は 0。"""
+        step = cls(**{**saved, "cost_yen": 0.0, "duration_ms": 0})
+        step.resumed = True
+        return step
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    """DAG の1ステップ。depends_on の全ステップが終わった時点で起動する。
+
+    Attributes:
+        name: ステップ名。_step_<name> メソッドで実行される。
+        depends_on: 先行ステップ名。入力データは先行ステップの出力を宣言順にマージしたもの。
+        stop_on_failure: 失敗（リトライ後も success=False）したら新しいステップを起動せず
+            パイプラインを失敗で終える。実行中の他ステップは完了を待つ。
+    """
+    name: str
+    depends_on: tuple[str, ...] = ()
+    stop_on_failure: bool = False
+
+
+DEFAULT_STEPS: tuple[StepSpec, ...] = (
+    StepSpec("ocr", stop_on_failure=True),
+    StepSpec("extract", ("ocr",), stop_on_failure=True),
+    StepSpec("enrich", ("extract",)),
+    StepSpec("calculate", ("enrich",)),
+    # 以下3つは計算結果を読むだけなので並列に実行する
+    StepSpec("validate", ("calculate",)),
+    StepSpec("anomaly_check", ("calculate",)),
+    StepSpec("generate", ("calculate",)),
+)
+
+
+def _validate_steps(steps: tuple[StepSpec, ...], owner: type) -> None:
+    """ステップ名の重複・未定義の依存・循環・実装メソッドの欠落を検出する。"""
+    names = [s.name for s in steps]
+    if len(names) != len(set(names)):
+        raise ValueError(f"{owner.__name__}.steps: ステップ名が重複しています: {names}")
+    known = set(names)
+    for spec in steps:
+        missing = [d for d in spec.depends_on if d not in known]
+        if missing:
+            raise ValueError(f"{owner.__name__}.steps: {spec.name} の依存 {missing} が未定義です")
+        if not hasattr(owner, f"_step_{spec.name}"):
+            raise ValueError(f"{owner.__name__}.steps: _step_{spec.name} が実装されていません")
+    remaining = {s.name: set(s.depends_on) for s in steps}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"{owner.__name__}.steps: 依存関係が循環しています: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
 
 class BasePipeline(ABC):
     """全BPOパイプラインの基底クラス。
@@ -80,6 +165,9 @@ class BasePipeline(ABC):
                   ranges（{フィールド名: [min, max]}）
                   rules（カスタムルールリスト）
         generate_template (str | None): document_generatorのテンプレート名。Noneならスキップ。
+        steps (tuple[StepSpec, ...]): ステップDAG。既定は DEFAULT_STEPS。
+        checkpointing (bool): 成功したステップの結果を保存し、同じ入力での再実行時に
+            完了済みステップを再開扱いでスキップする（workers/bpo/engine/checkpoint.py）。
 
     以下のメソッドをオーバーライドして業種固有ロジックを注入できる:
         _step_enrich  - ルールマッチング・DB照合
@@ -91,16 +179,24 @@ class BasePipeline(ABC):
     validation_rules: dict[str, Any] = {}
     anomaly_config: Optional[dict[str, Any]] = None
     generate_template: Optional[str] = None
+    steps: tuple[StepSpec, ...] = DEFAULT_STEPS
+    checkpointing: bool = True
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _validate_steps(cls.steps, cls)
 
     # -------------------------------------------------------------------
     # メイン実行フロー（オーバーライド不要）
     # -------------------------------------------------------------------
 
     async def run(self, company_id: str, payload: dict[str, Any]) -> dict[str, Any]:
-        """7ステップパイプラインを順に実行する。
+        """ステップDAGを依存順に、並列実行可能なものは同時に実行する。
 
         各ステップは最大2回リトライ（合計3回試行）する。
         失敗時には compensatable=True のステップのリストを compensation_needed に記録する。
+        checkpointing=True なら、前回同じ payload で失敗・タイムアウトした実行の完了済みステップは
+        保存済みの結果で再開する（steps の各要素に resumed=True が付く）。
 
         Args:
             company_id: テナントID（RLSフィルタ用）
@@ -111,17 +207,28 @@ class BasePipeline(ABC):
         Returns:
             dict with keys:
                 pipeline (str): パイプライン名
-                steps (list[dict]): 各ステップの実行サマリ
+                steps (list[dict]): 各ステップの実行サマリ（steps の宣言順）
                 data (dict): 最終出力データ
                 success (bool): 全ステップ完了したか
                 anomaly_warnings (list[dict]): 異常検知で見つかった警告（あれば）
                 total_cost_yen (float): 全ステップのLLMコスト合計
                 total_duration_ms (int): 全ステップの処理時間合計（ms）
                 failed_step (str | None): 失敗したステップ名
+                timing (dict): 実測の壁時計時間・ステップ別の開始/終了・クリティカルパス
+                resumed_steps (list[str]): チェックポイントから再開したステップ名
                 compensation_needed (list[dict]): 補償が必要なステップ情報。
                     失敗時のみ設定。Phase 1ではログ記録のみ、実際のSaaS取消はPhase 2。
         """
-        step_results: list[PipelineStepResult] = []
+        specs = self.steps
+        step_results: dict[str, PipelineStepResult] = {}
+        outputs: dict[str, dict[str, Any]] = {}           # ステップ名 → 下流へ渡すデータ
+        timings: dict[str, tuple[float, float]] = {}      # ステップ名 → (開始, 終了)
+        context: dict[str, Any] = {"text": ""}
+        checkpointer = PipelineCheckpointer(
+            self.pipeline_name, company_id, payload,
+            enabled=self.checkpointing and checkpoints_enabled(),
+        )
+        started = time.monotonic()
         result: dict[str, Any] = {
             "pipeline": self.pipeline_name,
             "steps": [],
@@ -131,17 +238,23 @@ class BasePipeline(ABC):
             "total_cost_yen": 0.0,
             "total_duration_ms": 0,
             "failed_step": None,
+            "resumed_steps": checkpointer.resumed_steps,
         }
 
+        def _ordered() -> list[PipelineStepResult]:
+            return [step_results[s.name] for s in specs if s.name in step_results]
+
         def _fail(step_name: str) -> dict[str, Any]:
             """失敗時の共通後処理。補償情報を収集して返す。"""
+            ordered = _ordered()
             result["failed_step"] = step_name
-            result["steps"] = [s.to_dict() for s in step_results]
-            self._accumulate_totals(result, step_results)
+            result["steps"] = [s.to_dict() for s in ordered]
+            self._accumulate_totals(result, ordered)
+            result["timing"] = self._timing_breakdown(timings, started)
             # 成功済みかつ補償可能なステップを記録（Phase 1: ログのみ）
             compensation_needed = [
                 {"step": s.name, "compensation_data": s.compensation_data}
-                for s in step_results
+                for s in ordered
                 if s.success and not s.skipped and s.compensatable
             ]
             if compensation_needed:
@@ -153,71 +266,145 @@ class BasePipeline(ABC):
                 )
             return result
 
-        # Step 1: OCR
-        text, step1 = await self._retry_step(
-            lambda: self._step_ocr(company_id, payload),
-            step_name="ocr",
-        )
-        step_results.append(step1)
-        if not step1.success and not step1.skipped:
-            return _fail("ocr")
-
-        # Step 2: 構造化抽出
-        extracted, step2 = await self._retry_step(
-            lambda: self._step_extract(company_id, text, payload),
-            step_name="extract",
-        )
-        step_results.append(step2)
-        if not step2.success and not step2.skipped:
-            return _fail("extract")
-
-        working_data: dict[str, Any] = extracted
-
-        # Step 3: 補完（ルールマッチング等）
-        (enriched, step3) = await self._retry_step(
-            lambda: self._step_enrich(company_id, working_data),
-            step_name="enrich",
-        )
-        step_results.append(step3)
-        working_data = enriched
-
-        # Step 4: 計算
-        (calculated, step4) = await self._retry_step(
-            lambda: self._step_calculate(company_id, working_data),
-            step_name="calculate",
-        )
-        step_results.append(step4)
-        working_data = calculated
-
-        # Step 5: バリデーション
-        step5 = await self._retry_step(
-            lambda: self._step_validate(company_id, working_data),
-            step_name="validate",
-        )
-        step_results.append(step5)
-
-        # Step 6: 異常検知
-        step6 = await self._retry_step(
-            lambda: self._step_anomaly_check(company_id, working_data, result),
-            step_name="anomaly_check",
-        )
-        step_results.append(step6)
-
-        # Step 7: ドキュメント生成
-        (generated, step7) = await self._retry_step(
-            lambda: self._step_generate(company_id, working_data),
-            step_name="generate",
-        )
-        step_results.append(step7)
-        if generated is not None:
-            working_data = {**working_data, **generated}
-
-        result["data"] = working_data
+        pending = {s.name: set(s.depends_on) for s in specs}
+        running: dict[asyncio.Task, StepSpec] = {}
+        failed_step: Optional[str] = None
+
+        def _launch_ready() -> None:
+            for spec in specs:
+                if spec.name in pending and not pending[spec.name]:
+                    del pending[spec.name]
+                    data = self._merge_step_inputs(spec.depends_on, outputs)
+                    task = asyncio.create_task(
+                        self._execute_step(spec, company_id, payload, data, context, result, checkpointer)
+                    )
+                    running[task] = spec
+
+        _launch_ready()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    spec = running.pop(task)
+                    data, step, begin, finish = task.result()
+                    step_results[spec.name] = step
+                    outputs[spec.name] = data
+                    timings[spec.name] = (begin, finish)
+                    if spec.stop_on_failure and not step.success and not step.skipped:
+                        failed_step = failed_step or spec.name
+                    for deps in pending.values():
+                        deps.discard(spec.name)
+                if failed_step is None:
+                    _launch_ready()
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+        if failed_step is not None:
+            return _fail(failed_step)
+
+        # 最終データ = 後続を持たないステップの出力を宣言順にマージ
+        depended = {d for s in specs for d in s.depends_on}
+        sinks = tuple(s.name for s in specs if s.name not in depended)
+        ordered = _ordered()
+        result["data"] = self._merge_step_inputs(sinks, outputs)
         result["success"] = True
-        result["steps"] = [s.to_dict() for s in step_results]
-        self._accumulate_totals(result, step_results)
+        result["steps"] = [s.to_dict() for s in ordered]
+        self._accumulate_totals(result, ordered)
+        result["timing"] = self._timing_breakdown(timings, started)
+        await checkpointer.complete()
         return result
 
+    async def _execute_step(
+        self,
+        spec: StepSpec,
+        company_id: str,
+        payload: dict[str, Any],
+        data: dict[str, Any],
+        context: dict[str, Any],
+        result: dict[str, Any],
+        checkpointer: Optional[PipelineCheckpointer] = None,
+    ) -> tuple[dict[str, Any], PipelineStepResult, float, float]:
+        """1ステップをリトライ付きで実行し、(下流へ渡すデータ, 結果, 開始, 終了) を返す。"""
+        name = spec.name
+        method = getattr(self, f"_step_{name}")
+        if name == "ocr":
+            step_input: Any = payload
+            factory = lambda: method(company_id, payload)  # noqa: E731
+        elif name == "extract":
+            step_input = {"text": context["text"], "payload": payload}
+            factory = lambda: method(company_id, context["text"], payload)  # noqa: E731
+        elif name == "anomaly_check":
+            step_input = data
+            factory = lambda: method(company_id, data, result)  # noqa: E731
+        else:
+            step_input = data
+            factory = lambda: method(company_id, data)  # noqa: E731
+
+        begin = time.monotonic()
+        saved = await checkpointer.lookup(name, step_input) if checkpointer else None
+        if saved is not None:
+            step = PipelineStepResult.from_checkpoint(saved.result)
+            value = saved.output
+            if name == "anomaly_check" and step.data.get("anomaly_count", 0) > 0:
+                result["anomaly_warnings"] = step.data.get("anomalies", [])
+        else:
+            out = await self._retry_step(factory, step_name=name)
+            if isinstance(out, PipelineStepResult):
+                step, value = out, None
+            else:
+                value, step = out[0], out[-1]
+            if checkpointer and step.success and not step.skipped:
+                await checkpointer.record(name, step_input, step.to_checkpoint(), value)
+        finish = time.monotonic()
+
+        if name == "ocr":
+            context["text"] = value or ""
+            return data, step, begin, finish
+        if name == "generate":
+            return ({**data, **value} if value is not None else data), step, begin, finish
+        return (value if isinstance(value, dict) else data), step, begin, finish
+
+    @staticmethod
+    def _merge_step_inputs(
+        names: tuple[str, ...], outputs: dict[str, dict[str, Any]]
+    ) -> dict[str, Any]:
+        """先行ステップの出力をマージする（1つならそのまま渡す）。"""
+        if len(names) == 1:
+            return outputs.get(names[0], {})
+        merged: dict[str, Any] = {}
+        for name in names:
+            merged.update(outputs.get(name, {}))
+        return merged
+
+    def _timing_breakdown(
+        self, timings: dict[str, tuple[float, float]], started: float
+    ) -> dict[str, Any]:
+        """ステップ別の開始/終了と、最後に終わったステップから辿ったクリティカルパス。"""
+        deps = {s.name: s.depends_on for s in self.steps}
+        path: list[str] = []
+        current = max(timings, key=lambda n: timings[n][1]) if timings else None
+        while current is not None:
+            path.append(current)
+            finished = [d for d in deps.get(current, ()) if d in timings]
+            current = max(finished, key=lambda d: timings[d][1]) if finished else None
+        path.reverse()
+
+        def _ms(t: float) -> int:
+            return int((t - started) * 1000)
+
+        return {
+            "wall_ms": int((time.monotonic() - started) * 1000),
+            "critical_path": path,
+            "critical_path_ms": sum(_ms(timings[n][1]) - _ms(timings[n][0]) for n in path),
+            "steps": {
+                name: {"start_ms": _ms(b), "end_ms": _ms(f), "duration_ms": _ms(f) - _ms(b)}
+                for name, (b, f) in timings.items()
+            },
+        }
+
     async def _retry_step(
         self,
         coro_factory: Callable[[], Coroutine[Any, Any, Any]],
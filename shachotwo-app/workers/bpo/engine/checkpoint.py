@@ -0,0 +1,306 @@
+"""パイプラインのステップ単位チェックポイント。
+
+タイムアウトや途中ステップの失敗で再実行されたとき、同じ入力で完了済みのステップ
+（OCR・LLM抽出など課金の重い処理）を再実行せず保存済みの出力から再開する。
+
+キー: (pipeline, company_id, 実行入力のハッシュ) → ステップ名ごとに
+    step_input_hash（そのステップへの入力のハッシュ）・ステップ結果・出力データ を保持する。
+ステップ入力のハッシュが一致した場合だけ再利用する（上流の結果が変われば再実行）。
+パイプラインが最後まで成功したら clear() で削除し、残ったものは BPO_CHECKPOINT_TTL_SEC で失効する。
+
+バックエンドは env BPO_CHECKPOINT_BACKEND（未指定なら BPO_QUEUE_BACKEND と同じ）:
+    memory   : プロセス内（同じプロセスでのリトライのみ再開できる）
+    postgres : bpo_pipeline_checkpoints テーブル（migration 063）
+    redis    : ハッシュ + EXPIRE（REDIS_URL）
+
+無効化: BPO_PIPELINE_CHECKPOINTS=0
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+BPO_CHECKPOINT_TTL_SEC = int(os.environ.get("BPO_CHECKPOINT_TTL_SEC", str(24 * 3600)))
+_REDIS_PREFIX = "bpo:ckpt:"
+
+
+def checkpoints_enabled() -> bool:
+    return os.environ.get("BPO_PIPELINE_CHECKPOINTS", "1").lower() not in ("0", "false", "no")
+
+
+def input_hash(value: Any) -> str:
+    """JSON 正規化（キー順ソート）した値の sha256。"""
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StepCheckpoint:
+    step: str
+    step_input_hash: str
+    result: dict[str, Any] = field(default_factory=dict)   # ステップ結果（PipelineStepResult / MicroAgentOutput）
+    output: Any = None                                      # 下流に渡した出力データ
+    created_at: float = field(default_factory=time.time)
+
+
+class CheckpointStore(Protocol):
+    async def load(self, pipeline: str, company_id: str, run_hash: str) -> dict[str, StepCheckpoint]: ...
+    async def save(self, pipeline: str, company_id: str, run_hash: str, checkpoint: StepCheckpoint) -> None: ...
+    async def clear(self, pipeline: str, company_id: str, run_hash: str) -> None: ...
+    async def purge_expired(self) -> int: ...
+
+
+class MemoryCheckpointStore:
+    def __init__(self, ttl_sec: int = BPO_CHECKPOINT_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+        self._runs: dict[tuple[str, str, str], tuple[float, dict[str, StepCheckpoint]]] = {}
+
+    async def load(self, pipeline: str, company_id: str, run_hash: str) -> dict[str, StepCheckpoint]:
+        key = (pipeline, company_id, run_hash)
+        entry = self._runs.get(key)
+        if entry is None:
+            return {}
+        if time.time() >= entry[0]:
+            del self._runs[key]
+            return {}
+        return dict(entry[1])
+
+    async def save(self, pipeline: str, company_id: str, run_hash: str, checkpoint: StepCheckpoint) -> None:
+        key = (pipeline, company_id, run_hash)
+        _, steps = self._runs.get(key, (0.0, {}))
+        steps[checkpoint.step] = checkpoint
+        self._runs[key] = (time.time() + self.ttl_sec, steps)
+
+    async def clear(self, pipeline: str, company_id: str, run_hash: str) -> None:
+        self._runs.pop((pipeline, company_id, run_hash), None)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [k for k, (expires_at, _) in self._runs.items() if now >= expires_at]
+        for key in expired:
+            del self._runs[key]
+        return len(expired)
+
+
+class PostgresCheckpointStore:
+    _TABLE = "bpo_pipeline_checkpoints"
+
+    def __init__(self, ttl_sec: int = BPO_CHECKPOINT_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+
+    async def load(self, pipeline: str, company_id: str, run_hash: str) -> dict[str, StepCheckpoint]:
+        from db.supabase import execute, get_service_client
+        result = await execute(
+            get_service_client().table(self._TABLE)
+            .select("step, step_input_hash, result, output, created_at")
+            .eq("pipeline", pipeline).eq("company_id", company_id).eq("input_hash", run_hash)
+            .gt("expires_at", datetime.now(timezone.utc).isoformat())
+        )
+        return {
+            row["step"]: StepCheckpoint(
+                step=row["step"],
+                step_input_hash=row["step_input_hash"],
+                result=row.get("result") or {},
+                output=row.get("output"),
+            )
+            for row in (result.data or [])
+        }
+
+    async def save(self, pipeline: str, company_id: str, run_hash: str, checkpoint: StepCheckpoint) -> None:
+        from db.supabase import execute, get_service_client
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_sec)
+        await execute(
+            get_service_client().table(self._TABLE).upsert({
+                "pipeline": pipeline,
+                "company_id": company_id,
+                "input_hash": run_hash,
+                "step": checkpoint.step,
+                "step_input_hash": checkpoint.step_input_hash,
+                "result": _jsonable(checkpoint.result),
+                "output": _jsonable(checkpoint.output),
+                "expires_at": expires_at.isoformat(),
+            }, on_conflict="pipeline,company_id,input_hash,step")
+        )
+
+    async def clear(self, pipeline: str, company_id: str, run_hash: str) -> None:
+        from db.supabase import execute, get_service_client
+        await execute(
+            get_service_client().table(self._TABLE).delete()
+            .eq("pipeline", pipeline).eq("company_id", company_id).eq("input_hash", run_hash)
+        )
+
+    async def purge_expired(self) -> int:
+        from db.supabase import execute, get_service_client
+        result = await execute(get_service_client().rpc("purge_bpo_pipeline_checkpoints", {}))
+        return int(result.data or 0)
+
+
+class RedisCheckpointStore:
+    """実行ごとに 1 ハッシュ（field=ステップ名）。EXPIRE で失効するので purge は不要。"""
+
+    def __init__(self, url: str, ttl_sec: int = BPO_CHECKPOINT_TTL_SEC) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.ttl_sec = ttl_sec
+
+    @staticmethod
+    def _key(pipeline: str, company_id: str, run_hash: str) -> str:
+        return f"{_REDIS_PREFIX}{pipeline}:{company_id}:{run_hash}"
+
+    async def load(self, pipeline: str, company_id: str, run_hash: str) -> dict[str, StepCheckpoint]:
+        raw = await self._redis.hgetall(self._key(pipeline, company_id, run_hash))
+        return {step: StepCheckpoint(**json.loads(value)) for step, value in raw.items()}
+
+    async def save(self, pipeline: str, company_id: str, run_hash: str, checkpoint: StepCheckpoint) -> None:
+        key = self._key(pipeline, company_id, run_hash)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hset(key, checkpoint.step, json.dumps(_jsonable(asdict(checkpoint)), ensure_ascii=False))
+        pipe.expire(key, self.ttl_sec)
+        await pipe.execute()
+
+    async def clear(self, pipeline: str, company_id: str, run_hash: str) -> None:
+        await self._redis.delete(self._key(pipeline, company_id, run_hash))
+
+    async def purge_expired(self) -> int:
+        return 0
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+# ─── 実行単位のヘルパー ──────────────────────────────────────────────────────
+
+
+class PipelineCheckpointer:
+    """1回のパイプライン実行に対応するチェックポイント操作。
+
+    使い方:
+        ckpt = PipelineCheckpointer("construction/estimation", company_id, input_data)
+        out = await ckpt.micro_step("document_ocr", ocr_payload, lambda: run_document_ocr(...))
+        ...
+        await ckpt.complete()   # 全ステップ成功時
+    """
+
+    def __init__(
+        self,
+        pipeline: str,
+        company_id: str,
+        run_input: Any,
+        store: Optional[CheckpointStore] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        self.pipeline = pipeline
+        self.company_id = company_id
+        self.run_hash = input_hash(run_input)
+        self.enabled = checkpoints_enabled() if enabled is None else enabled
+        self._store = store
+        self._loaded: Optional[dict[str, StepCheckpoint]] = None
+        self.resumed_steps: list[str] = []
+
+    @property
+    def store(self) -> CheckpointStore:
+        return self._store or get_checkpoint_store()
+
+    async def load(self) -> int:
+        """保存済みチェックポイントを読み込み、件数を返す。
+
+        lookup() は初回に自動で読み込むが、並行ワーカーから使う場合は先に1回呼んでおく。
+        """
+        if not self.enabled:
+            return 0
+        if self._loaded is None:
+            try:
+                self._loaded = await self.store.load(self.pipeline, self.company_id, self.run_hash)
+            except Exception as e:
+                logger.warning(f"checkpoint load failed ({self.pipeline}): {e}")
+                self._loaded = {}
+        return len(self._loaded)
+
+    async def lookup(self, step: str, step_input: Any) -> Optional[StepCheckpoint]:
+        """同じステップ入力で完了済みのチェックポイントを返す（なければ None）。"""
+        if not self.enabled:
+            return None
+        await self.load()
+        checkpoint = self._loaded.get(step)
+        if checkpoint is None or checkpoint.step_input_hash != input_hash(step_input):
+            return None
+        self.resumed_steps.append(step)
+        logger.info(f"[{self.pipeline}] チェックポイントから再開: step={step}")
+        return checkpoint
+
+    async def record(self, step: str, step_input: Any, result: dict[str, Any], output: Any = None) -> None:
+        if not self.enabled:
+            return
+        checkpoint = StepCheckpoint(step=step, step_input_hash=input_hash(step_input), result=result, output=output)
+        try:
+            await self.store.save(self.pipeline, self.company_id, self.run_hash, checkpoint)
+        except Exception as e:
+            logger.warning(f"checkpoint save failed ({self.pipeline}/{step}): {e}")
+
+    async def complete(self) -> None:
+        """全ステップ成功後に呼ぶ。同じ入力の次回実行は最初から行う。"""
+        if not self.enabled:
+            return
+        try:
+            await self.store.clear(self.pipeline, self.company_id, self.run_hash)
+        except Exception as e:
+            logger.debug(f"checkpoint clear failed ({self.pipeline}): {e}")
+
+    async def micro_step(self, step: str, step_input: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """MicroAgentOutput を返すステップをチェックポイント付きで実行する。
+
+        再開時は保存済みの出力を cost_yen=0 / duration_ms=0 で返す（今回は課金されていないため）。
+        成功した出力だけを保存する。
+        """
+        from workers.micro.models import MicroAgentOutput
+
+        checkpoint = await self.lookup(step, step_input)
+        if checkpoint is not None:
+            return MicroAgentOutput.model_validate({**checkpoint.result, "cost_yen": 0.0, "duration_ms": 0})
+        out = await factory()
+        if getattr(out, "success", False):
+            await self.record(step, step_input, out.model_dump(mode="json"))
+        return out
+
+
+# ─── factory ────────────────────────────────────────────────────────────────
+
+_store: Optional[CheckpointStore] = None
+
+
+def checkpoint_backend() -> str:
+    return (
+        os.environ.get("BPO_CHECKPOINT_BACKEND")
+        or os.environ.get("BPO_QUEUE_BACKEND", "memory")
+    ).lower()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """プロセス共通の CheckpointStore（バックエンドは env BPO_CHECKPOINT_BACKEND）。"""
+    global _store
+    if _store is None:
+        backend = checkpoint_backend()
+        if backend == "postgres":
+            _store = PostgresCheckpointStore()
+        elif backend == "redis":
+            try:
+                _store = RedisCheckpointStore(os.environ.get("REDIS_URL", "redis://localhost:6379"))
+            except Exception as e:
+                logger.warning(f"checkpoint redis backend unavailable, using memory: {e}")
+        if _store is None:
+            _store = MemoryCheckpointStore()
+    return _store
+
+
+def reset_checkpoint_store() -> None:
+    """プロセス共通ストアを破棄する（テスト用）。"""
+    global _store
+    _store = None
@@ -138,6 +138,8 @@ class GenomeRegistry:
         # key → GenomePipelineEntry
         self._registry: dict[str, GenomePipelineEntry] = {}
         self._loaded = False
+        # ロード時点の JSON ファイル群の (パス, mtime_ns, サイズ)。reload_if_changed の比較用
+        self._fingerprint: tuple = ()
 
     # ──────────────────────────────────────────────────────
     # Public API
@@ -150,6 +152,7 @@ class GenomeRegistry:
 
         self._registry.clear()
         genome_dir = os.path.abspath(self.genome_dir)
+        self._fingerprint = self.fingerprint()
 
         if not os.path.isdir(genome_dir):
             logger.warning(f"ゲノムディレクトリが存在しません: {genome_dir}")
@@ -189,6 +192,36 @@ class GenomeRegistry:
         )
         self._loaded = True
 
+    async def reload_if_changed(self) -> bool:
+        """ゲノムJSONが追加・削除・更新されていれば再ロードする。再ロードした場合 True。
+
+        判定はファイルの mtime/サイズのみで行うため、変更がなければ JSON は読まない。
+        """
+        if self._loaded and self.fingerprint() == self._fingerprint:
+            return False
+        self._loaded = False
+        await self.load()
+        return True
+
+    def fingerprint(self) -> tuple:
+        """genome_dir 直下と bpo/ 配下の *.json の (パス, mtime_ns, サイズ) 一覧。"""
+        genome_dir = os.path.abspath(self.genome_dir)
+        entries = []
+        for directory in (genome_dir, os.path.join(genome_dir, "bpo")):
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for filename in names:
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(directory, filename))
+                except OSError:
+                    continue
+                entries.append((os.path.join(directory, filename), st.st_mtime_ns, st.st_size))
+        return tuple(sorted(entries))
+
     def get_pipeline(self, key: str) -> Optional[GenomePipelineEntry]:
         """パイプライン情報を取得する。未登録の場合は None を返す。"""
         return self._registry.get(key)
@@ -0,0 +1,81 @@
+"""KeywordMatcher — Aho-Corasick による複数キーワードの一括照合。
+
+AgentFactory のナレッジ注入で、ロールの担当業務から作った N-gram キーワード群を
+各ナレッジのタイトル・本文に対して 1 パスで照合する（キーワード数に依存しない線形時間）。
+
+    matcher = KeywordMatcher(["見積", "コスト", "見積作成"])
+    matcher.count_matches("見積作成の手順", "本文")   # → 2（見積・見積作成）
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable
+
+# 複数テキストを連結して走査するときの区切り文字。キーワードに含まれないので境界をまたいで一致しない
+_SEPARATOR = "\x00"
+
+
+class KeywordMatcher:
+    """キーワード集合をコンパイルしたオートマトン。構築後は不変なので共有してよい。"""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: tuple[str, ...] = tuple(sorted({k for k in keywords if k and _SEPARATOR not in k}))
+        # 状態 i の遷移表 / 失敗リンク / その状態で一致するキーワード番号（失敗リンク先の分も含む）
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        self._build()
+
+    def _build(self) -> None:
+        own: list[list[int]] = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    own.append([])
+                state = nxt
+            own[state].append(index)
+
+        self._out = [()] * len(self._goto)
+        queue: deque[int] = deque(self._goto[0].values())
+        for state in queue:
+            self._out[state] = tuple(own[state])
+        # BFS で失敗リンクを張る（浅い状態の出力は確定済みなので連結できる）
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = tuple(own[nxt]) + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def find(self, *texts: str) -> set[int]:
+        """texts のいずれかに出現するキーワードの番号集合（self.keywords の添字）。"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        state = 0
+        for ch in _SEPARATOR.join(texts):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def count_matches(self, *texts: str) -> int:
+        """texts に出現する異なりキーワード数。関連度スコアとして使う。"""
+        return len(self.find(*texts))
+
+    def matched_keywords(self, *texts: str) -> list[str]:
+        return [self.keywords[i] for i in sorted(self.find(*texts))]
@@ -0,0 +1,161 @@
+"""ステージグラフ — 件数の多いバッチを段階ごとの bounded queue で流すストリーミング実行。
+
+各ステージは concurrency 本のワーカーで動き、処理できた要素から次のステージへ渡す
+（前のステージの最遅要素を待たない）。キューは queue_size で上限を持つので、
+下流が詰まると上流も自然に待つ（LLM を一斉に叩かない）。
+
+    stages = [
+        Stage("research", research_one, concurrency=8, bucket=llm_bucket),
+        Stage("send", send_one, concurrency=2),
+    ]
+    result = await run_stages(companies, stages)
+    result.outputs            # 最終ステージの出力（完了順）
+    result.stats["research"]  # 件数・所要時間
+
+ハンドラが None を返した要素はそこで脱落する。例外は要素単位でログに残して脱落させる。
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # ワーカー終了の番兵
+
+
+class TokenBucket:
+    """非同期トークンバケット。rate_per_sec <= 0 なら無制限。
+
+    acquire() はトークンが貯まるまで待つ。待ち手は到着順に1本ずつ処理する。
+    """
+
+    def __init__(self, rate_per_sec: float, burst: float = 1.0) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate_per_sec <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_sec)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate_per_sec)
+
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[Any], Awaitable[Optional[Any]]]
+    concurrency: int = 1
+    bucket: Optional[TokenBucket] = None  # 各要素の処理前に1トークン取得する
+
+
+@dataclass
+class StageStats:
+    name: str
+    received: int = 0
+    emitted: int = 0     # 次のステージへ渡した件数
+    dropped: int = 0     # None を返した件数
+    failed: int = 0      # 例外で脱落した件数
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> int:
+        if self.started_at is None or self.finished_at is None:
+            return 0
+        return int((self.finished_at - self.started_at) * 1000)
+
+
+@dataclass
+class StageGraphResult:
+    outputs: list[Any] = field(default_factory=list)
+    stats: dict[str, StageStats] = field(default_factory=dict)
+    stopped: bool = False
+
+
+async def run_stages(
+    items: Iterable[Any],
+    stages: Sequence[Stage],
+    queue_size: int = 16,
+    stop: Optional[asyncio.Event] = None,
+) -> StageGraphResult:
+    """items を stages の順に流し、最終ステージの出力を返す。
+
+    stop がセットされると未処理の要素は捨てて速やかに終了する（日次上限到達など）。
+    """
+    if not stages:
+        return StageGraphResult(outputs=list(items))
+    stop = stop or asyncio.Event()
+    result = StageGraphResult(stats={s.name: StageStats(s.name) for s in stages})
+    queues: list[asyncio.Queue] = [asyncio.Queue(maxsize=max(queue_size, 1)) for _ in stages]
+    remaining = [max(s.concurrency, 1) for s in stages]
+
+    async def _feed() -> None:
+        for item in items:
+            if stop.is_set():
+                break
+            await queues[0].put(item)
+        for _ in range(remaining[0]):
+            await queues[0].put(_DONE)
+
+    async def _worker(index: int) -> None:
+        stage = stages[index]
+        stats = result.stats[stage.name]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                break
+            if stop.is_set():
+                continue
+            stats.received += 1
+            if stats.started_at is None:
+                stats.started_at = time.monotonic()
+            try:
+                if stage.bucket is not None:
+                    await stage.bucket.acquire()
+                out = await stage.handler(item)
+            except Exception as e:
+                stats.failed += 1
+                logger.warning(f"stage {stage.name}: 要素の処理に失敗（スキップ）: {e}")
+                out = None
+            else:
+                if out is None:
+                    stats.dropped += 1
+            stats.finished_at = time.monotonic()
+            if out is None:
+                continue
+            stats.emitted += 1
+            if outbox is None:
+                result.outputs.append(out)
+            else:
+                await outbox.put(out)
+        # 最後のワーカーが抜けたら次のステージのワーカーを終了させる
+        remaining[index] -= 1
+        if remaining[index] == 0 and outbox is not None:
+            for _ in range(remaining[index + 1]):
+                await outbox.put(_DONE)
+
+    tasks = [asyncio.create_task(_feed())]
+    for index, stage in enumerate(stages):
+        tasks.extend(asyncio.create_task(_worker(index)) for _ in range(remaining[index]))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    result.stopped = stop.is_set()
+    return result
@@ -1,11 +1,35 @@
-"""BPO Manager — ConditionEvaluator。knowledge_relationsのtriggers連鎖を評価する。"""
+"""BPO Manager — ConditionEvaluator。knowledge_relationsのtriggers連鎖を評価する。
+
+評価はテナント単位で次のようにまとめて行う:
+- knowledge_relations の動的条件は参照テーブルごとに 1 クエリ（必要な列をまとめて select）
+- 組み込みセールス連鎖（proactive_proposals）は全チェーン分を 1 クエリ
+- 各グループが依存するテーブルのウォーターマーク（最終更新時刻+行数。RPC get_condition_watermarks）
+  を前回評価時と比べ、変わったテーブルのグループだけ再評価する（時刻依存の条件は一定時間で再評価）
+- 直近 BPO_CONDITION_MEMO_SEC 以内の評価結果はそのまま返し、同時呼び出しは 1 回の評価に合流する
+
+パイプライン完了ごとの連鎖評価（task_router）は changed_only=True で呼び、
+再評価されたグループから生じたタスクだけを受け取る。
+"""
+import asyncio
 import logging
-from typing import Any
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
 
+from db.supabase import execute
 from workers.bpo.manager.models import BPOTask, TriggerType, ExecutionLevel
 
 logger = logging.getLogger(__name__)
 
+# 直近の評価結果を再利用する期間（連鎖パイプライン完了が続いても評価は 1 回）
+BPO_CONDITION_MEMO_SEC = float(os.environ.get("BPO_CONDITION_MEMO_SEC", "30"))
+# 時刻に依存する条件（SLA 期限・経過日数）の再評価間隔（条件サイクル 5 分より短く）
+BPO_CONDITION_TIME_STALE_SEC = float(os.environ.get("BPO_CONDITION_TIME_STALE_SEC", "240"))
+# 依存テーブルが変わらなくても再評価する上限（取りこぼし・一時エラーの保険）
+BPO_CONDITION_MAX_STALE_SEC = float(os.environ.get("BPO_CONDITION_MAX_STALE_SEC", "3600"))
+
 # --------------------------------------------------------------------------
 # 組み込み条件連鎖定義（セールス・CS ドメイン）
 # --------------------------------------------------------------------------
@@ -93,6 +117,8 @@ BUILTIN_SALES_CONDITION_CHAINS: list[dict[str, Any]] = [
 # --------------------------------------------------------------------------
 # proactive_proposals に依存せず、実際の業務テーブルを直接参照して条件を判定する。
 # evaluator は company_id を受け取り、条件に合致するレコードリストを返す非同期関数。
+# depends_on は evaluator が参照するテーブル（変更があったときだけ再評価する）、
+# time_dependent は現在時刻との比較を含む条件（BPO_CONDITION_TIME_STALE_SEC ごとに再評価）。
 # --------------------------------------------------------------------------
 BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
     {
@@ -103,6 +129,7 @@ BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
         "input_data": {"mode": "risk_alert", "reason": "health_score_low"},
         "description": "ヘルススコアが閾値以下の顧客 → 解約リスクアラート",
         "evaluator_key": "health_score_low",
+        "depends_on": "customers",
     },
     {
         "name": "sla_breach",
@@ -112,6 +139,8 @@ BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
         "input_data": {"mode": "escalation"},
         "description": "SLA超過チケット → サポートエスカレーション",
         "evaluator_key": "sla_breach",
+        "depends_on": "support_tickets",
+        "time_dependent": True,
     },
     {
         "name": "upsell_high",
@@ -121,6 +150,8 @@ BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
         "input_data": {"mode": "followup_reminder"},
         "description": "ヘルススコア高 + 契約6ヶ月以上の顧客 → アップセル提案",
         "evaluator_key": "upsell_high",
+        "depends_on": "customers",
+        "time_dependent": True,
     },
     {
         "name": "lost_reengagement",
@@ -130,6 +161,8 @@ BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
         "input_data": {"mode": "reengagement_pdca"},
         "description": "失注後30日以内の案件 → 再エンゲージメントPDCA",
         "evaluator_key": "lost_reengagement",
+        "depends_on": "opportunities",
+        "time_dependent": True,
     },
 ]
 
@@ -143,12 +176,11 @@ BUILTIN_CONDITION_CHAINS: list[dict[str, Any]] = [
 async def _eval_health_score_low(company_id: str, db: Any) -> list[dict]:
     """customersテーブルからhealth_score <= 30 のレコードを取得する。"""
     try:
-        result = (
+        result = await execute(
             db.table("customers")
             .select("id, name, health_score")
             .eq("company_id", company_id)
             .lte("health_score", 30)
-            .execute()
         )
         return result.data or []
     except Exception as e:
@@ -159,13 +191,12 @@ async def _eval_health_score_low(company_id: str, db: Any) -> list[dict]:
 async def _eval_sla_breach(company_id: str, db: Any) -> list[dict]:
     """support_ticketsテーブルからSLA超過かつ未解決のチケットを取得する。"""
     try:
-        result = (
+        result = await execute(
             db.table("support_tickets")
             .select("id, title, sla_due_at, status, customer_id")
             .eq("company_id", company_id)
             .lt("sla_due_at", "now()")
             .not_.in_("status", ["resolved", "closed"])
-            .execute()
         )
         return result.data or []
     except Exception as e:
@@ -178,13 +209,12 @@ async def _eval_upsell_high(company_id: str, db: Any) -> list[dict]:
     try:
         from datetime import datetime, timezone, timedelta
         six_months_ago = (datetime.now(timezone.utc) - timedelta(days=180)).isoformat()
-        result = (
+        result = await execute(
             db.table("customers")
             .select("id, name, health_score, contract_started_at")
             .eq("company_id", company_id)
             .gte("health_score", 80)
             .lte("contract_started_at", six_months_ago)
-            .execute()
         )
         return result.data or []
     except Exception as e:
@@ -197,13 +227,12 @@ async def _eval_lost_reengagement(company_id: str, db: Any) -> list[dict]:
     try:
         from datetime import datetime, timezone, timedelta
         thirty_days_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-        result = (
+        result = await execute(
             db.table("opportunities")
             .select("id, title, stage, updated_at, customer_id")
             .eq("company_id", company_id)
             .eq("stage", "lost")
             .gte("updated_at", thirty_days_ago)
-            .execute()
         )
         return result.data or []
     except Exception as e:
@@ -257,6 +286,23 @@ async def _evaluate_dynamic_condition(
         "table": "customers"   # 省略時は "customers"
       }
     """
+    if not _validate_condition(condition):
+        return []
+    table = condition.get("table", "customers")
+    field = condition["field"]
+    try:
+        rows = await _fetch_condition_rows(company_id, db, table, [field])
+    except Exception as e:
+        logger.warning(f"_evaluate_dynamic_condition error (table={table}, field={field}): {e}")
+        return []
+    return _match_condition_rows(condition, rows)
+
+
+_FIELD_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _validate_condition(condition: dict[str, Any]) -> bool:
+    """condition の形式・テーブル・operator が評価可能か。"""
     field = condition.get("field")
     operator_str = condition.get("operator")
     threshold = condition.get("threshold")
@@ -264,180 +310,389 @@ async def _evaluate_dynamic_condition(
 
     if not field or not operator_str or threshold is None:
         logger.debug(f"_evaluate_dynamic_condition: conditionフィールド不足 {condition}")
-        return []
-
+        return False
     if table not in _SUPPORTED_TABLES:
         logger.warning(f"_evaluate_dynamic_condition: 非対応テーブル '{table}'")
-        return []
-
-    operator_fn = _OPERATOR_MAP.get(operator_str)
-    if operator_fn is None:
+        return False
+    if operator_str not in _OPERATOR_MAP:
         logger.warning(f"_evaluate_dynamic_condition: 非対応operator '{operator_str}'")
-        return []
+        return False
+    if not isinstance(field, str) or not _FIELD_NAME_RE.match(field):
+        # 同じテーブルの他の条件とまとめて select するため、列名として不正なものは除外する
+        logger.warning(f"_evaluate_dynamic_condition: 不正なfield '{field}'")
+        return False
+    return True
 
-    try:
-        # DB から全レコードを取得し Python 側でフィルタ
-        # （Supabase クライアントの動的operator生成の複雑さを回避）
-        result = (
-            db.table(table)
-            .select(f"id, {field}")
-            .eq("company_id", company_id)
-            .execute()
-        )
-        rows = result.data or []
 
-        matched = []
-        for row in rows:
-            actual = row.get(field)
-            if actual is None:
-                continue
-            try:
-                if operator_fn(actual, threshold):
-                    matched.append(row)
-            except (TypeError, ValueError):
-                continue
+async def _fetch_condition_rows(company_id: str, db: Any, table: str, fields: list[str]) -> list[dict]:
+    """テナントの table から id と fields を取得する（Python 側で条件判定する）。
 
-        return matched
+    Supabase クライアントの動的operator生成の複雑さを回避するため、フィルタは Python 側で行う。
+    同じテーブルを参照する条件はまとめて 1 回で取得する。
+    """
+    columns = ", ".join(["id", *sorted(set(fields) - {"id"})])
+    result = await execute(db.table(table).select(columns).eq("company_id", company_id))
+    return result.data or []
+
+
+def _match_condition_rows(condition: dict[str, Any], rows: list[dict]) -> list[dict]:
+    field = condition["field"]
+    operator_fn = _OPERATOR_MAP[condition["operator"]]
+    threshold = condition["threshold"]
+    matched = []
+    for row in rows:
+        actual = row.get(field)
+        if actual is None:
+            continue
+        try:
+            if operator_fn(actual, threshold):
+                matched.append(row)
+        except (TypeError, ValueError):
+            continue
+    return matched
 
-    except Exception as e:
-        logger.warning(f"_evaluate_dynamic_condition error (table={table}, field={field}): {e}")
-        return []
 
+# --------------------------------------------------------------------------
+# 評価状態（ウォーターマーク・グループ別結果のメモ）
+# --------------------------------------------------------------------------
 
-async def evaluate_knowledge_triggers(company_id: str) -> list[BPOTask]:
-    """
-    knowledge_relations テーブルの relation_type="triggers" を評価する。
+# 条件評価が参照しうるテーブル（get_condition_watermarks のホワイトリストと一致させる）
+_WATERMARK_TABLES: tuple[str, ...] = (
+    "knowledge_items", "knowledge_relations", "proactive_proposals", *sorted(_SUPPORTED_TABLES),
+)
 
-    ソース知識アイテムの条件が満たされている場合に
-    ターゲット知識アイテムをBPOTaskとして返す。
 
-    例: "残業45時間超え" (source) → "産業医面談通知" (target pipeline)
-    """
-    try:
-        from db.supabase import get_service_client
-        db = get_service_client()
+@dataclass
+class _GroupResult:
+    """条件グループ 1 つ分の評価結果。"""
+    value: Any
+    evaluated_at: float
+    tables: frozenset[str]
+    time_dependent: bool = False
 
-        # triggers関係を持つknowledge_relationsを取得
-        relations_result = db.table("knowledge_relations").select(
-            "source_id, target_id, metadata"
-        ).eq("company_id", company_id).eq("relation_type", "triggers").execute()
 
-        relations = relations_result.data or []
+@dataclass
+class _ConditionState:
+    """テナントの前回評価の状態。"""
+    watermarks: dict[str, str]
+    groups: dict[str, _GroupResult]
+    tasks: list[BPOTask]
+    evaluated_at: float
 
-        tasks: list[BPOTask] = []
 
-        # knowledge_relations がある場合のみ knowledge_items を取得して評価
-        sources: dict[str, Any] = {}
-        targets: dict[str, Any] = {}
-        if relations:
-            # ソースIDリスト取得
-            source_ids = list({r["source_id"] for r in relations})
-            sources_result = db.table("knowledge_items").select(
-                "id, title, metadata, confidence, is_active"
-            ).eq("company_id", company_id).in_("id", source_ids).execute()
+_condition_states: dict[str, _ConditionState] = {}
+_condition_locks: dict[str, asyncio.Lock] = {}
 
-            sources = {s["id"]: s for s in (sources_result.data or [])}
 
-            # ターゲットIDリスト取得
-            target_ids = list({r["target_id"] for r in relations})
-            targets_result = db.table("knowledge_items").select(
-                "id, title, metadata, confidence"
-            ).eq("company_id", company_id).in_("id", target_ids).execute()
+def reset_condition_state(company_id: Optional[str] = None) -> None:
+    """評価状態を捨てる（次回は全グループを再評価する）。"""
+    if company_id is None:
+        _condition_states.clear()
+    else:
+        _condition_states.pop(company_id, None)
 
-            targets = {t["id"]: t for t in (targets_result.data or [])}
 
-        for relation in relations:
-            source = sources.get(relation["source_id"])
-            target = targets.get(relation["target_id"])
+async def _fetch_watermarks(company_id: str, db: Any) -> Optional[dict[str, str]]:
+    """依存テーブルのウォーターマーク。取得できなければ None（全グループ再評価）。"""
+    try:
+        result = await execute(db.rpc("get_condition_watermarks", {
+            "p_company_id": company_id, "p_tables": list(_WATERMARK_TABLES),
+        }))
+        return {row["table_name"]: row["watermark"] for row in (result.data or [])}
+    except Exception as e:
+        logger.debug(f"condition_evaluator: watermark取得失敗 ({company_id[:8]}): {e}")
+        return None
+
+
+class _EvaluationRun:
+    """1 回の評価。前回状態のうち依存テーブルが変わっていないグループの結果を再利用する。"""
+
+    def __init__(self, company_id: str, db: Any, previous: Optional[_ConditionState]) -> None:
+        self.company_id = company_id
+        self.db = db
+        self.previous = previous
+        self.now = time.monotonic()
+        self.watermarks: Optional[dict[str, str]] = None
+        self.changed: Optional[set[str]] = None  # None = 全テーブル変更扱い
+        self.groups: dict[str, _GroupResult] = {}
+        self.fresh_groups: set[str] = set()
+
+    async def prepare(self) -> None:
+        self.watermarks = await _fetch_watermarks(self.company_id, self.db)
+        if self.watermarks is not None and self.previous is not None and self.previous.watermarks:
+            self.changed = {
+                table for table in _WATERMARK_TABLES
+                if self.watermarks.get(table) != self.previous.watermarks.get(table)
+            }
+
+    async def group(
+        self,
+        key: str,
+        tables: frozenset[str],
+        loader: Callable[[], Awaitable[Any]],
+        time_dependent: bool = False,
+    ) -> Any:
+        """依存テーブルが変わっていなければ前回の結果、変わっていれば loader の結果を返す。"""
+        prev = self.previous.groups.get(key) if self.previous else None
+        if prev is not None and self._reusable(prev):
+            self.groups[key] = prev
+            return prev.value
+        value = await loader()
+        self.groups[key] = _GroupResult(value, self.now, tables, time_dependent)
+        self.fresh_groups.add(key)
+        return value
+
+    def _reusable(self, prev: _GroupResult) -> bool:
+        if self.changed is None or prev.tables & self.changed:
+            return False
+        age = self.now - prev.evaluated_at
+        if age >= BPO_CONDITION_MAX_STALE_SEC:
+            return False
+        return not (prev.time_dependent and age >= BPO_CONDITION_TIME_STALE_SEC)
+
+    def state(self, tasks: list[BPOTask]) -> _ConditionState:
+        return _ConditionState(
+            watermarks=self.watermarks or {},
+            groups=self.groups,
+            tasks=tasks,
+            evaluated_at=self.now,
+        )
 
-            if not source or not target:
-                continue
-            if not source.get("is_active"):
-                continue
 
-            source_meta = source.get("metadata") or {}
-            target_meta = target.get("metadata") or {}
-            relation_meta = relation.get("metadata") or {}
+# --------------------------------------------------------------------------
+# 評価本体
+# --------------------------------------------------------------------------
 
-            pipeline = target_meta.get("pipeline", "")
-            if not pipeline:
-                continue
+async def evaluate_knowledge_triggers(company_id: str, changed_only: bool = False) -> list[BPOTask]:
+    """
+    knowledge_relations テーブルの relation_type="triggers" と組み込み連鎖を評価する。
 
-            condition_met = False
+    ソース知識アイテムの条件が満たされている場合に
+    ターゲット知識アイテムをBPOTaskとして返す。
 
-            # ── 動的条件評価（condition フィールドがある場合） ──────────────────
-            condition_def = source_meta.get("condition") or relation_meta.get("condition")
-            if condition_def and isinstance(condition_def, dict):
-                try:
-                    matched_records = await _evaluate_dynamic_condition(
-                        company_id, db, condition_def
-                    )
-                    condition_met = len(matched_records) > 0
-                    if condition_met:
-                        logger.debug(
-                            f"condition_evaluator dynamic: source={source['id']} "
-                            f"matched {len(matched_records)} records"
-                        )
-                except Exception as e:
-                    logger.warning(
-                        f"condition_evaluator dynamic eval error "
-                        f"(source={source['id']}): {e} — fallback to static flag"
-                    )
-                    # フォールバック: 静的フラグ方式
-                    condition_met = source_meta.get("condition_met", False)
-            else:
-                # フォールバック: 既存の静的フラグ方式
-                condition_met = source_meta.get("condition_met", False)
+    例: "残業45時間超え" (source) → "産業医面談通知" (target pipeline)
 
-            if not condition_met:
-                continue
+    changed_only=True の場合は、今回再評価された（依存テーブルが変わった）条件から
+    生じたタスクだけを返す。メモ期間内の呼び出しでは空リストになる。
+    """
+    cached = _memoized(company_id, changed_only)
+    if cached is not None:
+        return cached
+
+    lock = _condition_locks.setdefault(company_id, asyncio.Lock())
+    async with lock:
+        cached = _memoized(company_id, changed_only)
+        if cached is not None:
+            return cached
+        try:
+            from db.supabase import get_service_client
+            db = get_service_client()
 
-            tasks.append(BPOTask(
-                company_id=company_id,
-                pipeline=pipeline,
-                trigger_type=TriggerType.CONDITION,
-                execution_level=ExecutionLevel(target_meta.get("execution_level", 2)),
-                input_data=target_meta.get("input_data", {}),
-                estimated_impact=float(relation_meta.get("impact", target.get("confidence", 0.7))),
-                knowledge_item_ids=[source["id"], target["id"]],
-            ))
+            run = _EvaluationRun(company_id, db, _condition_states.get(company_id))
+            await run.prepare()
+            sourced = await _evaluate_all(run)
+        except Exception as e:
+            logger.error(f"condition_evaluator error: {e}")
+            return []
+
+        tasks = [task for task, _ in sourced]
+        _condition_states[company_id] = run.state(tasks)
+
+    logger.info(
+        f"condition_evaluator: total {len(tasks)} tasks for {company_id} "
+        f"(re-evaluated groups: {sorted(run.fresh_groups)})"
+    )
+    if changed_only:
+        return [task for task, group_keys in sourced if group_keys & run.fresh_groups]
+    return tasks
 
-        logger.info(f"condition_evaluator DB: {len(tasks)} triggered tasks for {company_id}")
 
-        # ── Step 2: BUILTIN_CONDITION_CHAINS の動的評価 ─────────────────────────
-        dynamic_tasks = await _evaluate_builtin_condition_chains(company_id, db)
-        tasks.extend(dynamic_tasks)
+def _memoized(company_id: str, changed_only: bool) -> Optional[list[BPOTask]]:
+    state = _condition_states.get(company_id)
+    if state is None or time.monotonic() - state.evaluated_at >= BPO_CONDITION_MEMO_SEC:
+        return None
+    if changed_only:
+        return []
+    return [task.model_copy(deep=True) for task in state.tasks]
+
+
+async def _evaluate_all(run: _EvaluationRun) -> list[tuple[BPOTask, set[str]]]:
+    """全グループを評価し、(タスク, 由来グループキー集合) のリストを返す。"""
+    company_id, db = run.company_id, run.db
+    sourced: list[tuple[BPOTask, set[str]]] = []
+
+    # ── Step 1: knowledge_relations（triggers）──────────────────────────────
+    relations, sources, targets = await run.group(
+        "relations",
+        frozenset({"knowledge_relations", "knowledge_items"}),
+        lambda: _load_trigger_relations(company_id, db),
+    )
+    relation_tasks = await _evaluate_relations(run, relations, sources, targets)
+    sourced.extend(relation_tasks)
+    logger.info(f"condition_evaluator DB: {len(relation_tasks)} triggered tasks for {company_id}")
+
+    # ── Step 2: BUILTIN_CONDITION_CHAINS の動的評価（チェーンごとに並列）──────
+    async def builtin_chain(chain: dict[str, Any]) -> list[tuple[BPOTask, set[str]]]:
+        key = f"chain:{chain['name']}"
+        tables = frozenset({chain["depends_on"]}) if chain.get("depends_on") else frozenset(_WATERMARK_TABLES)
+        tasks = await run.group(
+            key, tables,
+            lambda: _evaluate_builtin_condition_chains(company_id, db, chains=[chain]),
+            time_dependent=bool(chain.get("time_dependent")),
+        )
+        return [(task, {key}) for task in tasks]
+
+    for chain_tasks in await asyncio.gather(*(builtin_chain(c) for c in BUILTIN_CONDITION_CHAINS)):
+        sourced.extend(chain_tasks)
+
+    # ── Step 3: 組み込み条件連鎖の評価（proactive_proposals 参照・旧方式） ──
+    sales_tasks = await run.group(
+        "sales_chains",
+        frozenset({"proactive_proposals"}),
+        lambda: _evaluate_builtin_sales_chains(company_id, db),
+    )
+    sourced.extend((task, {"sales_chains"}) for task in sales_tasks)
+
+    # グループ結果は再利用されるため、呼び出し元へはコピーを渡す
+    return [(task.model_copy(deep=True), keys) for task, keys in sourced]
+
+
+async def _load_trigger_relations(company_id: str, db: Any) -> tuple[list[dict], dict[str, Any], dict[str, Any]]:
+    """triggers 関係と、そのソース・ターゲットの knowledge_items を取得する。"""
+    relations_result = await execute(db.table("knowledge_relations").select(
+        "source_id, target_id, metadata"
+    ).eq("company_id", company_id).eq("relation_type", "triggers"))
+    relations = relations_result.data or []
+
+    # knowledge_relations がある場合のみ knowledge_items を取得して評価
+    sources: dict[str, Any] = {}
+    targets: dict[str, Any] = {}
+    if relations:
+        source_ids = list({r["source_id"] for r in relations})
+        target_ids = list({r["target_id"] for r in relations})
+        sources_result, targets_result = await asyncio.gather(
+            execute(db.table("knowledge_items").select(
+                "id, title, metadata, confidence, is_active"
+            ).eq("company_id", company_id).in_("id", source_ids)),
+            execute(db.table("knowledge_items").select(
+                "id, title, metadata, confidence"
+            ).eq("company_id", company_id).in_("id", target_ids)),
+        )
+        sources = {s["id"]: s for s in (sources_result.data or [])}
+        targets = {t["id"]: t for t in (targets_result.data or [])}
+    return relations, sources, targets
+
+
+async def _evaluate_relations(
+    run: _EvaluationRun,
+    relations: list[dict],
+    sources: dict[str, Any],
+    targets: dict[str, Any],
+) -> list[tuple[BPOTask, set[str]]]:
+    """triggers 関係ごとに条件を判定する。動的条件は参照テーブルごとに 1 クエリでまとめて取得する。"""
+    # (relation, source, target, condition_def, 条件が評価可能か)
+    candidates: list[tuple[dict, dict, dict, Optional[dict], bool]] = []
+    fields_by_table: dict[str, set[str]] = {}
+
+    for relation in relations:
+        source = sources.get(relation["source_id"])
+        target = targets.get(relation["target_id"])
+        if not source or not target:
+            continue
+        if not source.get("is_active"):
+            continue
+        target_meta = target.get("metadata") or {}
+        if not target_meta.get("pipeline", ""):
+            continue
 
-        # ── Step 3: 組み込み条件連鎖の評価（proactive_proposals 参照・旧方式） ──
-        builtin_tasks = await _evaluate_builtin_sales_chains(company_id, db)
-        tasks.extend(builtin_tasks)
+        source_meta = source.get("metadata") or {}
+        relation_meta = relation.get("metadata") or {}
+        condition_def = source_meta.get("condition") or relation_meta.get("condition")
+        valid = False
+        if not (condition_def and isinstance(condition_def, dict)):
+            condition_def = None
+        elif _validate_condition(condition_def):
+            valid = True
+            fields_by_table.setdefault(condition_def.get("table", "customers"), set()).add(condition_def["field"])
+        candidates.append((relation, source, target, condition_def, valid))
+
+    # ── 動的条件: テーブル単位でまとめて取得 ─────────────────────────────────
+    async def table_rows(table: str, fields: set[str]) -> tuple[str, Optional[list[dict]]]:
+        async def load() -> Optional[list[dict]]:
+            try:
+                return await _fetch_condition_rows(run.company_id, run.db, table, sorted(fields))
+            except Exception as e:
+                logger.warning(f"condition_evaluator dynamic eval error (table={table}): {e}")
+                return None
+        key = f"table:{table}:{','.join(sorted(fields))}"
+        return key, await run.group(key, frozenset({table}), load)
+
+    rows_by_table: dict[str, tuple[str, Optional[list[dict]]]] = {}
+    fetched = await asyncio.gather(*(table_rows(t, f) for t, f in fields_by_table.items()))
+    for table, result in zip(fields_by_table, fetched):
+        rows_by_table[table] = result
+
+    tasks: list[tuple[BPOTask, set[str]]] = []
+    for relation, source, target, condition_def, valid in candidates:
+        source_meta = source.get("metadata") or {}
+        target_meta = target.get("metadata") or {}
+        relation_meta = relation.get("metadata") or {}
+        group_keys = {"relations"}
+
+        if condition_def is None:
+            # フォールバック: 既存の静的フラグ方式
+            condition_met = source_meta.get("condition_met", False)
+        elif not valid:
+            condition_met = False
+        else:
+            key, rows = rows_by_table[condition_def.get("table", "customers")]
+            group_keys.add(key)
+            if rows is None:
+                # 取得失敗時のフォールバック: 静的フラグ方式
+                condition_met = source_meta.get("condition_met", False)
+            else:
+                matched_records = _match_condition_rows(condition_def, rows)
+                condition_met = len(matched_records) > 0
+                if condition_met:
+                    logger.debug(
+                        f"condition_evaluator dynamic: source={source['id']} "
+                        f"matched {len(matched_records)} records"
+                    )
 
-        logger.info(f"condition_evaluator: total {len(tasks)} tasks for {company_id}")
-        return tasks
+        if not condition_met:
+            continue
 
-    except Exception as e:
-        logger.error(f"condition_evaluator error: {e}")
-        return []
+        tasks.append((BPOTask(
+            company_id=run.company_id,
+            pipeline=target_meta["pipeline"],
+            trigger_type=TriggerType.CONDITION,
+            execution_level=ExecutionLevel(target_meta.get("execution_level", 2)),
+            input_data=target_meta.get("input_data", {}),
+            estimated_impact=float(relation_meta.get("impact", target.get("confidence", 0.7))),
+            knowledge_item_ids=[source["id"], target["id"]],
+        ), group_keys))
+    return tasks
 
 
 async def _evaluate_builtin_condition_chains(
     company_id: str,
     db: Any,
+    chains: Optional[list[dict[str, Any]]] = None,
 ) -> list[BPOTask]:
     """
-    BUILTIN_CONDITION_CHAINS を評価する。
+    BUILTIN_CONDITION_CHAINS（または chains）を評価する。
 
-    各チェーンの evaluator_key に対応する評価関数を呼び出し、
+    各チェーンの evaluator_key に対応する評価関数を並列に呼び出し、
     レコードが1件以上あれば BPOTask を生成して返す。
     """
-    tasks: list[BPOTask] = []
+    chains = BUILTIN_CONDITION_CHAINS if chains is None else chains
 
-    for chain in BUILTIN_CONDITION_CHAINS:
+    async def run_chain(chain: dict[str, Any]) -> Optional[BPOTask]:
         evaluator_key = chain.get("evaluator_key", "")
         evaluator_fn = _EVALUATOR_REGISTRY.get(evaluator_key)
         if evaluator_fn is None:
             logger.warning(f"_evaluate_builtin_condition_chains: evaluator '{evaluator_key}' 未登録")
-            continue
+            return None
 
         try:
             matched_records = await evaluator_fn(company_id, db)
@@ -446,14 +701,17 @@ async def _evaluate_builtin_condition_chains(
                 f"_evaluate_builtin_condition_chains: chain '{chain['name']}' "
                 f"evaluator error: {e}"
             )
-            continue
+            return None
 
         if not matched_records:
-            continue
+            return None
 
         matched_ids = [r.get("id") for r in matched_records if r.get("id")]
-
-        tasks.append(BPOTask(
+        logger.info(
+            f"condition_evaluator builtin_dynamic: chain '{chain['name']}' fired "
+            f"({len(matched_records)} records) → {chain['target_pipeline']} for {company_id}"
+        )
+        return BPOTask(
             company_id=company_id,
             pipeline=chain["target_pipeline"],
             trigger_type=TriggerType.CONDITION,
@@ -468,13 +726,19 @@ async def _evaluate_builtin_condition_chains(
                 "matched_record_ids": matched_ids,
                 "matched_count": len(matched_records),
             },
-        ))
-        logger.info(
-            f"condition_evaluator builtin_dynamic: chain '{chain['name']}' fired "
-            f"({len(matched_records)} records) → {chain['target_pipeline']} for {company_id}"
         )
 
-    return tasks
+    results = await asyncio.gather(*(run_chain(chain) for chain in chains))
+    return [task for task in results if task is not None]
+
+
+_THRESHOLD_OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    "gte": lambda a, b: a >= b,
+    "gt": lambda a, b: a > b,
+    "lte": lambda a, b: a <= b,
+    "lt": lambda a, b: a < b,
+    "eq": lambda a, b: a == b,
+}
 
 
 async def _evaluate_builtin_sales_chains(
@@ -485,56 +749,38 @@ async def _evaluate_builtin_sales_chains(
     BUILTIN_SALES_CONDITION_CHAINS を評価し、条件を満たすタスクを返す。
 
     各チェーンの source_condition は proactive_proposals テーブルを参照し、
-    指定フィルタで絞り込んだレコードが存在し、かつ impact_score が閾値を超えた場合に発火する。
+    指定フィルタに合致するレコードのうち threshold を満たすものがあれば発火する。
+    同じテーブルを参照するチェーンはまとめて 1 クエリで取得し、Python 側で振り分ける。
     """
-    tasks: list[BPOTask] = []
-
+    by_table: dict[str, list[dict[str, Any]]] = {}
     for chain in BUILTIN_SALES_CONDITION_CHAINS:
-        cond = chain["source_condition"]
-        table = cond.get("table", "proactive_proposals")
-        filters = cond.get("filter", {})
-        threshold_field = cond.get("threshold_field", "impact_score")
-        threshold_op = cond.get("threshold_operator", "gte")
-        threshold_value = float(cond.get("threshold_value", 0.5))
-
-        try:
-            query = db.table(table).select(
-                f"id, {threshold_field}"
-            ).eq("company_id", company_id)
+        by_table.setdefault(chain["source_condition"].get("table", "proactive_proposals"), []).append(chain)
 
-            # 追加フィルタを適用
-            for key, val in filters.items():
-                query = query.eq(key, val)
+    tasks: list[BPOTask] = []
+    for table, chains in by_table.items():
+        conds = [c["source_condition"] for c in chains]
+        columns = {"id"}
+        for cond in conds:
+            columns.add(cond.get("threshold_field", "impact_score"))
+            columns.update(cond.get("filter", {}).keys())
+        proposal_types = sorted({
+            cond["filter"]["proposal_type"] for cond in conds if "proposal_type" in cond.get("filter", {})
+        })
 
-            result = query.limit(1).execute()
+        try:
+            query = db.table(table).select(", ".join(sorted(columns))).eq("company_id", company_id)
+            if proposal_types and len(proposal_types) == len(conds):
+                query = query.in_("proposal_type", proposal_types)
+            result = await execute(query)
             rows = result.data or []
+        except Exception as e:
+            logger.warning(f"condition_evaluator builtin chains ({table}) error: {e}")
+            continue
 
-            if not rows:
-                continue
-
-            # 閾値チェック
-            actual = rows[0].get(threshold_field)
-            if actual is None:
-                continue
-
-            condition_met = False
-            try:
-                if threshold_op == "gte":
-                    condition_met = float(actual) >= threshold_value
-                elif threshold_op == "gt":
-                    condition_met = float(actual) > threshold_value
-                elif threshold_op == "lte":
-                    condition_met = float(actual) <= threshold_value
-                elif threshold_op == "lt":
-                    condition_met = float(actual) < threshold_value
-                elif threshold_op == "eq":
-                    condition_met = float(actual) == threshold_value
-            except (TypeError, ValueError):
-                continue
-
-            if not condition_met:
+        for chain in chains:
+            source_row = _first_matching_row(chain["source_condition"], rows)
+            if source_row is None:
                 continue
-
             tasks.append(BPOTask(
                 company_id=company_id,
                 pipeline=chain["target_pipeline"],
@@ -547,7 +793,7 @@ async def _evaluate_builtin_sales_chains(
                     "builtin": True,
                     "chain_name": chain["name"],
                     "description": chain.get("description", ""),
-                    "source_record_id": rows[0].get("id"),
+                    "source_record_id": source_row.get("id"),
                 },
             ))
             logger.info(
@@ -555,8 +801,26 @@ async def _evaluate_builtin_sales_chains(
                 f"{chain['target_pipeline']} for {company_id}"
             )
 
-        except Exception as e:
-            logger.warning(f"condition_evaluator builtin chain '{chain['name']}' error: {e}")
-            continue
-
     return tasks
+
+
+def _first_matching_row(cond: dict[str, Any], rows: list[dict]) -> Optional[dict]:
+    """filter に一致し threshold を満たす最初の行。"""
+    filters = cond.get("filter", {})
+    threshold_field = cond.get("threshold_field", "impact_score")
+    compare = _THRESHOLD_OPERATORS.get(cond.get("threshold_operator", "gte"))
+    threshold_value = float(cond.get("threshold_value", 0.5))
+    if compare is None:
+        return None
+    for row in rows:
+        if any(row.get(key) != val for key, val in filters.items()):
+            continue
+        actual = row.get(threshold_field)
+        if actual is None:
+            continue
+        try:
+            if compare(float(actual), threshold_value):
+                return row
+        except (TypeError, ValueError):
+            continue
+    return None
@@ -0,0 +1,123 @@
+"""BPO Manager — Cron。cron 式をビットセットにコンパイルして評価・次回発火時刻を計算する。
+
+書式: "分 時 日 月 曜日"
+- 各フィールド: ``*`` / ``n`` / ``a-b`` / ``*/s`` / ``a-b/s`` / ``a/s`` とそのカンマ区切り
+- 日フィールドの ``L`` は月末日（例: "0 9 L * *" → 毎月末 9:00）
+- 曜日は Python の weekday() に合わせた独自定義（0=月曜 … 6=日曜）
+- 日と曜日は両方指定された場合 AND で評価する（従来の _matches_cron と同じ）
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+# フィールドごとの (最小値, 最大値)
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+# next_fire の探索上限（2/29 のみ等の稀な式でも見つかる範囲）
+_MAX_SEARCH_DAYS = 366 * 8
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    """コンパイル済み cron 式。各フィールドは値 v を bit v に立てた整数。"""
+    expr: str
+    minutes: int
+    hours: int
+    days: int
+    months: int
+    weekdays: int
+    last_day: bool = False  # 日フィールドに L を含む
+
+    def matches(self, now: datetime) -> bool:
+        return (
+            _has(self.minutes, now.minute)
+            and _has(self.hours, now.hour)
+            and _has(self.months, now.month)
+            and _has(self.weekdays, now.weekday())
+            and self._day_matches(now.year, now.month, now.day)
+        )
+
+    def next_fire(self, after: datetime) -> Optional[datetime]:
+        """after（分単位に切り捨て）以降で最初に一致する時刻。見つからなければ None。"""
+        start = after.replace(second=0, microsecond=0)
+        day = start.replace(hour=0, minute=0)
+        for offset in range(_MAX_SEARCH_DAYS):
+            if offset:
+                day = day + timedelta(days=1)
+            if not (
+                _has(self.months, day.month)
+                and _has(self.weekdays, day.weekday())
+                and self._day_matches(day.year, day.month, day.day)
+            ):
+                continue
+            from_hour, from_minute = (start.hour, start.minute) if offset == 0 else (0, 0)
+            for hour in _bits_from(self.hours, from_hour):
+                minute = _first_bit_from(self.minutes, from_minute if hour == from_hour else 0)
+                if minute is not None:
+                    return day.replace(hour=hour, minute=minute)
+        return None
+
+    def _day_matches(self, year: int, month: int, day: int) -> bool:
+        if _has(self.days, day):
+            return True
+        return self.last_day and day == calendar.monthrange(year, month)[1]
+
+
+def _has(mask: int, value: int) -> bool:
+    return bool(mask >> value & 1)
+
+
+def _first_bit_from(mask: int, start: int) -> Optional[int]:
+    rest = mask >> start
+    if not rest:
+        return None
+    return start + ((rest & -rest).bit_length() - 1)
+
+
+def _bits_from(mask: int, start: int):
+    value = _first_bit_from(mask, start)
+    while value is not None:
+        yield value
+        value = _first_bit_from(mask, value + 1)
+
+
+def _parse_field(field: str, low: int, high: int, allow_last: bool = False) -> tuple[int, bool]:
+    mask = 0
+    last = False
+    for part in field.split(","):
+        if allow_last and part == "L":
+            last = True
+            continue
+        body, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step <= 0:
+            raise ValueError(f"invalid step: {part}")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start_text, end_text = body.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(body)
+            end = high if step_text else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"out of range: {part}")
+        for value in range(start, end + 1, step):
+            mask |= 1 << value
+    return mask, last
+
+
+@lru_cache(maxsize=1024)
+def compile_cron(expr: str) -> CronSchedule:
+    """cron 式をコンパイルする。不正な式は ValueError。"""
+    parts = expr.strip().split()
+    if len(parts) != 5:
+        raise ValueError(f"cron expression must have 5 fields: {expr!r}")
+    masks = []
+    last_day = False
+    for i, (part, (low, high)) in enumerate(zip(parts, _FIELD_RANGES)):
+        mask, last = _parse_field(part, low, high, allow_last=(i == 2))
+        masks.append(mask)
+        last_day = last_day or last
+    return CronSchedule(expr.strip(), *masks, last_day=last_day)
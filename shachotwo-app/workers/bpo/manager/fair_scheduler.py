@@ -0,0 +1,319 @@
+"""BPO Manager — FairScheduler。パイプライン実行枠をテナント間で重み付き公平に配分する。
+
+- プロセス全体の実行枠 BPO_PIPELINE_SLOTS と、テナントごとの上限
+  MAX_CONCURRENT_PIPELINES_PER_TENANT の両方を守る
+- 枠が空いていなければ即失敗にせず、テナント別の待ち行列（上限 BPO_SCHEDULER_QUEUE_PER_TENANT）で待つ
+- テナントの選択は仮想時間による重み付き公平キューイング（プラン上位ほど重みが大きく、多く割り当てられる）
+- テナント内は優先度（ExecutionLevel + estimated_impact）→ 締め切りの早い順
+- 締め切り（BPOTask.deadline、未指定なら BPO_SCHEDULER_MAX_WAIT_SEC 後）までに枠が取れなければ
+  queue_timeout で返す。queue_worker はこれをリトライ対象として扱うので、タスクは失われない
+- get_scheduler_stats: 実行中・待ち行列の深さ・待ち時間（平均/p95/最大）・拒否/期限切れ件数
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from workers.bpo.manager.models import BPOTask, ExecutionLevel
+
+logger = logging.getLogger(__name__)
+
+BPO_PIPELINE_SLOTS = int(os.environ.get("BPO_PIPELINE_SLOTS", "32"))
+MAX_CONCURRENT_PIPELINES_PER_TENANT = int(os.environ.get("BPO_TENANT_PIPELINE_SLOTS", "3"))
+BPO_SCHEDULER_QUEUE_PER_TENANT = int(os.environ.get("BPO_SCHEDULER_QUEUE_PER_TENANT", "100"))
+BPO_SCHEDULER_MAX_WAIT_SEC = float(os.environ.get("BPO_SCHEDULER_MAX_WAIT_SEC", "300"))
+BPO_PLAN_WEIGHT_TTL_SEC = int(os.environ.get("BPO_PLAN_WEIGHT_TTL_SEC", "600"))
+
+# プラン → 重み（billing_guard._PLAN_LIMITS のプラン名）。未契約・不明は 1
+_PLAN_WEIGHTS: dict[str, float] = {
+    "common_bpo": 1.0,
+    "industry_bpo": 2.0,
+    "industry_bpo_support": 3.0,
+}
+
+# 承認済み・自律実行のタスクを読み取り系より先に流す
+_LEVEL_PRIORITY: dict[ExecutionLevel, int] = {
+    ExecutionLevel.NOTIFY_ONLY: 0,
+    ExecutionLevel.DATA_COLLECT: 1,
+    ExecutionLevel.DRAFT_CREATE: 2,
+    ExecutionLevel.APPROVAL_GATED: 3,
+    ExecutionLevel.AUTONOMOUS: 3,
+}
+
+# 待ち時間の統計に使う直近サンプル数
+_WAIT_SAMPLES = 1000
+
+
+class SchedulerRejected(Exception):
+    """実行枠を取得できなかった。reason は PipelineResult.failed_step に入れる値。"""
+
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+def task_priority(task: BPOTask) -> float:
+    """大きいほど先に実行する。"""
+    return _LEVEL_PRIORITY.get(task.execution_level, 2) + max(0.0, min(1.0, task.estimated_impact))
+
+
+@dataclass(order=True)
+class _Waiter:
+    sort_key: tuple                                   # (-priority, deadline, seq)
+    deadline: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class _TenantState:
+    weight: float = 1.0
+    running: int = 0
+    queued: int = 0
+    vtime: float = 0.0                                # 仮想終了時刻（小さいテナントから割り当てる）
+    waiters: list[_Waiter] = field(default_factory=list)
+
+
+class FairScheduler:
+    """重み付き公平キュー付きの実行枠。acquire → 実行 → release で使う。"""
+
+    def __init__(
+        self,
+        slots: int = BPO_PIPELINE_SLOTS,
+        per_tenant: int = MAX_CONCURRENT_PIPELINES_PER_TENANT,
+        queue_per_tenant: int = BPO_SCHEDULER_QUEUE_PER_TENANT,
+        max_wait_sec: float = BPO_SCHEDULER_MAX_WAIT_SEC,
+        weight_fn: Optional[Callable[[str], Awaitable[float]]] = None,
+    ) -> None:
+        self.slots = max(1, slots)
+        self.per_tenant = max(1, per_tenant)
+        self.queue_per_tenant = max(0, queue_per_tenant)
+        self.max_wait_sec = max_wait_sec
+        self._weight_fn = weight_fn or plan_weight
+        self._tenants: dict[str, _TenantState] = {}
+        self._running = 0
+        self._queued = 0
+        self._vclock = 0.0
+        self._seq = itertools.count()
+        self._wait_ms: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._granted = 0
+        self._rejected = 0
+        self._expired = 0
+
+    async def acquire(self, task: BPOTask) -> None:
+        """実行枠を取得するまで待つ。取れなければ SchedulerRejected。"""
+        cid = task.company_id
+        tenant = self._tenants.get(cid)
+        if tenant is None:
+            tenant = self._tenants[cid] = _TenantState()
+
+        # 誰も待っていなければ即時割り当て（重みの取得も不要）
+        if self._queued == 0 and self._running < self.slots and tenant.running < self.per_tenant:
+            self._grant(tenant, waited_ms=0.0)
+            return
+
+        if tenant.queued >= self.queue_per_tenant:
+            self._rejected += 1
+            self._forget_if_idle(cid)
+            raise SchedulerRejected(
+                "concurrency_limit",
+                f"実行待ち行列が上限（{self.queue_per_tenant}）に達しています。しばらく待ってから再試行してください。",
+            )
+
+        weight = await self._weight_fn(cid)
+        # await 中に release() → _forget_if_idle() で消されていたら登録し直す（孤立した状態に並ばない）
+        tenant = self._tenants.setdefault(cid, tenant)
+        tenant.weight = weight
+        now = time.monotonic()
+        deadline = self._deadline_of(task, now)
+        if not tenant.waiters and tenant.running == 0:
+            # アイドルだったテナントは過去の空き時間を貯金できない
+            tenant.vtime = max(tenant.vtime, self._vclock)
+        waiter = _Waiter(
+            sort_key=(-task_priority(task), deadline, next(self._seq)),
+            deadline=deadline,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(tenant.waiters, waiter)
+        tenant.queued += 1
+        self._queued += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait({waiter.future}, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(cid)
+            else:
+                self._abandon(cid, tenant, waiter)
+            raise
+
+        if not waiter.future.done():
+            self._abandon(cid, tenant, waiter)
+            self._expired += 1
+            raise SchedulerRejected("queue_timeout", "実行待ちの締め切りを過ぎました。再試行してください。")
+        error = waiter.future.exception()
+        if error is not None:
+            raise error
+
+    def release(self, company_id: str) -> None:
+        """acquire で得た枠を返す。"""
+        tenant = self._tenants.get(company_id)
+        if tenant is not None and tenant.running > 0:
+            tenant.running -= 1
+            self._running -= 1
+        self._dispatch()
+        self._forget_if_idle(company_id)
+
+    def _grant(self, tenant: _TenantState, waited_ms: float) -> None:
+        tenant.running += 1
+        self._running += 1
+        self._vclock = max(self._vclock, tenant.vtime)
+        tenant.vtime = max(tenant.vtime, self._vclock) + 1.0 / max(tenant.weight, 0.01)
+        self._granted += 1
+        self._wait_ms.append(waited_ms)
+
+    def _dispatch(self) -> None:
+        """空き枠を仮想時間の小さいテナントから順に割り当てる。"""
+        now = time.monotonic()
+        while self._running < self.slots and self._queued > 0:
+            best: Optional[_TenantState] = None
+            for tenant in self._tenants.values():
+                self._drop_stale(tenant, now)
+                if tenant.waiters and tenant.running < self.per_tenant:
+                    if best is None or tenant.vtime < best.vtime:
+                        best = tenant
+            if best is None:
+                return
+            waiter = heapq.heappop(best.waiters)
+            best.queued -= 1
+            self._queued -= 1
+            self._grant(best, waited_ms=(now - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(True)
+
+    def _drop_stale(self, tenant: _TenantState, now: float) -> None:
+        """先頭から放棄済み・期限切れの待ちを取り除く（期限切れは queue_timeout で起こす）。"""
+        while tenant.waiters:
+            head = tenant.waiters[0]
+            if head.future.done():
+                heapq.heappop(tenant.waiters)
+                continue
+            if head.deadline <= now:
+                heapq.heappop(tenant.waiters)
+                tenant.queued -= 1
+                self._queued -= 1
+                self._expired += 1
+                head.future.set_exception(
+                    SchedulerRejected("queue_timeout", "実行待ちの締め切りを過ぎました。再試行してください。")
+                )
+                continue
+            return
+
+    def _abandon(self, company_id: str, tenant: _TenantState, waiter: _Waiter) -> None:
+        """待ちを取り消す。id で引き直さず、待ちを積んだテナント状態そのものを減らす。"""
+        if waiter.future.done():
+            return
+        waiter.future.cancel()
+        tenant.queued -= 1
+        self._queued -= 1
+        tenant.waiters = [w for w in tenant.waiters if not w.future.done()]
+        heapq.heapify(tenant.waiters)
+        self._forget_if_idle(company_id)
+
+    def _forget_if_idle(self, company_id: str) -> None:
+        tenant = self._tenants.get(company_id)
+        if tenant is not None and tenant.running == 0 and tenant.queued == 0:
+            del self._tenants[company_id]
+
+    def _deadline_of(self, task: BPOTask, now: float) -> float:
+        if task.deadline is not None:
+            deadline = task.deadline
+            if deadline.tzinfo is None:
+                deadline = deadline.replace(tzinfo=timezone.utc)
+            remaining = (deadline - datetime.now(timezone.utc)).total_seconds()
+            return now + min(max(0.0, remaining), self.max_wait_sec)
+        return now + self.max_wait_sec
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._wait_ms)
+        return {
+            "slots": self.slots,
+            "per_tenant": self.per_tenant,
+            "running": self._running,
+            "queued": self._queued,
+            "granted": self._granted,
+            "rejected": self._rejected,
+            "expired": self._expired,
+            "wait_ms": {
+                "avg": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0.0,
+                "max": round(waits[-1], 1) if waits else 0.0,
+            },
+            "tenants": {
+                cid: {"running": t.running, "queued": t.queued, "weight": t.weight}
+                for cid, t in self._tenants.items()
+            },
+        }
+
+
+# ─── プラン別の重み ──────────────────────────────────────────────────────────
+
+_plan_weights: dict[str, tuple[float, float]] = {}  # company_id → (weight, fetched_at)
+
+
+async def plan_weight(company_id: str) -> float:
+    """subscriptions の active/trialing プランから重みを返す（TTL キャッシュ、失敗時は 1）。"""
+    cached = _plan_weights.get(company_id)
+    if cached is not None and time.monotonic() - cached[1] < BPO_PLAN_WEIGHT_TTL_SEC:
+        return cached[0]
+    weight = 1.0
+    try:
+        from db.supabase import execute, get_service_client
+
+        db = get_service_client()
+        result = await execute(
+            db.table("subscriptions")
+            .select("plan")
+            .eq("company_id", company_id)
+            .in_("status", ["active", "trialing"])
+            .order("created_at", desc=True)
+            .limit(1)
+        )
+        rows = result.data or []
+        if rows:
+            weight = _PLAN_WEIGHTS.get(str(rows[0].get("plan") or ""), 1.0)
+    except Exception as e:
+        logger.debug(f"プラン重み取得スキップ（重み=1）: company={company_id[:8]} error={e}")
+    _plan_weights[company_id] = (weight, time.monotonic())
+    return weight
+
+
+# ─── シングルトン ────────────────────────────────────────────────────────────
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_fair_scheduler() -> FairScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler()
+    return _scheduler
+
+
+def get_scheduler_stats() -> dict[str, Any]:
+    """実行枠・待ち行列のメトリクス。"""
+    return get_fair_scheduler().stats()
+
+
+def reset_fair_scheduler() -> None:
+    """スケジューラとプラン重みキャッシュを破棄する（テスト用）。"""
+    global _scheduler
+    _scheduler = None
+    _plan_weights.clear()
@@ -0,0 +1,33 @@
+"""パイプライン実行プロセスの起動・停止処理。
+
+API の lifespan（main.py）と独立ワーカー（queue_worker.main）の両方から呼ぶ。
+どちらのプロセスでもパイプラインが動くので、LLMコスト同期・パイプライン事前import・
+コネクタ接続プールの後始末をここに集める。
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def start_bpo_runtime(warm_pipelines: bool = True) -> None:
+    """LLMコスト同期を開始し、必要ならパイプラインを事前 import する。"""
+    # LLMコスト集計の共有ストア同期（LLM_COST_BACKEND=redis/postgres の場合のみ動作）
+    from llm.cost_tracker import get_cost_tracker
+    await get_cost_tracker().start_sync()
+    if warm_pipelines:
+        from workers.bpo.manager.task_router import warm_pipelines as _warm
+        await _warm()
+
+
+async def stop_bpo_runtime() -> None:
+    """未同期のLLMコストを書き出し、SaaS コネクタの共有 HTTP 接続プールを閉じる。"""
+    try:
+        from llm.cost_tracker import get_cost_tracker
+        await get_cost_tracker().stop_sync()
+    except Exception as e:
+        logger.warning(f"lifecycle: cost sync stop failed: {e}")
+    try:
+        from workers.connector.base import close_connector_pools
+        await close_connector_pools()
+    except Exception as e:
+        logger.warning(f"lifecycle: connector pool close failed: {e}")
@@ -19,6 +19,7 @@ class BPOTask(BaseModel):
     knowledge_item_ids: list[str] = Field(default_factory=list)
     created_at: Optional[datetime] = None
     context: dict[str, Any] = Field(default_factory=dict)
+    deadline: Optional[datetime] = None    # 実行枠待ちの締め切り（FairScheduler。未指定なら既定の待ち上限）
 
 
 class PipelineResult(BaseModel):
@@ -1,13 +1,75 @@
-"""BPO Manager — Orchestrator。全マネージャーコンポーネントを定期実行する。"""
+"""BPO Manager — Orchestrator。全マネージャーコンポーネントを定期実行する。
+
+発見したタスクは TaskQueue（task_queue.py）に冪等キー付きで積むだけで、実行は
+queue_worker が行う。テナント走査は tenant_scan.scan_tenants で BPO_SCAN_CONCURRENCY
+並列・サイクルごとの締め切り付きで行う。
+
+複数インスタンスで起動した場合:
+- 既定: リーダーリースを持つ 1 台だけがトリガーを走査する
+- BPO_ORCHESTRATOR_SHARDING=1: 全レプリカがハートビートを書き、生存メンバーの
+  コンシステントハッシュでテナントを分担して走査する（メンバー増減時の重複発見は冪等キーで吸収）
+"""
 import asyncio
 import logging
 import os
+import time
 from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from workers.bpo.manager.models import BPOTask
+from workers.bpo.manager.task_queue import (
+    LeaderLease,
+    ShardMembership,
+    get_leader_lease,
+    get_shard_membership,
+    get_task_queue,
+    idempotency_key,
+    queue_backend,
+)
+from workers.bpo.manager.tenant_scan import (
+    ConsistentHashRing,
+    TenantCache,
+    record_overlap_skip,
+    scan_tenants,
+)
 
 logger = logging.getLogger(__name__)
 
+# リーダーリースの有効期間（1分ループ + サイクル所要時間より長く）
+BPO_LEADER_LEASE_SEC = int(os.environ.get("BPO_LEADER_LEASE_SEC", "180"))
+_LEADER_LEASE_NAME = "bpo-orchestrator"
+
+# サイクルごとの周期（冪等キーの時間バケット）
+_SCHEDULE_BUCKET_SEC = 60
+_CONDITION_BUCKET_SEC = 5 * 60
+_PROACTIVE_BUCKET_SEC = 30 * 60
+
+# サイクルごとの締め切り（周期より短く。超過分のテナントは次のサイクルで再評価）
+BPO_SCHEDULE_DEADLINE_SEC = float(os.environ.get("BPO_SCHEDULE_DEADLINE_SEC", "50"))
+BPO_CONDITION_DEADLINE_SEC = float(os.environ.get("BPO_CONDITION_DEADLINE_SEC", "280"))
+BPO_PROACTIVE_DEADLINE_SEC = float(os.environ.get("BPO_PROACTIVE_DEADLINE_SEC", "1700"))
+
+_LOOP_INTERVAL_SEC = 60
+
 # バックグラウンドタスク参照
 _orchestrator_task: asyncio.Task | None = None
+_leader_lease: LeaderLease | None = None
+_membership: ShardMembership | None = None
+_shard_ring: ConsistentHashRing | None = None
+_cycle_tasks: dict[str, asyncio.Task] = {}
+_tenant_cache = TenantCache()
+_in_process_worker_started = False
+
+
+def _sharding_enabled() -> bool:
+    """レプリカ間でテナントを分担するか（無効時はリーダー 1 台が全テナントを走査）。"""
+    return os.environ.get("BPO_ORCHESTRATOR_SHARDING", "").lower() in ("1", "true", "yes")
+
+
+def _in_process_worker_enabled() -> bool:
+    """API プロセス内でキューワーカーも動かすか（memory キューでは必須なので既定ON）。"""
+    default = "1" if queue_backend() == "memory" else "0"
+    return os.environ.get("BPO_WORKER_IN_PROCESS", default).lower() in ("1", "true", "yes")
 
 
 def _is_global_kill_switch_on() -> bool:
@@ -63,52 +125,79 @@ async def _get_active_company_ids() -> list[str]:
         return []
 
 
+def invalidate_tenant_cache() -> None:
+    """companies.is_active / bpo_kill_switch を更新した直後に呼ぶ。次のサイクルで一覧を再取得する。"""
+    _tenant_cache.invalidate()
+
+
+async def _get_cycle_company_ids() -> list[str]:
+    """このインスタンスが走査するテナント（キャッシュ済み一覧をシャードで絞ったもの）。"""
+    company_ids = await _tenant_cache.get(_get_active_company_ids)
+    if _sharding_enabled() and _shard_ring is not None and _membership is not None:
+        me = _membership.member_id
+        company_ids = [cid for cid in company_ids if _shard_ring.owner(cid) == me]
+    return company_ids
+
+
+async def _dispatch(task: BPOTask, source: str, bucket_sec: int) -> bool:
+    """タスクをキューに積む。同じ周期内の重複発見は冪等キーで捨てる。積んだら True。"""
+    key = idempotency_key(task, source, bucket_sec)
+    if await get_task_queue().enqueue(task, idempotency_key=key):
+        logger.info(f"orchestrator {source}: enqueued {task.pipeline} for {task.company_id[:8]}")
+        return True
+    logger.debug(f"orchestrator {source}: duplicate {task.pipeline} for {task.company_id[:8]}")
+    return False
+
+
+async def _run_cycle(
+    source: str,
+    scan_fn: Callable[[str], Awaitable[list[BPOTask]]],
+    bucket_sec: int,
+    deadline_sec: float,
+) -> None:
+    company_ids = await _get_cycle_company_ids()
+    await scan_tenants(
+        source,
+        company_ids,
+        scan_fn,
+        lambda task: _dispatch(task, source, bucket_sec),
+        deadline_sec=deadline_sec,
+    )
+
+
 async def _run_schedule_cycle():
-    """全テナントのスケジュールトリガーを評価し、該当タスクを実行する。"""
+    """全テナントのスケジュールトリガーを評価し、該当タスクをキューに積む。"""
     from workers.bpo.manager.schedule_watcher import scan_schedule_triggers
-    from workers.bpo.manager.task_router import route_and_execute
-
-    company_ids = await _get_active_company_ids()
-    for cid in company_ids:
-        try:
-            tasks = await scan_schedule_triggers(cid)
-            for task in tasks:
-                asyncio.create_task(route_and_execute(task))
-                logger.info(f"orchestrator schedule: dispatched {task.pipeline} for {cid[:8]}")
-        except Exception as e:
-            logger.error(f"orchestrator schedule error for {cid[:8]}: {e}")
+    await _run_cycle("schedule", scan_schedule_triggers, _SCHEDULE_BUCKET_SEC, BPO_SCHEDULE_DEADLINE_SEC)
 
 
 async def _run_condition_cycle():
-    """全テナントの条件連鎖トリガーを評価し、該当タスクを実行する。"""
+    """全テナントの条件連鎖トリガーを評価し、該当タスクをキューに積む。"""
     from workers.bpo.manager.condition_evaluator import evaluate_knowledge_triggers
-    from workers.bpo.manager.task_router import route_and_execute
-
-    company_ids = await _get_active_company_ids()
-    for cid in company_ids:
-        try:
-            tasks = await evaluate_knowledge_triggers(cid)
-            for task in tasks:
-                asyncio.create_task(route_and_execute(task))
-                logger.info(f"orchestrator condition: dispatched {task.pipeline} for {cid[:8]}")
-        except Exception as e:
-            logger.error(f"orchestrator condition error for {cid[:8]}: {e}")
+    await _run_cycle("condition", evaluate_knowledge_triggers, _CONDITION_BUCKET_SEC, BPO_CONDITION_DEADLINE_SEC)
 
 
 async def _run_proactive_cycle():
-    """全テナントの先読みスキャンを実行する。"""
+    """全テナントの先読みスキャンを実行し、該当タスクをキューに積む。"""
     from workers.bpo.manager.proactive_scanner import scan_proactive_tasks
-    from workers.bpo.manager.task_router import route_and_execute
+    await _run_cycle("proactive", scan_proactive_tasks, _PROACTIVE_BUCKET_SEC, BPO_PROACTIVE_DEADLINE_SEC)
 
-    company_ids = await _get_active_company_ids()
-    for cid in company_ids:
-        try:
-            tasks = await scan_proactive_tasks(cid)
-            for task in tasks:
-                asyncio.create_task(route_and_execute(task))
-                logger.info(f"orchestrator proactive: dispatched {task.pipeline} for {cid[:8]}")
-        except Exception as e:
-            logger.error(f"orchestrator proactive error for {cid[:8]}: {e}")
+
+def _spawn_cycle(name: str, cycle: Callable[[], Awaitable[None]]) -> None:
+    """長いサイクルを毎分ループから切り離して起動する。前回がまだ実行中ならスキップする。"""
+    running = _cycle_tasks.get(name)
+    if running is not None and not running.done():
+        record_overlap_skip(name)
+        return
+    _cycle_tasks[name] = asyncio.create_task(cycle())
+
+
+async def _cancel_cycles() -> None:
+    tasks = [t for t in _cycle_tasks.values() if not t.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _cycle_tasks.clear()
 
 
 async def _orchestrator_loop():
@@ -119,14 +208,19 @@ async def _orchestrator_loop():
     - テナント別kill switch (companies.bpo_kill_switch=True) → そのテナントのみスキップ
       ※ _get_active_company_ids() がkill switch=Trueのテナントを除外するため、
       テナントループ内での個別チェックは追加のDBアクセスを避けるため省略。
+
+    リーダーリースを取れなかったインスタンスは走査せず待機する（毎分取得を試みる）。
+    シャーディング有効時はリースを使わず、毎分ハートビートでリングを更新して自分の担当分だけ走査する。
     """
     from workers.bpo.manager.notifier import notify_pipeline_event
 
     logger.info("orchestrator: バックグラウンドループ開始")
     tick = 0
     _global_kill_notified = False  # グローバルkill switch通知を1回だけ送るフラグ
+    is_leader = False
 
     while True:
+        started = time.monotonic()
         try:
             # ── グローバルkill switchチェック ──────────────────────────────
             if _is_global_kill_switch_on():
@@ -141,7 +235,7 @@ async def _orchestrator_loop():
                         )
                     )
                     _global_kill_notified = True
-                await asyncio.sleep(60)
+                await asyncio.sleep(_LOOP_INTERVAL_SEC)
                 continue
 
             # グローバルkill switchが解除されたらフラグをリセット
@@ -149,38 +243,80 @@ async def _orchestrator_loop():
                 logger.info("orchestrator: グローバルkill switch 解除 — BPO処理を再開")
                 _global_kill_notified = False
 
+            # ── リーダー選出 / シャード更新 ─────────────────────────────────
+            if _sharding_enabled():
+                await _refresh_shard_ring()
+            elif not await _get_leader_lease().acquire():
+                if is_leader:
+                    logger.info("orchestrator: リーダーリース喪失 — 走査を停止")
+                    is_leader = False
+                await asyncio.sleep(_LOOP_INTERVAL_SEC)
+                continue
+            elif not is_leader:
+                logger.info("orchestrator: リーダーリース取得 — 走査を開始")
+                is_leader = True
+
             # ── 通常サイクル ───────────────────────────────────────────────
             # 毎分: スケジュールトリガー評価（cron式と現在時刻を照合）
             await _run_schedule_cycle()
 
-            # 5分ごと: 条件連鎖トリガー評価
+            # 5分ごと: 条件連鎖トリガー評価（毎分ループを塞がないよう切り離して実行）
             if tick % 5 == 0:
-                await _run_condition_cycle()
+                _spawn_cycle("condition", _run_condition_cycle)
 
             # 30分ごと: 先読みスキャン
             if tick % 30 == 0:
-                await _run_proactive_cycle()
+                _spawn_cycle("proactive", _run_proactive_cycle)
 
             tick += 1
         except Exception as e:
             logger.error(f"orchestrator loop error: {e}")
 
-        await asyncio.sleep(60)  # 1分間隔
+        # 1分間隔（スケジュールサイクルの所要時間を差し引く）
+        await asyncio.sleep(max(1.0, _LOOP_INTERVAL_SEC - (time.monotonic() - started)))
+
+
+async def _refresh_shard_ring() -> None:
+    """ハートビートを書き、生存メンバーでハッシュリングを作り直す。"""
+    global _shard_ring
+    members = await _get_membership().heartbeat()
+    _shard_ring = ConsistentHashRing(members)
+
+
+def _get_membership() -> ShardMembership:
+    global _membership
+    if _membership is None:
+        _membership = get_shard_membership(_LEADER_LEASE_NAME, BPO_LEADER_LEASE_SEC)
+    return _membership
+
+
+def _get_leader_lease() -> LeaderLease:
+    global _leader_lease
+    if _leader_lease is None:
+        _leader_lease = get_leader_lease(_LEADER_LEASE_NAME, BPO_LEADER_LEASE_SEC)
+    return _leader_lease
 
 
 async def start_orchestrator():
-    """オーケストレータをバックグラウンドタスクとして起動する。"""
-    global _orchestrator_task
+    """オーケストレータをバックグラウンドタスクとして起動する。
+
+    BPO_WORKER_IN_PROCESS が有効なら同じプロセスでキューワーカーも起動する。
+    """
+    global _orchestrator_task, _in_process_worker_started
     if _orchestrator_task and not _orchestrator_task.done():
         logger.warning("orchestrator: already running")
         return
+    if _in_process_worker_enabled():
+        from workers.bpo.manager.queue_worker import start_queue_worker
+        await start_queue_worker()
+        _in_process_worker_started = True
     _orchestrator_task = asyncio.create_task(_orchestrator_loop())
-    logger.info("orchestrator: started")
+    logger.info(f"orchestrator: started (queue={queue_backend()}, in_process_worker={_in_process_worker_started})")
 
 
 async def stop_orchestrator():
-    """オーケストレータを停止する。"""
-    global _orchestrator_task
+    """オーケストレータを停止する（リーダーリース・シャードを返却し、プロセス内ワーカーを drain する）。"""
+    global _orchestrator_task, _leader_lease, _membership, _shard_ring, _in_process_worker_started
     if _orchestrator_task and not _orchestrator_task.done():
         _orchestrator_task.cancel()
         try:
@@ -188,4 +324,16 @@ async def stop_orchestrator():
         except asyncio.CancelledError:
             pass
     _orchestrator_task = None
+    await _cancel_cycles()
+    if _leader_lease is not None:
+        await _leader_lease.release()
+        _leader_lease = None
+    if _membership is not None:
+        await _membership.leave()
+        _membership = None
+        _shard_ring = None
+    if _in_process_worker_started:
+        from workers.bpo.manager.queue_worker import stop_queue_worker
+        await stop_queue_worker()
+        _in_process_worker_started = False
     logger.info("orchestrator: stopped")
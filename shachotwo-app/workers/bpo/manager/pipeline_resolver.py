@@ -0,0 +1,194 @@
+"""BPO Manager — PipelineResolver。route_and_execute のパイプライン解決をプロセス内でキャッシュする。
+
+- ResolvedRegistry: 静的 PIPELINE_REGISTRY とゲノム由来エントリのマージ結果。
+  ゲノムJSONの変更（mtime/サイズ）を BPO_GENOME_CHECK_SEC ごとに確認し、変わった時だけ作り直す
+- resolve_pipeline_callable: "module.func" → 実行関数のメモ化（import_module は初回のみ）
+- HitlRequirements: bpo_hitl_requirements 全行のプロセス内テーブル。
+  BPO_HITL_REFRESH_SEC ごと、または invalidate_hitl_requirements() で再取得する
+- warm_pipeline_cache: 起動時に登録済みパイプラインを事前 import する
+"""
+import asyncio
+import importlib
+import logging
+import os
+import time
+from collections import ChainMap
+from typing import Any, Callable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+BPO_GENOME_CHECK_SEC = int(os.environ.get("BPO_GENOME_CHECK_SEC", "30"))
+BPO_HITL_REFRESH_SEC = int(os.environ.get("BPO_HITL_REFRESH_SEC", "60"))
+
+
+class ResolvedRegistry:
+    """静的レジストリを優先し、静的に無いキーだけゲノムから引くマージ済みビュー。
+
+    静的 dict は ChainMap でそのまま参照するため、コピーは作らない
+    （PIPELINE_REGISTRY への追加・テストでの patch.dict もそのまま反映される）。
+    """
+
+    def __init__(self, check_sec: int = BPO_GENOME_CHECK_SEC) -> None:
+        self.check_sec = check_sec
+        self._genome_paths: dict[str, str] = {}
+        self._view: Optional[ChainMap] = None
+        self._static_id: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, static_registry: dict[str, str]) -> Mapping[str, str]:
+        if self._fresh(static_registry):
+            return self._view  # type: ignore[return-value]
+        async with self._lock:
+            if not self._fresh(static_registry):
+                await self._refresh(static_registry)
+        return self._view  # type: ignore[return-value]
+
+    def _fresh(self, static_registry: dict[str, str]) -> bool:
+        return (
+            self._view is not None
+            and self._static_id == id(static_registry)
+            and self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.check_sec
+        )
+
+    async def _refresh(self, static_registry: dict[str, str]) -> None:
+        from workers.bpo.engine.genome_registry import get_loaded_genome_registry
+
+        self._checked_at = time.monotonic()
+        try:
+            genome = await get_loaded_genome_registry()
+            changed = await genome.reload_if_changed()
+            if changed or self._view is None:
+                self._genome_paths = {e.key: e.module_path for e in genome.list_entries()}
+                if changed:
+                    logger.info(f"ゲノムJSON変更を検知: {len(self._genome_paths)} パイプラインで再構築")
+        except Exception as e:
+            # 前回ロードできたゲノム由来エントリはそのまま使い続ける
+            logger.warning(f"GenomeRegistry マージ失敗。静的レジストリ（+前回のゲノム）のみ使用: {e}")
+        self._static_id = id(static_registry)
+        self._view = ChainMap(static_registry, self._genome_paths)
+
+    def invalidate(self) -> None:
+        self._view = None
+        self._checked_at = None
+
+
+_resolved_registry = ResolvedRegistry()
+
+
+async def get_resolved_registry(static_registry: dict[str, str]) -> Mapping[str, str]:
+    """静的 + ゲノム由来のマージ済みレジストリ（キャッシュ済みビュー）を返す。"""
+    return await _resolved_registry.get(static_registry)
+
+
+# ─── パイプライン関数のメモ化 ────────────────────────────────────────────────
+
+_pipeline_callables: dict[str, Callable[..., Any]] = {}
+
+
+def resolve_pipeline_callable(dotted_path: str) -> Callable[..., Any]:
+    """"package.module.func" を import して関数を返す。2回目以降は辞書引きのみ。
+
+    import 失敗（ImportError / AttributeError）はキャッシュせずそのまま送出する。
+    """
+    func = _pipeline_callables.get(dotted_path)
+    if func is None:
+        module_path, func_name = dotted_path.rsplit(".", 1)
+        module = importlib.import_module(module_path)
+        func = getattr(module, func_name)
+        _pipeline_callables[dotted_path] = func
+    return func
+
+
+async def warm_pipeline_cache(static_registry: dict[str, str]) -> dict[str, int]:
+    """登録済みの全パイプラインを事前 import する（初回リクエストの import 待ちをなくす）。
+
+    Returns:
+        {"loaded": 成功数, "failed": 失敗数}
+    """
+    registry = await get_resolved_registry(static_registry)
+    started = time.monotonic()
+    loaded = failed = 0
+    for key, dotted_path in registry.items():
+        try:
+            resolve_pipeline_callable(dotted_path)
+            loaded += 1
+        except Exception as e:
+            failed += 1
+            logger.debug(f"パイプライン事前importスキップ: {key} — {e}")
+        # 起動中も他のタスク（ハートビート等）を止めない
+        await asyncio.sleep(0)
+    logger.info(
+        f"パイプライン事前import完了: {loaded} 件成功, {failed} 件失敗 "
+        f"({int((time.monotonic() - started) * 1000)}ms)"
+    )
+    return {"loaded": loaded, "failed": failed}
+
+
+# ─── HITL 要件テーブル ──────────────────────────────────────────────────────
+
+
+class HitlRequirements:
+    """bpo_hitl_requirements の全行を pipeline_key → 行 で保持する。
+
+    取得失敗時は前回のテーブルを使い続け、次の間隔で再試行する。
+    """
+
+    def __init__(self, refresh_sec: int = BPO_HITL_REFRESH_SEC) -> None:
+        self.refresh_sec = refresh_sec
+        self._rows: dict[str, dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, pipeline_key: str) -> Optional[dict[str, Any]]:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    await self._load()
+        return self._rows.get(pipeline_key)
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_sec
+
+    async def _load(self) -> None:
+        self._loaded_at = time.monotonic()
+        try:
+            from db.supabase import execute, get_service_client
+
+            db = get_service_client()
+            result = await execute(
+                db.table("bpo_hitl_requirements").select(
+                    "pipeline_key, requires_approval, min_confidence_for_auto"
+                )
+            )
+            self._rows = {
+                row["pipeline_key"]: row for row in (result.data or []) if row.get("pipeline_key")
+            }
+        except Exception as e:
+            logger.debug(f"HITL要件テーブル取得スキップ（前回値を使用）: {e}")
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+
+_hitl_requirements = HitlRequirements()
+
+
+async def get_hitl_requirement(pipeline_key: str) -> Optional[dict[str, Any]]:
+    """パイプラインの HITL 要件行（requires_approval / min_confidence_for_auto）。なければ None。"""
+    return await _hitl_requirements.get(pipeline_key)
+
+
+def invalidate_hitl_requirements() -> None:
+    """bpo_hitl_requirements を更新した直後に呼ぶ。次の参照で再取得する。"""
+    _hitl_requirements.invalidate()
+
+
+def reset_pipeline_cache() -> None:
+    """レジストリ・関数メモ・HITL テーブルを全て破棄する（テスト用）。"""
+    _resolved_registry.invalidate()
+    _resolved_registry._genome_paths = {}
+    _pipeline_callables.clear()
+    _hitl_requirements.invalidate()
+    _hitl_requirements._rows = {}
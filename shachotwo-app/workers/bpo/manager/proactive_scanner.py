@@ -2,6 +2,7 @@
 import logging
 from typing import Any
 
+from db.supabase import execute
 from workers.bpo.manager.models import BPOTask, TriggerType, ExecutionLevel
 
 logger = logging.getLogger(__name__)
@@ -135,7 +136,7 @@ async def _save_pending_proposals(db: Any, proposals: list[dict[str, Any]]) -> N
             }
             for p in proposals
         ]
-        db.table("proactive_proposals").insert(rows).execute()
+        await execute(db.table("proactive_proposals").insert(rows))
     except Exception as e:
         logger.warning(f"proactive_scanner: failed to save pending proposals: {e}")
 
@@ -181,9 +182,9 @@ async def _scan_from_knowledge_items(company_id: str) -> list[BPOTask]:
         from db.supabase import get_service_client
         db = get_service_client()
 
-        result = db.table("knowledge_items").select(
+        result = await execute(db.table("knowledge_items").select(
             "id, title, metadata, confidence"
-        ).eq("company_id", company_id).eq("is_active", True).execute()
+        ).eq("company_id", company_id).eq("is_active", True))
 
         items = result.data or []
         tasks: list[BPOTask] = []
@@ -0,0 +1,220 @@
+"""BPO Manager — QueueWorker。TaskQueue からタスクを取り出して route_and_execute する。
+
+API と別プロセスで動かす場合:
+    BPO_QUEUE_BACKEND=postgres python -m workers.bpo.manager.queue_worker
+
+BPO_QUEUE_BACKEND=memory（既定）ではキューがプロセス内にしか無いため、
+オーケストレータと同じプロセスで start_queue_worker() を呼ぶ（orchestrator が自動で行う）。
+
+- 同時実行数は BPO_WORKER_CONCURRENCY。空きスロット分だけ claim するので、
+  処理が追いつかないタスクはキューに残る（バックプレッシャ）
+- 実行中は可視性タイムアウトの 1/3 ごとに extend し、長いパイプラインが再配信されないようにする
+- 例外と実行枠を取れなかった失敗（concurrency_limit / queue_timeout）はリトライ対象。それ以外の PipelineResult(success=False)
+  （承認待ち・Circuit Breaker・未登録パイプライン等）は結果として ack する
+- 停止時は claim を止め、実行中タスクを BPO_WORKER_DRAIN_SEC まで待つ。
+  終わらなかったタスクは可視性タイムアウト後に他のワーカーが拾う
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Optional
+
+from workers.bpo.manager.task_queue import (
+    BPO_QUEUE_VISIBILITY_SEC,
+    QueuedTask,
+    TaskQueue,
+    close_task_queue,
+    get_task_queue,
+)
+
+logger = logging.getLogger(__name__)
+
+BPO_WORKER_CONCURRENCY = int(os.environ.get("BPO_WORKER_CONCURRENCY", "4"))
+BPO_WORKER_POLL_INTERVAL_SEC = float(os.environ.get("BPO_WORKER_POLL_INTERVAL_SEC", "2"))
+BPO_WORKER_DRAIN_SEC = float(os.environ.get("BPO_WORKER_DRAIN_SEC", "25"))
+# 完了行の掃除間隔（purge を持つバックエンドのみ）
+_PURGE_INTERVAL_SEC = 3600
+
+# リトライすべき PipelineResult.failed_step（一時的な失敗）
+_RETRYABLE_FAILED_STEPS = {"concurrency_limit", "queue_timeout"}
+
+_worker: Optional["TaskWorker"] = None
+_worker_task: asyncio.Task | None = None
+
+
+class TaskWorker:
+    """TaskQueue を並列数 concurrency で処理するワーカー。"""
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        concurrency: int = BPO_WORKER_CONCURRENCY,
+        consumer: Optional[str] = None,
+        visibility_sec: int = BPO_QUEUE_VISIBILITY_SEC,
+        poll_interval_sec: float = BPO_WORKER_POLL_INTERVAL_SEC,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.visibility_sec = visibility_sec
+        self.poll_interval_sec = poll_interval_sec
+        self._running: set[asyncio.Task] = set()
+        self._slot_freed = asyncio.Event()
+        self._stopping = False
+        self._purged_at = 0.0
+
+    async def run(self) -> None:
+        """stop() されるまで claim → 実行を繰り返す。"""
+        logger.info(f"queue worker: started consumer={self.consumer} concurrency={self.concurrency}")
+        while not self._stopping:
+            free = self.concurrency - len(self._running)
+            claimed: list[QueuedTask] = []
+            if free > 0:
+                try:
+                    claimed = await self.queue.claim(self.consumer, free, self.visibility_sec)
+                except Exception as e:
+                    logger.error(f"queue worker: claim failed: {e}")
+            for queued in claimed:
+                task = asyncio.create_task(self._handle(queued))
+                self._running.add(task)
+                task.add_done_callback(self._on_done)
+            await self._maybe_purge()
+            if free <= 0 or len(claimed) < free:
+                # スロット満杯 or キューが空: スロットが空くかポーリング間隔が過ぎるまで待つ
+                await self._wait(self.poll_interval_sec)
+
+    async def _wait(self, timeout: float) -> None:
+        self._slot_freed.clear()
+        try:
+            await asyncio.wait_for(self._slot_freed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._slot_freed.set()
+
+    async def _handle(self, queued: QueuedTask) -> None:
+        from workers.bpo.manager.task_router import route_and_execute
+
+        heartbeat = asyncio.create_task(self._heartbeat(queued))
+        try:
+            result = await route_and_execute(queued.task)
+        except Exception as e:
+            await self._fail(queued, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        if not result.success and result.failed_step in _RETRYABLE_FAILED_STEPS:
+            await self._fail(queued, str(result.final_output.get("error", result.failed_step)))
+            return
+        try:
+            await self.queue.ack(self.consumer, queued)
+        except Exception as e:
+            logger.error(f"queue worker: ack failed {queued.task.pipeline}: {e}")
+
+    async def _fail(self, queued: QueuedTask, error: str) -> None:
+        try:
+            retried = await self.queue.fail(self.consumer, queued, error)
+        except Exception as e:
+            logger.error(f"queue worker: fail() failed {queued.task.pipeline}: {e}")
+            return
+        logger.warning(
+            f"queue worker: {queued.task.pipeline} ({queued.task.company_id[:8]}) "
+            f"attempt {queued.attempts} failed, {'retry scheduled' if retried else 'dead-lettered'}: {error}"
+        )
+
+    async def _heartbeat(self, queued: QueuedTask) -> None:
+        interval = max(1.0, self.visibility_sec / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.queue.extend(self.consumer, queued, self.visibility_sec)
+            except Exception as e:
+                logger.warning(f"queue worker: extend failed {queued.task.pipeline}: {e}")
+
+    async def _maybe_purge(self) -> None:
+        if time.monotonic() - self._purged_at < _PURGE_INTERVAL_SEC:
+            return
+        self._purged_at = time.monotonic()
+        purge = getattr(self.queue, "purge", None)
+        if purge is not None:
+            try:
+                await purge()
+            except Exception as e:
+                logger.warning(f"queue worker: purge failed: {e}")
+        # 失効したステップチェックポイントも同じ間隔で掃除する
+        try:
+            from workers.bpo.engine.checkpoint import get_checkpoint_store
+            await get_checkpoint_store().purge_expired()
+        except Exception as e:
+            logger.warning(f"queue worker: checkpoint purge failed: {e}")
+
+    async def stop(self, drain_sec: float = BPO_WORKER_DRAIN_SEC) -> None:
+        """claim を止め、実行中タスクを drain_sec まで待ってから打ち切る。"""
+        self._stopping = True
+        self._slot_freed.set()
+        if self._running:
+            _, pending = await asyncio.wait(set(self._running), timeout=drain_sec)
+            for task in pending:
+                task.cancel()
+        logger.info(f"queue worker: stopped consumer={self.consumer}")
+
+
+async def start_queue_worker(concurrency: int = BPO_WORKER_CONCURRENCY) -> None:
+    """プロセス内ワーカーをバックグラウンドタスクとして起動する。"""
+    global _worker, _worker_task
+    if _worker_task and not _worker_task.done():
+        logger.warning("queue worker: already running")
+        return
+    _worker = TaskWorker(get_task_queue(), concurrency=concurrency)
+    _worker_task = asyncio.create_task(_worker.run())
+
+
+async def stop_queue_worker() -> None:
+    """プロセス内ワーカーを停止する。"""
+    global _worker, _worker_task
+    if _worker is not None:
+        await _worker.stop()
+    if _worker_task and not _worker_task.done():
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+    _worker = None
+    _worker_task = None
+
+
+async def main() -> None:
+    """独立ワーカープロセスのエントリポイント。SIGTERM/SIGINT で drain して終了する。"""
+    from workers.bpo.manager.lifecycle import start_bpo_runtime, stop_bpo_runtime
+
+    await start_bpo_runtime()
+    worker = TaskWorker(get_task_queue())
+    loop = asyncio.get_running_loop()
+    stop_requested = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_requested.set)
+        except NotImplementedError:  # pragma: no cover (Windows)
+            pass
+
+    run_task = asyncio.create_task(worker.run())
+    await stop_requested.wait()
+    await worker.stop()
+    await run_task
+    await close_task_queue()
+    await stop_bpo_runtime()
+    from db.supabase import close_clients
+    await close_clients()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+    asyncio.run(main())
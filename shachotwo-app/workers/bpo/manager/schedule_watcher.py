@@ -1,12 +1,32 @@
-"""BPO Manager — ScheduleWatcher。Cronベースのトリガーを評価する。"""
+"""BPO Manager — ScheduleWatcher。Cronベースのトリガーを評価する。
+
+cron 式は cron.compile_cron でテナントのロード時に 1 回だけコンパイルし、全テナント共通の
+ScheduleIndex（次回発火時刻の min-heap）に積む。毎分のスキャンでは期限が来たエントリだけを
+heap から取り出すため、コストはテナント数 × アイテム数ではなく発火数に比例する。
+
+テナントのスケジュールは次のときに DB から再ロードする:
+- knowledge_items の変更フィード（updated_at が前回以降の行の company_id。毎分 1 クエリ）
+- invalidate_schedule_index(company_id) の明示呼び出し
+- BPO_SCHEDULE_INDEX_TTL_SEC 経過（物理削除など変更フィードに出ない変更の保険）
+"""
+import asyncio
+import heapq
+import itertools
 import logging
-from datetime import datetime, timezone
-from typing import Any
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
+from db.supabase import execute
+from workers.bpo.manager.cron import CronSchedule, compile_cron
 from workers.bpo.manager.models import BPOTask, TriggerType, ExecutionLevel
 
 logger = logging.getLogger(__name__)
 
+BPO_SCHEDULE_INDEX_TTL_SEC = int(os.environ.get("BPO_SCHEDULE_INDEX_TTL_SEC", "3600"))
+
 # --------------------------------------------------------------------------
 # 組み込みスケジュールトリガー定義
 # --------------------------------------------------------------------------
@@ -81,15 +101,12 @@ BUILTIN_SCHEDULE_TRIGGERS: list[dict[str, Any]] = [
     },
     {
         # 毎月末 09:00 — CS 品質月次レビュー
-        # 月末は「日=28〜31」では確実ではないため "L" 相当として
-        # _matches_cron_last_day() で別途処理する（後述）。
-        # ここでは sentinel cron として "0 9 28-31 * *" を使い、
-        # 実際の最終日判定は input_data の "last_day_only": True フラグで行う。
-        "cron_expr": "0 9 28-31 * *",
+        # 日フィールドの "L" = 月末日（cron.compile_cron が解釈する）
+        "cron_expr": "0 9 L * *",
         "pipeline": "sales/cs_feedback",
         "execution_level": ExecutionLevel.DATA_COLLECT,
         "estimated_impact": 0.5,
-        "input_data": {"last_day_only": True},
+        "input_data": {},
         "description": "CS品質月次レビュー（毎月末）",
     },
     # ── バックオフィス スケジュール ─────────────────────────────────
@@ -126,11 +143,11 @@ BUILTIN_SCHEDULE_TRIGGERS: list[dict[str, Any]] = [
         "description": "買掛支払処理（月末5日前）",
     },
     {
-        "cron_expr": "0 9 28-31 * *",
+        "cron_expr": "0 9 L * *",
         "pipeline": "backoffice/invoice_issue",
         "execution_level": ExecutionLevel.APPROVAL_GATED,
         "estimated_impact": 0.7,
-        "input_data": {"last_day_only": True},
+        "input_data": {},
         "description": "請求書発行月末",
     },
     {
@@ -234,139 +251,262 @@ BUILTIN_SCHEDULE_TRIGGERS: list[dict[str, Any]] = [
 ]
 
 
-def _is_last_day_of_month(now: datetime) -> bool:
-    """現在日時が月末かどうかを判定する。"""
-    import calendar
-    last_day = calendar.monthrange(now.year, now.month)[1]
-    return now.day == last_day
-
-
 def _matches_cron(cron_expr: str, now: datetime) -> bool:
-    """
-    簡易Cron評価（croniterがない場合のフォールバック）。
-    書式: "分 時 日 月 曜日"（* はワイルドカード）
-    例: "0 9 25 * *" → 毎月25日9時0分
-    """
+    """cron 式が now（分単位）に一致するか。不正な式は False。"""
     try:
-        parts = cron_expr.strip().split()
-        if len(parts) != 5:
-            return False
-        minute, hour, day, month, weekday = parts
-
-        def match_field(field: str, value: int) -> bool:
-            if field == "*":
-                return True
-            if "," in field:
-                return value in [int(x) for x in field.split(",")]
-            if "-" in field:
-                start, end = field.split("-")
-                return int(start) <= value <= int(end)
-            return int(field) == value
-
-        return (
-            match_field(minute, now.minute)
-            and match_field(hour, now.hour)
-            and match_field(day, now.day)
-            and match_field(month, now.month)
-            and match_field(weekday, now.weekday())
-        )
-    except Exception:
+        return compile_cron(cron_expr).matches(now)
+    except ValueError:
         return False
 
 
-async def scan_schedule_triggers(company_id: str) -> list[BPOTask]:
-    """
-    knowledge_items の metadata に cron_expr があるアイテムを評価し、
-    現在時刻と一致する BPOTask リストを返す。
+def _compile_trigger(cron_expr: str, input_data: dict) -> CronSchedule:
+    """トリガーの cron 式をコンパイルする。旧形式の last_day_only フラグは日フィールドの L に読み替える。"""
+    if input_data.get("last_day_only"):
+        parts = cron_expr.split()
+        if len(parts) == 5:
+            parts[2] = "L"
+            cron_expr = " ".join(parts)
+    return compile_cron(cron_expr)
 
-    評価順序:
-    1. DB の knowledge_items（カスタムスケジュール、企業固有設定）
-    2. BUILTIN_SCHEDULE_TRIGGERS（組み込みデフォルト）
-       - DB に同一 pipeline + cron_expr が存在する場合は組み込みをスキップ（重複防止）
 
-    knowledge_item の metadata 例:
-    {"trigger_type": "schedule", "cron_expr": "0 9 25 * *", "pipeline": "common/payroll"}
-    """
-    now = datetime.now(timezone.utc)
-    tasks: list[BPOTask] = []
+# --------------------------------------------------------------------------
+# ScheduleIndex
+# --------------------------------------------------------------------------
+
+@dataclass
+class _ScheduleEntry:
+    """1 テナントの 1 スケジュールトリガー（DB アイテム or 組み込み）。"""
+    company_id: str
+    pipeline: str
+    schedule: CronSchedule
+    execution_level: int
+    input_data: dict
+    estimated_impact: float
+    generation: int
+    knowledge_item_ids: list[str] = field(default_factory=list)
+    context: dict = field(default_factory=dict)
+
+    def to_task(self) -> BPOTask:
+        return BPOTask(
+            company_id=self.company_id,
+            pipeline=self.pipeline,
+            trigger_type=TriggerType.SCHEDULE,
+            execution_level=ExecutionLevel(self.execution_level),
+            input_data=dict(self.input_data),
+            estimated_impact=self.estimated_impact,
+            knowledge_item_ids=list(self.knowledge_item_ids),
+            context=dict(self.context),
+        )
 
-    # ── Step 1: DB ファーストでカスタムスケジュールを評価 ──────────────────
-    # DB に登録済みの pipeline キーを追跡して組み込みとの重複を防ぐ
+
+def _build_entries(company_id: str, items: list[dict], generation: int) -> list[_ScheduleEntry]:
+    """DB アイテムと組み込みトリガーからエントリを作る（DB に同一 pipeline があれば組み込みは除外）。"""
+    entries: list[_ScheduleEntry] = []
     db_registered_pipelines: set[str] = set()
 
-    try:
-        from db.supabase import get_service_client
-        db = get_service_client()
+    for item in items:
+        meta = item.get("metadata") or {}
+        if meta.get("trigger_type") != "schedule":
+            continue
+        cron_expr = meta.get("cron_expr", "")
+        pipeline = meta.get("pipeline", "")
+        if not cron_expr or not pipeline:
+            continue
+        db_registered_pipelines.add(pipeline)
+        input_data = meta.get("input_data", {})
+        try:
+            entries.append(_ScheduleEntry(
+                company_id=company_id,
+                pipeline=pipeline,
+                schedule=_compile_trigger(cron_expr, input_data),
+                execution_level=ExecutionLevel(meta.get("execution_level", 2)),
+                input_data=input_data,
+                estimated_impact=float(item.get("confidence", 0.8)),
+                generation=generation,
+                knowledge_item_ids=[item["id"]],
+            ))
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"schedule_watcher: invalid schedule item {item.get('id')} ({cron_expr!r}): {e}")
 
-        result = db.table("knowledge_items").select(
-            "id, title, metadata, confidence"
-        ).eq("company_id", company_id).eq("is_active", True).execute()
+    for trigger in BUILTIN_SCHEDULE_TRIGGERS:
+        if trigger["pipeline"] in db_registered_pipelines:
+            continue
+        input_data = dict(trigger.get("input_data", {}))
+        entries.append(_ScheduleEntry(
+            company_id=company_id,
+            pipeline=trigger["pipeline"],
+            schedule=_compile_trigger(trigger["cron_expr"], input_data),
+            execution_level=trigger["execution_level"],
+            input_data=input_data,
+            estimated_impact=float(trigger.get("estimated_impact", 0.5)),
+            generation=generation,
+            context={"builtin": True, "description": trigger.get("description", "")},
+        ))
+    return entries
 
-        items = result.data or []
 
-        for item in items:
-            meta = item.get("metadata") or {}
-            if meta.get("trigger_type") != "schedule":
-                continue
+class ScheduleIndex:
+    """全テナントのスケジュールエントリを次回発火時刻の min-heap で持つ。
 
-            cron_expr = meta.get("cron_expr", "")
-            pipeline = meta.get("pipeline", "")
-            if not cron_expr or not pipeline:
+    - invalidate されたテナントの古いエントリは世代番号で識別し、heap から取り出した時点で捨てる
+    - TTL の間スキャンされなかったテナント（シャード移動・停止）は取り出した時点で破棄する
+    """
+
+    def __init__(self, ttl_sec: int = BPO_SCHEDULE_INDEX_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+        self._heap: list[tuple[datetime, int, _ScheduleEntry]] = []
+        self._seq = itertools.count()
+        self._generation: dict[str, int] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._last_scanned: dict[str, float] = {}
+        self._fired_through: dict[str, datetime] = {}
+        self._due: dict[str, list[_ScheduleEntry]] = {}
+        self._changes_since: Optional[datetime] = None
+        self._changes_polled_minute: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def needs_load(self, company_id: str) -> bool:
+        loaded_at = self._loaded_at.get(company_id)
+        return loaded_at is None or time.monotonic() - loaded_at >= self.ttl_sec
+
+    def load(self, company_id: str, items: list[dict], now: datetime, retry: bool = False) -> None:
+        """テナントのエントリを作り直し、now 以降（発火済みの分は除く）の次回発火時刻で heap に積む。
+
+        retry=True（DB 取得失敗時の組み込みのみロード）の場合は次のスキャンで再ロードする。
+        """
+        self.invalidate(company_id)
+        generation = self._generation[company_id]
+        start = _minute(now)
+        fired_through = self._fired_through.get(company_id)
+        if fired_through is not None and fired_through >= start:
+            start = fired_through + timedelta(minutes=1)
+        for entry in _build_entries(company_id, items, generation):
+            self._push(entry, entry.schedule.next_fire(start))
+        if not retry:
+            self._loaded_at[company_id] = time.monotonic()
+
+    def invalidate(self, company_id: str) -> None:
+        self._generation[company_id] = self._generation.get(company_id, 0) + 1
+        self._loaded_at.pop(company_id, None)
+        self._due.pop(company_id, None)
+
+    def pop_due(self, now: datetime) -> None:
+        """期限が来たエントリを heap から取り出してテナント別に溜め、次回発火時刻で積み直す。"""
+        current = _minute(now)
+        following = current + timedelta(minutes=1)
+        idle_cutoff = time.monotonic() - self.ttl_sec
+        while self._heap and self._heap[0][0] <= current:
+            _, _, entry = heapq.heappop(self._heap)
+            cid = entry.company_id
+            if entry.generation != self._generation.get(cid):
                 continue
+            if self._last_scanned.get(cid, float("inf")) < idle_cutoff:
+                self._evict(cid)
+                continue
+            self._due.setdefault(cid, []).append(entry)
+            self._push(entry, entry.schedule.next_fire(following))
 
-            db_registered_pipelines.add(pipeline)
+    def take(self, company_id: str, now: datetime) -> list[_ScheduleEntry]:
+        self._last_scanned[company_id] = time.monotonic()
+        self._fired_through[company_id] = _minute(now)
+        return self._due.pop(company_id, [])
 
-            if _matches_cron(cron_expr, now):
-                tasks.append(BPOTask(
-                    company_id=company_id,
-                    pipeline=pipeline,
-                    trigger_type=TriggerType.SCHEDULE,
-                    execution_level=ExecutionLevel(meta.get("execution_level", 2)),
-                    input_data=meta.get("input_data", {}),
-                    estimated_impact=float(item.get("confidence", 0.8)),
-                    knowledge_item_ids=[item["id"]],
-                ))
+    async def poll_changes(self, now: datetime) -> None:
+        """knowledge_items の変更フィードを毎分 1 回だけ読み、変更のあったロード済みテナントを invalidate する。"""
+        minute = _minute(now)
+        if self._changes_polled_minute == minute:
+            return
+        async with self._lock:
+            if self._changes_polled_minute == minute:
+                return
+            self._changes_polled_minute = minute
+            since, self._changes_since = self._changes_since, now
+            if since is None or not self._loaded_at:
+                return
+            try:
+                from db.supabase import get_service_client
+                db = get_service_client()
+                # アプリと DB の時計のずれを見込んで少し前から読む（重複 invalidate は無害）
+                result = await execute(
+                    db.table("knowledge_items").select("company_id")
+                    .gt("updated_at", (since - timedelta(seconds=30)).isoformat())
+                )
+                changed = {row["company_id"] for row in (result.data or [])}
+            except Exception as e:
+                logger.warning(f"schedule_watcher: change feed poll failed: {e}")
+                self._changes_since = since
+                return
+            for cid in changed & set(self._loaded_at):
+                self.invalidate(cid)
 
-        logger.debug(f"schedule_watcher DB: {len(tasks)} tasks for {company_id}")
+    def _push(self, entry: _ScheduleEntry, fire_at: Optional[datetime]) -> None:
+        if fire_at is not None:
+            heapq.heappush(self._heap, (fire_at, next(self._seq), entry))
 
-    except Exception as e:
-        logger.error(f"schedule_watcher DB error: {e}")
-        # DB エラーでも組み込みトリガーは評価を続ける
+    def _evict(self, company_id: str) -> None:
+        self.invalidate(company_id)
+        self._last_scanned.pop(company_id, None)
+        self._fired_through.pop(company_id, None)
 
-    # ── Step 2: 組み込みスケジュールトリガーの評価 ─────────────────────────
-    builtin_tasks: list[BPOTask] = []
-    for trigger in BUILTIN_SCHEDULE_TRIGGERS:
-        pipeline = trigger["pipeline"]
 
-        # DB に同一パイプラインが登録済みなら組み込みをスキップ
-        if pipeline in db_registered_pipelines:
-            continue
+def _minute(now: datetime) -> datetime:
+    return now.replace(second=0, microsecond=0)
 
-        cron_expr = trigger["cron_expr"]
-        input_data = dict(trigger.get("input_data", {}))
 
-        # 月末限定フラグの処理: last_day_only=True の場合は月末のみ発火
-        if input_data.get("last_day_only") and not _is_last_day_of_month(now):
-            continue
+_schedule_index = ScheduleIndex()
+
+
+def invalidate_schedule_index(company_id: Optional[str] = None) -> None:
+    """テナント（None なら全テナント）のスケジュールを次回スキャンで DB から再ロードさせる。"""
+    global _schedule_index
+    if company_id is None:
+        _schedule_index = ScheduleIndex()
+    else:
+        _schedule_index.invalidate(company_id)
 
-        if _matches_cron(cron_expr, now):
-            builtin_tasks.append(BPOTask(
-                company_id=company_id,
-                pipeline=pipeline,
-                trigger_type=TriggerType.SCHEDULE,
-                execution_level=ExecutionLevel(trigger["execution_level"]),
-                input_data=input_data,
-                estimated_impact=float(trigger.get("estimated_impact", 0.5)),
-                knowledge_item_ids=[],  # 組み込みトリガーはknowledge_item不要
-                context={"builtin": True, "description": trigger.get("description", "")},
-            ))
 
-    if builtin_tasks:
+async def _load_schedule_items(company_id: str) -> list[dict]:
+    from db.supabase import get_service_client
+    db = get_service_client()
+    result = await execute(db.table("knowledge_items").select(
+        "id, title, metadata, confidence"
+    ).eq("company_id", company_id).eq("is_active", True))
+    return result.data or []
+
+
+async def scan_schedule_triggers(company_id: str) -> list[BPOTask]:
+    """
+    現在時刻に発火するスケジュールトリガーの BPOTask リストを返す。
+
+    トリガーの出所:
+    1. DB の knowledge_items（カスタムスケジュール、企業固有設定）
+    2. BUILTIN_SCHEDULE_TRIGGERS（組み込みデフォルト）
+       - DB に同一 pipeline が存在する場合は組み込みをスキップ（重複防止）
+
+    knowledge_item の metadata 例:
+    {"trigger_type": "schedule", "cron_expr": "0 9 25 * *", "pipeline": "common/payroll"}
+
+    ループが遅れて分をまたいだ場合も、取りこぼした発火は次のスキャンで 1 回だけ返す。
+    """
+    now = datetime.now(timezone.utc)
+    index = _schedule_index
+
+    await index.poll_changes(now)
+    if index.needs_load(company_id):
+        try:
+            index.load(company_id, await _load_schedule_items(company_id), now)
+        except Exception as e:
+            logger.error(f"schedule_watcher DB error: {e}")
+            # DB エラーでも組み込みトリガーは評価を続ける（次のスキャンで再ロード）
+            index.load(company_id, [], now, retry=True)
+
+    index.pop_due(now)
+    tasks = [entry.to_task() for entry in index.take(company_id, now)]
+
+    builtin = [t.pipeline for t in tasks if t.context.get("builtin")]
+    if builtin:
         logger.info(
-            f"schedule_watcher builtin: {len(builtin_tasks)} triggers fired "
-            f"({[t.pipeline for t in builtin_tasks]}) for {company_id}"
+            f"schedule_watcher builtin: {len(builtin)} triggers fired ({builtin}) for {company_id}"
         )
-
-    tasks.extend(builtin_tasks)
     logger.info(f"schedule_watcher: total {len(tasks)} tasks for {company_id}")
     return tasks
@@ -0,0 +1,637 @@
+"""BPO Manager — TaskQueue。オーケストレータが発見した BPOTask を永続キュー経由で実行する。
+
+オーケストレータはタスクを enqueue するだけで、実行は queue_worker（別プロセス可）が
+claim → route_and_execute → ack/fail の順で行う。バックエンドは env BPO_QUEUE_BACKEND で選ぶ:
+    memory   : プロセス内キュー（既定。API プロセス内のワーカーが処理する）
+    postgres : bpo_task_queue テーブル + FOR UPDATE SKIP LOCKED（migration 059）
+    redis    : Redis Stream + コンシューマグループ（REDIS_URL）
+
+共通の保証:
+- 可視性タイムアウト: claim 後 BPO_QUEUE_VISIBILITY_SEC 以内に ack/extend されない
+  タスクは再配信される（ワーカーのクラッシュ・デプロイで失われない）
+- 冪等キー: 同じキーの enqueue は 1 回だけ受け付ける（複数インスタンスの重複発見対策）
+- リトライ: fail 時は指数バックオフで再投入し、BPO_QUEUE_MAX_ATTEMPTS 回で
+  bpo_task_dead_letters へ移す
+
+LeaderLease は「トリガー走査を 1 インスタンスだけが行う」ためのリース、
+ShardMembership は「テナントをレプリカ間で分担する」ための生存メンバー管理で、
+どちらもキューと同じバックエンドを使う。
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from workers.bpo.manager.models import BPOTask
+
+logger = logging.getLogger(__name__)
+
+BPO_QUEUE_VISIBILITY_SEC = int(os.environ.get("BPO_QUEUE_VISIBILITY_SEC", "360"))
+BPO_QUEUE_MAX_ATTEMPTS = int(os.environ.get("BPO_QUEUE_MAX_ATTEMPTS", "3"))
+BPO_QUEUE_RETRY_BASE_SEC = int(os.environ.get("BPO_QUEUE_RETRY_BASE_SEC", "30"))
+_RETRY_MAX_DELAY_SEC = 3600
+# 冪等キーの保持期間（キー自体に時間バケットを含むので短くてよい）
+IDEMPOTENCY_TTL_SEC = 24 * 3600
+
+_REDIS_STREAM = "bpo:tasks"
+_REDIS_GROUP = "bpo-workers"
+_REDIS_DELAYED = "bpo:tasks:delayed"
+_REDIS_DELIVERIES = "bpo:tasks:deliveries"
+_REDIS_IDEM_PREFIX = "bpo:idem:"
+_REDIS_LEASE_PREFIX = "bpo:lease:"
+_REDIS_MEMBERS_PREFIX = "bpo:members:"
+
+
+@dataclass
+class QueuedTask:
+    """claim されたタスク。attempts は今回の配信を含む累計試行回数。"""
+    id: str
+    task: BPOTask
+    attempts: int = 1
+    idempotency_key: Optional[str] = None
+
+
+def serialize_task(task: BPOTask) -> str:
+    return task.model_dump_json()
+
+
+def deserialize_task(payload: str | dict) -> BPOTask:
+    if isinstance(payload, str):
+        return BPOTask.model_validate_json(payload)
+    return BPOTask.model_validate(payload)
+
+
+def idempotency_key(task: BPOTask, source: str, bucket_sec: int, now: Optional[float] = None) -> str:
+    """同じ時間バケット内で同じタスクを発見したら同じキーになる。
+
+    source はサイクル名（schedule / condition / proactive）、bucket_sec はその周期。
+    """
+    bucket = int((now if now is not None else time.time()) // bucket_sec)
+    input_digest = hashlib.sha1(
+        json.dumps(task.input_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{source}:{bucket}:{task.company_id}:{task.pipeline}:{input_digest}"
+
+
+def retry_delay_sec(attempts: int) -> int:
+    """attempts 回目の失敗後の待ち時間（指数バックオフ）。"""
+    return min(BPO_QUEUE_RETRY_BASE_SEC * (2 ** max(0, attempts - 1)), _RETRY_MAX_DELAY_SEC)
+
+
+class TaskQueue(Protocol):
+    async def enqueue(self, task: BPOTask, idempotency_key: Optional[str] = None) -> bool:
+        """受け付けたら True、冪等キーが重複していたら False。"""
+        ...
+
+    async def claim(self, consumer: str, limit: int, visibility_sec: int) -> list[QueuedTask]: ...
+
+    async def extend(self, consumer: str, queued: QueuedTask, visibility_sec: int) -> None: ...
+
+    async def ack(self, consumer: str, queued: QueuedTask) -> None: ...
+
+    async def fail(self, consumer: str, queued: QueuedTask, error: str) -> bool:
+        """再投入したら True、デッドレターへ移したら False。"""
+        ...
+
+    async def close(self) -> None: ...
+
+
+# ─── memory ─────────────────────────────────────────────────────────────────
+
+class MemoryTaskQueue:
+    """単一プロセス用。再起動で中身は失われる（開発・単一インスタンス向け）。"""
+
+    def __init__(self) -> None:
+        self._ready: deque[QueuedTask] = deque()
+        self._delayed: list[tuple[float, QueuedTask]] = []
+        self._inflight: dict[str, tuple[float, str, QueuedTask]] = {}
+        self._idempotency: OrderedDict[str, float] = OrderedDict()
+        self.dead_letters: list[tuple[QueuedTask, str]] = []
+
+    async def enqueue(self, task: BPOTask, idempotency_key: Optional[str] = None) -> bool:
+        now = time.monotonic()
+        while self._idempotency and next(iter(self._idempotency.values())) <= now:
+            self._idempotency.popitem(last=False)
+        if idempotency_key:
+            if idempotency_key in self._idempotency:
+                return False
+            self._idempotency[idempotency_key] = now + IDEMPOTENCY_TTL_SEC
+        self._ready.append(QueuedTask(
+            id=uuid.uuid4().hex, task=task, attempts=0, idempotency_key=idempotency_key,
+        ))
+        return True
+
+    async def claim(self, consumer: str, limit: int, visibility_sec: int) -> list[QueuedTask]:
+        now = time.monotonic()
+        for task_id, (deadline, _, queued) in list(self._inflight.items()):
+            if deadline <= now:
+                del self._inflight[task_id]
+                if queued.attempts >= BPO_QUEUE_MAX_ATTEMPTS:
+                    self.dead_letters.append((queued, "visibility timeout"))
+                else:
+                    self._ready.appendleft(queued)
+        due = [q for at, q in self._delayed if at <= now]
+        self._delayed = [(at, q) for at, q in self._delayed if at > now]
+        self._ready.extend(due)
+
+        claimed: list[QueuedTask] = []
+        while self._ready and len(claimed) < limit:
+            queued = self._ready.popleft()
+            queued.attempts += 1
+            self._inflight[queued.id] = (now + visibility_sec, consumer, queued)
+            claimed.append(queued)
+        return claimed
+
+    async def extend(self, consumer: str, queued: QueuedTask, visibility_sec: int) -> None:
+        entry = self._inflight.get(queued.id)
+        if entry and entry[1] == consumer:
+            self._inflight[queued.id] = (time.monotonic() + visibility_sec, consumer, queued)
+
+    async def ack(self, consumer: str, queued: QueuedTask) -> None:
+        self._inflight.pop(queued.id, None)
+
+    async def fail(self, consumer: str, queued: QueuedTask, error: str) -> bool:
+        self._inflight.pop(queued.id, None)
+        if queued.attempts >= BPO_QUEUE_MAX_ATTEMPTS:
+            self.dead_letters.append((queued, error))
+            logger.error(f"task_queue: dead letter {queued.task.pipeline} ({queued.task.company_id[:8]}): {error}")
+            return False
+        self._delayed.append((time.monotonic() + retry_delay_sec(queued.attempts), queued))
+        return True
+
+    def pending_count(self) -> int:
+        return len(self._ready) + len(self._delayed) + len(self._inflight)
+
+    async def close(self) -> None:
+        return None
+
+
+# ─── postgres ───────────────────────────────────────────────────────────────
+
+class PostgresTaskQueue:
+    """bpo_task_queue テーブル。claim は FOR UPDATE SKIP LOCKED の RPC で行う。"""
+
+    async def enqueue(self, task: BPOTask, idempotency_key: Optional[str] = None) -> bool:
+        from db.supabase import execute, get_service_client
+        result = await execute(get_service_client().rpc("enqueue_bpo_task", {
+            "p_company_id": task.company_id,
+            "p_pipeline": task.pipeline,
+            "p_payload": json.loads(serialize_task(task)),
+            "p_idempotency_key": idempotency_key,
+        }))
+        return bool(result.data)
+
+    async def claim(self, consumer: str, limit: int, visibility_sec: int) -> list[QueuedTask]:
+        from db.supabase import execute, get_service_client
+        result = await execute(get_service_client().rpc("claim_bpo_tasks", {
+            "p_consumer": consumer,
+            "p_limit": limit,
+            "p_visibility_sec": visibility_sec,
+            "p_max_attempts": BPO_QUEUE_MAX_ATTEMPTS,
+        }))
+        claimed = []
+        for row in result.data or []:
+            try:
+                task = deserialize_task(row["payload"])
+            except Exception as e:
+                logger.error(f"task_queue: invalid payload {row.get('id')}: {e}")
+                continue
+            claimed.append(QueuedTask(
+                id=row["id"], task=task, attempts=row["attempts"],
+                idempotency_key=row.get("idempotency_key"),
+            ))
+        return claimed
+
+    async def extend(self, consumer: str, queued: QueuedTask, visibility_sec: int) -> None:
+        from db.supabase import execute, get_service_client
+        await execute(get_service_client().rpc("extend_bpo_task", {
+            "p_id": queued.id, "p_consumer": consumer, "p_visibility_sec": visibility_sec,
+        }))
+
+    async def ack(self, consumer: str, queued: QueuedTask) -> None:
+        from db.supabase import execute, get_service_client
+        await execute(get_service_client().rpc("ack_bpo_task", {
+            "p_id": queued.id, "p_consumer": consumer,
+        }))
+
+    async def fail(self, consumer: str, queued: QueuedTask, error: str) -> bool:
+        from db.supabase import execute, get_service_client
+        result = await execute(get_service_client().rpc("fail_bpo_task", {
+            "p_id": queued.id,
+            "p_consumer": consumer,
+            "p_error": error[:2000],
+            "p_max_attempts": BPO_QUEUE_MAX_ATTEMPTS,
+            "p_retry_delay_sec": retry_delay_sec(queued.attempts),
+        }))
+        return result.data == "retry"
+
+    async def purge(self) -> int:
+        """冪等キーの保持期間を過ぎた完了行を削除する。"""
+        from db.supabase import execute, get_service_client
+        result = await execute(get_service_client().rpc("purge_bpo_task_queue", {
+            "p_older_than_sec": IDEMPOTENCY_TTL_SEC,
+        }))
+        return result.data or 0
+
+    async def close(self) -> None:
+        return None
+
+
+# ─── redis ──────────────────────────────────────────────────────────────────
+
+class RedisTaskQueue:
+    """Redis Stream（bpo:tasks）+ コンシューマグループ。
+
+    - 可視性タイムアウトは XAUTOCLAIM（アイドル時間）で実現し、extend は XCLAIM で時計を戻す
+    - リトライ待ちは sorted set（bpo:tasks:delayed）に置き、claim 時に期限到来分を戻す
+    - デッドレターは Postgres の bpo_task_dead_letters に書く
+    """
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self._group_ready = False
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self._redis.xgroup_create(_REDIS_STREAM, _REDIS_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def enqueue(self, task: BPOTask, idempotency_key: Optional[str] = None) -> bool:
+        await self._ensure_group()
+        if idempotency_key:
+            accepted = await self._redis.set(
+                _REDIS_IDEM_PREFIX + idempotency_key, "1", nx=True, ex=IDEMPOTENCY_TTL_SEC,
+            )
+            if not accepted:
+                return False
+        await self._redis.xadd(_REDIS_STREAM, {
+            "payload": serialize_task(task),
+            "attempts": 0,
+            "idempotency_key": idempotency_key or "",
+        })
+        return True
+
+    async def _promote_delayed(self) -> None:
+        due = await self._redis.zrangebyscore(_REDIS_DELAYED, "-inf", time.time(), start=0, num=100)
+        for entry in due:
+            # ZREM に成功したワーカーだけが戻す（二重投入防止）
+            if await self._redis.zrem(_REDIS_DELAYED, entry):
+                await self._redis.xadd(_REDIS_STREAM, json.loads(entry))
+
+    async def claim(self, consumer: str, limit: int, visibility_sec: int) -> list[QueuedTask]:
+        await self._ensure_group()
+        await self._promote_delayed()
+
+        # 可視性タイムアウト切れ（クラッシュしたワーカーの分）を先に引き取る
+        _, reclaimed, *_ = await self._redis.xautoclaim(
+            _REDIS_STREAM, _REDIS_GROUP, consumer,
+            min_idle_time=visibility_sec * 1000, start_id="0-0", count=limit,
+        )
+        entries = []
+        for entry_id, fields in (e for e in reclaimed if e and e[1]):
+            # 前回の配信がクラッシュ・ハングで終わった分。上限に達していればデッドレターへ
+            delivered = int(await self._redis.hget(_REDIS_DELIVERIES, entry_id) or 0)
+            attempts = int(fields.get("attempts", 0)) + delivered
+            if attempts >= BPO_QUEUE_MAX_ATTEMPTS:
+                try:
+                    queued = QueuedTask(
+                        id=entry_id,
+                        task=deserialize_task(fields["payload"]),
+                        attempts=attempts,
+                        idempotency_key=fields.get("idempotency_key") or None,
+                    )
+                except Exception as e:
+                    logger.error(f"task_queue: invalid payload {entry_id}: {e}")
+                else:
+                    await _write_dead_letter(queued, "visibility timeout")
+                    logger.error(f"task_queue: dead letter {queued.task.pipeline} ({queued.task.company_id[:8]}): visibility timeout")
+                await self._drop(entry_id)
+                continue
+            entries.append((entry_id, fields))
+        if len(entries) < limit:
+            streams = await self._redis.xreadgroup(
+                _REDIS_GROUP, consumer, {_REDIS_STREAM: ">"}, count=limit - len(entries),
+            )
+            for _, stream_entries in streams or []:
+                entries.extend(stream_entries)
+
+        claimed = []
+        for entry_id, fields in entries:
+            deliveries = await self._redis.hincrby(_REDIS_DELIVERIES, entry_id, 1)
+            try:
+                task = deserialize_task(fields["payload"])
+            except Exception as e:
+                logger.error(f"task_queue: invalid payload {entry_id}: {e}")
+                await self._drop(entry_id)
+                continue
+            claimed.append(QueuedTask(
+                id=entry_id,
+                task=task,
+                attempts=int(fields.get("attempts", 0)) + deliveries,
+                idempotency_key=fields.get("idempotency_key") or None,
+            ))
+        return claimed
+
+    async def extend(self, consumer: str, queued: QueuedTask, visibility_sec: int) -> None:
+        await self._redis.xclaim(
+            _REDIS_STREAM, _REDIS_GROUP, consumer, min_idle_time=0,
+            message_ids=[queued.id], justid=True,
+        )
+
+    async def _drop(self, entry_id: str) -> None:
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.xack(_REDIS_STREAM, _REDIS_GROUP, entry_id)
+        pipe.xdel(_REDIS_STREAM, entry_id)
+        pipe.hdel(_REDIS_DELIVERIES, entry_id)
+        await pipe.execute()
+
+    async def ack(self, consumer: str, queued: QueuedTask) -> None:
+        await self._drop(queued.id)
+
+    async def fail(self, consumer: str, queued: QueuedTask, error: str) -> bool:
+        if queued.attempts >= BPO_QUEUE_MAX_ATTEMPTS:
+            await _write_dead_letter(queued, error)
+            await self._drop(queued.id)
+            return False
+        entry = json.dumps({
+            "payload": serialize_task(queued.task),
+            "attempts": queued.attempts,
+            "idempotency_key": queued.idempotency_key or "",
+            "uid": uuid.uuid4().hex,  # 同一内容のリトライが sorted set 上で潰れないように
+        })
+        await self._redis.zadd(_REDIS_DELAYED, {entry: time.time() + retry_delay_sec(queued.attempts)})
+        await self._drop(queued.id)
+        return True
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+async def _write_dead_letter(queued: QueuedTask, error: str) -> None:
+    """Postgres 以外のバックエンドからデッドレターを書く（失敗時はログのみ）。"""
+    try:
+        from db.supabase import execute, get_service_client
+        await execute(get_service_client().table("bpo_task_dead_letters").insert({
+            "company_id": queued.task.company_id,
+            "pipeline": queued.task.pipeline,
+            "payload": json.loads(serialize_task(queued.task)),
+            "idempotency_key": queued.idempotency_key,
+            "attempts": queued.attempts,
+            "last_error": error[:2000],
+        }))
+    except Exception as e:
+        logger.error(f"task_queue: dead letter write failed ({queued.task.pipeline}): {e} / error={error}")
+
+
+# ─── leader lease ───────────────────────────────────────────────────────────
+
+class LeaderLease(Protocol):
+    async def acquire(self) -> bool:
+        """リーダーなら True（取得または更新）。"""
+        ...
+
+    async def release(self) -> None: ...
+
+
+class MemoryLeaderLease:
+    """単一プロセスでは常にリーダー。"""
+
+    async def acquire(self) -> bool:
+        return True
+
+    async def release(self) -> None:
+        return None
+
+
+class PostgresLeaderLease:
+    def __init__(self, name: str, ttl_sec: int) -> None:
+        self.name = name
+        self.ttl_sec = ttl_sec
+        self.holder = uuid.uuid4().hex
+
+    async def acquire(self) -> bool:
+        from db.supabase import execute, get_service_client
+        try:
+            result = await execute(get_service_client().rpc("try_acquire_leader_lease", {
+                "p_name": self.name, "p_holder": self.holder, "p_ttl_sec": self.ttl_sec,
+            }))
+            return bool(result.data)
+        except Exception as e:
+            logger.warning(f"leader lease acquire failed ({self.name}): {e}")
+            return False
+
+    async def release(self) -> None:
+        from db.supabase import execute, get_service_client
+        try:
+            await execute(
+                get_service_client().table("bpo_leader_leases").delete()
+                .eq("name", self.name).eq("holder", self.holder)
+            )
+        except Exception as e:
+            logger.debug(f"leader lease release failed ({self.name}): {e}")
+
+
+# 自分が保持者なら期限を延長、未保持なら NX で取得
+_REDIS_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+_REDIS_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaderLease:
+    def __init__(self, url: str, name: str, ttl_sec: int) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.key = _REDIS_LEASE_PREFIX + name
+        self.ttl_sec = ttl_sec
+        self.holder = uuid.uuid4().hex
+
+    async def acquire(self) -> bool:
+        try:
+            return bool(await self._redis.eval(
+                _REDIS_LEASE_SCRIPT, 1, self.key, self.holder, self.ttl_sec * 1000,
+            ))
+        except Exception as e:
+            logger.warning(f"leader lease acquire failed ({self.key}): {e}")
+            return False
+
+    async def release(self) -> None:
+        try:
+            await self._redis.eval(_REDIS_RELEASE_SCRIPT, 1, self.key, self.holder)
+            await self._redis.aclose()
+        except Exception as e:
+            logger.debug(f"leader lease release failed ({self.key}): {e}")
+
+
+# ─── shard membership ───────────────────────────────────────────────────────
+
+class ShardMembership(Protocol):
+    member_id: str
+
+    async def heartbeat(self) -> list[str]:
+        """自分の生存を記録し、生存メンバー（自分を含む）を返す。"""
+        ...
+
+    async def leave(self) -> None: ...
+
+
+class MemoryShardMembership:
+    """単一プロセスでは自分だけがメンバー。"""
+
+    def __init__(self) -> None:
+        self.member_id = uuid.uuid4().hex
+
+    async def heartbeat(self) -> list[str]:
+        return [self.member_id]
+
+    async def leave(self) -> None:
+        return None
+
+
+class PostgresShardMembership:
+    def __init__(self, group: str, ttl_sec: int) -> None:
+        self.group = group
+        self.ttl_sec = ttl_sec
+        self.member_id = uuid.uuid4().hex
+
+    async def heartbeat(self) -> list[str]:
+        from db.supabase import execute, get_service_client
+        try:
+            result = await execute(get_service_client().rpc("heartbeat_orchestrator_member", {
+                "p_group": self.group, "p_member_id": self.member_id, "p_ttl_sec": self.ttl_sec,
+            }))
+            members = [r["member_id"] for r in (result.data or [])]
+        except Exception as e:
+            # 取得できないときは自分だけとみなす（重複発見は冪等キーで吸収される）
+            logger.warning(f"shard membership heartbeat failed ({self.group}): {e}")
+            members = []
+        return members or [self.member_id]
+
+    async def leave(self) -> None:
+        from db.supabase import execute, get_service_client
+        try:
+            await execute(
+                get_service_client().table("bpo_orchestrator_members").delete()
+                .eq("group_name", self.group).eq("member_id", self.member_id)
+            )
+        except Exception as e:
+            logger.debug(f"shard membership leave failed ({self.group}): {e}")
+
+
+class RedisShardMembership:
+    """sorted set（score=最終ハートビート時刻）で生存メンバーを持つ。"""
+
+    def __init__(self, url: str, group: str, ttl_sec: int) -> None:
+        import redis.asyncio as redis_asyncio  # 遅延インポート（memory 利用時は不要）
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.key = _REDIS_MEMBERS_PREFIX + group
+        self.ttl_sec = ttl_sec
+        self.member_id = uuid.uuid4().hex
+
+    async def heartbeat(self) -> list[str]:
+        now = time.time()
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.zadd(self.key, {self.member_id: now})
+            pipe.zremrangebyscore(self.key, "-inf", now - self.ttl_sec)
+            pipe.zrange(self.key, 0, -1)
+            _, _, members = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"shard membership heartbeat failed ({self.key}): {e}")
+            members = []
+        return list(members) or [self.member_id]
+
+    async def leave(self) -> None:
+        try:
+            await self._redis.zrem(self.key, self.member_id)
+            await self._redis.aclose()
+        except Exception as e:
+            logger.debug(f"shard membership leave failed ({self.key}): {e}")
+
+
+# ─── factory ────────────────────────────────────────────────────────────────
+
+def queue_backend() -> str:
+    return os.environ.get("BPO_QUEUE_BACKEND", "memory").lower()
+
+
+def _redis_url() -> str:
+    return os.environ.get("REDIS_URL", "redis://localhost:6379")
+
+
+_task_queue: Optional[TaskQueue] = None
+
+
+def get_task_queue() -> TaskQueue:
+    """プロセス共通の TaskQueue（バックエンドは env BPO_QUEUE_BACKEND）。"""
+    global _task_queue
+    if _task_queue is None:
+        backend = queue_backend()
+        if backend == "postgres":
+            _task_queue = PostgresTaskQueue()
+        elif backend == "redis":
+            try:
+                _task_queue = RedisTaskQueue(_redis_url())
+            except Exception as e:
+                logger.warning(f"BPO task queue redis backend unavailable, using memory: {e}")
+        if _task_queue is None:
+            _task_queue = MemoryTaskQueue()
+    return _task_queue
+
+
+def get_leader_lease(name: str, ttl_sec: int) -> LeaderLease:
+    backend = queue_backend()
+    if backend == "postgres":
+        return PostgresLeaderLease(name, ttl_sec)
+    if backend == "redis":
+        try:
+            return RedisLeaderLease(_redis_url(), name, ttl_sec)
+        except Exception as e:
+            logger.warning(f"leader lease redis backend unavailable, assuming leader: {e}")
+    return MemoryLeaderLease()
+
+
+def get_shard_membership(group: str, ttl_sec: int) -> ShardMembership:
+    backend = queue_backend()
+    if backend == "postgres":
+        return PostgresShardMembership(group, ttl_sec)
+    if backend == "redis":
+        try:
+            return RedisShardMembership(_redis_url(), group, ttl_sec)
+        except Exception as e:
+            logger.warning(f"shard membership redis backend unavailable, running unsharded: {e}")
+    return MemoryShardMembership()
+
+
+async def close_task_queue() -> None:
+    global _task_queue
+    queue, _task_queue = _task_queue, None
+    if queue is not None:
+        await queue.close()
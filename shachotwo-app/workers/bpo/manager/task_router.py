@@ -1,18 +1,32 @@
 """BPO Manager — TaskRouter。発見タスクを適切なパイプラインにルーティングする。"""
 import asyncio
-import importlib
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Mapping, Optional
 
+from workers.bpo.manager.fair_scheduler import (
+    MAX_CONCURRENT_PIPELINES_PER_TENANT,  # noqa: F401 — 後方互換の再エクスポート
+    SchedulerRejected,
+    get_fair_scheduler,
+)
 from workers.bpo.manager.models import BPOTask, ExecutionLevel, PipelineResult
 from workers.bpo.manager.notifier import notify_pipeline_event
-from workers.bpo.engine.genome_registry import get_loaded_genome_registry
+from workers.bpo.manager.pipeline_resolver import (
+    get_hitl_requirement,
+    get_resolved_registry,
+    resolve_pipeline_callable,
+    warm_pipeline_cache,
+)
+from workers.bpo.manager.task_queue import get_task_queue, idempotency_key
 
 logger = logging.getLogger(__name__)
 
+# 連鎖タスクの冪等キー周期。orchestrator の条件サイクルと同じにし、
+# 同じ条件を両方が見つけても 1 回だけ積まれるようにする
+_CHAIN_BUCKET_SEC = 5 * 60
+
 
 # ─── Circuit Breaker ──────────────────────────────────────────────────────────
 
@@ -236,18 +250,6 @@ PIPELINE_REGISTRY: dict[str, str] = {
     # "architecture/building_permit":  "workers.bpo.architecture.pipelines.building_permit_pipeline.run_building_permit_pipeline",
 }
 
-# テナント別同時実行制御（最大3パイプライン同時）
-MAX_CONCURRENT_PIPELINES_PER_TENANT = 3
-_tenant_semaphores: dict[str, asyncio.Semaphore] = {}
-
-
-def _get_tenant_semaphore(company_id: str) -> asyncio.Semaphore:
-    """テナント別のSemaphoreを取得（なければ作成）"""
-    if company_id not in _tenant_semaphores:
-        _tenant_semaphores[company_id] = asyncio.Semaphore(MAX_CONCURRENT_PIPELINES_PER_TENANT)
-    return _tenant_semaphores[company_id]
-
-
 def determine_approval_required(task: BPOTask, trust_score: float = 0.0) -> bool:
     """
     実行レベルと信頼スコアから承認要否を判定する。
@@ -299,18 +301,19 @@ async def _save_approval_pending(task: BPOTask, draft_result: dict[str, Any]) ->
         logger.error(f"承認待ち保存失敗: {e}")
 
 
-async def _get_effective_registry() -> dict[str, str]:
+async def _get_effective_registry() -> Mapping[str, str]:
     """静的 PIPELINE_REGISTRY にゲノム由来のパイプラインをマージして返す。
 
-    静的定義が常に優先される（後方互換保証）。
+    静的定義が常に優先される（後方互換保証）。マージ結果はキャッシュされ、
+    ゲノムJSONが変わった時だけ作り直す（pipeline_resolver.ResolvedRegistry）。
     GenomeRegistry のロードに失敗した場合は静的レジストリのみを返す。
     """
-    try:
-        genome = await get_loaded_genome_registry()
-        return genome.merge_with_static(PIPELINE_REGISTRY)
-    except Exception as e:
-        logger.warning(f"GenomeRegistry マージ失敗。静的レジストリのみ使用: {e}")
-        return dict(PIPELINE_REGISTRY)
+    return await get_resolved_registry(PIPELINE_REGISTRY)
+
+
+async def warm_pipelines() -> dict[str, int]:
+    """起動時に登録済みパイプラインを全て事前 import する。"""
+    return await warm_pipeline_cache(PIPELINE_REGISTRY)
 
 
 async def route_and_execute(
@@ -364,13 +367,8 @@ async def route_and_execute(
     # ── HITL閾値チェック: min_confidence_for_auto が設定されていれば自動承認を許可 ──
     hitl_auto_approved = False
     try:
-        from db.supabase import get_service_client
-        db = get_service_client()
-        hitl = db.table("bpo_hitl_requirements").select(
-            "requires_approval, min_confidence_for_auto"
-        ).eq("pipeline_key", pipeline_key).limit(1).execute()
-        if hitl.data:
-            row = hitl.data[0]
+        row = await get_hitl_requirement(pipeline_key)
+        if row:
             min_conf = row.get("min_confidence_for_auto")
             if min_conf is not None and trust_score >= float(min_conf):
                 hitl_auto_approved = True
@@ -401,11 +399,9 @@ async def route_and_execute(
             final_output={"message": "承認待ち。proactive_proposalsを確認してください。"},
         )
 
-    # パイプライン関数を動的にロード（マージ済みレジストリから取得）
-    module_path, func_name = effective_registry[pipeline_key].rsplit(".", 1)
+    # パイプライン関数を動的にロード（マージ済みレジストリから取得・2回目以降はメモ）
     try:
-        module = importlib.import_module(module_path)
-        pipeline_func = getattr(module, func_name)
+        pipeline_func = resolve_pipeline_callable(effective_registry[pipeline_key])
     except (ImportError, AttributeError) as e:
         logger.error(f"パイプラインロード失敗: {pipeline_key} — {e}")
         return PipelineResult(
@@ -415,18 +411,20 @@ async def route_and_execute(
             final_output={"error": f"パイプライン未実装: {e}"},
         )
 
-    # 同時実行制御
-    sem = _get_tenant_semaphore(task.company_id)
-    if sem.locked() and sem._value == 0:  # type: ignore[attr-defined]
-        logger.warning(f"同時実行上限到達: company={task.company_id}")
+    # 同時実行制御（プロセス全体の実行枠 + テナント別上限。空くまで重み付き公平キューで待つ）
+    scheduler = get_fair_scheduler()
+    try:
+        await scheduler.acquire(task)
+    except SchedulerRejected as e:
+        logger.warning(f"実行枠取得失敗 ({e.reason}): company={task.company_id} pipeline={pipeline_key}")
         return PipelineResult(
             success=False,
             pipeline=pipeline_key,
-            failed_step="concurrency_limit",
-            final_output={"error": f"同時実行上限（{MAX_CONCURRENT_PIPELINES_PER_TENANT}）に達しています。しばらく待ってから再試行してください。"},
+            failed_step=e.reason,
+            final_output={"error": str(e)},
         )
 
-    async with sem:
+    try:
         # パイプライン実行（5分タイムアウト）
         PIPELINE_TIMEOUT_SECONDS = 300
         try:
@@ -462,11 +460,14 @@ async def route_and_execute(
                 else:
                     await _record_failure(pipeline_key, task.company_id)
                 # パイプライン完了後に条件評価器を呼び出して連鎖トリガーを評価
+                # （依存テーブルが変わって再評価された条件のタスクだけを連鎖させる）
                 try:
                     from workers.bpo.manager.condition_evaluator import evaluate_knowledge_triggers
-                    chain_tasks = await evaluate_knowledge_triggers(task.company_id)
+                    chain_tasks = await evaluate_knowledge_triggers(task.company_id, changed_only=True)
                     for ct in chain_tasks:
-                        asyncio.create_task(route_and_execute(ct, trust_score=trust_score))
+                        # 永続キューに積む（プロセスが落ちても連鎖が失われない）
+                        key = idempotency_key(ct, "condition", _CHAIN_BUCKET_SEC)
+                        await get_task_queue().enqueue(ct, idempotency_key=key)
                 except Exception as chain_err:
                     logger.debug(f"条件連鎖評価スキップ: {chain_err}")
                 return result
@@ -499,3 +500,5 @@ async def route_and_execute(
                 failed_step="pipeline_execution",
                 final_output={"error": str(e)},
             )
+    finally:
+        scheduler.release(task.company_id)
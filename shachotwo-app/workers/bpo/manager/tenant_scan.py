@@ -0,0 +1,178 @@
+"""BPO Manager — TenantScan。オーケストレータのテナント走査を並列化・分担する。
+
+- scan_tenants: テナントごとの走査を BPO_SCAN_CONCURRENCY 並列で実行し、
+  サイクルごとの締め切りを過ぎた分は打ち切って超過（overrun）として記録する
+- TenantCache: アクティブテナント一覧を TTL 付きでキャッシュする（毎サイクルの companies 再取得を避ける）
+- ConsistentHashRing: 生存レプリカ間でテナントを分担する（メンバー増減で動くテナントは最小限）
+- get_cycle_stats: サイクル別の所要時間・超過回数などのメトリクス
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+
+from workers.bpo.manager.models import BPOTask
+
+logger = logging.getLogger(__name__)
+
+BPO_SCAN_CONCURRENCY = int(os.environ.get("BPO_SCAN_CONCURRENCY", "16"))
+BPO_TENANT_CACHE_TTL_SEC = int(os.environ.get("BPO_TENANT_CACHE_TTL_SEC", "300"))
+# 1メンバーあたりの仮想ノード数（多いほど分担が均等）
+_RING_VNODES = 64
+
+
+@dataclass
+class CycleStats:
+    """サイクル別の走査メトリクス（直近値と累計）。"""
+    name: str
+    runs: int = 0
+    overruns: int = 0                 # 締め切り超過 or 前回実行中でスキップした回数
+    skipped_overlaps: int = 0
+    last_duration_ms: int = 0
+    max_duration_ms: int = 0
+    last_tenants: int = 0
+    last_scanned: int = 0
+    last_failed: int = 0
+    last_timed_out: int = 0
+    last_enqueued: int = 0
+    last_finished_at: Optional[float] = None
+
+
+_cycle_stats: dict[str, CycleStats] = {}
+
+
+def _stats(name: str) -> CycleStats:
+    if name not in _cycle_stats:
+        _cycle_stats[name] = CycleStats(name=name)
+    return _cycle_stats[name]
+
+
+def get_cycle_stats() -> dict[str, dict]:
+    """サイクル名 → メトリクス。"""
+    return {name: asdict(s) for name, s in _cycle_stats.items()}
+
+
+def record_overlap_skip(name: str) -> None:
+    """前回のサイクルがまだ実行中で今回を起動しなかったことを記録する。"""
+    stats = _stats(name)
+    stats.overruns += 1
+    stats.skipped_overlaps += 1
+    logger.warning(f"orchestrator {name}: 前回サイクルが実行中のためスキップ (overruns={stats.overruns})")
+
+
+def reset_cycle_stats() -> None:
+    _cycle_stats.clear()
+
+
+async def scan_tenants(
+    name: str,
+    company_ids: list[str],
+    scan_fn: Callable[[str], Awaitable[list[BPOTask]]],
+    dispatch_fn: Callable[[BPOTask], Awaitable[bool]],
+    deadline_sec: float,
+    concurrency: int = BPO_SCAN_CONCURRENCY,
+) -> CycleStats:
+    """テナントを並列走査し、見つかったタスクをテナント単位ですぐ dispatch する。
+
+    deadline_sec を過ぎても終わらないテナントはキャンセルし、次のサイクルで再評価する。
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    scanned = failed = enqueued = 0
+
+    async def scan_one(cid: str) -> None:
+        nonlocal scanned, failed, enqueued
+        async with semaphore:
+            try:
+                tasks = await scan_fn(cid)
+                for task in tasks:
+                    if await dispatch_fn(task):
+                        enqueued += 1
+                scanned += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"orchestrator {name} error for {cid[:8]}: {e}")
+
+    jobs = [asyncio.create_task(scan_one(cid)) for cid in company_ids]
+    pending: set[asyncio.Task] = set()
+    if jobs:
+        _, pending = await asyncio.wait(jobs, timeout=deadline_sec)
+        for job in pending:
+            job.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    duration_ms = int((time.monotonic() - started) * 1000)
+    stats = _stats(name)
+    stats.runs += 1
+    stats.last_duration_ms = duration_ms
+    stats.max_duration_ms = max(stats.max_duration_ms, duration_ms)
+    stats.last_tenants = len(company_ids)
+    stats.last_scanned = scanned
+    stats.last_failed = failed
+    stats.last_timed_out = len(pending)
+    stats.last_enqueued = enqueued
+    stats.last_finished_at = time.time()
+    if pending:
+        stats.overruns += 1
+        logger.warning(
+            f"orchestrator {name}: 締め切り {deadline_sec:.0f}s 超過 — "
+            f"{len(pending)}/{len(company_ids)} テナントを打ち切り (overruns={stats.overruns})"
+        )
+    else:
+        logger.info(
+            f"orchestrator {name}: {scanned}/{len(company_ids)} テナント走査, "
+            f"{enqueued} 件投入, {failed} 件失敗 ({duration_ms}ms)"
+        )
+    return stats
+
+
+class TenantCache:
+    """アクティブテナント一覧の TTL キャッシュ。取得失敗（空）時は前回値を使い続ける。"""
+
+    def __init__(self, ttl_sec: int = BPO_TENANT_CACHE_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+        self._ids: list[str] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, loader: Callable[[], Awaitable[list[str]]]) -> list[str]:
+        if self._fresh():
+            return self._ids
+        async with self._lock:
+            if not self._fresh():
+                ids = await loader()
+                if ids or self._loaded_at is None:
+                    self._ids = ids
+                self._loaded_at = time.monotonic()
+        return self._ids
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_sec
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+
+class ConsistentHashRing:
+    """メンバーを仮想ノードでリング上に配置し、キーを時計回りで最初のメンバーに割り当てる。"""
+
+    def __init__(self, members: list[str], vnodes: int = _RING_VNODES) -> None:
+        points = sorted(
+            (_hash(f"{member}#{i}"), member) for member in set(members) for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._members = [m for _, m in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._members[idx]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
@@ -1,15 +1,16 @@
 """gBizINFO詳細APIバッチ取得スクリプト。
 
-一覧APIで取得した法人番号を使い、詳細APIからHP(company_url)・従業員数・資本金等を取得する。
-レート制限を守り（1リクエスト/秒）、進捗をJSONファイルに保存して中断・再開可能。
+一覧APIで取得した法人番号を使い、詳細APIから従業員数・資本金等を取得し、
+Web検索でHP・連絡先を補う。
+
+詳細取得は gbizinfo_fetcher の並列エンジン（429 に応じたレート調整 + ローカルキャッシュ）で行う。
+約14,000社でも数分で終わり、再実行では期限切れ・変更分だけを取り直す。
 
 使い方:
     python -m workers.bpo.sales.gbiz_detail_batch \
         --token YOUR_API_TOKEN \
         --output data/manufacturing_leads.json \
-        --delay 1.0
-
-約14,000社 × 1秒/件 = 約4時間（バックグラウンド実行推奨）
+        --cache-dir data/gbiz_cache
 """
 import argparse
 import asyncio
@@ -19,13 +20,16 @@ import os
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 
 import httpx
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
 
-from workers.connector.gbizinfo import MANUFACTURING_KEYWORDS
+from workers.connector.base import ConnectorConfig
+from workers.connector.gbizinfo import GBIZ_FETCH_CONCURRENCY, MANUFACTURING_KEYWORDS, GBizInfoConnector
+from workers.connector.gbizinfo_fetcher import GBIZ_CACHE_DIR, GBizDetailCache, GBizDetailFetcher
 from workers.micro.web_searcher import batch_search_websites
 from workers.micro.contact_extractor import extract_company_details
 
@@ -247,74 +251,50 @@ async def step2_web_search_and_extract(
 async def step2_fetch_details(
     token: str,
     companies: list[dict],
-    progress_file: str,
-    delay: float = 1.0,
+    progress_file: Optional[str] = None,
+    cache_dir: str = GBIZ_CACHE_DIR,
+    concurrency: int = GBIZ_FETCH_CONCURRENCY,
 ) -> list[dict]:
-    """Step 2 (旧): 詳細APIから HP / 従業員数 / 資本金等を取得する。
+    """詳細APIから従業員数 / 資本金 / 代表者 等を取得する（HP は Step 2 の Web 検索で補う）。
 
-    .. deprecated::
-        gBizINFO詳細APIではHP情報がほぼ取得できないため、
-        代わりに :func:`step2_web_search_and_extract` を使用すること。
+    取得は gbizinfo_fetcher の並列エンジンで行う（429 に応じてレート調整）。
+    レスポンスは cache_dir にキャッシュされるので、中断後の再実行や定期更新では
+    期限切れ・変更分だけを取り直す。progress_file を渡したときだけ結果を保存する
+    （Step 2 の進捗ファイルとは別のパスにすること。web_fetched のない行で上書きすると
+    Step 2 の再開位置と取得済みの website_url が失われる）。
     """
-    headers = {"X-hojinInfo-api-token": token}
-
-    done: dict[str, dict] = {}
-    if os.path.exists(progress_file):
-        with open(progress_file) as f:
-            existing = json.load(f)
-            done = {c["corporate_number"]: c for c in existing if "detail_fetched" in c}
-        logger.info(f"既存進捗: {len(done)}社")
-
-    results: list[dict] = list(done.values())
-    remaining = [c for c in companies if c["corporate_number"] not in done]
-    logger.info(f"残り: {len(remaining)}社")
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for i, company in enumerate(remaining):
-            cn = company["corporate_number"]
-            for attempt in range(3):
-                try:
-                    resp = await client.get(f"{BASE_URL}/{cn}", headers=headers)
-                    if resp.status_code == 200:
-                        infos = resp.json().get("hojin-infos", [])
-                        if infos:
-                            detail = infos[0]
-                            company.update({
-                                "company_url": detail.get("company_url", ""),
-                                "employee_number": detail.get("employee_number"),
-                                "capital_stock": detail.get("capital_stock"),
-                                "representative_name": detail.get("representative_name", ""),
-                                "business_summary": detail.get("business_summary", ""),
-                                "date_of_establishment": detail.get("date_of_establishment", ""),
-                                "detail_fetched": True,
-                            })
-                        break
-                    elif resp.status_code == 429:
-                        wait = delay * (2 ** (attempt + 2))
-                        logger.warning(f"レート制限 ({cn}) — {wait:.0f}秒待機 (attempt {attempt+1}/3)")
-                        await asyncio.sleep(wait)
-                    else:
-                        company["detail_fetched"] = False
-                        company["detail_error"] = f"HTTP {resp.status_code}"
-                        break
-                except httpx.ReadTimeout:
-                    wait = delay * (2 ** (attempt + 2))
-                    logger.warning(f"タイムアウト ({cn}) — {wait:.0f}秒待機 (attempt {attempt+1}/3)")
-                    await asyncio.sleep(wait)
-                except Exception as e:
-                    company["detail_fetched"] = False
-                    company["detail_error"] = str(e)
-                    break
-
-            results.append(company)
-
-            if (i + 1) % 100 == 0:
-                _save_progress(results, progress_file)
-                logger.info(f"進捗: {i + 1}/{len(remaining)} ({len([r for r in results if r.get('company_url')])} HP有り)")
-
-            await asyncio.sleep(delay)
+    connector = GBizInfoConnector(ConnectorConfig(tool_name="gbizinfo", credentials={"api_token": token}))
+    fetcher = GBizDetailFetcher(connector, GBizDetailCache(cache_dir), concurrency=concurrency)
+    details = {r.corporate_number: r for r in await fetcher.fetch(c["corporate_number"] for c in companies)}
+
+    results: list[dict] = []
+    for company in companies:
+        result = details.get(company["corporate_number"])
+        if result is None:
+            continue
+        if result.record is not None:
+            detail = result.record
+            company.update({
+                "company_url": detail.get("company_url", ""),
+                "employee_number": detail.get("employee_number"),
+                "capital_stock": detail.get("capital_stock"),
+                "representative_name": detail.get("representative_name", ""),
+                "business_summary": detail.get("business_summary", ""),
+                "date_of_establishment": detail.get("date_of_establishment", ""),
+                "detail_fetched": True,
+            })
+        else:
+            company["detail_fetched"] = False
+            company["detail_error"] = result.error or result.status
+        results.append(company)
 
-    _save_progress(results, progress_file)
+    if progress_file:
+        _save_progress(results, progress_file)
+    stats = fetcher.stats
+    logger.info(
+        f"詳細取得: {stats.requested}社 / API取得 {stats.fetched} / 未変更 {stats.not_modified} / "
+        f"キャッシュ {stats.cached} / 429 {stats.throttled}回 / {stats.duration_ms / 1000:.0f}秒"
+    )
     return results
 
 
@@ -368,7 +348,14 @@ def summarize(results: list[dict]) -> None:
     print("=" * 60)
 
 
-async def main(token: str, output: str, delay: float, concurrency: int) -> None:
+async def main(
+    token: str,
+    output: str,
+    delay: float,
+    concurrency: int,
+    cache_dir: str = GBIZ_CACHE_DIR,
+    fetch_details: bool = True,
+) -> None:
     """メイン処理。"""
     # Step 1: 法人番号収集
     logger.info("=== Step 1: 法人番号収集 ===")
@@ -380,6 +367,12 @@ async def main(token: str, output: str, delay: float, concurrency: int) -> None:
 
     logger.info(f"合計 {len(all_companies)}社の法人番号を収集")
 
+    # Step 1.5: 詳細APIで従業員数・資本金等を補完（キャッシュ済みは再取得しない）。
+    # 再開は cache_dir のキャッシュで足りるので output（Step 2 の進捗ファイル）には書かない
+    if fetch_details:
+        logger.info("=== Step 1.5: 詳細API取得 ===")
+        await step2_fetch_details(token, all_companies, cache_dir=cache_dir)
+
     # Step 2: Web検索でHP特定 → 連絡先抽出
     logger.info("=== Step 2: Web検索→HP→連絡先抽出 ===")
     results = await step2_web_search_and_extract(
@@ -407,6 +400,15 @@ if __name__ == "__main__":
         "--concurrency", type=int, default=10,
         help="同時処理数。デフォルト10（HP検索+抽出を並列実行）"
     )
+    parser.add_argument(
+        "--cache-dir", default=GBIZ_CACHE_DIR, help="詳細APIレスポンスのキャッシュ先"
+    )
+    parser.add_argument(
+        "--skip-details", action="store_true", help="詳細API取得（従業員数・資本金等）を省略する"
+    )
     args = parser.parse_args()
 
-    asyncio.run(main(args.token, args.output, args.delay, args.concurrency))
+    asyncio.run(main(
+        args.token, args.output, args.delay, args.concurrency,
+        cache_dir=args.cache_dir, fetch_details=not args.skip_details,
+    ))
@@ -1,6 +1,7 @@
 """kintone → leads 取り込みの共通ループ（製造・建設で再利用）。
 
 b_10 要件: $id ページング・プローブ・field_mappings 対応。
+書き込みはページ単位で lead_ingest.bulk_upsert_leads に渡し、次ページの取得と重ねる。
 """
 from __future__ import annotations
 
@@ -9,6 +10,7 @@ import logging
 from collections.abc import Callable
 from typing import Any, Optional
 
+from workers.bpo.sales.lead_ingest import bulk_upsert_leads
 from workers.connector.base import ConnectorConfig
 from workers.connector.kintone import KintoneConnector, KINTONE_MAX_LIMIT
 
@@ -74,6 +76,7 @@ async def run_kintone_lead_import(
     cfg = ConnectorConfig(
         tool_name="kintone",
         credentials={"subdomain": subdomain, "api_token": api_token},
+        company_id=company_id,
     )
     conn = KintoneConnector(cfg)
     from db.supabase import get_service_client
@@ -83,24 +86,27 @@ async def run_kintone_lead_import(
     last_id = 0
     total_received = 0
     total_upsert_ok = 0
+    total_inserted = 0
+    total_updated = 0
     total_skipped = 0
     probe_phase = True
     probe_ok = False
 
-    while True:
-        batch_limit = probe_size if probe_phase else KINTONE_MAX_LIMIT
-        q = build_page_query(base_query, last_id)
+    async def _fetch_page(min_id: int, limit: int) -> list[dict]:
+        q = build_page_query(base_query, min_id)
         try:
-            batch = await conn.read_records_page(app_id, query=q, limit=batch_limit)
+            return await conn.read_records_page(app_id, query=q, limit=limit)
         except Exception as e:
             logger.error("[%s] fetch failed query=%s: %s", log_prefix, q, e)
             raise
 
-        if not batch:
-            if probe_phase and total_received == 0:
-                logger.info("[%s] no records in app %s", log_prefix, app_id)
-            break
+    batch_limit = probe_size
+    batch = await _fetch_page(last_id, batch_limit)
+    if not batch:
+        logger.info("[%s] no records in app %s", log_prefix, app_id)
 
+    while batch:
+        rows: list[dict[str, Any]] = []
         for rec in batch:
             total_received += 1
             rid = record_numeric_id(rec)
@@ -112,25 +118,26 @@ async def run_kintone_lead_import(
             if not row:
                 total_skipped += 1
                 continue
+            rows.append(row)
 
-            if dry_run:
-                total_upsert_ok += 1
-                continue
+        # プローブ後は次ページの取得と今ページの upsert を重ねる
+        next_page: Optional[asyncio.Task] = None
+        if not probe_phase and len(batch) >= batch_limit:
+            next_page = asyncio.create_task(_fetch_page(last_id, KINTONE_MAX_LIMIT))
 
-            try:
-                db.table("leads").upsert(
-                    row,
-                    on_conflict="company_id,corporate_number",
-                ).execute()
-                total_upsert_ok += 1
-            except Exception as upsert_err:
-                logger.warning(
-                    "[%s] upsert skipped corp=%s: %s",
-                    log_prefix,
-                    row.get("corporate_number"),
-                    upsert_err,
-                )
-                total_skipped += 1
+        try:
+            if dry_run:
+                total_upsert_ok += len(rows)
+            else:
+                upserted = await bulk_upsert_leads(db, rows, collect_ids=False)
+                total_upsert_ok += upserted.upserted
+                total_inserted += upserted.inserted
+                total_updated += upserted.updated
+                total_skipped += upserted.failed + upserted.skipped
+        except BaseException:
+            if next_page is not None:
+                next_page.cancel()
+            raise
 
         if probe_phase:
             if total_received > 0 and total_upsert_ok == 0 and not dry_run:
@@ -140,17 +147,18 @@ async def run_kintone_lead_import(
                 )
             probe_ok = True
             probe_phase = False
-            await asyncio.sleep(0.15)
+            batch_limit = KINTONE_MAX_LIMIT
+            batch = await _fetch_page(last_id, batch_limit)
             continue
 
-        if len(batch) < batch_limit:
-            break
-        await asyncio.sleep(0.15)
+        batch = await next_page if next_page is not None else []
 
     return {
         "probe_ok": probe_ok,
         "total_received": total_received,
         "total_upsert_ok": total_upsert_ok,
+        "total_inserted": total_inserted,
+        "total_updated": total_updated,
         "total_skipped": total_skipped,
         "dry_run": dry_run,
     }
@@ -0,0 +1,253 @@
+"""leads の一括取り込み（manufacturing_lead_loader・kintone インポート共通の書き込み経路）。
+
+1行ごとに select → insert/update → lead_activities insert と3往復していたのを、
+LEAD_UPSERT_CHUNK_SIZE 行ごとに以下へまとめる:
+
+1. 既存行の select（company_id + corporate_number IN (...)）— 新規/更新の判定用
+2. leads の upsert（on_conflict=company_id,corporate_number）
+3. lead_activities の一括 insert（activity_for が返した行）
+
+入力は同期・非同期どちらのイテレータでも受け、チャンク単位で流すので 10 万行でもメモリは一定。
+DB 呼び出しは db.supabase.execute() 経由でイベントループを止めない。
+
+    result = await bulk_upsert_leads(db, rows, activity_for=lambda row, lead_id: {...})
+    result.inserted, result.updated, result.failed
+"""
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from db.supabase import execute
+
+logger = logging.getLogger(__name__)
+
+LEAD_UPSERT_CHUNK_SIZE = int(os.environ.get("LEAD_UPSERT_CHUNK_SIZE", "500"))
+LEAD_CONFLICT_COLUMNS = ("company_id", "corporate_number")
+
+# 既存行を更新するときに上書きしない列（id を変えると lead_activities の参照が切れる）
+_INSERT_ONLY_COLUMNS = ("id", "created_at")
+# NOT NULL かつ既定値なしの列（021）。upsert は ON CONFLICT の前に NOT NULL を検査するので、
+# update_columns を絞っても既存行の payload に必ず載せる
+LEAD_REQUIRED_COLUMNS = ("company_name", "source")
+
+ActivityBuilder = Callable[[dict[str, Any], str], Optional[dict[str, Any]]]
+
+
+@dataclass
+class LeadUpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0        # corporate_number / company_id なし
+    failed: int = 0
+    activities: int = 0
+    chunks: int = 0
+    inserted_ids: list[str] = field(default_factory=list)
+    updated_ids: list[str] = field(default_factory=list)
+
+    @property
+    def upserted(self) -> int:
+        return self.inserted + self.updated
+
+
+def _key(row: dict[str, Any]) -> tuple[str, str]:
+    return str(row.get("company_id") or ""), str(row.get("corporate_number") or "").strip()
+
+
+async def _chunked(rows: Iterable[dict] | AsyncIterable[dict], size: int) -> AsyncIterator[list[dict]]:
+    chunk: list[dict] = []
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _existing_ids(db: Any, keys: Sequence[tuple[str, str]]) -> dict[tuple[str, str], str]:
+    """(company_id, corporate_number) → 既存 lead id。"""
+    by_company: dict[str, list[str]] = {}
+    for company_id, corporate_number in keys:
+        by_company.setdefault(company_id, []).append(corporate_number)
+    found: dict[tuple[str, str], str] = {}
+    for company_id, numbers in by_company.items():
+        result = await execute(
+            db.table("leads")
+            .select("id, corporate_number")
+            .eq("company_id", company_id)
+            .in_("corporate_number", numbers)
+        )
+        for row in result.data or []:
+            found[(company_id, row["corporate_number"])] = row["id"]
+    return found
+
+
+async def _claim_legacy_ids(
+    db: Any,
+    pending: dict[tuple[str, str], dict[str, Any]],
+    source_detail: str,
+) -> dict[tuple[str, str], str]:
+    """corporate_number 未設定の旧取り込み行を company_name で照合し、法人番号を書き込んで引き継ぐ。
+
+    旧 gbizinfo_bulk_load は法人番号を lead_activities にしか残しておらず、
+    部分ユニークインデックス（031）は NULL を対象外にするため、そのままだと全件が重複挿入される。
+    """
+    by_company: dict[str, dict[str, tuple[str, str]]] = {}
+    for key, row in pending.items():
+        name = row.get("company_name")
+        if name:
+            by_company.setdefault(key[0], {}).setdefault(name, key)
+    claimed: dict[tuple[str, str], str] = {}
+    for company_id, names in by_company.items():
+        result = await execute(
+            db.table("leads")
+            .select("id, company_name")
+            .eq("company_id", company_id)
+            .eq("source_detail", source_detail)
+            .is_("corporate_number", "null")
+            .in_("company_name", list(names))
+        )
+        for row in result.data or []:
+            key = names.pop(row["company_name"], None)
+            if key is None:
+                continue  # 同名の旧行が複数ある場合は最初の1件だけ引き継ぐ
+            await execute(db.table("leads").update({"corporate_number": key[1]}).eq("id", row["id"]))
+            claimed[key] = row["id"]
+    return claimed
+
+
+async def _upsert(db: Any, payload: list[dict[str, Any]], on_conflict: str) -> list[dict[str, Any]]:
+    """チャンクを1回で upsert し、失敗したら1行ずつ入れ直す（不正な行だけを落とす）。"""
+    if not payload:
+        return []
+    try:
+        result = await execute(db.table("leads").upsert(payload, on_conflict=on_conflict))
+        return list(result.data or [])
+    except Exception as chunk_err:
+        logger.warning("[lead_ingest] chunk upsert failed (%d rows), retrying row by row: %s", len(payload), chunk_err)
+    saved: list[dict[str, Any]] = []
+    for row in payload:
+        try:
+            result = await execute(db.table("leads").upsert(row, on_conflict=on_conflict))
+            saved.extend(result.data or [])
+        except Exception as row_err:
+            logger.warning("[lead_ingest] upsert skipped corp=%s: %s", row.get("corporate_number"), row_err)
+    return saved
+
+
+async def bulk_upsert_leads(
+    db: Any,
+    rows: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]],
+    *,
+    chunk_size: int = LEAD_UPSERT_CHUNK_SIZE,
+    update_columns: Optional[Sequence[str]] = None,
+    activity_for: Optional[ActivityBuilder] = None,
+    collect_ids: bool = True,
+    legacy_source_detail: Optional[str] = None,
+) -> LeadUpsertResult:
+    """leads を (company_id, corporate_number) でチャンク upsert する。
+
+    Args:
+        db:             Supabase クライアント
+        rows:           leads 行（company_id・corporate_number 必須）。同じキーはチャンク内で後勝ち
+        chunk_size:     1回の upsert に載せる行数
+        update_columns: 既存行で上書きする列。None なら行の全列（id / created_at を除く）。
+                        LEAD_REQUIRED_COLUMNS は常に含める
+        activity_for:   (行, lead_id) → lead_activities 行（None なら記録しない）
+        collect_ids:    inserted_ids / updated_ids を返すか（大量取り込みでは False で件数のみ）
+        legacy_source_detail: 指定すると、法人番号なしで取り込まれた旧行（source_detail がこの値）を
+                        company_name で照合して更新扱いにする（重複挿入の防止）
+    """
+    on_conflict = ",".join(LEAD_CONFLICT_COLUMNS)
+    result = LeadUpsertResult()
+
+    async for chunk in _chunked(rows, max(chunk_size, 1)):
+        result.chunks += 1
+        pending: dict[tuple[str, str], dict[str, Any]] = {}
+        for row in chunk:
+            key = _key(row)
+            if not key[0] or not key[1]:
+                result.skipped += 1
+                continue
+            pending.pop(key, None)
+            pending[key] = {**row, "corporate_number": key[1]}
+        if not pending:
+            continue
+
+        try:
+            existing = await _existing_ids(db, list(pending))
+        except Exception as e:
+            logger.error("[lead_ingest] existing lookup failed (%d rows): %s", len(pending), e)
+            result.failed += len(pending)
+            continue
+        if legacy_source_detail:
+            unmatched = {key: row for key, row in pending.items() if key not in existing}
+            if unmatched:
+                try:
+                    existing.update(await _claim_legacy_ids(db, unmatched, legacy_source_detail))
+                except Exception as e:
+                    logger.warning("[lead_ingest] legacy lead lookup failed (%d rows): %s", len(unmatched), e)
+
+        new_rows = [
+            {k: v for k, v in row.items() if k != "id"}
+            for key, row in pending.items() if key not in existing
+        ]
+        updated_rows = []
+        for key, row in pending.items():
+            if key not in existing:
+                continue
+            if update_columns is None:
+                updated_rows.append({k: v for k, v in row.items() if k not in _INSERT_ONLY_COLUMNS})
+            else:
+                columns = (*LEAD_REQUIRED_COLUMNS, *update_columns)
+                updated_rows.append({
+                    **{c: row[c] for c in columns if c in row},
+                    "company_id": key[0],
+                    "corporate_number": key[1],
+                })
+
+        saved = await _upsert(db, new_rows, on_conflict) + await _upsert(db, updated_rows, on_conflict)
+        saved_ids: dict[tuple[str, str], str] = {_key(r): r["id"] for r in saved if r.get("id")}
+        result.failed += len(pending) - len(saved_ids.keys() & pending.keys())
+
+        activities: list[dict[str, Any]] = []
+        for key, lead_id in saved_ids.items():
+            row = pending.get(key)
+            if row is None:
+                continue
+            if key in existing:
+                result.updated += 1
+                if collect_ids:
+                    result.updated_ids.append(lead_id)
+            else:
+                result.inserted += 1
+                if collect_ids:
+                    result.inserted_ids.append(lead_id)
+            if activity_for is not None:
+                activity = activity_for(row, lead_id)
+                if activity:
+                    activities.append(activity)
+
+        if activities:
+            try:
+                await execute(db.table("lead_activities").insert(activities))
+                result.activities += len(activities)
+            except Exception as e:
+                logger.warning("[lead_ingest] lead_activities INSERT 失敗 (%d rows): %s", len(activities), e)
+
+    logger.info(
+        "[lead_ingest] upsert 完了: 新規=%d 更新=%d スキップ=%d 失敗=%d 活動=%d (%d chunks)",
+        result.inserted, result.updated, result.skipped, result.failed, result.activities, result.chunks,
+    )
+    return result
@@ -6,10 +6,10 @@ import logging
 import os
 from datetime import datetime, timezone
 from typing import Optional
-from uuid import uuid4
 
 from workers.connector.gbizinfo import GBizInfoConnector, MANUFACTURING_KEYWORDS
 from workers.connector.base import ConnectorConfig
+from workers.bpo.sales.lead_ingest import bulk_upsert_leads
 from workers.bpo.sales.segmentation import classify_company, detect_sub_industry
 from workers.micro.contact_extractor import batch_extract_contacts
 
@@ -45,6 +45,13 @@ _PER_KEYWORD_LIMIT = 50
 _LEAD_SOURCE = "outbound"
 _LEAD_SOURCE_DETAIL = "gbizinfo_bulk_load"
 
+# 既存リードを再取り込みしたときに上書きする列（status / 担当者等の営業進捗は残す）
+_LEAD_UPDATE_COLUMNS = (
+    "contact_email", "contact_phone", "employee_count", "score", "score_reasons",
+    "website_url", "capital_stock", "prefecture", "city", "representative", "business_overview",
+    "updated_at",
+)
+
 
 # ---------------------------------------------------------------------------
 # 内部ヘルパー
@@ -54,6 +61,15 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _as_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 def _build_lead_row(
     company_id: str,
     gbiz_data: dict,
@@ -65,25 +81,20 @@ def _build_lead_row(
 ) -> dict:
     """gBizINFOデータ + セグメント情報からleads行dictを組み立てる。
 
-    leads テーブルのスキーマ（021_sfa_crm_cs_tables.sql）に準拠する。
-    追加フィールド（corporate_number, website_url 等）は source_detail / JSONB に格納する。
+    leads テーブルのスキーマ（021_sfa_crm_cs_tables.sql / 026_lead_enrichment_fields.sql）に準拠する。
+    contact_form_url は leads に列がないため lead_activities に記録する。
     """
     now = _now_iso()
-    employee_count = gbiz_data.get("employee_count")
-    if employee_count is not None:
-        try:
-            employee_count = int(employee_count)
-        except (ValueError, TypeError):
-            employee_count = None
+    employee_count = _as_int(gbiz_data.get("employee_count"))
 
     # スコアはセグメント階層から初期値を設定
     score_map = {"S": 80, "A": 60, "B": 40, "C": 20}
     initial_score = score_map.get(segment_tier, 20)
 
     return {
-        "id": str(uuid4()),
         "company_id": company_id,
         "company_name": gbiz_data.get("name", ""),
+        "corporate_number": gbiz_data.get("corporate_number", ""),
         "contact_email": contact_email or None,
         "contact_phone": contact_phone or None,
         "industry": sub_industry,
@@ -93,81 +104,41 @@ def _build_lead_row(
         "score": initial_score,
         "score_reasons": [f"セグメント{segment_tier}（gBizINFO一括取得）"],
         "status": "new",
-        # 拡張情報はsource_detailに補足情報として記録（スキーマ変更なし）
-        # corporate_number / website_url / contact_form_url は別途 lead_activities に記録
+        "sub_industry": sub_industry,
+        "priority_tier": segment_tier,
+        "website_url": gbiz_data.get("website_url") or None,
+        "capital_stock": _as_int(gbiz_data.get("capital")),
+        "prefecture": gbiz_data.get("prefecture") or None,
+        "city": gbiz_data.get("city") or None,
+        "representative": gbiz_data.get("representative") or None,
+        "business_overview": gbiz_data.get("business_overview") or None,
         "created_at": now,
         "updated_at": now,
     }
 
 
-async def _upsert_lead(
-    supabase_client,
+def _research_activity(
     lead_row: dict,
-    corporate_number: str,
-    company_id: str,
-    website_url: str,
+    lead_id: str,
     contact_form_url: str,
-) -> tuple[str, bool]:
-    """leadsテーブルにupsertする。
-
-    corporate_number が一致する既存リードがあれば UPDATE、なければ INSERT する。
-    Returns:
-        (lead_id, is_inserted): 処理したリードIDと新規挿入かどうか
-    """
-    # corporate_number で既存チェック（source_detail + company_name で代替判定）
-    existing = (
-        supabase_client
-        .table("leads")
-        .select("id, version")
-        .eq("company_id", company_id)
-        .eq("company_name", lead_row["company_name"])
-        .eq("source_detail", _LEAD_SOURCE_DETAIL)
-        .maybe_single()
-        .execute()
-    )
-
-    is_inserted = False
-
-    if existing.data:
-        lead_id = existing.data["id"]
-        current_version = existing.data.get("version", 1)
-        update_data = {
-            "contact_email": lead_row["contact_email"],
-            "contact_phone": lead_row["contact_phone"],
-            "employee_count": lead_row["employee_count"],
-            "score": lead_row["score"],
-            "score_reasons": lead_row["score_reasons"],
-            "updated_at": _now_iso(),
-            "version": current_version + 1,
-        }
-        supabase_client.table("leads").update(update_data).eq("id", lead_id).execute()
-    else:
-        result = supabase_client.table("leads").insert(lead_row).execute()
-        lead_id = result.data[0]["id"]
-        is_inserted = True
-
-    # 企業サイトURL・フォームURLをlead_activitiesに記録（スキーマ拡張なし）
-    if website_url or contact_form_url:
-        activity_row = {
-            "id": str(uuid4()),
-            "company_id": company_id,
-            "lead_id": lead_id,
-            "activity_type": "research",
-            "activity_data": {
-                "corporate_number": corporate_number,
-                "website_url": website_url,
-                "contact_form_url": contact_form_url,
-                "source": "gbizinfo_bulk_load",
-            },
-            "channel": "web",
-            "created_at": _now_iso(),
-        }
-        try:
-            supabase_client.table("lead_activities").insert(activity_row).execute()
-        except Exception as e:
-            logger.warning(f"lead_activities INSERT 失敗 (lead_id={lead_id}): {e}")
-
-    return lead_id, is_inserted
+) -> Optional[dict]:
+    """企業サイトURL・フォームURLを lead_activities 行にする（どちらも無ければ None）。"""
+    website_url = lead_row.get("website_url") or ""
+    if not website_url and not contact_form_url:
+        return None
+    return {
+        "company_id": lead_row["company_id"],
+        "lead_id": lead_id,
+        "activity_type": "research",
+        "activity_data": {
+            "corporate_number": lead_row["corporate_number"],
+            "website_url": website_url,
+            "contact_form_url": contact_form_url,
+            "source": _LEAD_SOURCE_DETAIL,
+        },
+        "channel": "web",
+        "created_at": _now_iso(),
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -180,15 +151,17 @@ async def load_manufacturing_leads(
     target_sub_industries: Optional[list[str]] = None,
     extract_contacts: bool = True,
     dry_run: bool = False,
+    fetch_details: bool = True,
 ) -> dict:
     """製造業リードを一括ロードする。
 
     処理フロー:
     1. gBizINFO APIからサブ業種ごとにキーワード検索
     2. 重複排除（法人番号ベース）
+    2.5 詳細APIで従業員数・資本金・HP を補完（fetch_details=True 時。並列取得・キャッシュ付き）
     3. セグメント分類（S/A/B/C）
     4. HP → メール/フォーム自動抽出（extract_contacts=True 時）
-    5. leadsテーブルにupsert（dry_run=False 時）
+    5. leadsテーブルにチャンク upsert（dry_run=False 時。lead_ingest.bulk_upsert_leads）
 
     Args:
         api_token:             gBizINFO APIトークン
@@ -196,10 +169,12 @@ async def load_manufacturing_leads(
         target_sub_industries: 対象サブ業種リスト（Noneなら全サブ業種）
         extract_contacts:      HP → メール/フォーム抽出を実行するか
         dry_run:               Trueなら DBへの書き込みを行わない
+        fetch_details:         詳細APIで検索結果を補完するか
 
     Returns:
         {
             "total_fetched": int,
+            "details_fetched": int,
             "total_inserted": int,
             "total_updated": int,
             "by_sub_industry": {"金属加工": 42, ...},
@@ -214,6 +189,7 @@ async def load_manufacturing_leads(
     config = ConnectorConfig(
         tool_name="gbizinfo",
         credentials={"api_token": api_token},
+        company_id=company_id,
     )
     connector = GBizInfoConnector(config)
     supabase = get_service_client()
@@ -257,6 +233,7 @@ async def load_manufacturing_leads(
     if total_fetched == 0:
         return {
             "total_fetched": 0,
+            "details_fetched": 0,
             "total_inserted": 0,
             "total_updated": 0,
             "by_sub_industry": by_sub_industry,
@@ -266,6 +243,19 @@ async def load_manufacturing_leads(
             "forms_found": 0,
         }
 
+    # --- Step 1.5: 詳細APIで補完（一覧APIには従業員数・資本金・HP が入らないことが多い） ---
+    details_fetched = 0
+    if fetch_details:
+        for detail in await connector.fetch_details(list(all_records)):
+            if detail.record is None:
+                continue
+            details_fetched += 1
+            rec = all_records[detail.corporate_number]
+            for key, value in connector.map_to_company_data(detail.record).items():
+                if value not in (None, ""):
+                    rec[key] = value
+        logger.info(f"[manufacturing_lead_loader] 詳細補完: {details_fetched}/{total_fetched} 件")
+
     # --- Step 2: セグメント分類 ---
     records_list = list(all_records.values())
     by_priority: dict[str, int] = {"S": 0, "A": 0, "B": 0, "C": 0}
@@ -330,43 +320,39 @@ async def load_manufacturing_leads(
                 if form_url:
                     forms_found += 1
 
-    # --- Step 4: leadsテーブルにupsert ---
+    # --- Step 4: leadsテーブルにupsert（チャンク単位で一括） ---
     total_inserted = 0
     total_updated = 0
 
     if not dry_run:
-        for rec, tier, sub_ind in classified:
-            corp_num = rec.get("corporate_number", "")
-            email, form_url, phone = contact_map.get(corp_num, ("", "", ""))
-
-            lead_row = _build_lead_row(
-                company_id=company_id,
-                gbiz_data=rec,
-                segment_tier=tier,
-                sub_industry=sub_ind,
-                contact_email=email,
-                contact_form_url=form_url,
-                contact_phone=phone,
-            )
-
-            try:
-                _, is_inserted = await _upsert_lead(
-                    supabase_client=supabase,
-                    lead_row=lead_row,
-                    corporate_number=corp_num,
+        def _lead_rows():
+            for rec, tier, sub_ind in classified:
+                email, form_url, phone = contact_map.get(rec.get("corporate_number", ""), ("", "", ""))
+                yield _build_lead_row(
                     company_id=company_id,
-                    website_url=rec.get("website_url", ""),
+                    gbiz_data=rec,
+                    segment_tier=tier,
+                    sub_industry=sub_ind,
+                    contact_email=email,
                     contact_form_url=form_url,
+                    contact_phone=phone,
                 )
-                if is_inserted:
-                    total_inserted += 1
-                else:
-                    total_updated += 1
-            except Exception as e:
-                logger.error(
-                    f"[manufacturing_lead_loader] upsert失敗 "
-                    f"corp_num={corp_num}, name={rec.get('name')}: {e}"
-                )
+
+        def _activity(lead_row: dict, lead_id: str) -> Optional[dict]:
+            form_url = contact_map.get(lead_row["corporate_number"], ("", "", ""))[1]
+            return _research_activity(lead_row, lead_id, form_url)
+
+        upserted = await bulk_upsert_leads(
+            supabase,
+            _lead_rows(),
+            update_columns=_LEAD_UPDATE_COLUMNS,
+            activity_for=_activity,
+            legacy_source_detail=_LEAD_SOURCE_DETAIL,
+        )
+        total_inserted = upserted.inserted
+        total_updated = upserted.updated
+        if upserted.failed:
+            logger.error(f"[manufacturing_lead_loader] upsert失敗 {upserted.failed} 件")
     else:
         logger.info(
             f"[manufacturing_lead_loader] dry_run=True のため DB書き込みをスキップ "
@@ -376,6 +362,7 @@ async def load_manufacturing_leads(
 
     result = {
         "total_fetched": total_fetched,
+        "details_fetched": details_fetched,
         "total_inserted": total_inserted,
         "total_updated": total_updated,
         "by_sub_industry": by_sub_industry,
@@ -17,14 +17,20 @@ Steps:
   Step 6: signal_detector      LP閲覧・CTAクリック・資料DL シグナルを評価し温度判定
   Step 7: calendar_booker      hot リードに対して Google Calendar 空き枠提示 + Meet 予約作成
   Step 8: leads_writer         leads テーブル保存 + lead_activities ログ + Google Sheets 同期
+
+Step 1〜5 は企業単位のストリーム（workers.bpo.engine.streaming）で実行し、
+各段の出力はチェックポイント（workers.bpo.engine.checkpoint）に残す。
 """
 import asyncio
+import json
 import logging
+import os
 import random
 import time
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Any
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
 
 from workers.micro.models import MicroAgentInput, MicroAgentOutput
 from workers.micro.company_researcher import run_company_researcher
@@ -35,6 +41,8 @@ from workers.connector.gbizinfo import GBizInfoConnector
 from workers.connector.playwright_form import PlaywrightFormConnector
 from workers.connector.google_sheets import GoogleSheetsConnector
 from workers.connector.base import ConnectorConfig
+from workers.bpo.engine.checkpoint import PipelineCheckpointer
+from workers.bpo.engine.streaming import Stage, TokenBucket, run_stages
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +58,25 @@ DAILY_OUTREACH_LIMIT = 400
 CONFIDENCE_WARNING_THRESHOLD = 0.60
 
 # 各企業への処理間隔（秒）—— 負荷分散 & レート制限対策
+# 送信チャネル（フォーム / SendGrid）ごとのトークンバケットの補充間隔として使う
 INTER_COMPANY_DELAY_SEC = 2.0
 
+# ストリーム各段の並列数と段間キューの上限
+OUTREACH_STAGE_QUEUE_SIZE = int(os.environ.get("OUTREACH_STAGE_QUEUE_SIZE", "32"))
+OUTREACH_ENRICH_CONCURRENCY = int(os.environ.get("OUTREACH_ENRICH_CONCURRENCY", "4"))
+OUTREACH_RESEARCH_CONCURRENCY = int(os.environ.get("OUTREACH_RESEARCH_CONCURRENCY", "8"))
+OUTREACH_LP_CONCURRENCY = int(os.environ.get("OUTREACH_LP_CONCURRENCY", "8"))
+OUTREACH_COMPOSE_CONCURRENCY = int(os.environ.get("OUTREACH_COMPOSE_CONCURRENCY", "8"))
+OUTREACH_SEND_CONCURRENCY = int(os.environ.get("OUTREACH_SEND_CONCURRENCY", "2"))
+
+# プロバイダごとのレート（リクエスト/秒, バースト）。0 以下で無制限
+OUTREACH_LLM_RPS = float(os.environ.get("OUTREACH_LLM_RPS", "5"))
+OUTREACH_LLM_BURST = float(os.environ.get("OUTREACH_LLM_BURST", "10"))
+OUTREACH_GBIZINFO_RPS = float(os.environ.get("OUTREACH_GBIZINFO_RPS", "3"))
+
+# 日次バッチの再開単位（同じ JST 日付・同じ入力の再実行を続きとして扱う）
+JST = timezone(timedelta(hours=9))
+
 # ---------------------------------------------------------------------------
 # 製造業特化定数
 # ---------------------------------------------------------------------------
@@ -243,6 +268,166 @@ def _fail(
     )
 
 
+def _outreach_run_key(input_data: dict[str, Any]) -> dict[str, Any]:
+    """チェックポイントの実行キー。signals は Step 6 専用なので含めない。"""
+    key = {k: v for k, v in input_data.items() if k != "signals"}
+    key["run_date"] = datetime.now(JST).date().isoformat()
+    return key
+
+
+def _send_log_key() -> dict[str, Any]:
+    """送信記録の実行キー（当日分のみ）。入力を変えた同日の再実行でも同じ送信記録を参照する。"""
+    return {"run_date": datetime.now(JST).date().isoformat()}
+
+
+def _company_key(company: dict[str, Any]) -> str:
+    return company.get("corporate_number") or company.get("name", "")
+
+
+def _provider_buckets() -> dict[str, TokenBucket]:
+    """実行ごとのプロバイダ別トークンバケット。LLM は research / LP / compose で共有する。"""
+    send_rate = 1.0 / INTER_COMPANY_DELAY_SEC if INTER_COMPANY_DELAY_SEC > 0 else 0.0
+    return {
+        "gbizinfo": TokenBucket(OUTREACH_GBIZINFO_RPS),
+        "llm": TokenBucket(OUTREACH_LLM_RPS, burst=OUTREACH_LLM_BURST),
+        "form": TokenBucket(send_rate),
+        "email": TokenBucket(send_rate),
+    }
+
+
+def _is_manufacturing_company(company: dict[str, Any]) -> bool:
+    """業種テキストに製造業キーワードが含まれるか、明示的に製造業が指定されていれば True。"""
+    from workers.connector.gbizinfo import MANUFACTURING_KEYWORDS
+    industry_text = " ".join([
+        company.get("industry", ""),
+        company.get("business_overview", ""),
+        company.get("name", ""),
+    ])
+    return any(kw in industry_text for kw in MANUFACTURING_KEYWORDS) or "製造" in company.get("industry", "")
+
+
+def _with_manufacturing_hints(company: dict[str, Any]) -> dict[str, Any]:
+    """製造業ターゲットのフラグとペイン種別ヒント（company_researcher が利用）を付けたコピー。"""
+    company = {**company, "_is_manufacturing_target": True}
+    # industry が未設定または汎用的な場合に "製造業" を補完
+    if not company.get("industry") or company.get("industry") in ("", "その他"):
+        company["industry"] = "製造業"
+    if not company.get("manufacturing_pain_hints"):
+        company["manufacturing_pain_hints"] = [p["category"] for p in MANUFACTURING_PAIN_FALLBACK]
+    return company
+
+
+def _research_payload(company: dict[str, Any]) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "name": company.get("name", ""),
+        "industry": company.get("industry", ""),
+        "employee_count": company.get("employee_count"),
+        "business_overview": company.get("business_overview", ""),
+        "raw_html": company.get("raw_html", ""),
+        "job_postings": company.get("job_postings", []),
+    }
+    # 製造業ターゲットの場合: ペイン推定の優先カテゴリを渡す
+    if company.get("_is_manufacturing_target"):
+        payload["pain_focus_categories"] = company.get(
+            "manufacturing_pain_hints",
+            [p["category"] for p in MANUFACTURING_PAIN_FALLBACK],
+        )
+        payload["pain_fallback"] = MANUFACTURING_PAIN_FALLBACK
+    return payload
+
+
+def _variant_instruction(email_variant: str) -> str:
+    """バリアント別プロンプト差異。"""
+    if email_variant == "B":
+        # バリアントB: 実績・事例強調型
+        return "メール本文では、具体的な導入事例や数値実績を中心に訴求してください。"
+    if email_variant == "C":
+        # バリアントC: 課題解決型（ペイン重視）
+        return (
+            "メール本文では、企業が抱える具体的な課題（ペイン）から入り、"
+            "解決策としてシャチョツーを提案してください。"
+        )
+    # バリアントA（デフォルト）: 標準型
+    return ""
+
+
+async def _execute_outreach(
+    company: dict[str, Any],
+    form_connector: PlaywrightFormConnector,
+    buckets: dict[str, TokenBucket],
+    *,
+    dry_run: bool,
+    sendgrid_api_key: str,
+    sender_email: str,
+    sender_name: str,
+) -> OutreachRecord:
+    """1社分の送信。フォームあり → Playwright / フォームなし + メール → SendGrid。"""
+    rec_start = int(time.time() * 1000)
+    method = "skipped"
+    sent = False
+    error_msg: str | None = None
+
+    form_url: str = company.get("form_url", "")
+    contact_email: str = company.get("contact_email", "")
+
+    try:
+        if dry_run:
+            # dry_run: 送信せず成功扱い
+            method = "form" if form_url else ("email" if contact_email else "skipped")
+            sent = bool(form_url or contact_email)
+
+        elif form_url:
+            # Playwright フォーム送信
+            await buckets["form"].acquire()
+            result = await form_connector.write_record(form_url, {
+                "company": sender_name,
+                "name": sender_name,
+                "email": sender_email,
+                "message": company["email_body"],
+                "subject": company.get("email_subject", ""),
+            })
+            method = "form"
+            sent = result.get("status") == "success"
+            if not sent:
+                error_msg = result.get("detail", "")
+
+        elif contact_email and sendgrid_api_key:
+            # SendGrid メール送信
+            await buckets["email"].acquire()
+            sent = await _send_via_sendgrid(
+                api_key=sendgrid_api_key,
+                to_email=contact_email,
+                from_email=sender_email,
+                from_name=sender_name,
+                subject=company.get("email_subject", f"【{company.get('industry', '')}向け】シャチョツーご紹介"),
+                body=company.get("email_body", ""),
+            )
+            method = "email"
+            if not sent:
+                error_msg = "SendGrid 送信失敗"
+        else:
+            method = "skipped"
+            error_msg = "form_url も contact_email も未設定"
+
+    except Exception as e:
+        error_msg = str(e)
+        logger.warning(f"アウトリーチ実行エラー ({company.get('name')}): {e}")
+
+    return OutreachRecord(
+        company_name=company.get("name", ""),
+        corporate_number=company.get("corporate_number", ""),
+        industry=company.get("industry", ""),
+        outreach_method=method,
+        sent=sent,
+        temperature="unknown",
+        meeting_booked=False,
+        lead_id=None,
+        cost_yen=0.0,
+        duration_ms=int(time.time() * 1000) - rec_start,
+        error=error_msg,
+    )
+
+
 # ---------------------------------------------------------------------------
 # メインパイプライン
 # ---------------------------------------------------------------------------
@@ -313,20 +498,18 @@ async def run_outreach_pipeline(
     }
 
     # -----------------------------------------------------------------------
-    # Step 1: gbizinfo_enrich
+    # Step 1: gbizinfo_enrich（対象企業リストの取得）
     #   - Google Sheets から未送信企業リストを取得（source="google_sheets"）
     #   - gBizINFO 製造業専用検索（source="gbizinfo_manufacturing"）
     #   - 直接リスト指定（source="direct"、デフォルト）
-    #   - gBizINFO API で法人番号・従業員数・代表者名をエンリッチ
-    #   - 製造業の場合: 従業員規模フィルタ + ペインポイント補完を実施
+    #   gBizINFO エンリッチ・製造業フィルタは下のストリームの先頭段で企業ごとに行う。
     # -----------------------------------------------------------------------
     s1_start = int(time.time() * 1000)
     raw_companies: list[dict[str, Any]] = []
+    source = input_data.get("source", "direct")
+    api_token = input_data.get("gbizinfo_api_token", "")
 
     try:
-        source = input_data.get("source", "direct")
-        api_token = input_data.get("gbizinfo_api_token", "")
-
         if source == "google_sheets":
             sheets = GoogleSheetsConnector(ConnectorConfig(
                 connector_type="google_sheets",
@@ -367,106 +550,7 @@ async def run_outreach_pipeline(
             logger.info(f"直接指定 {len(raw_companies)} 社")
 
         if not raw_companies:
-            s1_out = MicroAgentOutput(
-                agent_name="gbizinfo_enrich",
-                success=False,
-                result={"error": "処理対象企業が0件です"},
-                confidence=0.0,
-                cost_yen=0.0,
-                duration_ms=int(time.time() * 1000) - s1_start,
-            )
-            steps.append(_make_step(1, "gbizinfo_enrich", "gbizinfo_enrich", s1_out))
-            return _fail("gbizinfo_enrich", steps, pipeline_start)
-
-        # gBizINFO エンリッチ（APIトークンがある場合かつ source が gbizinfo_manufacturing 以外）
-        enriched_companies: list[dict[str, Any]] = []
-        enrich_success_count = 0
-
-        if api_token and source != "gbizinfo_manufacturing":
-            gbiz = GBizInfoConnector(ConnectorConfig(
-                connector_type="gbizinfo",
-                company_id=company_id,
-                credentials={"api_token": api_token},
-            ))
-            for company in raw_companies:
-                try:
-                    records = await gbiz.read_records(
-                        "search",
-                        {"name": company.get("name", ""), "limit": 1},
-                    )
-                    if records:
-                        enriched = GBizInfoConnector.map_to_company_data(records[0])
-                        # 元データを上書きせず enriched で補完
-                        merged = {**enriched, **{k: v for k, v in company.items() if v}}
-                        enriched_companies.append(merged)
-                        enrich_success_count += 1
-                    else:
-                        enriched_companies.append(company)
-                except Exception as e:
-                    logger.warning(f"gBizINFO エンリッチ失敗 ({company.get('name')}): {e}")
-                    enriched_companies.append(company)
-        else:
-            enriched_companies = raw_companies
-            if not api_token:
-                logger.info("gbizinfo_api_token 未設定のためエンリッチをスキップ")
-            enrich_success_count = len(raw_companies)
-
-        # ------------------------------------------------------------------
-        # 製造業フィルタ: source="direct" or "google_sheets" の場合に追加適用
-        #   - target_industry=="manufacturing" のとき非製造業企業を除外
-        #   - 製造業フラグを各企業に付与し、後続ステップの context を強化
-        # ------------------------------------------------------------------
-        if is_manufacturing and source in ("direct", "google_sheets"):
-            from workers.connector.gbizinfo import MANUFACTURING_KEYWORDS
-            before_count = len(enriched_companies)
-            filtered: list[dict[str, Any]] = []
-            for c in enriched_companies:
-                industry_text = " ".join([
-                    c.get("industry", ""),
-                    c.get("business_overview", ""),
-                    c.get("name", ""),
-                ])
-                # 業種テキストに製造業キーワードが含まれるか、明示的に製造業が指定されていれば通す
-                if any(kw in industry_text for kw in MANUFACTURING_KEYWORDS) or \
-                        "製造" in c.get("industry", ""):
-                    filtered.append(c)
-                else:
-                    logger.debug(f"製造業フィルタで除外: {c.get('name', '')} (industry={c.get('industry', '')})")
-            enriched_companies = filtered
-            logger.info(
-                f"製造業フィルタ: {before_count}社 → {len(enriched_companies)}社"
-                f"（{before_count - len(enriched_companies)}社除外）"
-            )
-
-        # 製造業ペインポイント補完: company_researcher に渡す前の前処理
-        # business_overview が空の場合などに MANUFACTURING_PAIN_FALLBACK を仮設定する
-        if is_manufacturing:
-            for c in enriched_companies:
-                c["_is_manufacturing_target"] = True
-                # industry が未設定または汎用的な場合に "製造業" を補完
-                if not c.get("industry") or c.get("industry") in ("", "その他"):
-                    c["industry"] = "製造業"
-                # 製造業向けペイン種別ヒントを context に追加（company_researcher が利用）
-                if not c.get("manufacturing_pain_hints"):
-                    c["manufacturing_pain_hints"] = [
-                        p["category"] for p in MANUFACTURING_PAIN_FALLBACK
-                    ]
-
-        enrich_rate = enrich_success_count / len(raw_companies) if raw_companies else 0.0
-        s1_out = MicroAgentOutput(
-            agent_name="gbizinfo_enrich",
-            success=True,
-            result={
-                "company_count": len(enriched_companies),
-                "enrich_success": enrich_success_count,
-                "enrich_rate": round(enrich_rate, 3),
-                "target_industry": target_industry,
-                "manufacturing_filter_applied": is_manufacturing,
-            },
-            confidence=max(0.5, enrich_rate) if api_token else 0.7,
-            cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s1_start,
-        )
+            raise ValueError("処理対象企業が0件です")
 
     except Exception as e:
         logger.error(f"gbizinfo_enrich error: {e}")
@@ -478,111 +562,134 @@ async def run_outreach_pipeline(
             cost_yen=0.0,
             duration_ms=int(time.time() * 1000) - s1_start,
         )
-
-    steps.append(_make_step(1, "gbizinfo_enrich", "gbizinfo_enrich", s1_out))
-    if not s1_out.success:
+        steps.append(_make_step(1, "gbizinfo_enrich", "gbizinfo_enrich", s1_out))
         return _fail("gbizinfo_enrich", steps, pipeline_start)
 
-    context["companies"] = enriched_companies
+    s1_fetch_ms = int(time.time() * 1000) - s1_start
 
     # -----------------------------------------------------------------------
-    # Step 2: company_researcher（ペイン推定・規模判定）
-    #   全企業を並列処理。LLMコスト節約のため asyncio.gather で一括投げ。
+    # Steps 1〜5: 企業単位のストリーミング実行
+    #   enrich → research → LP → compose → send を bounded queue でつなぎ、
+    #   準備できた企業から次の段へ流す（全社の research 完了を待たずに送信が始まる）。
+    #   gBizINFO / LLM / 送信チャネルはプロバイダごとのトークンバケットでペース制御する。
+    #   各段の出力は企業単位でチェックポイントに残し、日次バッチが途中で落ちても
+    #   同日の再実行は完了済みの段（送信済みを含む）を飛ばして続きから処理する。
+    #   特定電子メール法準拠: 送信は1日 DAILY_OUTREACH_LIMIT 件まで。
     # -----------------------------------------------------------------------
-    s2_start = int(time.time() * 1000)
-    try:
-        async def _research_one(company: dict[str, Any]) -> dict[str, Any]:
-            payload: dict[str, Any] = {
-                "name": company.get("name", ""),
-                "industry": company.get("industry", ""),
-                "employee_count": company.get("employee_count"),
-                "business_overview": company.get("business_overview", ""),
-                "raw_html": company.get("raw_html", ""),
-                "job_postings": company.get("job_postings", []),
-            }
-            # 製造業ターゲットの場合: ペイン推定の優先カテゴリを渡す
-            if company.get("_is_manufacturing_target"):
-                payload["pain_focus_categories"] = company.get(
-                    "manufacturing_pain_hints",
-                    [p["category"] for p in MANUFACTURING_PAIN_FALLBACK],
-                )
-                payload["pain_fallback"] = MANUFACTURING_PAIN_FALLBACK
+    dry_run: bool = context["dry_run"]
+    sendgrid_api_key: str = input_data.get("sendgrid_api_key", "")
+    sender_email: str = input_data.get("sender_email", "")
+    sender_name: str = input_data.get("sender_name", "シャチョツー")
+
+    checkpointer = PipelineCheckpointer("marketing/outreach", company_id, _outreach_run_key(input_data))
+    await checkpointer.load()
+    # 送信済み記録は実行のチェックポイントと分け、complete() でも消さない（TTL で失効）。
+    # 企業キーだけで照合するので、上流の出力（件名・本文など）が変わった再実行でも二重送信しない
+    sent_log = PipelineCheckpointer("marketing/outreach/sent", company_id, _send_log_key())
+    await sent_log.load()
+    buckets = _provider_buckets()
+    costs: dict[str, float] = defaultdict(float)
+    counts: dict[str, int] = defaultdict(int)
+    send_state = {"reserved": 0}
+    stop = asyncio.Event()
+
+    gbiz_enricher: GBizInfoConnector | None = None
+    if api_token and source != "gbizinfo_manufacturing":
+        gbiz_enricher = GBizInfoConnector(ConnectorConfig(
+            connector_type="gbizinfo",
+            company_id=company_id,
+            credentials={"api_token": api_token},
+        ))
+    elif not api_token:
+        logger.info("gbizinfo_api_token 未設定のためエンリッチをスキップ")
+
+    async def _resume_or_run(
+        stage: str,
+        company: dict[str, Any],
+        run: Callable[[], Awaitable[tuple[dict[str, Any], float]]],
+    ) -> dict[str, Any]:
+        """完了済みならチェックポイントの出力を返し、未完了なら run() して記録する。"""
+        key = f"{stage}:{_company_key(company)}"
+        saved = await checkpointer.lookup(key, company)
+        if saved is not None:
+            return saved.output
+        output, cost = await run()
+        costs[stage] += cost
+        await checkpointer.record(key, company, {"cost_yen": cost}, output)
+        return output
+
+    async def _enrich(item: tuple[int, dict[str, Any]]) -> tuple[int, dict[str, Any]] | None:
+        index, company = item
+        if gbiz_enricher is None:
+            counts["enrich_success"] += 1
+        else:
+            key = f"enrich:{_company_key(company)}"
+            saved = await checkpointer.lookup(key, company)
+            if saved is not None:
+                enriched, found = saved.output, saved.result.get("enriched", False)
+            else:
+                await buckets["gbizinfo"].acquire()
+                enriched, found = company, False
+                try:
+                    records = await gbiz_enricher.read_records(
+                        "search",
+                        {"name": company.get("name", ""), "limit": 1},
+                    )
+                except Exception as e:
+                    # 失敗は記録しない（再実行時にもう一度引く）
+                    logger.warning(f"gBizINFO エンリッチ失敗 ({company.get('name')}): {e}")
+                else:
+                    if records:
+                        mapped = GBizInfoConnector.map_to_company_data(records[0])
+                        # 元データを上書きせず enriched で補完
+                        enriched, found = {**mapped, **{k: v for k, v in company.items() if v}}, True
+                    await checkpointer.record(key, company, {"enriched": found}, enriched)
+            if found:
+                counts["enrich_success"] += 1
+            company = enriched
+
+        # 製造業フィルタ: source="direct" or "google_sheets" のとき非製造業企業を除外
+        if is_manufacturing and source in ("direct", "google_sheets") and not _is_manufacturing_company(company):
+            logger.debug(f"製造業フィルタで除外: {company.get('name', '')} (industry={company.get('industry', '')})")
+            return None
+        if is_manufacturing:
+            company = _with_manufacturing_hints(company)
+        return index, company
+
+    async def _research(item: tuple[int, dict[str, Any]]) -> tuple[int, dict[str, Any]]:
+        index, company = item
+
+        async def _run() -> tuple[dict[str, Any], float]:
+            await buckets["llm"].acquire()
             out = await run_company_researcher(MicroAgentInput(
                 company_id=company_id,
                 agent_name="company_researcher",
-                payload=payload,
+                payload=_research_payload(company),
                 context=context,
             ))
             return {
-                "company": company,
-                "researcher_out": out,
-            }
-
-        research_results = await asyncio.gather(
-            *[_research_one(c) for c in enriched_companies],
-            return_exceptions=True,
-        )
-
-        researched: list[dict[str, Any]] = []
-        total_research_cost = 0.0
-        success_count = 0
-
-        for res in research_results:
-            if isinstance(res, Exception):
-                logger.warning(f"company_researcher 例外: {res}")
-                continue
-            out: MicroAgentOutput = res["researcher_out"]
-            total_research_cost += out.cost_yen
-            if out.success:
-                success_count += 1
-            researched.append({
-                **res["company"],
+                **company,
                 "pain_points": out.result.get("pain_points", []),
                 "scale": out.result.get("scale", "小規模"),
                 "tone": out.result.get("tone", ""),
                 "industry_tasks": out.result.get("industry_tasks", []),
                 "industry_appeal": out.result.get("industry_appeal", ""),
                 "researcher_success": out.success,
-            })
+            }, out.cost_yen
 
-        s2_confidence = success_count / len(enriched_companies) if enriched_companies else 0.0
-        s2_out = MicroAgentOutput(
-            agent_name="company_researcher",
-            success=bool(researched),
-            result={"researched_count": len(researched), "success_count": success_count},
-            confidence=round(s2_confidence, 3),
-            cost_yen=total_research_cost,
-            duration_ms=int(time.time() * 1000) - s2_start,
-        )
+        researched = await _resume_or_run("research", company, _run)
+        if researched.get("researcher_success"):
+            counts["research_success"] += 1
+        return index, researched
 
-    except Exception as e:
-        logger.error(f"company_researcher batch error: {e}")
-        s2_out = MicroAgentOutput(
-            agent_name="company_researcher",
-            success=False,
-            result={"error": str(e)},
-            confidence=0.0,
-            cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s2_start,
-        )
+    async def _generate_lp(item: tuple[int, dict[str, Any]]) -> tuple[int, dict[str, Any]]:
+        index, company = item
 
-    steps.append(_make_step(2, "company_researcher", "company_researcher", s2_out))
-    if not s2_out.success:
-        return _fail("company_researcher", steps, pipeline_start)
-
-    context["researched"] = researched
-
-    # -----------------------------------------------------------------------
-    # Step 3: lp_generator
-    #   業種×ペインに合わせたカスタム LP 内容を生成。
-    #   generator.py（既存）の "outreach_lp" テンプレートを利用。
-    # -----------------------------------------------------------------------
-    s3_start = int(time.time() * 1000)
-    try:
-        async def _generate_lp_one(company: dict[str, Any]) -> dict[str, Any]:
+        async def _run() -> tuple[dict[str, Any], float]:
             pain_summary = "; ".join(
                 p.get("detail", "") for p in company.get("pain_points", [])[:2]
             )
+            await buckets["llm"].acquire()
             out = await run_document_generator(MicroAgentInput(
                 company_id=company_id,
                 agent_name="lp_generator",
@@ -600,59 +707,14 @@ async def run_outreach_pipeline(
                 },
                 context=context,
             ))
-            return {"company": company, "lp_content": out.result.get("content", ""), "cost_yen": out.cost_yen}
-
-        lp_results = await asyncio.gather(
-            *[_generate_lp_one(c) for c in researched],
-            return_exceptions=True,
-        )
-
-        lp_enriched: list[dict[str, Any]] = []
-        total_lp_cost = 0.0
-
-        for res in lp_results:
-            if isinstance(res, Exception):
-                logger.warning(f"lp_generator 例外: {res}")
-                continue
-            total_lp_cost += res["cost_yen"]
-            lp_enriched.append({
-                **res["company"],
-                "lp_content": res["lp_content"],
-            })
+            return {**company, "lp_content": out.result.get("content", "")}, out.cost_yen
 
-        s3_out = MicroAgentOutput(
-            agent_name="lp_generator",
-            success=bool(lp_enriched),
-            result={"lp_count": len(lp_enriched)},
-            confidence=0.85,
-            cost_yen=total_lp_cost,
-            duration_ms=int(time.time() * 1000) - s3_start,
-        )
-
-    except Exception as e:
-        logger.error(f"lp_generator batch error: {e}")
-        s3_out = MicroAgentOutput(
-            agent_name="lp_generator",
-            success=False,
-            result={"error": str(e)},
-            confidence=0.0,
-            cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s3_start,
-        )
-
-    steps.append(_make_step(3, "lp_generator", "document_generator", s3_out))
-    if not s3_out.success:
-        return _fail("lp_generator", steps, pipeline_start)
+        return index, await _resume_or_run("lp", company, _run)
 
-    context["lp_enriched"] = lp_enriched
+    async def _compose(item: tuple[int, dict[str, Any]]) -> tuple[int, dict[str, Any]]:
+        index, company = item
 
-    # -----------------------------------------------------------------------
-    # Step 4: outreach_composer（パーソナライズメール生成）
-    #   generator.py の "outreach_email" テンプレートで件名＋本文を生成。
-    # -----------------------------------------------------------------------
-    s4_start = int(time.time() * 1000)
-    try:
-        async def _compose_one(company: dict[str, Any]) -> dict[str, Any]:
+        async def _run() -> tuple[dict[str, Any], float]:
             pain_summary = "; ".join(
                 p.get("appeal_message", p.get("detail", ""))
                 for p in company.get("pain_points", [])[:2]
@@ -663,22 +725,7 @@ async def run_outreach_pipeline(
                 company_id, company.get("industry", "")
             )
 
-            # バリアント別プロンプト差異
-            if email_variant == "B":
-                # バリアントB: 実績・事例強調型
-                variant_instruction = (
-                    "メール本文では、具体的な導入事例や数値実績を中心に訴求してください。"
-                )
-            elif email_variant == "C":
-                # バリアントC: 課題解決型（ペイン重視）
-                variant_instruction = (
-                    "メール本文では、企業が抱える具体的な課題（ペイン）から入り、"
-                    "解決策としてシャチョツーを提案してください。"
-                )
-            else:
-                # バリアントA（デフォルト）: 標準型
-                variant_instruction = ""
-
+            await buckets["llm"].acquire()
             out = await run_document_generator(MicroAgentInput(
                 company_id=company_id,
                 agent_name="outreach_composer",
@@ -690,15 +737,14 @@ async def run_outreach_pipeline(
                         "tone": company.get("tone", ""),
                         "pain_summary": pain_summary,
                         "industry_appeal": company.get("industry_appeal", ""),
-                        "sender_name": input_data.get("sender_name", "シャチョツー"),
-                        "variant_instruction": variant_instruction,
+                        "sender_name": sender_name,
+                        "variant_instruction": _variant_instruction(email_variant),
                     },
                     "format": "json",
                 },
                 context=context,
             ))
             # generator は JSON 文字列を返すことがある。パース試行。
-            import json
             content_raw = out.result.get("content", "{}")
             try:
                 email_data = json.loads(content_raw)
@@ -713,158 +759,146 @@ async def run_outreach_pipeline(
                 email_data = {"subject": fallback_subject, "body": content_raw}
 
             return {
-                "company": company,
+                **company,
                 "email_subject": email_data.get("subject", ""),
                 "email_body": email_data.get("body", ""),
                 "email_variant": email_variant,
-                "cost_yen": out.cost_yen,
-            }
-
-        compose_results = await asyncio.gather(
-            *[_compose_one(c) for c in lp_enriched],
-            return_exceptions=True,
-        )
-
-        composed: list[dict[str, Any]] = []
-        total_compose_cost = 0.0
-
-        for res in compose_results:
-            if isinstance(res, Exception):
-                logger.warning(f"outreach_composer 例外: {res}")
-                continue
-            total_compose_cost += res["cost_yen"]
-            composed.append({
-                **res["company"],
-                "email_subject": res["email_subject"],
-                "email_body": res["email_body"],
-                "email_variant": res["email_variant"],
-            })
-
-        s4_out = MicroAgentOutput(
-            agent_name="outreach_composer",
-            success=bool(composed),
-            result={"composed_count": len(composed)},
-            confidence=0.85,
-            cost_yen=total_compose_cost,
-            duration_ms=int(time.time() * 1000) - s4_start,
-        )
-
-    except Exception as e:
-        logger.error(f"outreach_composer batch error: {e}")
-        s4_out = MicroAgentOutput(
-            agent_name="outreach_composer",
-            success=False,
-            result={"error": str(e)},
-            confidence=0.0,
-            cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s4_start,
+            }, out.cost_yen
+
+        return index, await _resume_or_run("compose", company, _run)
+
+    async def _send(
+        item: tuple[int, dict[str, Any]],
+    ) -> tuple[int, dict[str, Any], OutreachRecord] | None:
+        index, company = item
+        company_key = _company_key(company)
+        key = f"send:{company_key}"
+        # dry_run は送信しないので記録もしない
+        saved = None if dry_run else await sent_log.lookup(key, company_key)
+        if saved is not None:
+            send_state["reserved"] += 1
+            return index, company, OutreachRecord(**saved.output)
+        if send_state["reserved"] >= DAILY_OUTREACH_LIMIT:
+            logger.info(f"日次上限 {DAILY_OUTREACH_LIMIT} 件に到達。残件をスキップ。")
+            stop.set()
+            return None
+        # 並行送信でも上限を超えないよう、送信前に枠を確保する（未送信なら返却）
+        send_state["reserved"] += 1
+        record = await _execute_outreach(
+            company,
+            form_connector,
+            buckets,
+            dry_run=dry_run,
+            sendgrid_api_key=sendgrid_api_key,
+            sender_email=sender_email,
+            sender_name=sender_name,
         )
-
-    steps.append(_make_step(4, "outreach_composer", "document_generator", s4_out))
-    if not s4_out.success:
-        return _fail("outreach_composer", steps, pipeline_start)
-
-    context["composed"] = composed
-
-    # -----------------------------------------------------------------------
-    # Step 5: outreach_executor
-    #   フォームあり → Playwright 自動送信
-    #   フォームなし + メール → SendGrid 送信
-    #   dry_run=True のとき実際の送信をスキップ
-    #   特定電子メール法準拠: 1日 DAILY_OUTREACH_LIMIT 件を上限とし、
-    #   企業間に INTER_COMPANY_DELAY_SEC 秒のインターバルを挟む。
-    # -----------------------------------------------------------------------
-    s5_start = int(time.time() * 1000)
-    records: list[OutreachRecord] = []
-    dry_run: bool = context["dry_run"]
-    sendgrid_api_key: str = input_data.get("sendgrid_api_key", "")
-    sender_email: str = input_data.get("sender_email", "")
-    sender_name: str = input_data.get("sender_name", "シャチョツー")
-
+        if not record.sent:
+            send_state["reserved"] -= 1
+        elif not dry_run:
+            await sent_log.record(key, company_key, {"sent": True}, asdict(record))
+        if send_state["reserved"] >= DAILY_OUTREACH_LIMIT:
+            stop.set()
+        return index, company, record
+
+    stages = [
+        Stage("enrich", _enrich, concurrency=OUTREACH_ENRICH_CONCURRENCY),
+        Stage("research", _research, concurrency=OUTREACH_RESEARCH_CONCURRENCY),
+        Stage("lp", _generate_lp, concurrency=OUTREACH_LP_CONCURRENCY),
+        Stage("compose", _compose, concurrency=OUTREACH_COMPOSE_CONCURRENCY),
+    ]
+    send_error: str | None = None
     try:
         form_connector = PlaywrightFormConnector(ConnectorConfig(
             connector_type="playwright_form",
             company_id=company_id,
             credentials={},
         ))
+        stages.append(Stage("send", _send, concurrency=OUTREACH_SEND_CONCURRENCY))
+    except Exception as e:
+        logger.error(f"outreach_executor error: {e}")
+        send_error = str(e)
 
-        sent_count = 0
-        for company in composed:
-            if sent_count >= DAILY_OUTREACH_LIMIT:
-                logger.info(f"日次上限 {DAILY_OUTREACH_LIMIT} 件に到達。残件をスキップ。")
-                break
+    stream = await run_stages(
+        enumerate(raw_companies), stages, queue_size=OUTREACH_STAGE_QUEUE_SIZE, stop=stop,
+    )
+    stats = stream.stats
+    outputs = sorted(stream.outputs, key=lambda o: o[0])
+    if send_error is None:
+        records: list[OutreachRecord] = [o[2] for o in outputs]
+        composed: list[dict[str, Any]] = [o[1] for o in outputs]
+    else:
+        records, composed = [], [o[1] for o in outputs]
+
+    # Step 1 結果
+    company_count = stats["enrich"].emitted
+    enrich_success_count = counts["enrich_success"]
+    enrich_rate = enrich_success_count / len(raw_companies)
+    s1_out = MicroAgentOutput(
+        agent_name="gbizinfo_enrich",
+        success=True,
+        result={
+            "company_count": company_count,
+            "enrich_success": enrich_success_count,
+            "enrich_rate": round(enrich_rate, 3),
+            "target_industry": target_industry,
+            "manufacturing_filter_applied": is_manufacturing,
+        },
+        confidence=max(0.5, enrich_rate) if api_token else 0.7,
+        cost_yen=0.0,
+        duration_ms=s1_fetch_ms + stats["enrich"].duration_ms,
+    )
+    steps.append(_make_step(1, "gbizinfo_enrich", "gbizinfo_enrich", s1_out))
 
-            rec_start = int(time.time() * 1000)
-            method = "skipped"
-            sent = False
-            error_msg: str | None = None
+    # Step 2: company_researcher（ペイン推定・規模判定）
+    researched_count = stats["research"].emitted
+    research_success = counts["research_success"]
+    s2_out = MicroAgentOutput(
+        agent_name="company_researcher",
+        success=bool(researched_count),
+        result={"researched_count": researched_count, "success_count": research_success},
+        confidence=round(research_success / company_count, 3) if company_count else 0.0,
+        cost_yen=costs["research"],
+        duration_ms=stats["research"].duration_ms,
+    )
+    steps.append(_make_step(2, "company_researcher", "company_researcher", s2_out))
+    if not s2_out.success:
+        return _fail("company_researcher", steps, pipeline_start)
 
-            form_url: str = company.get("form_url", "")
-            contact_email: str = company.get("contact_email", "")
+    # Step 3: lp_generator（業種×ペインのカスタム LP。generator.py の "outreach_lp" テンプレート）
+    s3_out = MicroAgentOutput(
+        agent_name="lp_generator",
+        success=bool(stats["lp"].emitted),
+        result={"lp_count": stats["lp"].emitted},
+        confidence=0.85,
+        cost_yen=costs["lp"],
+        duration_ms=stats["lp"].duration_ms,
+    )
+    steps.append(_make_step(3, "lp_generator", "document_generator", s3_out))
+    if not s3_out.success:
+        return _fail("lp_generator", steps, pipeline_start)
 
-            try:
-                if dry_run:
-                    # dry_run: 送信せず成功扱い
-                    method = "form" if form_url else ("email" if contact_email else "skipped")
-                    sent = bool(form_url or contact_email)
-
-                elif form_url:
-                    # Playwright フォーム送信
-                    result = await form_connector.write_record(form_url, {
-                        "company": sender_name,
-                        "name": sender_name,
-                        "email": sender_email,
-                        "message": company["email_body"],
-                        "subject": company.get("email_subject", ""),
-                    })
-                    method = "form"
-                    sent = result.get("status") == "success"
-                    if not sent:
-                        error_msg = result.get("detail", "")
-
-                elif contact_email and sendgrid_api_key:
-                    # SendGrid メール送信
-                    import httpx
-                    resp = await _send_via_sendgrid(
-                        api_key=sendgrid_api_key,
-                        to_email=contact_email,
-                        from_email=sender_email,
-                        from_name=sender_name,
-                        subject=company.get("email_subject", f"【{company.get('industry', '')}向け】シャチョツーご紹介"),
-                        body=company.get("email_body", ""),
-                    )
-                    method = "email"
-                    sent = resp
-                    if not sent:
-                        error_msg = "SendGrid 送信失敗"
-                else:
-                    method = "skipped"
-                    error_msg = "form_url も contact_email も未設定"
+    # Step 4: outreach_composer（パーソナライズメール。"outreach_email" テンプレート）
+    s4_out = MicroAgentOutput(
+        agent_name="outreach_composer",
+        success=bool(stats["compose"].emitted),
+        result={"composed_count": stats["compose"].emitted},
+        confidence=0.85,
+        cost_yen=costs["compose"],
+        duration_ms=stats["compose"].duration_ms,
+    )
+    steps.append(_make_step(4, "outreach_composer", "document_generator", s4_out))
+    if not s4_out.success:
+        return _fail("outreach_composer", steps, pipeline_start)
 
-            except Exception as e:
-                error_msg = str(e)
-                logger.warning(f"アウトリーチ実行エラー ({company.get('name')}): {e}")
-
-            if sent:
-                sent_count += 1
-                # 企業間インターバル（最後の1件はスキップ）
-                if sent_count < min(len(composed), DAILY_OUTREACH_LIMIT):
-                    await asyncio.sleep(INTER_COMPANY_DELAY_SEC)
-
-            records.append(OutreachRecord(
-                company_name=company.get("name", ""),
-                corporate_number=company.get("corporate_number", ""),
-                industry=company.get("industry", ""),
-                outreach_method=method,
-                sent=sent,
-                temperature="unknown",
-                meeting_booked=False,
-                lead_id=None,
-                cost_yen=0.0,
-                duration_ms=int(time.time() * 1000) - rec_start,
-                error=error_msg,
-            ))
+    context["companies"] = composed
+    context["composed"] = composed
 
+    # Step 5: outreach_executor
+    #   フォームあり → Playwright 自動送信 / フォームなし + メール → SendGrid 送信
+    #   dry_run=True のとき実際の送信をスキップ
+    if send_error is None:
+        sent_count = sum(1 for r in records if r.sent)
         s5_out = MicroAgentOutput(
             agent_name="outreach_executor",
             success=True,
@@ -874,22 +908,21 @@ async def run_outreach_pipeline(
                 "form": sum(1 for r in records if r.outreach_method == "form"),
                 "email": sum(1 for r in records if r.outreach_method == "email"),
                 "skipped": sum(1 for r in records if r.outreach_method == "skipped"),
+                "limit_reached": stream.stopped,
                 "dry_run": dry_run,
             },
             confidence=1.0,
             cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s5_start,
+            duration_ms=stats["send"].duration_ms,
         )
-
-    except Exception as e:
-        logger.error(f"outreach_executor error: {e}")
+    else:
         s5_out = MicroAgentOutput(
             agent_name="outreach_executor",
             success=False,
-            result={"error": str(e)},
+            result={"error": send_error},
             confidence=0.0,
             cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s5_start,
+            duration_ms=0,
         )
 
     steps.append(_make_step(5, "outreach_executor", "outreach_executor", s5_out))
@@ -1066,6 +1099,12 @@ async def run_outreach_pipeline(
                         await sheets.mark_failed(row_num, rec.error[:50])
                 except Exception as e:
                     logger.warning(f"Sheets 更新失敗 (row={row_num}): {e}")
+            # 行ごとの更新は values:batchUpdate 1回にまとめて送る
+            try:
+                await sheets.flush()
+            except Exception as e:
+                logger.warning(f"Sheets 一括更新失敗 ({sheets_sync_count}行): {e}")
+                sheets_sync_count = 0
 
         # leads テーブル保存はルーター側で行う（パイプラインはDBに直接触れない設計）
         # final_output に保存用データを詰めて返す。
@@ -1143,8 +1182,10 @@ async def run_outreach_pipeline(
         "leads_payload": leads_payload if s8_out.success else [],
         "followup_actions": s6_out.result.get("followup_actions", []),
         "meeting_info": context.get("meeting_info", {}),
+        "resumed_count": len(checkpointer.resumed_steps) + len(sent_log.resumed_steps),
         "dry_run": dry_run,
     }
+    await checkpointer.complete()
 
     logger.info(
         f"outreach_pipeline complete: "
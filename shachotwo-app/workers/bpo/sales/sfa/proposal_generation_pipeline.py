@@ -17,6 +17,10 @@ Steps:
     Step 7: saas_writer        — SendGrid Email Connector 経由でメール送信
     Step 8: saas_writer        — proposals / opportunities テーブル更新 + Slack 通知
 
+チェックポイント:
+    Step 3（LLM 提案書生成）の成功結果を保存し、後続ステップの失敗やタイムアウトで同じ入力が
+    再実行されたときは再利用する（workers/bpo/engine/checkpoint.py）。
+
 定数/設定:
     CONFIDENCE_WARNING_THRESHOLD: 0.70 未満のステップは warning を記録
     MAX_STORAGE_PATH_LEN: ストレージパス文字数上限
@@ -32,7 +36,8 @@ from datetime import date, timedelta
 from pathlib import Path
 from typing import Any
 
-from llm.client import LLMTask, ModelTier, get_llm_client
+from llm.client import LLMTask, ModelTier, estimate_max_cost_yen, get_llm_client
+from workers.bpo.engine.checkpoint import PipelineCheckpointer
 from llm.prompts.sales_proposal import (
     INDUSTRY_PAIN_POINTS,
     USER_PROPOSAL_TEMPLATE,
@@ -442,6 +447,9 @@ async def run_proposal_generation_pipeline(
         "company_id": company_id,
         "dry_run": dry_run,
     }
+    checkpointer = PipelineCheckpointer(
+        "sales/proposal_generation", company_id, {"input_data": input_data, "dry_run": dry_run},
+    )
 
     # ──────────────────────────────────────────
     # ヘルパー
@@ -650,78 +658,93 @@ async def run_proposal_generation_pipeline(
     # Step 3: document_generator — LLM 提案書 JSON 生成
     # ──────────────────────────────────────────
     s3_start = int(time.time() * 1000)
-    try:
-        from db.pricing import get_all_module_prices
-        llm = get_llm_client()
-        selected_modules: list[str] = (
-            context["opportunity"].get("selected_modules")
-            or input_data.get("selected_modules", ["brain", "bpo_core"])
-        )
-        # DB から最新料金を取得してシステムプロンプトを動的生成
-        db_prices = await get_all_module_prices(company_id)
-        system_prompt = build_proposal_system_prompt(db_prices)
-        pain_points_input = (
-            lead.get("score_reasons")
-            or input_data.get("pain_points", [])
-        )
-        # score_reasons が dict リストの可能性があるため文字列に正規化
-        if pain_points_input and isinstance(pain_points_input[0], dict):
-            pain_points_input = [
-                str(p.get("reason", p.get("description", p)))
-                for p in pain_points_input
-            ]
-
-        user_prompt = build_user_proposal_prompt(
-            company_name=lead.get("company_name", ""),
-            industry=industry,
-            employee_count=lead.get("employee_count") or 30,
-            pain_points=", ".join(pain_points_input) if pain_points_input else "（未入力）",
-            selected_modules=", ".join(selected_modules),
-        )
 
-        llm_response = await llm.generate(LLMTask(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            tier=ModelTier.STANDARD,
-            max_tokens=3000,
-            temperature=0.35,
-            company_id=company_id,
-            task_type="proposal_generation",
-        ))
+    async def _generate_proposal_json() -> MicroAgentOutput:
+        try:
+            from db.pricing import get_all_module_prices
+            llm = get_llm_client()
+            selected_modules: list[str] = (
+                context["opportunity"].get("selected_modules")
+                or input_data.get("selected_modules", ["brain", "bpo_core"])
+            )
+            # DB から最新料金を取得してシステムプロンプトを動的生成
+            db_prices = await get_all_module_prices(company_id)
+            system_prompt = build_proposal_system_prompt(db_prices)
+            pain_points_input = (
+                lead.get("score_reasons")
+                or input_data.get("pain_points", [])
+            )
+            # score_reasons が dict リストの可能性があるため文字列に正規化
+            if pain_points_input and isinstance(pain_points_input[0], dict):
+                pain_points_input = [
+                    str(p.get("reason", p.get("description", p)))
+                    for p in pain_points_input
+                ]
+
+            user_prompt = build_user_proposal_prompt(
+                company_name=lead.get("company_name", ""),
+                industry=industry,
+                employee_count=lead.get("employee_count") or 30,
+                pain_points=", ".join(pain_points_input) if pain_points_input else "（未入力）",
+                selected_modules=", ".join(selected_modules),
+            )
 
-        proposal_json = _parse_llm_json(llm_response.content)
-        s3_out = MicroAgentOutput(
-            agent_name="document_generator",
-            success=True,
-            result={
-                "proposal_json": proposal_json,
-                "tokens_in": llm_response.tokens_in,
-                "tokens_out": llm_response.tokens_out,
-            },
-            confidence=0.85,
-            cost_yen=llm_response.cost_yen,
-            duration_ms=int(time.time() * 1000) - s3_start,
-        )
-    except json.JSONDecodeError as e:
-        logger.error(f"LLM 出力 JSON パース失敗: {e}")
-        s3_out = MicroAgentOutput(
-            agent_name="document_generator",
-            success=False,
-            result={"error": f"JSON parse error: {e}"},
-            confidence=0.0, cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s3_start,
-        )
-    except Exception as e:
-        logger.error(f"document_generator error: {e}")
-        s3_out = MicroAgentOutput(
-            agent_name="document_generator",
-            success=False,
-            result={"error": str(e)},
-            confidence=0.0, cost_yen=0.0,
-            duration_ms=int(time.time() * 1000) - s3_start,
-        )
+            task = LLMTask(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                tier=ModelTier.STANDARD,
+                max_tokens=3000,
+                temperature=0.35,
+                company_id=company_id,
+                task_type="proposal_generation",
+            )
+            # 高コスト呼び出しなので見積額を先に予算確保（並列実行で月間上限を超えない）
+            task.reserve_cost_yen = estimate_max_cost_yen(task)
+            llm_response = await llm.generate(task)
+
+            proposal_json = _parse_llm_json(llm_response.content)
+            return MicroAgentOutput(
+                agent_name="document_generator",
+                success=True,
+                result={
+                    "proposal_json": proposal_json,
+                    "tokens_in": llm_response.tokens_in,
+                    "tokens_out": llm_response.tokens_out,
+                },
+                confidence=0.85,
+                cost_yen=llm_response.cost_yen,
+                duration_ms=int(time.time() * 1000) - s3_start,
+            )
+        except json.JSONDecodeError as e:
+            logger.error(f"LLM 出力 JSON パース失敗: {e}")
+            return MicroAgentOutput(
+                agent_name="document_generator",
+                success=False,
+                result={"error": f"JSON parse error: {e}"},
+                confidence=0.0, cost_yen=0.0,
+                duration_ms=int(time.time() * 1000) - s3_start,
+            )
+        except Exception as e:
+            logger.error(f"document_generator error: {e}")
+            return MicroAgentOutput(
+                agent_name="document_generator",
+                success=False,
+                result={"error": str(e)},
+                confidence=0.0, cost_yen=0.0,
+                duration_ms=int(time.time() * 1000) - s3_start,
+            )
+
+    s3_out = await checkpointer.micro_step(
+        "document_generator",
+        {
+            "lead": context.get("lead"),
+            "opportunity": context.get("opportunity"),
+            "industry": context.get("industry"),
+        },
+        _generate_proposal_json,
+    )
 
     _add_step(3, "document_generator", "document_generator", s3_out)
     if not s3_out.success:
@@ -1134,6 +1157,7 @@ async def run_proposal_generation_pipeline(
         f"{total_duration}ms"
     )
 
+    await checkpointer.complete()
     return ProposalGenerationResult(
         success=True,
         steps=steps,
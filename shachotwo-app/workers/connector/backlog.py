@@ -103,7 +103,7 @@ class BacklogConnector(BaseConnector):
         params = self._with_api_key(filters)
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.base_url}/{resource}",
                     params=params,
@@ -155,7 +155,7 @@ class BacklogConnector(BaseConnector):
         params = {"apiKey": self.api_key}
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.post(
                     f"{self.base_url}/{resource}",
                     params=params,
@@ -179,7 +179,7 @@ class BacklogConnector(BaseConnector):
             False: 接続失敗・サーバーエラー・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.base_url}/projects",
                     params={"apiKey": self.api_key},
@@ -1,7 +1,50 @@
-"""BaseConnector — 全コネクタの抽象基底クラス。"""
+"""BaseConnector — 全コネクタの抽象基底クラスと共通 HTTP ランタイム。
+
+HTTP ランタイム（サブクラスは self.http_client() を使うだけで有効）:
+- 接続プール: プロセス共通・ホスト別の httpx トランスポート（HTTP/2・keep-alive）を使い回す。
+  http_client() が返す AsyncClient を閉じてもプールは閉じないので、
+  呼び出しごとの TCP / TLS ハンドシェイクが発生しない
+- 流量制御: テナント×サービスごとの同時実行数とレート（トークンバケット）。
+  既定値は env CONNECTOR_MAX_CONCURRENCY / CONNECTOR_RATE_PER_SEC、サブクラスの
+  http_concurrency / http_rate_per_sec で上書きできる
+- 再試行: 429 / 502 / 503 / 504 と接続エラーを jitter 付き指数バックオフで再試行する。
+  Retry-After ヘッダーがあればそれに従う。POST / PATCH は 429 と未送信の接続エラーのみ再試行
+- メトリクス: get_connector_metrics() でサービス別の件数・エラー・再試行・レイテンシを返す
+
+    async with self.http_client(timeout=10.0) as client:
+        resp = await client.get(url, headers=self.headers)
+"""
+import asyncio
+import contextlib
+import email.utils
+import logging
+import os
+import random
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Optional
+
+import httpx
+
+from workers.bpo.engine.streaming import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CONNECTOR_MAX_CONCURRENCY = int(os.environ.get("CONNECTOR_MAX_CONCURRENCY", "8"))
+CONNECTOR_RATE_PER_SEC = float(os.environ.get("CONNECTOR_RATE_PER_SEC", "10"))
+CONNECTOR_MAX_RETRIES = int(os.environ.get("CONNECTOR_MAX_RETRIES", "3"))
+CONNECTOR_BACKOFF_BASE_SEC = float(os.environ.get("CONNECTOR_BACKOFF_BASE_SEC", "0.5"))
+CONNECTOR_BACKOFF_MAX_SEC = float(os.environ.get("CONNECTOR_BACKOFF_MAX_SEC", "30"))
+CONNECTOR_HTTP2 = os.environ.get("CONNECTOR_HTTP2", "1").lower() not in ("0", "false", "no")
+CONNECTOR_POOL_MAX_CONNECTIONS = int(os.environ.get("CONNECTOR_POOL_MAX_CONNECTIONS", "20"))
+CONNECTOR_KEEPALIVE_SEC = float(os.environ.get("CONNECTOR_KEEPALIVE_SEC", "60"))
+
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# レイテンシのパーセンタイル計算に使う直近サンプル数
+_LATENCY_SAMPLES = 256
 
 
 @dataclass
@@ -12,10 +55,247 @@ class ConnectorConfig:
     company_id: str = ""
 
 
+# ─── メトリクス ──────────────────────────────────────────────────────────────
+
+
+@dataclass
+class ConnectorStats:
+    """サービス別の HTTP メトリクス（累計）。"""
+    service: str
+    requests: int = 0
+    errors: int = 0          # 接続エラー・最終的な 429 / 5xx
+    retries: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_status: Optional[int] = None
+    last_error: Optional[str] = None
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=_LATENCY_SAMPLES))
+
+
+_connector_stats: dict[str, ConnectorStats] = {}
+
+
+def _stats(service: str) -> ConnectorStats:
+    if service not in _connector_stats:
+        _connector_stats[service] = ConnectorStats(service=service)
+    return _connector_stats[service]
+
+
+def get_connector_metrics() -> dict[str, dict]:
+    """サービス名 → {requests, errors, retries, avg_ms, p95_ms, max_ms, last_status, last_error}。"""
+    out: dict[str, dict] = {}
+    for service, s in _connector_stats.items():
+        samples = sorted(s.latencies_ms)
+        out[service] = {
+            "requests": s.requests,
+            "errors": s.errors,
+            "retries": s.retries,
+            "avg_ms": round(s.total_ms / s.requests, 1) if s.requests else 0.0,
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1) if samples else 0.0,
+            "max_ms": round(s.max_ms, 1),
+            "last_status": s.last_status,
+            "last_error": s.last_error,
+        }
+    return out
+
+
+# ─── 接続プール・流量制御 ────────────────────────────────────────────────────
+
+# httpx / httpcore の接続はイベントループに紐づくので、ループごとに持つ
+_host_transports: dict[tuple[int, str], httpx.AsyncHTTPTransport] = {}
+_limiters: dict[tuple[int, str, str], tuple[Optional[asyncio.Semaphore], TokenBucket]] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _host_transport(url: httpx.URL) -> httpx.AsyncHTTPTransport:
+    key = (id(asyncio.get_running_loop()), f"{url.scheme}://{url.netloc.decode('ascii')}")
+    transport = _host_transports.get(key)
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            http2=CONNECTOR_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=CONNECTOR_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=CONNECTOR_POOL_MAX_CONNECTIONS,
+                keepalive_expiry=CONNECTOR_KEEPALIVE_SEC,
+            ),
+        )
+        _host_transports[key] = transport
+    return transport
+
+
+def _limiter(
+    service: str, tenant: str, concurrency: int, rate_per_sec: float,
+) -> tuple[Optional[asyncio.Semaphore], TokenBucket]:
+    """テナント×サービスの同時実行枠とトークンバケット。concurrency が 0 以下なら枠なし（None）。"""
+    key = (id(asyncio.get_running_loop()), service, tenant)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        semaphore = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+        limiter = (semaphore, TokenBucket(rate_per_sec, burst=max(rate_per_sec, 1.0)))
+        _limiters[key] = limiter
+    return limiter
+
+
+def _retry_after_sec(response: httpx.Response) -> Optional[float]:
+    """Retry-After（秒数 または HTTP-date）を秒で返す。"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_sec(attempt: int) -> float:
+    """full jitter 付き指数バックオフ。"""
+    return random.uniform(0, min(CONNECTOR_BACKOFF_MAX_SEC, CONNECTOR_BACKOFF_BASE_SEC * (2 ** attempt)))
+
+
+class ConnectorTransport(httpx.AsyncBaseTransport):
+    """コネクタ1つ分のトランスポート。流量制御・再試行・メトリクスを挟んで共有プールへ流す。
+
+    aclose() では共有プールを閉じない（AsyncClient を毎回 async with で閉じてよい）。
+    """
+
+    def __init__(
+        self,
+        service: str,
+        tenant: str = "",
+        *,
+        concurrency: int = CONNECTOR_MAX_CONCURRENCY,
+        rate_per_sec: float = CONNECTOR_RATE_PER_SEC,
+        max_retries: int = CONNECTOR_MAX_RETRIES,
+    ) -> None:
+        self.service = service
+        self.tenant = tenant
+        self.concurrency = concurrency
+        self.rate_per_sec = rate_per_sec
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # 再試行で本文を送り直せるよう、先に読み込んでおく
+        await request.aread()
+        semaphore, bucket = _limiter(self.service, self.tenant, self.concurrency, self.rate_per_sec)
+        stats = _stats(self.service)
+        idempotent = request.method in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            async with semaphore or contextlib.nullcontext():
+                await bucket.acquire()
+                started = time.monotonic()
+                try:
+                    response = await _host_transport(request.url).handle_async_request(request)
+                except httpx.TransportError as e:
+                    self._record(stats, started, None, e)
+                    # 接続確立前の失敗は送信されていないのでどのメソッドでも再試行してよい
+                    unsent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                    if attempt < self.max_retries and (idempotent or unsent):
+                        delay = _backoff_sec(attempt)
+                    else:
+                        stats.errors += 1
+                        raise
+                else:
+                    self._record(stats, started, response.status_code, None)
+                    retryable = response.status_code in _RETRY_STATUSES and (
+                        idempotent or response.status_code == 429
+                    )
+                    if not retryable or attempt >= self.max_retries:
+                        if response.status_code in _RETRY_STATUSES or response.status_code >= 500:
+                            stats.errors += 1
+                        return response
+                    retry_after = _retry_after_sec(response)
+                    delay = min(retry_after, CONNECTOR_BACKOFF_MAX_SEC) if retry_after is not None else _backoff_sec(attempt)
+                    await response.aclose()
+            attempt += 1
+            stats.retries += 1
+            logger.info(
+                "connector %s: %s %s を %.2f 秒後に再試行 (%d/%d)",
+                self.service, request.method, request.url.host, delay, attempt, self.max_retries,
+            )
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _record(stats: ConnectorStats, started: float, status: Optional[int], error: Optional[Exception]) -> None:
+        elapsed_ms = (time.monotonic() - started) * 1000
+        stats.requests += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.latencies_ms.append(elapsed_ms)
+        stats.last_status = status
+        if error is not None:
+            stats.last_error = f"{type(error).__name__}: {error}"
+
+    async def aclose(self) -> None:
+        # 共有プールはプロセス終了時（close_connector_pools）に閉じる
+        return None
+
+
+async def close_connector_pools() -> None:
+    """現在のイベントループの共有接続プールを閉じる（シャットダウン時）。"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _host_transports if k[0] == loop_id]:
+        transport = _host_transports.pop(key)
+        try:
+            await transport.aclose()
+        except Exception as e:
+            logger.debug("connector pool close failed (%s): %s", key[1], e)
+
+
+def reset_connector_runtime() -> None:
+    """プール・リミッター・メトリクスを破棄する（テスト用）。"""
+    _host_transports.clear()
+    _limiters.clear()
+    _connector_stats.clear()
+
+
+# ─── BaseConnector ─────────────────────────────────────────────────────────
+
+
 class BaseConnector(ABC):
+    # テナント×サービスあたりの同時リクエスト数・毎秒リクエスト数（0 以下で無制限）
+    http_concurrency: int = CONNECTOR_MAX_CONCURRENCY
+    http_rate_per_sec: float = CONNECTOR_RATE_PER_SEC
+
     def __init__(self, config: ConnectorConfig) -> None:
         self.config = config
 
+    @property
+    def http_service(self) -> str:
+        """メトリクス・流量制御のサービス名。"""
+        return self.config.tool_name or self.config.connector_type or type(self).__name__
+
+    def http_client(
+        self,
+        timeout: float = 10.0,
+        *,
+        max_retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> httpx.AsyncClient:
+        """共有プール・流量制御・再試行付きの AsyncClient。async with で使う。
+
+        max_retries=0 にすると 429 / 5xx をそのまま返す（呼び出し側で流量を調整する場合）。
+        """
+        transport = ConnectorTransport(
+            self.http_service,
+            self.config.company_id,
+            concurrency=self.http_concurrency,
+            rate_per_sec=self.http_rate_per_sec,
+            max_retries=CONNECTOR_MAX_RETRIES if max_retries is None else max_retries,
+        )
+        return httpx.AsyncClient(transport=transport, timeout=timeout, **kwargs)
+
     @abstractmethod
     async def read_records(self, resource: str, filters: dict = {}) -> list[dict]:
         """SaaS からレコードを読み取る。
@@ -2,8 +2,6 @@
 import logging
 from typing import Any
 
-import httpx
-
 from workers.connector.base import BaseConnector, ConnectorConfig
 
 logger = logging.getLogger(__name__)
@@ -58,7 +56,7 @@ class CloudSignConnector(BaseConnector):
         if "per_page" in filters:
             params["per_page"] = filters["per_page"]
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with self.http_client(timeout=15.0) as client:
             resp = await client.get(
                 f"{BASE_URL}/{resource}",
                 params=params,
@@ -77,7 +75,7 @@ class CloudSignConnector(BaseConnector):
         Returns:
             CloudSign API レスポンス dict
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client(timeout=30.0) as client:
             resp = await client.post(
                 f"{BASE_URL}/{resource}",
                 json=data,
@@ -89,7 +87,7 @@ class CloudSignConnector(BaseConnector):
     async def health_check(self) -> bool:
         """CloudSign API への疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     f"{BASE_URL}/documents",
                     params={"per_page": 1},
@@ -111,7 +109,7 @@ class CloudSignConnector(BaseConnector):
         Returns:
             作成されたドキュメント ID
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client(timeout=30.0) as client:
             # ドキュメント作成
             resp = await client.post(
                 f"{BASE_URL}/documents",
@@ -146,7 +144,7 @@ class CloudSignConnector(BaseConnector):
             recipient_name:  署名者名
             organization:    署名者組織名
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client(timeout=30.0) as client:
             # 参加者追加
             await client.post(
                 f"{BASE_URL}/documents/{document_id}/participants",
@@ -172,7 +170,7 @@ class CloudSignConnector(BaseConnector):
         Returns:
             "draft" | "waiting" | "completed" | "rejected" | "unknown"
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.get(
                 f"{BASE_URL}/documents/{document_id}",
                 headers=self._headers,
@@ -186,7 +184,7 @@ class CloudSignConnector(BaseConnector):
         Returns:
             PDF バイナリ
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client(timeout=30.0) as client:
             resp = await client.get(
                 f"{BASE_URL}/documents/{document_id}/pdf",
                 headers=self._headers,
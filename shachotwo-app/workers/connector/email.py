@@ -5,6 +5,8 @@ SendGrid から Gmail API へ置き換え済み。
 - 送信上限: Google Workspace 2,000件/日（メモリ追跡）
 - バースト防止: 送信間隔最低1秒
 - 添付ファイル: base64エンコード（Gmail API 仕様）
+- API 呼び出しは google_runtime のスレッドプールで実行し、受信メール本文の取得は
+  batch エンドポイントでまとめて行う
 """
 import asyncio
 import base64
@@ -21,6 +23,7 @@ from email.mime.text import MIMEText
 from typing import Any
 
 from workers.connector.base import BaseConnector, ConnectorConfig
+from workers.connector.google_runtime import batch_execute, execute_request, get_service, run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -87,23 +90,21 @@ class GmailConnector(BaseConnector):
         delegated_email が指定されている場合は DWD（ドメイン委任）を適用する。
         """
         if self._service is None:
-            from google.oauth2.service_account import Credentials
-            from googleapiclient.discovery import build
-
             creds_path = self.config.credentials.get(
                 "credentials_path",
                 os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json"),
             )
-            creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-
             delegated = self.config.credentials.get(
                 "delegated_email",
                 os.environ.get("GMAIL_DELEGATED_EMAIL", ""),
             )
-            if delegated:
-                creds = creds.with_subject(delegated)
-
-            self._service = build("gmail", "v1", credentials=creds)
+            self._service = get_service(
+                "gmail", "v1",
+                scopes=SCOPES,
+                credentials_path=creds_path,
+                subject=delegated,
+                tenant=self.config.company_id,
+            )
         return self._service
 
     @property
@@ -271,8 +272,8 @@ class GmailConnector(BaseConnector):
             True: 正常接続, False: 接続失敗
         """
         try:
-            service = self._get_service()
-            profile = service.users().getProfile(userId="me").execute()
+            service = await run_blocking(self._get_service)
+            profile = await execute_request(service.users().getProfile(userId="me"))
             logger.debug(
                 "GmailConnector.health_check: emailAddress=%s",
                 profile.get("emailAddress", "unknown"),
@@ -321,11 +322,11 @@ class GmailConnector(BaseConnector):
 
             raw = self._build_message(to, subject, body_html, attachments)
             try:
-                service = self._get_service()
-                result = service.users().messages().send(
+                service = await run_blocking(self._get_service)
+                result = await execute_request(service.users().messages().send(
                     userId="me",
                     body={"raw": raw},
-                ).execute()
+                ))
                 self._send_count += 1
                 self._last_send_time = time.monotonic()
                 logger.info(
@@ -380,11 +381,11 @@ class GmailConnector(BaseConnector):
                 to, subject, body_html, attachments, tracking_url=tracking_url
             )
             try:
-                service = self._get_service()
-                result = service.users().messages().send(
+                service = await run_blocking(self._get_service)
+                result = await execute_request(service.users().messages().send(
                     userId="me",
                     body={"raw": raw},
-                ).execute()
+                ))
                 self._send_count += 1
                 self._last_send_time = time.monotonic()
                 logger.info(
@@ -431,7 +432,7 @@ class GmailConnector(BaseConnector):
         query = " ".join(query_parts) if query_parts else ""
 
         try:
-            service = self._get_service()
+            service = await run_blocking(self._get_service)
             list_params: dict[str, Any] = {
                 "userId": "me",
                 "maxResults": max_results,
@@ -440,25 +441,25 @@ class GmailConnector(BaseConnector):
             if query:
                 list_params["q"] = query
 
-            list_result = service.users().messages().list(**list_params).execute()
+            list_result = await execute_request(service.users().messages().list(**list_params))
             message_refs = list_result.get("messages", [])
 
+            # 本文は batch エンドポイントでまとめて取得（1件ずつの messages.get を避ける）
+            fetched = await batch_execute(service, [
+                service.users().messages().get(userId="me", id=ref["id"], format="full")
+                for ref in message_refs
+            ])
+
             messages: list[dict] = []
-            for ref in message_refs:
-                try:
-                    msg = service.users().messages().get(
-                        userId="me",
-                        id=ref["id"],
-                        format="full",
-                    ).execute()
-                    parsed = self._parse_message(msg)
-                    messages.append(parsed)
-                except Exception as e:
+            for ref, (msg, error) in zip(message_refs, fetched):
+                if error is not None or msg is None:
                     logger.warning(
                         "GmailConnector.fetch_inbound: メッセージ取得失敗 id=%s: %s",
                         ref.get("id"),
-                        e,
+                        error,
                     )
+                    continue
+                messages.append(self._parse_message(msg))
 
             return messages
 
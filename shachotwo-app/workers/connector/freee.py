@@ -1,5 +1,4 @@
 """FreeeConnector — freee API v1 アダプター。"""
-import httpx
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
@@ -39,7 +38,7 @@ class FreeeConnector(BaseConnector):
             レコードの list
         """
         params = {"company_id": self.company_id, **filters}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.get(
                 f"{self.base_url}/{resource}",
                 params=params,
@@ -61,7 +60,7 @@ class FreeeConnector(BaseConnector):
             freee API レスポンス dict
         """
         payload = {"company_id": self.company_id, **data}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.post(
                 f"{self.base_url}/{resource}",
                 json=payload,
@@ -73,7 +72,7 @@ class FreeeConnector(BaseConnector):
     async def health_check(self) -> bool:
         """事業所情報エンドポイントへのアクセスで疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     f"{self.base_url}/companies/{self.company_id}",
                     headers=self.headers,
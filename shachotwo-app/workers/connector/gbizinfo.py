@@ -1,11 +1,16 @@
 """GBizInfoConnector — gBizINFO API コネクタ。法人番号・業種・従業員数・代表者名を取得。"""
 import logging
-import httpx
+import os
+from typing import Iterable
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
 BASE_URL = "https://info.gbiz.go.jp/hojin/v1/hojin"
 
+# 詳細 API の同時リクエスト数と毎秒リクエスト数の上限（クォータに合わせて調整）
+GBIZ_FETCH_CONCURRENCY = int(os.environ.get("GBIZ_FETCH_CONCURRENCY", "8"))
+GBIZ_MAX_RATE_PER_SEC = float(os.environ.get("GBIZ_MAX_RATE_PER_SEC", "8"))
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -37,8 +42,13 @@ class GBizInfoConnector(BaseConnector):
     resource:
         - "search": 企業名検索（filters に name 必須）
         - "{corporate_number}": 法人番号で詳細取得
+
+    大量の詳細取得は fetch_details()（gbizinfo_fetcher の並列・キャッシュ付きエンジン）を使う。
     """
 
+    http_concurrency = GBIZ_FETCH_CONCURRENCY
+    http_rate_per_sec = GBIZ_MAX_RATE_PER_SEC
+
     def __init__(self, config: ConnectorConfig) -> None:
         super().__init__(config)
 
@@ -60,7 +70,7 @@ class GBizInfoConnector(BaseConnector):
         Returns:
             企業情報の list
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             if resource == "search":
                 name = filters.get("name", "")
                 limit = filters.get("limit", 5)
@@ -80,6 +90,18 @@ class GBizInfoConnector(BaseConnector):
                 resp.raise_for_status()
                 return resp.json().get("hojin-infos", [])
 
+    async def fetch_details(self, corporate_numbers: Iterable[str], **kwargs) -> list:
+        """法人番号の詳細をまとめて取得する（429 に応じて流量調整・ローカルキャッシュで差分のみ取得）。
+
+        kwargs は GBizDetailFetcher にそのまま渡す（cache / concurrency / rate_per_sec 等）。
+
+        Returns:
+            DetailResult の list（完了順）
+        """
+        from workers.connector.gbizinfo_fetcher import GBizDetailFetcher
+
+        return await GBizDetailFetcher(self, **kwargs).fetch(corporate_numbers)
+
     async def search_manufacturing_companies(
         self,
         prefecture: str = "",
@@ -112,7 +134,7 @@ class GBizInfoConnector(BaseConnector):
         raw_records: list[dict] = []
         seen_numbers: set[str] = set()
 
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with self.http_client(timeout=15.0) as client:
             for keyword in search_keywords:
                 try:
                     resp = await client.get(
@@ -186,7 +208,7 @@ class GBizInfoConnector(BaseConnector):
     async def health_check(self) -> bool:
         """API疎通確認。検索エンドポイントに軽量リクエストを送る。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     BASE_URL,
                     params={"name": "テスト", "limit": 1},
@@ -0,0 +1,362 @@
+"""gBizINFO 詳細 API の並列取得エンジン（GBizInfoConnector / manufacturing_lead_loader / gbiz_detail_batch 共通）。
+
+- 流量制御: トークンバケット + 上限付き同時実行。429 を受けるとレートを半減して Retry-After だけ全体で待ち、
+  成功が続くと GBIZ_MAX_RATE_PER_SEC まで少しずつ戻す（AIMD）
+- キャッシュ: レスポンス本文を SHA-256 で保存するローカルの内容アドレス型キャッシュ。
+  GBIZ_CACHE_TTL_HOURS 以内の法人番号は API を叩かず、期限切れは ETag / Last-Modified で条件付き再取得する。
+  本文が前回と同じなら changed=False（再実行では変わった分だけ下流へ流せる）
+- 再開: インデックスは追記型 JSONL なので、途中で落ちても取得済みの分はそのまま使える
+
+    fetcher = GBizDetailFetcher(connector)
+    results = await fetcher.fetch(corporate_numbers)
+    changed = [r for r in results if r.changed]
+    fetcher.stats  # fetched / not_modified / cached / throttled ...
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+import httpx
+
+from workers.bpo.engine.streaming import Stage, TokenBucket, run_stages
+from workers.connector.base import _backoff_sec, _retry_after_sec
+from workers.connector.gbizinfo import BASE_URL, GBIZ_FETCH_CONCURRENCY, GBIZ_MAX_RATE_PER_SEC, GBizInfoConnector
+
+logger = logging.getLogger(__name__)
+
+GBIZ_RATE_PER_SEC = float(os.environ.get("GBIZ_RATE_PER_SEC", "4"))
+GBIZ_MIN_RATE_PER_SEC = float(os.environ.get("GBIZ_MIN_RATE_PER_SEC", "0.5"))
+GBIZ_FETCH_MAX_ATTEMPTS = int(os.environ.get("GBIZ_FETCH_MAX_ATTEMPTS", "5"))
+GBIZ_CACHE_DIR = os.environ.get("GBIZ_CACHE_DIR", "data/gbiz_cache")
+GBIZ_CACHE_TTL_HOURS = float(os.environ.get("GBIZ_CACHE_TTL_HOURS", "168"))
+GBIZ_FETCH_TIMEOUT_SEC = float(os.environ.get("GBIZ_FETCH_TIMEOUT_SEC", "30"))
+
+
+# ─── 流量制御 ────────────────────────────────────────────────────────────────
+
+
+class AdaptiveRateLimiter:
+    """429 に合わせて毎秒リクエスト数を増減するリミッター（AIMD）。
+
+    - on_throttle(): レートを半減し、Retry-After（なければ 1/rate 秒）の間は全リクエストを止める。
+      同時に返ってきた 429 でレートが何段も落ちないよう、半減は1秒に1回まで
+    - on_success(): success_window 回連続で成功するたびに increase だけレートを上げる
+    """
+
+    def __init__(
+        self,
+        rate_per_sec: float = GBIZ_RATE_PER_SEC,
+        max_rate_per_sec: float = GBIZ_MAX_RATE_PER_SEC,
+        min_rate_per_sec: float = GBIZ_MIN_RATE_PER_SEC,
+        increase: float = 0.5,
+        success_window: int = 20,
+    ) -> None:
+        self.max_rate_per_sec = max_rate_per_sec
+        self.min_rate_per_sec = min(min_rate_per_sec, rate_per_sec)
+        self.increase = increase
+        self.success_window = success_window
+        self._bucket = TokenBucket(min(rate_per_sec, max_rate_per_sec))
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._successes = 0
+
+    @property
+    def rate_per_sec(self) -> float:
+        return self._bucket.rate_per_sec
+
+    async def acquire(self) -> None:
+        while (wait := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        await self._bucket.acquire()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.success_window:
+            self._successes = 0
+            self._bucket.rate_per_sec = min(self.max_rate_per_sec, self._bucket.rate_per_sec + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        self._successes = 0
+        if now - self._last_decrease >= 1.0:
+            self._last_decrease = now
+            self._bucket.rate_per_sec = max(self.min_rate_per_sec, self._bucket.rate_per_sec / 2)
+        pause = retry_after if retry_after is not None else 1.0 / max(self._bucket.rate_per_sec, 0.01)
+        self._paused_until = max(self._paused_until, now + pause)
+
+
+# ─── キャッシュ ──────────────────────────────────────────────────────────────
+
+
+@dataclass
+class CacheEntry:
+    corporate_number: str
+    sha256: str = ""          # 空 = 404（該当法人なし）
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0   # epoch 秒
+
+    def fresh(self, ttl_sec: float) -> bool:
+        return time.time() - self.fetched_at < ttl_sec
+
+
+class GBizDetailCache:
+    """詳細レスポンスのローカルキャッシュ。
+
+    root/objects/ab/abcd....json に本文を SHA-256 名で保存し（同じ内容は1ファイル）、
+    root/index.jsonl に法人番号 → (sha256, ETag, Last-Modified, 取得時刻) を追記する（後勝ち）。
+    """
+
+    def __init__(self, root: str | Path = GBIZ_CACHE_DIR) -> None:
+        self.root = Path(root)
+        self._index: Optional[dict[str, CacheEntry]] = None
+        self._appended = 0
+        self._torn_tail = False  # 最終行が改行で終わっていない（書き込み途中で落ちた）
+
+    @property
+    def _index_path(self) -> Path:
+        return self.root / "index.jsonl"
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.json"
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        if self._index is None:
+            self._index = {}
+            if self._index_path.exists():
+                with open(self._index_path, encoding="utf-8") as f:
+                    for line in f:
+                        self._torn_tail = not line.endswith("\n")
+                        try:
+                            entry = CacheEntry(**json.loads(line))
+                        except (ValueError, TypeError):
+                            continue  # 書き込み途中で落ちた行
+                        self._index[entry.corporate_number] = entry
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self._load_index())
+
+    def get(self, corporate_number: str) -> Optional[CacheEntry]:
+        return self._load_index().get(corporate_number)
+
+    def load(self, entry: CacheEntry) -> Optional[bytes]:
+        """本文を返す。404 エントリや本文が消えている場合は None。"""
+        if not entry.sha256:
+            return None
+        try:
+            return self._object_path(entry.sha256).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, corporate_number: str, body: bytes, etag: str = "", last_modified: str = "") -> tuple[CacheEntry, bool]:
+        """本文を保存し (エントリ, 前回から変わったか) を返す。"""
+        sha256 = hashlib.sha256(body).hexdigest()
+        previous = self.get(corporate_number)
+        path = self._object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            tmp.replace(path)
+        entry = CacheEntry(corporate_number, sha256, etag, last_modified, time.time())
+        self._append(entry)
+        return entry, previous is None or previous.sha256 != sha256
+
+    def touch(self, entry: CacheEntry, etag: str = "", last_modified: str = "") -> CacheEntry:
+        """304 を受けたエントリの取得時刻（と新しい検証子）を更新する。"""
+        updated = CacheEntry(
+            entry.corporate_number, entry.sha256,
+            etag or entry.etag, last_modified or entry.last_modified, time.time(),
+        )
+        self._append(updated)
+        return updated
+
+    def mark_missing(self, corporate_number: str) -> tuple[CacheEntry, bool]:
+        previous = self.get(corporate_number)
+        entry = CacheEntry(corporate_number, fetched_at=time.time())
+        self._append(entry)
+        return entry, previous is None or bool(previous.sha256)
+
+    def _append(self, entry: CacheEntry) -> None:
+        self._load_index()[entry.corporate_number] = entry
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self._index_path, "a", encoding="utf-8") as f:
+            if self._torn_tail:
+                f.write("\n")
+                self._torn_tail = False
+            f.write(json.dumps(entry.__dict__, ensure_ascii=False) + "\n")
+        self._appended += 1
+
+    def compact(self) -> None:
+        """追記で膨らんだインデックスを最新エントリだけに書き直す。"""
+        index = self._load_index()
+        if not self._appended:
+            return
+        tmp = self._index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in index.values():
+                f.write(json.dumps(entry.__dict__, ensure_ascii=False) + "\n")
+        tmp.replace(self._index_path)
+        self._appended = 0
+
+
+# ─── 取得エンジン ────────────────────────────────────────────────────────────
+
+
+@dataclass
+class DetailResult:
+    corporate_number: str
+    status: str                    # fetched / not_modified / cached / not_found / error
+    record: Optional[dict] = None  # hojin-infos[0]
+    changed: bool = False          # 前回取得時から内容が変わったか（初回取得は True）
+    error: str = ""
+
+
+@dataclass
+class FetchStats:
+    requested: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    cached: int = 0
+    not_found: int = 0
+    errors: int = 0
+    throttled: int = 0             # 受けた 429 の回数
+    final_rate_per_sec: float = 0.0
+    duration_ms: int = 0
+    by_status: dict[str, int] = field(default_factory=dict)
+
+
+def _first_record(body: Optional[bytes]) -> Optional[dict]:
+    if not body:
+        return None
+    try:
+        infos = json.loads(body).get("hojin-infos", [])
+    except (ValueError, AttributeError):
+        return None
+    return infos[0] if infos else None
+
+
+class GBizDetailFetcher:
+    """法人番号の一覧から詳細 API の結果を並列に取得する。"""
+
+    def __init__(
+        self,
+        connector: GBizInfoConnector,
+        cache: Optional[GBizDetailCache] = None,
+        *,
+        concurrency: int = GBIZ_FETCH_CONCURRENCY,
+        rate_per_sec: float = GBIZ_RATE_PER_SEC,
+        max_rate_per_sec: float = GBIZ_MAX_RATE_PER_SEC,
+        max_attempts: int = GBIZ_FETCH_MAX_ATTEMPTS,
+        ttl_hours: float = GBIZ_CACHE_TTL_HOURS,
+    ) -> None:
+        self.connector = connector
+        self.cache = cache if cache is not None else GBizDetailCache()
+        self.concurrency = concurrency
+        self.limiter = AdaptiveRateLimiter(rate_per_sec, max_rate_per_sec)
+        self.max_attempts = max_attempts
+        self.ttl_sec = ttl_hours * 3600
+        self.stats = FetchStats()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def fetch(self, corporate_numbers: Iterable[str]) -> list[DetailResult]:
+        """重複を除いて取得し、DetailResult を完了順に返す。"""
+        numbers = list(dict.fromkeys(cn for cn in corporate_numbers if cn))
+        self.stats = FetchStats(requested=len(numbers))
+        started = time.monotonic()
+        # 429 は自前で扱うので、共有ランタイム側の再試行は切る
+        async with self.connector.http_client(timeout=GBIZ_FETCH_TIMEOUT_SEC, max_retries=0) as client:
+            self._client = client
+            try:
+                graph = await run_stages(
+                    numbers,
+                    [Stage("gbiz_detail", self._fetch_one, concurrency=self.concurrency)],
+                    queue_size=self.concurrency * 2,
+                )
+            finally:
+                self._client = None
+                self.cache.compact()
+        results: list[DetailResult] = graph.outputs
+        for result in results:
+            self.stats.by_status[result.status] = self.stats.by_status.get(result.status, 0) + 1
+        self.stats.fetched = self.stats.by_status.get("fetched", 0)
+        self.stats.not_modified = self.stats.by_status.get("not_modified", 0)
+        self.stats.cached = self.stats.by_status.get("cached", 0)
+        self.stats.not_found = self.stats.by_status.get("not_found", 0)
+        self.stats.errors = self.stats.by_status.get("error", 0)
+        self.stats.final_rate_per_sec = self.limiter.rate_per_sec
+        self.stats.duration_ms = int((time.monotonic() - started) * 1000)
+        logger.info(
+            "gbizinfo_fetcher: %d件 (取得=%d / 未変更=%d / キャッシュ=%d / 該当なし=%d / エラー=%d / 429=%d) "
+            "%.1f秒 最終レート=%.1f/s",
+            self.stats.requested, self.stats.fetched, self.stats.not_modified, self.stats.cached,
+            self.stats.not_found, self.stats.errors, self.stats.throttled,
+            self.stats.duration_ms / 1000, self.stats.final_rate_per_sec,
+        )
+        return results
+
+    async def _fetch_one(self, corporate_number: str) -> DetailResult:
+        entry = self.cache.get(corporate_number)
+        if entry is not None and entry.fresh(self.ttl_sec):
+            if not entry.sha256:
+                return DetailResult(corporate_number, "not_found")
+            body = self.cache.load(entry)
+            if body is not None:
+                return DetailResult(corporate_number, "cached", _first_record(body))
+            entry = None  # 本文が消えていれば取り直す
+
+        headers = dict(self.connector.headers)
+        if entry is not None and entry.sha256:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        error = ""
+        for attempt in range(self.max_attempts):
+            await self.limiter.acquire()
+            try:
+                resp = await self._client.get(f"{BASE_URL}/{corporate_number}", headers=headers)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                await asyncio.sleep(_backoff_sec(attempt))
+                continue
+
+            if resp.status_code == 429:
+                self.stats.throttled += 1
+                self.limiter.on_throttle(_retry_after_sec(resp))
+                error = "HTTP 429"
+                continue
+            if resp.status_code >= 500:
+                error = f"HTTP {resp.status_code}"
+                await asyncio.sleep(_backoff_sec(attempt))
+                continue
+
+            self.limiter.on_success()
+            etag = resp.headers.get("etag", "")
+            last_modified = resp.headers.get("last-modified", "")
+            if resp.status_code == 304 and entry is not None:
+                entry = self.cache.touch(entry, etag, last_modified)
+                return DetailResult(corporate_number, "not_modified", _first_record(self.cache.load(entry)))
+            if resp.status_code == 404:
+                _, changed = self.cache.mark_missing(corporate_number)
+                return DetailResult(corporate_number, "not_found", changed=changed)
+            if resp.status_code != 200:
+                return DetailResult(corporate_number, "error", error=f"HTTP {resp.status_code}")
+
+            record = _first_record(resp.content)
+            if record is None:
+                _, changed = self.cache.mark_missing(corporate_number)
+                return DetailResult(corporate_number, "not_found", changed=changed)
+            _, changed = self.cache.put(corporate_number, resp.content, etag, last_modified)
+            return DetailResult(corporate_number, "fetched", record, changed=changed)
+
+        logger.warning("gbizinfo_fetcher: 取得失敗 %s (%s)", corporate_number, error)
+        return DetailResult(corporate_number, "error", error=error)
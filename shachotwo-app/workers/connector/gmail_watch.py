@@ -6,12 +6,16 @@ Watch の登録/停止/historyId差分取得を担当する。
 Google Pub/Sub 経由で Push 通知を受ける前提:
   トピック: projects/{project_id}/topics/gmail-push
   サービスアカウントに Pub/Sub Publisher 権限が必要。
+
+API 呼び出しは google_runtime 経由（スレッドプール実行・サービスキャッシュ・batch 取得）。
 """
 import base64
 import logging
 import os
 from typing import Any
 
+from workers.connector.google_runtime import batch_execute, execute_request, get_service, run_blocking
+
 logger = logging.getLogger(__name__)
 
 SCOPES = [
@@ -21,17 +25,12 @@ SCOPES = [
 
 def _get_gmail_service(delegated_email: str = ""):
     """Gmail API サービスオブジェクトを取得（Watch専用）。"""
-    from google.oauth2.service_account import Credentials
-    from googleapiclient.discovery import build
-
-    creds_path = os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json")
-    creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-
-    email = delegated_email or os.environ.get("GMAIL_DELEGATED_EMAIL", "")
-    if email:
-        creds = creds.with_subject(email)
-
-    return build("gmail", "v1", credentials=creds)
+    return get_service(
+        "gmail", "v1",
+        scopes=SCOPES,
+        credentials_path=os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json"),
+        subject=delegated_email or os.environ.get("GMAIL_DELEGATED_EMAIL", ""),
+    )
 
 
 async def register_gmail_watch(
@@ -51,14 +50,14 @@ async def register_gmail_watch(
         {"historyId": str, "expiration": str}
         expiration は UNIX ミリ秒（最大7日後）
     """
-    service = _get_gmail_service(delegated_email)
+    service = await run_blocking(_get_gmail_service, delegated_email)
 
     body: dict[str, Any] = {
         "topicName": topic_name,
         "labelIds": label_ids or ["INBOX"],
     }
 
-    result = service.users().watch(userId="me", body=body).execute()
+    result = await execute_request(service.users().watch(userId="me", body=body))
     logger.info(
         "gmail_watch: registered watch historyId=%s expiration=%s",
         result.get("historyId"),
@@ -78,8 +77,8 @@ async def stop_gmail_watch(
     Note: Gmail API の watch 停止は users.stop() で行う。
     channel_id/resource_id は不要（Gmail 固有の仕様）。
     """
-    service = _get_gmail_service(delegated_email)
-    service.users().stop(userId="me").execute()
+    service = await run_blocking(_get_gmail_service, delegated_email)
+    await execute_request(service.users().stop(userId="me"))
     logger.info("gmail_watch: stopped watch")
 
 
@@ -100,15 +99,15 @@ async def process_gmail_notification(
         list[dict] — 各要素:
             {id, threadId, from, to, subject, date, snippet, body_text}
     """
-    service = _get_gmail_service(delegated_email)
+    service = await run_blocking(_get_gmail_service, delegated_email)
 
     try:
-        history_result = service.users().history().list(
+        history_result = await execute_request(service.users().history().list(
             userId="me",
             startHistoryId=history_id,
             historyTypes=["messageAdded"],
             labelId="INBOX",
-        ).execute()
+        ))
     except Exception as e:
         logger.warning("gmail_watch: history.list failed (historyId=%s): %s", history_id, e)
         return []
@@ -123,18 +122,18 @@ async def process_gmail_notification(
             if msg_id:
                 message_ids.add(msg_id)
 
+    ordered_ids = sorted(message_ids)
+    fetched = await batch_execute(service, [
+        service.users().messages().get(userId="me", id=msg_id, format="full")
+        for msg_id in ordered_ids
+    ])
+
     messages: list[dict[str, Any]] = []
-    for msg_id in message_ids:
-        try:
-            msg = service.users().messages().get(
-                userId="me",
-                id=msg_id,
-                format="full",
-            ).execute()
-            parsed = _parse_message(msg)
-            messages.append(parsed)
-        except Exception as e:
-            logger.warning("gmail_watch: message.get failed id=%s: %s", msg_id, e)
+    for msg_id, (msg, error) in zip(ordered_ids, fetched):
+        if error is not None or msg is None:
+            logger.warning("gmail_watch: message.get failed id=%s: %s", msg_id, error)
+            continue
+        messages.append(_parse_message(msg))
 
     logger.info("gmail_watch: processed %d new messages from historyId=%s", len(messages), history_id)
     return messages
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from workers.connector.base import BaseConnector, ConnectorConfig
+from workers.connector.google_runtime import execute_request, get_service, run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -42,25 +43,23 @@ class GoogleCalendarConnector(BaseConnector):
         self._service = None
 
     def _get_service(self):
-        """Calendar API v3 サービスオブジェクトを取得（遅延初期化）。"""
+        """Calendar API v3 サービスオブジェクトを取得（テナント単位でキャッシュ）。"""
         if self._service is None:
-            from google.oauth2.service_account import Credentials
-            from googleapiclient.discovery import build
-
             creds_path = self.config.credentials.get(
                 "credentials_path",
                 os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json"),
             )
-            creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-
             delegated = self.config.credentials.get(
                 "delegated_email",
                 os.environ.get("GOOGLE_CALENDAR_DELEGATED_EMAIL", ""),
             )
-            if delegated:
-                creds = creds.with_subject(delegated)
-
-            self._service = build("calendar", "v3", credentials=creds)
+            self._service = get_service(
+                "calendar", "v3",
+                scopes=SCOPES,
+                credentials_path=creds_path,
+                subject=delegated,
+                tenant=self.config.company_id,
+            )
         return self._service
 
     @property
@@ -73,40 +72,40 @@ class GoogleCalendarConnector(BaseConnector):
 
     async def read_records(self, resource: str, filters: dict = {}) -> list[dict]:
         """Calendar からイベント情報を読み取る。"""
-        service = self._get_service()
+        service = await run_blocking(self._get_service)
 
         if resource == "events":
-            return self._list_events(service, filters)
+            return await run_blocking(self._list_events, service, filters)
         elif resource == "event":
-            return [self._get_event(service, filters)]
+            return [await run_blocking(self._get_event, service, filters)]
         elif resource == "freebusy":
-            return self._get_freebusy(service, filters)
+            return await run_blocking(self._get_freebusy, service, filters)
         else:
             logger.warning("GoogleCalendarConnector.read_records: resource '%s' 未サポート", resource)
             return []
 
     async def write_record(self, resource: str, data: dict) -> dict:
         """Calendar にイベントを作成/更新、またはWatch APIを操作する。"""
-        service = self._get_service()
+        service = await run_blocking(self._get_service)
 
         if resource == "create_event":
-            return self._create_event(service, data)
+            return await run_blocking(self._create_event, service, data)
         elif resource == "update_event":
-            return self._update_event(service, data)
+            return await run_blocking(self._update_event, service, data)
         elif resource == "delete_event":
-            return self._delete_event(service, data)
+            return await run_blocking(self._delete_event, service, data)
         elif resource == "watch":
-            return self._register_watch(service, data)
+            return await run_blocking(self._register_watch, service, data)
         elif resource == "stop_watch":
-            return self._stop_watch(service, data)
+            return await run_blocking(self._stop_watch, service, data)
         else:
             raise ValueError(f"GoogleCalendarConnector: 未知のresource '{resource}'")
 
     async def health_check(self) -> bool:
         """Calendar API 疎通確認。"""
         try:
-            service = self._get_service()
-            service.calendarList().list(maxResults=1).execute()
+            service = await run_blocking(self._get_service)
+            await execute_request(service.calendarList().list(maxResults=1))
             return True
         except Exception as e:
             logger.error("GoogleCalendarConnector.health_check failed: %s", e)
@@ -12,6 +12,7 @@ import os
 from typing import Any
 
 from workers.connector.base import BaseConnector, ConnectorConfig
+from workers.connector.google_runtime import execute_request, get_service, run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -48,25 +49,23 @@ class GoogleDriveConnector(BaseConnector):
         self._service = None
 
     def _get_service(self):
-        """Drive API v3 サービスオブジェクトを取得（遅延初期化）。"""
+        """Drive API v3 サービスオブジェクトを取得（テナント単位でキャッシュ）。"""
         if self._service is None:
-            from google.oauth2.service_account import Credentials
-            from googleapiclient.discovery import build
-
             creds_path = self.config.credentials.get(
                 "credentials_path",
                 os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json"),
             )
-            creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-
             delegated = self.config.credentials.get(
                 "delegated_email",
                 os.environ.get("GOOGLE_DRIVE_DELEGATED_EMAIL", ""),
             )
-            if delegated:
-                creds = creds.with_subject(delegated)
-
-            self._service = build("drive", "v3", credentials=creds)
+            self._service = get_service(
+                "drive", "v3",
+                scopes=SCOPES,
+                credentials_path=creds_path,
+                subject=delegated,
+                tenant=self.config.company_id,
+            )
         return self._service
 
     @property
@@ -91,14 +90,14 @@ class GoogleDriveConnector(BaseConnector):
         resource="content":
             filters: file_id, export_mime_type
         """
-        service = self._get_service()
+        service = await run_blocking(self._get_service)
 
         if resource == "files":
-            return self._list_files(service, filters)
+            return await run_blocking(self._list_files, service, filters)
         elif resource == "file":
-            return [self._get_file_metadata(service, filters)]
+            return [await run_blocking(self._get_file_metadata, service, filters)]
         elif resource == "content":
-            return [self._get_file_content(service, filters)]
+            return [await run_blocking(self._get_file_content, service, filters)]
         else:
             logger.warning("GoogleDriveConnector.read_records: resource '%s' 未サポート", resource)
             return []
@@ -115,24 +114,24 @@ class GoogleDriveConnector(BaseConnector):
         resource="update_metadata":
             data: file_id, name, description
         """
-        service = self._get_service()
+        service = await run_blocking(self._get_service)
 
         if resource == "upload":
-            return self._upload_file(service, data)
+            return await run_blocking(self._upload_file, service, data)
         elif resource == "create_folder":
-            return self._create_folder(service, data)
+            return await run_blocking(self._create_folder, service, data)
         elif resource == "share":
-            return self._share_file(service, data)
+            return await run_blocking(self._share_file, service, data)
         elif resource == "update_metadata":
-            return self._update_metadata(service, data)
+            return await run_blocking(self._update_metadata, service, data)
         else:
             raise ValueError(f"GoogleDriveConnector: 未知のresource '{resource}'")
 
     async def health_check(self) -> bool:
         """Drive API 疎通確認。about.get でストレージ情報を取得。"""
         try:
-            service = self._get_service()
-            service.about().get(fields="storageQuota").execute()
+            service = await run_blocking(self._get_service)
+            await execute_request(service.about().get(fields="storageQuota"))
             return True
         except Exception as e:
             logger.error("GoogleDriveConnector.health_check failed: %s", e)
@@ -155,22 +154,8 @@ class GoogleDriveConnector(BaseConnector):
         Returns:
             {"company": folder_id, "提案書": folder_id, "契約書": folder_id, "議事録": folder_id}
         """
-        service = self._get_service()
-        parent_id = self.root_folder_id
-
-        # 会社フォルダを検索 or 作成
-        company_folder_id = self._find_or_create_folder(
-            service, company_name, parent_id
-        )
-
-        result = {"company": company_folder_id}
-        for subfolder_name in _SALES_SUBFOLDERS:
-            sub_id = self._find_or_create_folder(
-                service, subfolder_name, company_folder_id
-            )
-            result[subfolder_name] = sub_id
-
-        return result
+        service = await run_blocking(self._get_service)
+        return await run_blocking(self._ensure_folder_hierarchy, service, company_name)
 
     async def upload_document(
         self,
@@ -205,6 +190,21 @@ class GoogleDriveConnector(BaseConnector):
     # 内部ヘルパー
     # ------------------------------------------------------------------
 
+    def _ensure_folder_hierarchy(self, service: Any, company_name: str) -> dict[str, str]:
+        # 会社フォルダを検索 or 作成
+        company_folder_id = self._find_or_create_folder(
+            service, company_name, self.root_folder_id
+        )
+
+        result = {"company": company_folder_id}
+        for subfolder_name in _SALES_SUBFOLDERS:
+            sub_id = self._find_or_create_folder(
+                service, subfolder_name, company_folder_id
+            )
+            result[subfolder_name] = sub_id
+
+        return result
+
     def _list_files(self, service: Any, filters: dict) -> list[dict]:
         folder_id = filters.get("folder_id", "")
         mime_type = filters.get("mime_type", "")
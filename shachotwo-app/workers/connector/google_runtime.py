@@ -0,0 +1,250 @@
+"""Google Workspace API の共通ランタイム（Gmail / Sheets / Drive / Calendar / gmail_watch）。
+
+googleapiclient の .execute() は同期 I/O なので、async メソッドから直接呼ぶと
+イベントループ全体が止まる。ここでは以下を共通化する:
+
+- run_blocking / execute_request: 上限付きスレッドプール（GOOGLE_API_MAX_WORKERS）で実行
+- get_service: サービスオブジェクトをテナント×API×認証情報ごとにキャッシュ。
+  ディスカバリ文書と認証情報もプロセス内で1回だけ読む。
+  リクエストごとに専用の Http を作る requestBuilder を使うので、スレッド間で共有してよい
+- batch_execute: 複数リクエストを Google の batch エンドポイントで1往復にまとめる
+- SheetsWriteBuffer: セル書き込みを values:batchUpdate にまとめ、件数または時間で flush
+
+使用例:
+    service = get_service("gmail", "v1", scopes=SCOPES, credentials_path=path, tenant=company_id)
+    listed = await execute_request(service.users().messages().list(userId="me"))
+    results = await batch_execute(service, [service.users().messages().get(userId="me", id=i) for i in ids])
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_API_MAX_WORKERS = int(os.environ.get("GOOGLE_API_MAX_WORKERS", "8"))
+# Gmail は 1 バッチ 100 件まで（推奨 50 件以下）
+GOOGLE_BATCH_MAX = int(os.environ.get("GOOGLE_BATCH_MAX", "50"))
+GOOGLE_SHEETS_BATCH_SIZE = int(os.environ.get("GOOGLE_SHEETS_BATCH_SIZE", "100"))
+GOOGLE_SHEETS_FLUSH_SEC = float(os.environ.get("GOOGLE_SHEETS_FLUSH_SEC", "1.0"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_credentials: dict[tuple, Any] = {}
+_services: dict[tuple, Any] = {}
+
+
+# ─── 実行 ────────────────────────────────────────────────────────────────────
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=GOOGLE_API_MAX_WORKERS, thread_name_prefix="google-api",
+            )
+        return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """同期関数を Google API 用スレッドプールで実行する。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def execute_request(request: Any) -> Any:
+    """googleapiclient の HttpRequest をループ外で execute() する。"""
+    return await run_blocking(request.execute)
+
+
+async def batch_execute(
+    service: Any,
+    requests: Sequence[Any],
+    batch_size: int = GOOGLE_BATCH_MAX,
+) -> list[tuple[Any, Optional[Exception]]]:
+    """requests を batch エンドポイントでまとめて実行し、(レスポンス, 例外) を入力順に返す。
+
+    バッチ自体が失敗した場合は、そのバッチ内で未完了のリクエスト全てに同じ例外を入れる。
+    """
+    results: list[tuple[Any, Optional[Exception]]] = [(None, None)] * len(requests)
+    done: set[int] = set()
+
+    def _callback(request_id: str, response: Any, exception: Optional[Exception]) -> None:
+        index = int(request_id)
+        results[index] = (response, exception)
+        done.add(index)
+
+    for start in range(0, len(requests), max(batch_size, 1)):
+        chunk = requests[start:start + batch_size]
+        batch = service.new_batch_http_request(callback=_callback)
+        for offset, request in enumerate(chunk):
+            batch.add(request, request_id=str(start + offset))
+        try:
+            await run_blocking(batch.execute)
+        except Exception as e:
+            logger.warning("google_runtime: batch execute failed (%d requests): %s", len(chunk), e)
+            for index in range(start, start + len(chunk)):
+                if index not in done:
+                    results[index] = (None, e)
+                    done.add(index)
+        for index in range(start, start + len(chunk)):
+            if index not in done:
+                results[index] = (None, RuntimeError("batch response missing"))
+    return results
+
+
+# ─── サービス・認証情報のキャッシュ ─────────────────────────────────────────────
+
+
+def get_credentials(credentials_path: str, scopes: Sequence[str], subject: str = "") -> Any:
+    """サービスアカウント認証情報（DWD の subject 付き）をキャッシュして返す。"""
+    key = (credentials_path, tuple(scopes), subject)
+    with _lock:
+        creds = _credentials.get(key)
+    if creds is None:
+        from google.oauth2.service_account import Credentials
+
+        creds = Credentials.from_service_account_file(credentials_path, scopes=list(scopes))
+        if subject:
+            creds = creds.with_subject(subject)
+        with _lock:
+            creds = _credentials.setdefault(key, creds)
+    return creds
+
+
+@functools.lru_cache(maxsize=None)
+def _discovery_document(api: str, version: str) -> Optional[str]:
+    """googleapiclient 同梱のディスカバリ文書（なければ None = ネットワーク取得）。"""
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc(api, version)
+
+
+def _request_builder(credentials: Any) -> Callable[..., Any]:
+    """リクエストごとに新しい Http を使う requestBuilder（httplib2.Http はスレッド非安全）。"""
+    import google_auth_httplib2
+    import httplib2
+    from googleapiclient.http import HttpRequest
+
+    def build_request(http: Any, *args: Any, **kwargs: Any) -> Any:
+        authorized = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        return HttpRequest(authorized, *args, **kwargs)
+
+    return build_request
+
+
+def get_service(
+    api: str,
+    version: str,
+    *,
+    scopes: Sequence[str],
+    credentials_path: str,
+    subject: str = "",
+    tenant: str = "",
+) -> Any:
+    """API サービスオブジェクトをテナント×API×認証情報ごとにキャッシュして返す。"""
+    key = (tenant, api, version, credentials_path, tuple(scopes), subject)
+    with _lock:
+        service = _services.get(key)
+    if service is not None:
+        return service
+
+    from googleapiclient.discovery import build, build_from_document
+
+    creds = get_credentials(credentials_path, scopes, subject)
+    kwargs = {"credentials": creds, "requestBuilder": _request_builder(creds)}
+    document = _discovery_document(api, version)
+    if document is None:
+        service = build(api, version, cache_discovery=False, **kwargs)
+    else:
+        service = build_from_document(document, **kwargs)
+    with _lock:
+        return _services.setdefault(key, service)
+
+
+def invalidate_google_clients(tenant: Optional[str] = None) -> None:
+    """キャッシュ済みサービスを破棄する（認証情報の差し替え時）。tenant=None で全件。"""
+    with _lock:
+        if tenant is None:
+            _services.clear()
+            _credentials.clear()
+            return
+        for key in [k for k in _services if k[0] == tenant]:
+            del _services[key]
+
+
+def reset_google_runtime() -> None:
+    """キャッシュとスレッドプールを破棄する（テスト用）。"""
+    global _executor
+    invalidate_google_clients()
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+# ─── Sheets 書き込みバッファ ────────────────────────────────────────────────
+
+
+class SheetsWriteBuffer:
+    """セル書き込みを values:batchUpdate 1回にまとめる。
+
+    add() したレンジは GOOGLE_SHEETS_BATCH_SIZE 件たまるか、最初の add() から
+    GOOGLE_SHEETS_FLUSH_SEC 秒経つと flush される。同じレンジへの書き込みは後勝ち。
+    flush に失敗したデータはバッファに戻す（より新しい値があればそちらを優先）。
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[dict[str, Any]]], Awaitable[Any]],
+        batch_size: int = GOOGLE_SHEETS_BATCH_SIZE,
+        flush_interval_sec: float = GOOGLE_SHEETS_FLUSH_SEC,
+    ) -> None:
+        self._send = send
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self._pending: dict[str, list[list[Any]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def add(self, write_range: str, values: list[list[Any]]) -> None:
+        self._pending.pop(write_range, None)
+        self._pending[write_range] = values
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval_sec)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("google_runtime: sheets batchUpdate failed (%d ranges pending): %s", self.pending, e)
+
+    async def flush(self) -> Any:
+        """溜まっている書き込みを送る。何もなければ None。"""
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        async with self._flush_lock:
+            if not self._pending:
+                return None
+            data, self._pending = self._pending, {}
+            try:
+                return await self._send([{"range": r, "values": v} for r, v in data.items()])
+            except Exception:
+                for write_range, values in data.items():
+                    self._pending.setdefault(write_range, values)
+                raise
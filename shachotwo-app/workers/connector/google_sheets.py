@@ -1,9 +1,16 @@
-"""GoogleSheetsConnector — Google Sheets API コネクタ。読み書き統合。"""
+"""GoogleSheetsConnector — Google Sheets API コネクタ。読み書き統合。
+
+API 呼び出しは google_runtime のスレッドプールで実行する（イベントループを止めない）。
+営業リストの行更新（mark_sent / mark_failed / update_lp_url / update_meeting_request）は
+SheetsWriteBuffer に積み、values:batchUpdate 1回にまとめて書き込む。
+呼び出し側は処理の最後に flush() すること（読み取り前にも自動で flush する）。
+"""
 import logging
 import os
 from typing import Any
 
 from workers.connector.base import BaseConnector, ConnectorConfig
+from workers.connector.google_runtime import SheetsWriteBuffer, execute_request, get_service, run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -31,19 +38,21 @@ class GoogleSheetsConnector(BaseConnector):
     def __init__(self, config: ConnectorConfig) -> None:
         super().__init__(config)
         self._service = None
+        self._writes = SheetsWriteBuffer(self._batch_update)
 
     def _get_service(self):
-        """Google Sheets API サービスオブジェクトを取得（遅延初期化）"""
+        """Google Sheets API サービスオブジェクトを取得（テナント単位でキャッシュ）"""
         if self._service is None:
-            from google.oauth2.service_account import Credentials
-            from googleapiclient.discovery import build
-
             creds_path = self.config.credentials.get(
                 "credentials_path",
                 os.environ.get("GOOGLE_CREDENTIALS_PATH", "credentials.json"),
             )
-            creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-            self._service = build("sheets", "v4", credentials=creds)
+            self._service = get_service(
+                "sheets", "v4",
+                scopes=SCOPES,
+                credentials_path=creds_path,
+                tenant=self.config.company_id,
+            )
         return self._service
 
     @property
@@ -65,11 +74,13 @@ class GoogleSheetsConnector(BaseConnector):
             list[dict] — columns 指定時はカラム名付きdictのリスト。
                          未指定時は {"row_index": i, "values": [...]} 形式
         """
-        service = self._get_service()
-        result = service.spreadsheets().values().get(
+        # 未送信の書き込みを先に反映する（read-your-writes）
+        await self.flush()
+        service = await run_blocking(self._get_service)
+        result = await execute_request(service.spreadsheets().values().get(
             spreadsheetId=self.spreadsheet_id,
             range=resource,
-        ).execute()
+        ))
         rows: list[list[str]] = result.get("values", [])
 
         columns = filters.get("columns")
@@ -99,29 +110,48 @@ class GoogleSheetsConnector(BaseConnector):
         Returns:
             Sheets API のレスポンス dict
         """
-        service = self._get_service()
+        service = await run_blocking(self._get_service)
         write_range = data.get("range", resource)
         values = data.get("values", [])
 
-        result = service.spreadsheets().values().update(
+        return await execute_request(service.spreadsheets().values().update(
             spreadsheetId=self.spreadsheet_id,
             range=write_range,
             valueInputOption="USER_ENTERED",
             body={"values": values},
-        ).execute()
-        return result
+        ))
 
     async def health_check(self) -> bool:
         """スプレッドシートのメタデータ取得で疎通確認。"""
         try:
-            service = self._get_service()
-            service.spreadsheets().get(
+            service = await run_blocking(self._get_service)
+            await execute_request(service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id,
-            ).execute()
+            ))
             return True
         except Exception:
             return False
 
+    # -----------------------------------------------------------------------
+    # バッファ書き込み（values:batchUpdate）
+    # -----------------------------------------------------------------------
+
+    async def _batch_update(self, data: list[dict[str, Any]]) -> dict:
+        service = await run_blocking(self._get_service)
+        return await execute_request(service.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={"valueInputOption": "USER_ENTERED", "data": data},
+        ))
+
+    async def queue_write(self, write_range: str, values: list[list[Any]]) -> dict:
+        """書き込みをバッファに積む（件数・時間で batchUpdate にまとめて flush される）。"""
+        await self._writes.add(write_range, values)
+        return {"range": write_range, "queued": True}
+
+    async def flush(self) -> dict | None:
+        """バッファ済みの書き込みを送る。batchUpdate のレスポンス（なければ None）。"""
+        return await self._writes.flush()
+
     # -----------------------------------------------------------------------
     # 便利メソッド（営業リスト操作ショートカット）
     # -----------------------------------------------------------------------
@@ -141,30 +171,18 @@ class GoogleSheetsConnector(BaseConnector):
 
     async def mark_sent(self, row: int, method: str, timestamp: str) -> dict:
         """送信成功マーク: D列, E列日時, F列送信方法"""
-        return await self.write_record("", {
-            "range": f"営業リスト!D{row}:F{row}",
-            "values": [["OK", timestamp, method]],
-        })
+        return await self.queue_write(f"営業リスト!D{row}:F{row}", [["OK", timestamp, method]])
 
     async def mark_failed(self, row: int, reason: str) -> dict:
         """送信失敗マーク: G列"""
-        return await self.write_record("", {
-            "range": f"営業リスト!G{row}",
-            "values": [[reason]],
-        })
+        return await self.queue_write(f"営業リスト!G{row}", [[reason]])
 
     async def update_lp_url(self, row: int, lp_url: str) -> dict:
         """LP URL記入: H列"""
-        return await self.write_record("", {
-            "range": f"営業リスト!H{row}",
-            "values": [[lp_url]],
-        })
+        return await self.queue_write(f"営業リスト!H{row}", [[lp_url]])
 
     async def update_meeting_request(
         self, row: int, name: str, phone: str, timestamp: str
     ) -> dict:
         """面談希望記録: J列日時, K列担当者名, L列電話番号"""
-        return await self.write_record("", {
-            "range": f"営業リスト!J{row}:L{row}",
-            "values": [[timestamp, name, phone]],
-        })
+        return await self.queue_write(f"営業リスト!J{row}:L{row}", [[timestamp, name, phone]])
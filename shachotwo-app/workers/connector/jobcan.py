@@ -93,7 +93,7 @@ class JobcanConnector(BaseConnector):
         params: dict = {"company_id": self.company_id, **filters}
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/{resource}",
                     params=params,
@@ -144,7 +144,7 @@ class JobcanConnector(BaseConnector):
         payload: dict = {"company_id": self.company_id, **data}
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 if "id" in payload:
                     record_id = payload.pop("id")
                     resp = await client.put(
@@ -175,7 +175,7 @@ class JobcanConnector(BaseConnector):
             False: 接続失敗・サーバーエラー・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/attendance_records",
                     params={"company_id": self.company_id},
@@ -113,7 +113,7 @@ class KingOfTimeConnector(BaseConnector):
         params: dict = {k: v for k, v in filters.items()}
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/{resource}",
                     params=params,
@@ -157,7 +157,7 @@ class KingOfTimeConnector(BaseConnector):
             httpx.HTTPStatusError: その他の HTTP エラー
         """
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 if "id" in data:
                     record_id = data.pop("id")
                     resp = await client.put(
@@ -188,7 +188,7 @@ class KingOfTimeConnector(BaseConnector):
             False: 接続失敗・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/employees",
                     headers=self.headers,
@@ -1,5 +1,4 @@
 """KintoneConnector — kintone REST API v1 アダプター。"""
-import httpx
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
@@ -47,7 +46,7 @@ class KintoneConnector(BaseConnector):
         params: dict = {"app": resource}
         if "query" in filters:
             params["query"] = filters["query"]
-        async with httpx.AsyncClient(timeout=KINTONE_READ_TIMEOUT) as client:
+        async with self.http_client(timeout=KINTONE_READ_TIMEOUT) as client:
             resp = await client.get(
                 f"{self.base_url}/records.json",
                 params=params,
@@ -69,7 +68,7 @@ class KintoneConnector(BaseConnector):
         """
         lim = max(1, min(limit, KINTONE_MAX_LIMIT))
         params: dict = {"app": resource, "query": query, "limit": lim}
-        async with httpx.AsyncClient(timeout=KINTONE_READ_TIMEOUT) as client:
+        async with self.http_client(timeout=KINTONE_READ_TIMEOUT) as client:
             resp = await client.get(
                 f"{self.base_url}/records.json",
                 params=params,
@@ -80,7 +79,7 @@ class KintoneConnector(BaseConnector):
 
     async def list_apps(self) -> list[dict]:
         """GET /k/v1/apps.json — トークンがアクセス可能なアプリ一覧。"""
-        async with httpx.AsyncClient(timeout=KINTONE_READ_TIMEOUT) as client:
+        async with self.http_client(timeout=KINTONE_READ_TIMEOUT) as client:
             resp = await client.get(
                 f"{self.base_url}/apps.json",
                 headers=self.headers,
@@ -102,7 +101,7 @@ class KintoneConnector(BaseConnector):
     async def list_form_fields(self, app_id: str) -> list[dict]:
         """GET /k/v1/app/form/fields.json — フォームフィールド定義をフラット配列で返す。"""
         params = {"app": app_id}
-        async with httpx.AsyncClient(timeout=KINTONE_READ_TIMEOUT) as client:
+        async with self.http_client(timeout=KINTONE_READ_TIMEOUT) as client:
             resp = await client.get(
                 f"{self.base_url}/app/form/fields.json",
                 params=params,
@@ -136,7 +135,7 @@ class KintoneConnector(BaseConnector):
         Returns:
             kintone API レスポンス dict
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             if "id" in data:
                 record_id = data.pop("id")
                 payload = {"app": resource, "id": record_id, "record": data}
@@ -158,7 +157,7 @@ class KintoneConnector(BaseConnector):
     async def health_check(self) -> bool:
         """app.json エンドポイントへのアクセスで疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     f"{self.base_url}/app.json",
                     params={"id": 1},
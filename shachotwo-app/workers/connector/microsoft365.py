@@ -95,7 +95,7 @@ class Microsoft365Connector(BaseConnector):
             httpx.HTTPStatusError: その他の HTTP エラー
         """
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/{resource}",
                     params=filters,
@@ -146,7 +146,7 @@ class Microsoft365Connector(BaseConnector):
             )
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.post(
                     f"{self.BASE_URL}/{resource}",
                     json=data,
@@ -172,7 +172,7 @@ class Microsoft365Connector(BaseConnector):
             False: 接続失敗・サーバーエラー・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/me",
                     headers=self.headers,
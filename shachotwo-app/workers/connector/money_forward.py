@@ -1,5 +1,4 @@
 """MoneyForwardConnector — MoneyForward ME for Business API v3 アダプター。"""
-import httpx
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
@@ -56,7 +55,7 @@ class MoneyForwardConnector(BaseConnector):
         """
         base = self._base_url(resource)
         params = {"office_id": self.office_id, **filters}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.get(
                 f"{base}/{resource}",
                 params=params,
@@ -88,7 +87,7 @@ class MoneyForwardConnector(BaseConnector):
             )
         base = self._base_url(resource)
         payload = {"office_id": self.office_id, **data}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.post(
                 f"{base}/{resource}",
                 json=payload,
@@ -100,7 +99,7 @@ class MoneyForwardConnector(BaseConnector):
     async def health_check(self) -> bool:
         """事業所情報エンドポイントへのアクセスで疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     f"{_INVOICE_BASE}/offices/{self.office_id}",
                     headers=self.headers,
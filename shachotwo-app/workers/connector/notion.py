@@ -92,7 +92,7 @@ class NotionConnector(BaseConnector):
             httpx.HTTPStatusError: その他の HTTP エラー
         """
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 # databases/{id}/query と search は POST で body を渡す
                 resp = await client.post(
                     f"{self.BASE_URL}/{resource}",
@@ -140,7 +140,7 @@ class NotionConnector(BaseConnector):
             )
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.post(
                     f"{self.BASE_URL}/{resource}",
                     json=data,
@@ -163,7 +163,7 @@ class NotionConnector(BaseConnector):
             False: 接続失敗・サーバーエラー・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.BASE_URL}/users/me",
                     headers=self.headers,
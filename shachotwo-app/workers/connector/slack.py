@@ -1,5 +1,4 @@
 """SlackConnector — Slack Web API アダプター。"""
-import httpx
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
@@ -35,7 +34,7 @@ class SlackConnector(BaseConnector):
         Returns:
             レコードの list
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             if resource == "channels":
                 resp = await client.get(
                     f"{self.base_url}/conversations.list",
@@ -70,7 +69,7 @@ class SlackConnector(BaseConnector):
         Returns:
             Slack API レスポンス dict
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.post(
                 f"{self.base_url}/chat.postMessage",
                 json=data,
@@ -82,7 +81,7 @@ class SlackConnector(BaseConnector):
     async def health_check(self) -> bool:
         """auth.test エンドポイントで疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.post(
                     f"{self.base_url}/auth.test",
                     headers=self.headers,
@@ -120,7 +120,7 @@ class SmartHRConnector(BaseConnector):
         params: dict = {k: v for k, v in filters.items()}
 
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.base_url}/{resource}",
                     params=params,
@@ -163,7 +163,7 @@ class SmartHRConnector(BaseConnector):
             httpx.HTTPStatusError: その他の HTTP エラー
         """
         try:
-            async with httpx.AsyncClient(timeout=self._TIMEOUT) as client:
+            async with self.http_client(timeout=self._TIMEOUT) as client:
                 if "id" in data:
                     record_id = data.pop("id")
                     resp = await client.patch(
@@ -194,7 +194,7 @@ class SmartHRConnector(BaseConnector):
             False: 接続失敗・例外発生
         """
         try:
-            async with httpx.AsyncClient(timeout=self._HEALTH_TIMEOUT) as client:
+            async with self.http_client(timeout=self._HEALTH_TIMEOUT) as client:
                 resp = await client.get(
                     f"{self.base_url}/employees",
                     params={"per_page": 1},
@@ -1,5 +1,4 @@
 """YayoiConnector — 弥生会計オンライン API v1 アダプター。"""
-import httpx
 
 from workers.connector.base import BaseConnector, ConnectorConfig
 
@@ -50,7 +49,7 @@ class YayoiConnector(BaseConnector):
                 f"Available: {list(_READABLE_RESOURCES)}"
             )
         params = {"company_id": self.company_id, **filters}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.get(
                 f"{self.base_url}/{resource}",
                 params=params,
@@ -80,7 +79,7 @@ class YayoiConnector(BaseConnector):
                 f"指定されたリソース: {resource}"
             )
         payload = {"company_id": self.company_id, **data}
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self.http_client(timeout=10.0) as client:
             resp = await client.post(
                 f"{self.base_url}/{resource}",
                 json=payload,
@@ -92,7 +91,7 @@ class YayoiConnector(BaseConnector):
     async def health_check(self) -> bool:
         """事業所情報エンドポイントへのアクセスで疎通確認。"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with self.http_client(timeout=5.0) as client:
                 resp = await client.get(
                     f"{self.base_url}/companies/{self.company_id}",
                     headers=self.headers,